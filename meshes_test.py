@@ -47,7 +47,7 @@ class MeshDrawable:
         # self.meshes_path = os.path.join(os.path.dirname(__file__), 'data/box/box-T2F_C3F_V3F.obj')
         # self.meshes_path = os.path.join(os.path.dirname(__file__), 'data/box/box-T2F_N3F_V3F.obj')
 
-        self.meshes = pywavefront.Wavefront(self.meshes_path)
+        self.meshes = pywavefront.Wavefront(self.meshes_path, indexed=True)
 
     def __del__(self):
         #glDeleteBuffers(1, self._vbo)
@@ -79,7 +79,10 @@ class MeshDrawable:
 
     def draw_material(self, screen, material, face=GL_FRONT_AND_BACK, lighting_enabled=True, textures_enabled=True):
         if material.gl_floats is None:
-            material.gl_floats = (GLfloat * len(material.vertices))(*material.vertices)
+            if not isinstance(material.vertices, (list, tuple)):
+                material.gl_floats = (GLfloat * len(material.vertices)).from_buffer(material.vertices)
+            else:
+                material.gl_floats = (GLfloat * len(material.vertices))(*material.vertices)
             material.triangle_count = len(material.vertices) / material.vertex_size
 
         #print(f"{material.triangle_count}, {material.vertex_format} ({vertex_format}): {material.vertices}")
@@ -142,6 +145,13 @@ class MeshDrawable:
         #~ ], dtype=np.float32))
         bufdata.bind()
 
+        index_data = None
+        if material.indices is not None:
+            index_dtype = np.uint16 if material.indices.itemsize == 2 else np.uint32
+            index_data = vbo.VBO(np.frombuffer(material.indices, dtype=index_dtype), target=GL_ELEMENT_ARRAY_BUFFER)
+            # The element buffer binding is stored in the VAO
+            index_data.bind()
+
         if material.vertex_format == 'V3F':
             glEnableVertexAttribArray(0)
             glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 12, ctypes.c_void_p(0))
@@ -163,9 +173,15 @@ class MeshDrawable:
 
         glBindVertexArray(0)
         glBindVertexArray(self._vao)
-        glDrawArrays(GL_TRIANGLES, 0, num_triangles)
+        if index_data is not None:
+            index_type = GL_UNSIGNED_SHORT if material.indices.itemsize == 2 else GL_UNSIGNED_INT
+            glDrawElements(GL_TRIANGLES, len(material.indices), index_type, None)
+        else:
+            glDrawArrays(GL_TRIANGLES, 0, num_triangles)
         bufdata.unbind()
         glBindVertexArray(0)
+        if index_data is not None:
+            index_data.unbind()
 
 
         if _texture is not None:
@@ -3,6 +3,7 @@ from distutils import dirname
 from mgl2d.graphics.quad_drawable import QuadDrawable
 from mgl2d.graphics.shader_program import ShaderProgram
 from mgl2d.graphics.texture import Texture
+from mgl2d.math.rect import Rect
 from mgl2d.math.vector2 import Vector2
 
 
@@ -157,10 +158,18 @@ class Font:
             path = base_dir + '/' + file
             self._page_textures[font_def.size].append(Texture().load_from_file(path))
 
-    def draw_string(self, screen, font_size, string, x, y, scale=1):
+    def draw_string(self, screen, font_size, string, x, y, scale=1, batch=None):
         font = self._font_faces[font_size]
         for char in string:
             c = font.get_char(char)
+            if batch is not None:
+                # The glyphs are drawn when the batch is flushed
+                batch.add(self._page_textures[font_size][c.page_index], x + c.offset_x * scale,
+                          y + c.offset_y * scale, c.width * scale, c.height * scale,
+                          uv_rect=Rect(c.x / font.page_width, c.y / font.page_height,
+                                       c.width / font.page_width, c.height / font.page_height))
+                x += c.advance_x * scale
+                continue
             self._quad.texture = self._page_textures[font_size][c.page_index]
             self._quad.size = Vector2(c.width, c.height) * scale
             self._quad.pos = Vector2(x + c.offset_x * scale, y + c.offset_y * scale)
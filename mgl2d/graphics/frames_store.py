@@ -4,6 +4,7 @@ import os
 from collections import OrderedDict
 
 from mgl2d.graphics.texture import Texture
+from mgl2d.graphics.texture_atlas import AtlasRegion
 from mgl2d.math.rect import Rect
 from mgl2d.math.vector2 import Vector2
 
@@ -23,7 +24,9 @@ class FramesStore:
         self.animations = {}
         self.animation_fps = self.DEFAULT_FPS
 
-    def load(self, path, file_name):
+    def load(self, path, file_name, atlas=None):
+        # With an atlas the images are only added to it, the caller builds the atlas and creates its
+        # textures once all the stores are loaded
         logger.info("Loading '%s/%s'" % (path, file_name))
 
         json_data = open(os.path.join(path, file_name))
@@ -45,6 +48,10 @@ class FramesStore:
                 animation_data['clone_of'] = clone_of
             self.animations[animation_name] = Animation(animation_data, animation_name)
 
+        if atlas is not None:
+            self._add_frames_to_atlas(path, data['frames'], atlas)
+            return
+
         # Load images and frames
         for frame_name in data['frames']:
             frame = data['frames'][frame_name]
@@ -53,6 +60,15 @@ class FramesStore:
                     os.path.join(path, frame['image_file']))
                 self.frames[frame_name] = Frame(frame, frame_name)
 
+    def _add_frames_to_atlas(self, path, frames, atlas):
+        for frame_name in frames:
+            frame = frames[frame_name]
+            if not frame['image_file'] in self.images:
+                image_path = os.path.join(path, frame['image_file'])
+                self.images[frame['image_file']] = atlas.add_file(image_path, image_path)
+            frame['image'] = self.images[frame['image_file']]
+            self.frames[frame_name] = Frame(frame, frame_name)
+
     def get_frame(self, frame_name):
         return self.frames[frame_name]
 
@@ -119,6 +135,14 @@ class Frame:
         else:
             self.hit_box = Rect(0, 0, 0, 0)
 
+    @property
+    def uv_rect(self):
+        # Area of the frame in texture coordinates of its image, or of the atlas page holding it
+        if isinstance(self.image, AtlasRegion):
+            return self.image.get_uv_rect(self.rect)
+        return Rect(self.rect.x / self.image.width, self.rect.y / self.image.height,
+                    self.rect.w / self.image.width, self.rect.h / self.image.height)
+
     def to_dictionary(self):
         d = OrderedDict()
 
@@ -2,10 +2,25 @@ import numpy as np
 from OpenGL.GL import *
 
 from mgl2d.graphics.shader_program import ShaderProgram
+from mgl2d.graphics.texture_atlas import AtlasRegion
 from mgl2d.math.matrix4 import Matrix4
+from mgl2d.math.transform2d import Transform2D
 from mgl2d.math.vector2 import Vector2
 
 
+# Texture coordinates of the corners of the quad, in the order of the vertex buffer
+QUAD_UVS = np.array([0, 0, 0, 1, 1, 1, 1, 0], dtype=np.float32)
+
+
+def texture_coordinates(texture):
+    # Atlas regions only cover part of their page
+    if not isinstance(texture, AtlasRegion):
+        return QUAD_UVS
+    uv_rect = texture.uv_rect
+    uvs = QUAD_UVS.reshape(-1, 2) * (uv_rect.w, uv_rect.h) + (uv_rect.x, uv_rect.y)
+    return uvs.astype(np.float32).ravel()
+
+
 class QuadDrawable:
     _default_shader = None
 
@@ -26,14 +41,7 @@ class QuadDrawable:
         self._texture = None
         self._shader = None
 
-        self._m_translation = None
-        self._m_size = None
-        self._m_rotation = None
-        self._m_scale = None
-        self._m_anchor = None
-        self._m_transform = None
-        self._is_transform_invalid = True
-        self._rebuild_matrices()
+        self._transform = Transform2D(pos_x, pos_y, size_x, size_y, 0, 0, scale_x, scale_y, angle)
 
         self._vao = glGenVertexArrays(1)
         glBindVertexArray(self._vao)
@@ -49,10 +57,10 @@ class QuadDrawable:
         # Texture coordinates
         self._vbo_uvs = glGenBuffers(1)
         glBindBuffer(GL_ARRAY_BUFFER, self._vbo_uvs)
-        self._texture_coordinates = np.array([0, 0, 0, 1, 1, 1, 1, 0], dtype=np.int16)
+        self._texture_coordinates = QUAD_UVS
         glBufferData(GL_ARRAY_BUFFER, self._texture_coordinates.nbytes, self._texture_coordinates, GL_STATIC_DRAW)
         glEnableVertexAttribArray(1)
-        glVertexAttribPointer(1, 2, GL_UNSIGNED_SHORT, GL_FALSE, 0, None)
+        glVertexAttribPointer(1, 2, GL_FLOAT, GL_FALSE, 0, None)
 
         glBindVertexArray(0)
         if self._default_shader is None:
@@ -63,7 +71,7 @@ class QuadDrawable:
         self.size = Vector2(self._texture.width, self._texture.height)
 
     def invalidate_matrices(self):
-        self._is_transform_invalid = True
+        self._transform.invalidate()
 
     def anchor_to_center(self):
         self.anchor = self.size / 2
@@ -98,8 +106,7 @@ class QuadDrawable:
     @pos.setter
     def pos(self, value):
         self._pos = value
-        self._m_translation = Matrix4.translate(self._pos.x, self._pos.y, 0)
-        self._is_transform_invalid = True
+        self._transform.set_position(value.x, value.y)
 
     @property
     def anchor(self):
@@ -108,8 +115,7 @@ class QuadDrawable:
     @anchor.setter
     def anchor(self, vector2):
         self._anchor = vector2
-        self._m_anchor = Matrix4.translate(-self._anchor.x, -self._anchor.y, 0)
-        self._is_transform_invalid = True
+        self._transform.set_anchor(vector2.x, vector2.y)
 
     @property
     def size(self):
@@ -118,8 +124,7 @@ class QuadDrawable:
     @size.setter
     def size(self, value):
         self._size = value
-        self._m_size = Matrix4.scale(self._size.x, self._size.y, 1)
-        self._is_transform_invalid = True
+        self._transform.set_size(value.x, value.y)
 
     @property
     def angle(self):
@@ -128,8 +133,7 @@ class QuadDrawable:
     @angle.setter
     def angle(self, value):
         self._angle = value
-        self._m_rotation = Matrix4.rotate_z(self._angle)
-        self._is_transform_invalid = True
+        self._transform.set_angle(value)
 
     @property
     def flip_x(self):
@@ -158,8 +162,7 @@ class QuadDrawable:
         self._scale = value
         flip_x = -1 if self._flip_x else 1
         flip_y = -1 if self._flip_y else 1
-        self._m_scale = Matrix4.scale(self._scale.x * flip_x, self._scale.y * flip_y, 1)
-        self._is_transform_invalid = True
+        self._transform.set_scale(self._scale.x * flip_x, self._scale.y * flip_y)
 
     @property
     def texture(self):
@@ -168,6 +171,12 @@ class QuadDrawable:
     @texture.setter
     def texture(self, texture):
         self._texture = texture
+        uvs = texture_coordinates(texture)
+        if not np.array_equal(uvs, self._texture_coordinates):
+            self._texture_coordinates = uvs
+            glBindBuffer(GL_ARRAY_BUFFER, self._vbo_uvs)
+            glBufferSubData(GL_ARRAY_BUFFER, 0, uvs.nbytes, uvs)
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
 
     @property
     def shader(self):
@@ -177,35 +186,26 @@ class QuadDrawable:
     def shader(self, shader):
         self._shader = shader
 
+    # The matrices of the single components are only built when requested, the transform matrix doesn't use them
     @property
     def translation_matrix(self):
-        return self._m_translation
+        return Matrix4.translate(self._pos.x, self._pos.y, 0)
 
     @property
     def rotation_matrix(self):
-        return self._m_rotation
+        return Matrix4.rotate_z(self._angle)
 
     @property
     def scaling_matrix(self):
-        return self._m_scale
+        flip_x = -1 if self._flip_x else 1
+        flip_y = -1 if self._flip_y else 1
+        return Matrix4.scale(self._scale.x * flip_x, self._scale.y * flip_y, 1)
 
     @property
     def transform_matrix(self):
-        if self._is_transform_invalid:
-            self._compute_transform()
-        return self._m_transform
+        return self._transform.matrix
 
     # Private methods
-    def _rebuild_matrices(self):
-        self._m_translation = Matrix4.translate(self._pos.x, self._pos.y, 0)
-        self._m_size = Matrix4.scale(self._size.x, self._size.y, 1)
-        self._m_anchor = Matrix4.translate(-self._anchor.x, -self._anchor.y, 0)
-        self._m_rotation = Matrix4.rotate_z(self._angle)
-        self._m_scale = Matrix4.scale(self._scale.x, self._scale.y, 1)
-
-    def _compute_transform(self):
-        self._m_transform = self._m_translation * self._m_rotation * self._m_scale * self._m_anchor * self._m_size
-        self._is_transform_invalid = False
 
     def _setup_default_shader(self):
         vertex_shader = """
@@ -31,10 +31,16 @@ class Sprite:
         # Drawing
         self._drawable = QuadDrawable()
 
-    def draw(self, screen):
+    def draw(self, screen, batch=None):
         if self._frame is None:
             return
 
+        if batch is not None:
+            # The quad is drawn when the batch is flushed
+            batch.add_frame(self._frame, self._x, self._y, self._scale.x, self._scale.y, self._angle,
+                            flip_x=self._drawable.flip_x, flip_y=self._drawable.flip_y)
+            return
+
         self._drawable.pos = Vector2(self._x, self._y)  # - camera.offset.x, self._y - camera.offset.y)
         self._drawable.draw(screen)
 
@@ -0,0 +1,270 @@
+import ctypes
+
+import numpy as np
+from OpenGL.GL import *
+
+from mgl2d.graphics.shader_program import ShaderProgram
+from mgl2d.graphics.texture_atlas import AtlasRegion
+from mgl2d.math.rect import Rect
+
+# Columns of the quads array
+QUAD_X, QUAD_Y, QUAD_W, QUAD_H, QUAD_ANCHOR_X, QUAD_ANCHOR_Y, QUAD_ANGLE, \
+    QUAD_U, QUAD_V, QUAD_UW, QUAD_VH, QUAD_R, QUAD_G, QUAD_B, QUAD_A = range(15)
+QUAD_COLUMNS = 15
+
+# Vertex layout: position (2), uv (2), color (4)
+VERTEX_SIZE = 8
+
+# Corners in the same order as QuadDrawable, drawn as two triangles
+_CORNERS = np.array([[0, 0], [0, 1], [1, 1], [1, 0]], dtype=np.float32)
+_QUAD_INDICES = np.array([0, 1, 2, 0, 2, 3], dtype=np.uint32)
+
+
+def build_quad_vertices(quads, out=None):
+    """Computes the 4 vertices of each quad, returns an array of shape (len(quads) * 4, VERTEX_SIZE).
+
+    Each vertex is the corner scaled by the size, moved by -anchor, rotated by angle and moved
+    to the position, as QuadDrawable's model matrix does.
+    """
+    n = len(quads)
+    if out is None:
+        out = np.empty((n * 4, VERTEX_SIZE), dtype=np.float32)
+    vertices = out[:n * 4].reshape(n, 4, VERTEX_SIZE)
+
+    local_x = _CORNERS[:, 0] * quads[:, QUAD_W, None] - quads[:, QUAD_ANCHOR_X, None]
+    local_y = _CORNERS[:, 1] * quads[:, QUAD_H, None] - quads[:, QUAD_ANCHOR_Y, None]
+    cos = np.cos(quads[:, QUAD_ANGLE, None])
+    sin = np.sin(quads[:, QUAD_ANGLE, None])
+    vertices[:, :, 0] = quads[:, QUAD_X, None] + local_x * cos - local_y * sin
+    vertices[:, :, 1] = quads[:, QUAD_Y, None] + local_x * sin + local_y * cos
+    vertices[:, :, 2] = quads[:, QUAD_U, None] + _CORNERS[:, 0] * quads[:, QUAD_UW, None]
+    vertices[:, :, 3] = quads[:, QUAD_V, None] + _CORNERS[:, 1] * quads[:, QUAD_VH, None]
+    vertices[:, :, 4:8] = quads[:, None, QUAD_R:QUAD_A + 1]
+    return out[:n * 4]
+
+
+def build_quad_indices(num_quads):
+    return (_QUAD_INDICES + (np.arange(num_quads, dtype=np.uint32) * 4)[:, None]).ravel()
+
+
+def find_runs(keys):
+    """Splits a sorted array of keys in runs of equal keys, returns a list of (key, start, count)."""
+    if len(keys) == 0:
+        return []
+    starts = np.concatenate(([0], np.flatnonzero(keys[1:] != keys[:-1]) + 1))
+    counts = np.diff(np.concatenate((starts, [len(keys)])))
+    return [(keys[start], start, count) for start, count in zip(starts.tolist(), counts.tolist())]
+
+
+class SpriteBatch:
+    """Collects textured quads and draws them with one draw call per texture and shader.
+
+    The quads are stored in a NumPy array and turned into vertices all at once when the batch
+    is flushed. With sort enabled the quads are grouped by shader and texture, keeping the order
+    in which they were added inside each group, which changes the overlapping order of quads
+    using different textures.
+
+        batch.begin()
+        for sprite in sprites:
+            batch.add(sprite.texture, sprite.x, sprite.y, sprite.width, sprite.height)
+        batch.end(screen)
+    """
+    _default_shader = None
+
+    def __init__(self, capacity=1024, sort=True):
+        self.sort = sort
+        self._quads = np.zeros((capacity, QUAD_COLUMNS), dtype=np.float32)
+        self._keys = np.zeros(capacity, dtype=np.int32)
+        self._count = 0
+        # (shader, texture) of every key used since begin()
+        self._groups = []
+        self._group_ids = {}
+        self._vertices = np.empty((capacity * 4, VERTEX_SIZE), dtype=np.float32)
+
+        # Statistics of the last flush
+        self.draw_calls = 0
+        self.quads_drawn = 0
+
+        # GL objects are created at the first flush
+        self._vao = None
+        self._vbo = None
+        self._ibo = None
+        self._vbo_size = 0
+        self._ibo_quads = 0
+        self.shader = None
+
+    def __len__(self):
+        return self._count
+
+    def begin(self):
+        self._count = 0
+        self._groups = []
+        self._group_ids = {}
+
+    def add(self, texture, x, y, width, height, anchor_x=0, anchor_y=0, angle=0, uv_rect=None,
+            color=None, flip_x=False, flip_y=False, shader=None):
+        # uv_rect is in texture coordinates of the texture, or of the source image for atlas regions.
+        # Flipping mirrors the quad around the anchor, as QuadDrawable does.
+        u, v, uw, vh = (0, 0, 1, 1) if uv_rect is None else (uv_rect.x, uv_rect.y, uv_rect.w, uv_rect.h)
+        if isinstance(texture, AtlasRegion):
+            region_uv = texture.uv_rect
+            u = region_uv.x + u * region_uv.w
+            v = region_uv.y + v * region_uv.h
+            uw *= region_uv.w
+            vh *= region_uv.h
+            texture = texture.texture
+        if flip_x:
+            width, anchor_x = -width, -anchor_x
+        if flip_y:
+            height, anchor_y = -height, -anchor_y
+        r, g, b, a = (1, 1, 1, 1) if color is None else (color.r, color.g, color.b, color.a)
+
+        key = self._group_ids.get((shader, texture))
+        if key is None:
+            key = self._group_ids[(shader, texture)] = len(self._groups)
+            self._groups.append((shader, texture))
+
+        if self._count == len(self._quads):
+            self._grow()
+        self._quads[self._count] = (x, y, width, height, anchor_x, anchor_y, angle, u, v, uw, vh, r, g, b, a)
+        self._keys[self._count] = key
+        self._count += 1
+
+    def add_frame(self, frame, x, y, scale_x=1, scale_y=1, angle=0, color=None, flip_x=False, flip_y=False,
+                  shader=None):
+        # Adds a FramesStore frame anchored at its anchor point
+        image = frame.image
+        rect = frame.rect
+        uv_rect = Rect(rect.x / image.width, rect.y / image.height, rect.w / image.width, rect.h / image.height)
+        self.add(image, x, y, rect.w * scale_x, rect.h * scale_y, frame.anchor.x * scale_x, frame.anchor.y * scale_y,
+                 angle, uv_rect, color, flip_x, flip_y, shader)
+
+    def end(self, screen):
+        self.flush(screen)
+
+    def get_runs(self):
+        """Returns the quads in drawing order and a list of (shader, texture, start, count) runs."""
+        quads = self._quads[:self._count]
+        keys = self._keys[:self._count]
+        if self.sort and len(self._groups) > 1:
+            order = np.argsort(keys, kind='stable')
+            quads = quads[order]
+            keys = keys[order]
+        runs = [self._groups[key] + (start, count) for key, start, count in find_runs(keys)]
+        return quads, runs
+
+    def build_vertices(self):
+        quads, runs = self.get_runs()
+        return build_quad_vertices(quads, self._vertices), runs
+
+    def flush(self, screen):
+        self.draw_calls = 0
+        self.quads_drawn = self._count
+        if self._count == 0:
+            return
+
+        vertices, runs = self.build_vertices()
+        self._upload(vertices)
+
+        glBindVertexArray(self._vao)
+        current_shader = None
+        for shader, texture, start, count in runs:
+            shader = shader or self.shader or self._default_shader
+            if shader is not current_shader:
+                shader.bind()
+                shader.set_uniform_matrix4('projection', screen.projection_matrix.m)
+                current_shader = shader
+            if texture is not None:
+                texture.bind()
+            glDrawElements(GL_TRIANGLES, count * 6, GL_UNSIGNED_INT, ctypes.c_void_p(start * 6 * 4))
+            self.draw_calls += 1
+        glBindVertexArray(0)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        current_shader.unbind()
+
+        self.begin()
+
+    # Private methods
+    def _grow(self):
+        capacity = len(self._quads) * 2
+        self._quads = np.resize(self._quads, (capacity, QUAD_COLUMNS))
+        self._keys = np.resize(self._keys, capacity)
+        self._vertices = np.empty((capacity * 4, VERTEX_SIZE), dtype=np.float32)
+
+    def _upload(self, vertices):
+        if self._vao is None:
+            self._setup_buffers()
+
+        glBindVertexArray(self._vao)
+        glBindBuffer(GL_ARRAY_BUFFER, self._vbo)
+        if vertices.nbytes > self._vbo_size:
+            self._vbo_size = self._vertices.nbytes
+            glBufferData(GL_ARRAY_BUFFER, self._vbo_size, None, GL_DYNAMIC_DRAW)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, vertices.nbytes, vertices)
+
+        num_quads = len(vertices) // 4
+        if num_quads > self._ibo_quads:
+            self._ibo_quads = len(self._quads)
+            indices = build_quad_indices(self._ibo_quads)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self._ibo)
+            glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+        glBindVertexArray(0)
+
+    def _setup_buffers(self):
+        self._vao = glGenVertexArrays(1)
+        glBindVertexArray(self._vao)
+
+        self._vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self._vbo)
+        stride = VERTEX_SIZE * 4
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 2, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(0))
+        glEnableVertexAttribArray(1)
+        glVertexAttribPointer(1, 2, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(2 * 4))
+        glEnableVertexAttribArray(2)
+        glVertexAttribPointer(2, 4, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(4 * 4))
+
+        # The element buffer binding is stored in the VAO
+        self._ibo = glGenBuffers(1)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self._ibo)
+        glBindVertexArray(0)
+
+        if SpriteBatch._default_shader is None:
+            SpriteBatch._setup_default_shader()
+
+    @classmethod
+    def _setup_default_shader(cls):
+        vertex_shader = """
+        #version 330 core
+
+        uniform mat4 projection;
+
+        layout(location=0) in vec2 vertex;
+        layout(location=1) in vec2 uv;
+        layout(location=2) in vec4 color;
+
+        out vec2 uv_out;
+        out vec4 color_out;
+
+        void main() {
+            gl_Position = projection * vec4(vertex, 0, 1);
+            uv_out = uv;
+            color_out = color;
+        }
+        """
+
+        fragment_shader = """
+        #version 330 core
+
+        in vec2 uv_out;
+        in vec4 color_out;
+        out vec4 color;
+
+        uniform sampler2D tex;
+
+        void main() {
+            color = texture(tex, uv_out) * color_out;
+        }
+        """
+
+        cls._default_shader = ShaderProgram.from_sources(vert_source=vertex_shader, frag_source=fragment_shader)
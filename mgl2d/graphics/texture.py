@@ -14,11 +14,14 @@ class Texture(object):
     def load_from_file(cls, filename, mode=GL_RGBA):
         image = Image.open(filename)
         logger.debug(f'Loading \'{filename}\' mode:{image.mode}')
+        texture = cls.load_from_image(image, mode)
+        image.close()
+        return texture
 
+    @classmethod
+    def load_from_image(cls, image, mode=GL_RGBA):
         if mode == GL_RGBA and image.mode != 'RGBA':
-            image_new = image.convert('RGBA')
-            image.close()
-            image = image_new
+            image = image.convert('RGBA')
 
         texture = Texture()
         texture._size.x = image.size[0]
@@ -39,7 +42,6 @@ class Texture(object):
         glTexImage2D(GL_TEXTURE_2D, 0, mode, texture.width, texture.height, 0, mode, GL_UNSIGNED_BYTE, pixels)
         glBindTexture(GL_TEXTURE_2D, 0)
 
-        image.close()
         return texture
 
     @classmethod
@@ -0,0 +1,374 @@
+import hashlib
+import json
+import logging
+import math
+import os
+from collections import OrderedDict
+
+from PIL import Image
+
+from mgl2d.math.rect import Rect
+
+logger = logging.getLogger(__name__)
+
+ATLAS_FORMAT_VERSION = 1
+
+
+def next_power_of_two(n):
+    return 2 ** (max(1, int(n)) - 1).bit_length()
+
+
+class SkylinePacker(object):
+    """Bottom-left skyline bin packer for a single page."""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.used_area = 0
+        # The skyline is a list of (x, y, width) segments covering the page width
+        self._skyline = [(0, 0, width)]
+
+    @property
+    def used_width(self):
+        return max((x + w for x, y, w in self._skyline if y > 0), default=0)
+
+    @property
+    def used_height(self):
+        return max(y for x, y, w in self._skyline)
+
+    def insert(self, width, height):
+        # Returns the (x, y) position of the rectangle, or None if it doesn't fit
+        best = None
+        for index in range(len(self._skyline)):
+            y = self._fit(index, width, height)
+            if y is None:
+                continue
+            score = (y + height, self._skyline[index][2])
+            if best is None or score < best[0]:
+                best = score, index, self._skyline[index][0], y
+        if best is None:
+            return None
+
+        _, index, x, y = best
+        self._add_level(index, x, y, width, height)
+        self.used_area += width * height
+        return x, y
+
+    def _fit(self, index, width, height):
+        x = self._skyline[index][0]
+        if x + width > self.width:
+            return None
+        y = 0
+        remaining = width
+        while remaining > 0:
+            _, segment_y, segment_w = self._skyline[index]
+            y = max(y, segment_y)
+            if y + height > self.height:
+                return None
+            remaining -= segment_w
+            index += 1
+        return y
+
+    def _add_level(self, index, x, y, width, height):
+        self._skyline.insert(index, (x, y + height, width))
+        right = x + width
+
+        # Shrink or remove the segments now covered by the new one
+        index += 1
+        while index < len(self._skyline):
+            segment_x, segment_y, segment_w = self._skyline[index]
+            if segment_x >= right:
+                break
+            if segment_x + segment_w <= right:
+                del self._skyline[index]
+                continue
+            self._skyline[index] = (right, segment_y, segment_x + segment_w - right)
+            break
+
+        # Merge neighbours at the same height
+        index = 0
+        while index < len(self._skyline) - 1:
+            x1, y1, w1 = self._skyline[index]
+            x2, y2, w2 = self._skyline[index + 1]
+            if y1 == y2:
+                self._skyline[index] = (x1, y1, w1 + w2)
+                del self._skyline[index + 1]
+            else:
+                index += 1
+
+
+class AtlasRegion(object):
+    """Area of an atlas page holding one source image (or part of it).
+
+    The region can be used in place of the Texture of its source: it has the same size
+    and binds the texture of its page. Position and size are known once the atlas is packed.
+    """
+
+    def __init__(self, name, width, height):
+        self.name = name
+        self.page_index = None
+        # Area in pixels inside the page, without padding and extrusion
+        self.rect = Rect(0, 0, width, height)
+        # Same area in texture coordinates (0..1), top-left origin like the uploaded pages
+        self.uv_rect = Rect(0, 0, 1, 1)
+        self.texture = None
+
+    @property
+    def width(self):
+        return self.rect.w
+
+    @property
+    def height(self):
+        return self.rect.h
+
+    @property
+    def is_packed(self):
+        return self.page_index is not None
+
+    def bind(self):
+        self.texture.bind()
+
+    def unbind(self):
+        self.texture.unbind()
+
+    def get_uv_rect(self, rect=None):
+        # Maps a rect in the coordinates of the source image to texture coordinates of the page
+        if rect is None:
+            return Rect.from_rect(self.uv_rect)
+        scale_x = self.uv_rect.w / self.rect.w
+        scale_y = self.uv_rect.h / self.rect.h
+        return Rect(self.uv_rect.x + rect.x * scale_x, self.uv_rect.y + rect.y * scale_y,
+                    rect.w * scale_x, rect.h * scale_y)
+
+    def _set_location(self, page_index, x, y, page_width, page_height):
+        self.page_index = page_index
+        self.rect.x = x
+        self.rect.y = y
+        self.uv_rect = Rect(x / page_width, y / page_height, self.rect.w / page_width, self.rect.h / page_height)
+
+
+class TextureAtlas(object):
+    """Packs many images into a few pages to share textures between drawables.
+
+    Packing only uses PIL, the pages are uploaded to GL by create_textures().
+
+        atlas = TextureAtlas(padding=1, extrude=1)
+        hero = atlas.add_file('hero', 'data/hero.png')
+        tile = atlas.add_file('tile_3', 'data/tiles.png', Rect(64, 0, 32, 32))
+        atlas.build(cache_dir='cache')
+        atlas.create_textures()
+        drawable.texture = hero
+    """
+
+    def __init__(self, max_page_size=2048, padding=1, extrude=0, power_of_two=True):
+        self.max_page_size = max_page_size
+        # Empty pixels between the regions
+        self.padding = padding
+        # Pixels around each region filled with its border to avoid bleeding when filtering
+        self.extrude = extrude
+        self.power_of_two = power_of_two
+        self.regions = OrderedDict()
+        self.pages = []
+        self.textures = []
+        self._sources = OrderedDict()
+
+    def add_file(self, name, file_name, rect=None):
+        # Only the header of the file is read, the pixels are loaded by pack()
+        if name in self.regions:
+            return self.regions[name]
+        if rect is None:
+            with Image.open(file_name) as image:
+                rect = Rect(0, 0, image.size[0], image.size[1])
+        return self._add_source(name, file_name, rect)
+
+    def add_image(self, name, image, rect=None):
+        if name in self.regions:
+            return self.regions[name]
+        if rect is None:
+            rect = Rect(0, 0, image.size[0], image.size[1])
+        return self._add_source(name, image, rect)
+
+    def get_region(self, name):
+        return self.regions[name]
+
+    def build(self, cache_dir=None):
+        # Packs the atlas, or loads it from the cache if none of the sources changed
+        if cache_dir is None:
+            self.pack()
+            return
+
+        key = self.get_key()
+        file_name = os.path.join(cache_dir, f'{key}.json')
+        if os.path.exists(file_name) and self.load(file_name):
+            logger.debug(f'Atlas loaded from \'{file_name}\'')
+            return
+
+        self.pack()
+        self.save(file_name, key)
+
+    def pack(self):
+        max_size = self.max_page_size
+        border = self.extrude * 2 + self.padding
+        items = []
+        for name, (source, rect) in self._sources.items():
+            width = int(rect.w) + border
+            height = int(rect.h) + border
+            if width > max_size or height > max_size:
+                raise ValueError(f'image \'{name}\' ({rect.w}x{rect.h}) does not fit in a page of {max_size}')
+            items.append((name, width, height))
+        # Tallest first packs tighter with a skyline
+        items.sort(key=lambda item: (-item[2], -item[1]))
+
+        self.pages = []
+        self.textures = []
+        locations = []
+        while items:
+            packer, placed, items = self._pack_page(items)
+            page_index = len(self.pages)
+            page_width, page_height = packer.used_width, packer.used_height
+            if self.power_of_two:
+                page_width, page_height = next_power_of_two(page_width), next_power_of_two(page_height)
+            self.pages.append(Image.new('RGBA', (page_width, page_height), (0, 0, 0, 0)))
+            for name, x, y in placed:
+                self.regions[name]._set_location(page_index, x + self.extrude, y + self.extrude,
+                                                 page_width, page_height)
+                locations.append(name)
+
+        self._draw_pages(locations)
+        logger.debug(f'Packed {len(self.regions)} images in {len(self.pages)} pages')
+
+    def create_textures(self):
+        # Uploads the pages, needs a GL context
+        from mgl2d.graphics.texture import Texture
+
+        self.textures = [Texture.load_from_image(page) for page in self.pages]
+        for region in self.regions.values():
+            region.texture = self.textures[region.page_index]
+        return self.textures
+
+    def get_key(self):
+        # Identifies the sources and the settings, used to name the cache files
+        sha1 = hashlib.sha1()
+        sha1.update(repr((ATLAS_FORMAT_VERSION, self.max_page_size, self.padding, self.extrude,
+                          self.power_of_two)).encode('utf-8'))
+        for name, (source, rect) in self._sources.items():
+            sha1.update(repr((name, rect.x, rect.y, rect.w, rect.h)).encode('utf-8'))
+            if isinstance(source, str):
+                stat = os.stat(source)
+                sha1.update(repr((os.path.abspath(source), stat.st_mtime_ns, stat.st_size)).encode('utf-8'))
+            else:
+                sha1.update(repr((source.mode, source.size)).encode('utf-8'))
+                sha1.update(source.tobytes())
+        return sha1.hexdigest()
+
+    def to_dictionary(self):
+        d = OrderedDict()
+        d['version'] = ATLAS_FORMAT_VERSION
+        d['padding'] = self.padding
+        d['extrude'] = self.extrude
+        d['pages'] = [OrderedDict([('width', page.size[0]), ('height', page.size[1])]) for page in self.pages]
+        d['regions'] = OrderedDict()
+        for name, region in self.regions.items():
+            r = d['regions'][name] = OrderedDict()
+            r['page'] = region.page_index
+            r['x'] = region.rect.x
+            r['y'] = region.rect.y
+            r['width'] = region.rect.w
+            r['height'] = region.rect.h
+        return d
+
+    def save(self, file_name, key=None):
+        # Writes the descriptor as json and the pages as png files next to it
+        base_name = os.path.splitext(file_name)[0]
+        os.makedirs(os.path.dirname(file_name) or '.', exist_ok=True)
+        d = self.to_dictionary()
+        d['key'] = key
+        for index, page in enumerate(self.pages):
+            page_file = f'{base_name}_{index}.png'
+            page.save(page_file)
+            d['pages'][index]['image_file'] = os.path.basename(page_file)
+        with open(file_name, 'w') as json_file:
+            json.dump(d, json_file, indent=2)
+
+    def load(self, file_name):
+        # Returns False if the descriptor doesn't match the regions of the atlas
+        with open(file_name) as json_file:
+            data = json.load(json_file)
+        if data.get('version') != ATLAS_FORMAT_VERSION or set(data['regions']) != set(self.regions):
+            return False
+
+        path = os.path.dirname(file_name)
+        pages = []
+        for page in data['pages']:
+            with Image.open(os.path.join(path, page['image_file'])) as image:
+                pages.append(image.convert('RGBA'))
+        self.pages = pages
+        self.textures = []
+        for name, r in data['regions'].items():
+            page = data['pages'][r['page']]
+            self.regions[name].rect.w = r['width']
+            self.regions[name].rect.h = r['height']
+            self.regions[name]._set_location(r['page'], r['x'], r['y'], page['width'], page['height'])
+        return True
+
+    # Private methods
+    def _add_source(self, name, source, rect):
+        self._sources[name] = source, Rect.from_rect(rect)
+        region = self.regions[name] = AtlasRegion(name, int(rect.w), int(rect.h))
+        return region
+
+    def _pack_page(self, items):
+        # Grows a power of two page from the area of the items, up to the maximum size
+        area = sum(width * height for name, width, height in items)
+        size = min(next_power_of_two(math.sqrt(area)), self.max_page_size)
+        width = height = size
+        while True:
+            packer = SkylinePacker(width, height)
+            placed = []
+            remaining = []
+            for name, item_w, item_h in items:
+                position = packer.insert(item_w, item_h)
+                if position is None:
+                    remaining.append((name, item_w, item_h))
+                else:
+                    placed.append((name, position[0], position[1]))
+
+            if not remaining or (width >= self.max_page_size and height >= self.max_page_size):
+                return packer, placed, remaining
+            if width <= height:
+                width = min(width * 2, self.max_page_size)
+            else:
+                height = min(height * 2, self.max_page_size)
+
+    def _draw_pages(self, names):
+        images = {}
+        try:
+            for name in names:
+                source, rect = self._sources[name]
+                if isinstance(source, str):
+                    if source not in images:
+                        with Image.open(source) as image:
+                            images[source] = image.convert('RGBA')
+                    source = images[source]
+                elif source.mode != 'RGBA':
+                    source = source.convert('RGBA')
+
+                region = self.regions[name]
+                page = self.pages[region.page_index]
+                x, y = int(region.rect.x), int(region.rect.y)
+                w, h = int(rect.w), int(rect.h)
+                page.paste(source.crop((rect.x, rect.y, rect.x + w, rect.y + h)), (x, y))
+                if self.extrude > 0:
+                    self._extrude(page, x, y, w, h)
+        finally:
+            for image in images.values():
+                image.close()
+
+    def _extrude(self, page, x, y, w, h):
+        e = self.extrude
+        # Stretch the border pixels of the region outwards, corners come from the top and bottom rows
+        page.paste(page.crop((x, y, x + 1, y + h)).resize((e, h), Image.NEAREST), (x - e, y))
+        page.paste(page.crop((x + w - 1, y, x + w, y + h)).resize((e, h), Image.NEAREST), (x + w, y))
+        page.paste(page.crop((x - e, y, x + w + e, y + 1)).resize((w + e * 2, e), Image.NEAREST), (x - e, y - e))
+        page.paste(page.crop((x - e, y + h - 1, x + w + e, y + h)).resize((w + e * 2, e), Image.NEAREST),
+                   (x - e, y + h))
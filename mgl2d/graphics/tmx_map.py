@@ -4,14 +4,21 @@ from pytmx import pytmx
 
 from mgl2d.graphics.quad_drawable import QuadDrawable
 from mgl2d.graphics.texture import Texture
+from mgl2d.math.rect import Rect
 from mgl2d.math.vector2 import Vector2
 
 logger = logging.getLogger(__name__)
 
 
 class TMXMap(object):
-    def __init__(self, filename):
-        self._tmx_data = pytmx.TiledMap(filename, invert_y=True, image_loader=self._image_loader)
+    def __init__(self, filename, atlas=None, atlas_cache_dir=None):
+        # With an atlas all the tiles and images of the map share its pages
+        self._atlas = atlas
+        image_loader = self._image_loader if atlas is None else self._atlas_image_loader
+        self._tmx_data = pytmx.TiledMap(filename, invert_y=True, image_loader=image_loader)
+        if atlas is not None:
+            atlas.build(atlas_cache_dir)
+            atlas.create_textures()
         self._size = self._tmx_data.width * self._tmx_data.tilewidth, self._tmx_data.height * self._tmx_data.tileheight
         self._layer_offsets = [Vector2(0, 0) for _ in range(0, len(self._tmx_data.layers))]
         self._drawable = QuadDrawable()
@@ -42,6 +49,22 @@ class TMXMap(object):
 
         return load_image
 
+    def _atlas_image_loader(self, filename, colorkey, **kwargs):
+        if colorkey:
+            logger.error('colorkey not implemented')
+
+        def load_image(rect=None, flags=None):
+            if flags:
+                logger.error('tile flags are not implemented')
+
+            # The regions are placed when the atlas is built, after the whole map is loaded
+            if rect:
+                x, y, w, h = rect
+                return self._atlas.add_file(f'{filename}:{x},{y},{w},{h}', filename, Rect(x, y, w, h))
+            return self._atlas.add_file(filename, filename)
+
+        return load_image
+
     @property
     def width_in_pixels(self):
         return self._size[0]
@@ -50,10 +73,11 @@ class TMXMap(object):
     def height_in_pixels(self):
         return self._size[1]
 
-    def draw(self, screen):
-        self.draw_layers_range(screen, 0, len(self._tmx_data.layers))
+    def draw(self, screen, batch=None):
+        self.draw_layers_range(screen, 0, len(self._tmx_data.layers), batch)
 
-    def draw_layers_range(self, screen, start, how_many):
+    def draw_layers_range(self, screen, start, how_many, batch=None):
+        # With a batch the tiles and images are added to it and drawn when it is flushed
         for index in range(start, start + how_many):
             layer = self._tmx_data.layers[index]
             if layer.visible == 0:
@@ -63,13 +87,17 @@ class TMXMap(object):
             offset_y = layer.offsety + self._layer_offsets[index].y
 
             if isinstance(layer, pytmx.TiledTileLayer):
-                # for x, y, image in layer.tiles():
-                pass
+                if batch is not None:
+                    tile_w, tile_h = self._tmx_data.tilewidth, self._tmx_data.tileheight
+                    for x, y, image in layer.tiles():
+                        batch.add(image, x * tile_w - offset_x, y * tile_h - offset_y, tile_w, tile_h)
             elif isinstance(layer, pytmx.TiledObjectGroup):
                 for obj in layer:
                     if hasattr(obj, 'points'):
                         # draw_lines(poly_color, obj.closed, obj.points, 3)
                         pass
+                    elif obj.image and batch is not None:
+                        batch.add(obj.image, obj.x - offset_x, obj.y - offset_y, obj.width, obj.height)
                     elif obj.image:
                         self._drawable.texture = obj.image
                         self._drawable.scale = Vector2(obj.width, obj.height)
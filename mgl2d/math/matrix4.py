@@ -16,7 +16,7 @@ class Matrix4(object):
                 [0, 1, 0, 0],
                 [0, 0, 1, 0],
                 [0, 0, 0, 1]
-            ], dtype=numpy.float)
+            ], dtype=numpy.float64)
 
     @property
     def m(self):
@@ -29,7 +29,7 @@ class Matrix4(object):
             [0, 1, 0, 0],
             [0, 0, 1, 0],
             [x, y, z, 1]
-        ], dtype=numpy.float))
+        ], dtype=numpy.float64))
 
     @staticmethod
     def scale(x, y, z):
@@ -38,7 +38,7 @@ class Matrix4(object):
             [0, y, 0, 0],
             [0, 0, z, 0],
             [0, 0, 0, 1]
-        ], dtype=numpy.float))
+        ], dtype=numpy.float64))
 
     @staticmethod
     def rotate_z(radians):
@@ -49,7 +49,7 @@ class Matrix4(object):
             [-z_sin, z_cos, 0, 0],
             [0, 0, 1, 0],
             [0, 0, 0, 1]
-        ], dtype=numpy.float))
+        ], dtype=numpy.float64))
 
     def __mul__(self, other):
         if isinstance(other, Vector2):
@@ -0,0 +1,91 @@
+import math
+
+import numpy
+
+from mgl2d.math.matrix4 import Matrix4
+
+
+class Transform2D(object):
+    """Model matrix of a quad, same as Matrix4 translate * rotate_z * scale * anchor * size.
+
+    The matrix is computed in closed form into a preallocated array. Changing the position only
+    updates the translation, any other component updates the 2x2 part as well.
+    """
+    __slots__ = ('_m', '_matrix', '_pos_x', '_pos_y', '_size_x', '_size_y', '_anchor_x', '_anchor_y',
+                 '_scale_x', '_scale_y', '_angle', '_offset_x', '_offset_y', '_is_linear_invalid',
+                 '_is_translation_invalid')
+
+    def __init__(self, pos_x=0.0, pos_y=0.0, size_x=1.0, size_y=1.0, anchor_x=0.0, anchor_y=0.0,
+                 scale_x=1.0, scale_y=1.0, angle=0.0):
+        # float32 is what glUniformMatrix4fv uploads
+        self._m = numpy.identity(4, dtype=numpy.float32)
+        self._matrix = Matrix4(self._m)
+        self._pos_x = pos_x
+        self._pos_y = pos_y
+        self._size_x = size_x
+        self._size_y = size_y
+        self._anchor_x = anchor_x
+        self._anchor_y = anchor_y
+        self._scale_x = scale_x
+        self._scale_y = scale_y
+        self._angle = angle
+        # Translation added by the anchor, rotation and scale
+        self._offset_x = 0.0
+        self._offset_y = 0.0
+        self._is_linear_invalid = True
+        self._is_translation_invalid = True
+
+    def set_position(self, x, y):
+        self._pos_x = x
+        self._pos_y = y
+        self._is_translation_invalid = True
+
+    def set_size(self, x, y):
+        self._size_x = x
+        self._size_y = y
+        self._is_linear_invalid = True
+
+    def set_anchor(self, x, y):
+        self._anchor_x = x
+        self._anchor_y = y
+        self._is_linear_invalid = True
+
+    def set_scale(self, x, y):
+        self._scale_x = x
+        self._scale_y = y
+        self._is_linear_invalid = True
+
+    def set_angle(self, radians):
+        self._angle = radians
+        self._is_linear_invalid = True
+
+    def invalidate(self):
+        self._is_linear_invalid = True
+
+    @property
+    def matrix(self):
+        # The returned Matrix4 is updated in place by the next changes
+        if self._is_linear_invalid:
+            self._update_linear()
+        if self._is_translation_invalid:
+            m = self._m
+            m[3, 0] = self._offset_x + self._pos_x
+            m[3, 1] = self._offset_y + self._pos_y
+            self._is_translation_invalid = False
+        return self._matrix
+
+    def _update_linear(self):
+        z_sin = math.sin(self._angle)
+        z_cos = math.cos(self._angle)
+        scale_x = self._scale_x
+        scale_y = self._scale_y
+
+        m = self._m
+        m[0, 0] = self._size_x * scale_x * z_cos
+        m[0, 1] = self._size_x * scale_x * z_sin
+        m[1, 0] = -self._size_y * scale_y * z_sin
+        m[1, 1] = self._size_y * scale_y * z_cos
+        self._offset_x = -self._anchor_x * scale_x * z_cos + self._anchor_y * scale_y * z_sin
+        self._offset_y = -self._anchor_x * scale_x * z_sin - self._anchor_y * scale_y * z_cos
+        self._is_linear_invalid = False
+        self._is_translation_invalid = True
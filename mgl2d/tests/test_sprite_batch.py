@@ -0,0 +1,147 @@
+import math
+import random
+
+import numpy as np
+
+from mgl2d.graphics.quad_drawable import texture_coordinates
+from mgl2d.graphics.sprite_batch import SpriteBatch, build_quad_vertices, build_quad_indices, find_runs, \
+    QUAD_COLUMNS, VERTEX_SIZE
+from mgl2d.graphics.texture_atlas import AtlasRegion
+from mgl2d.math.matrix4 import Matrix4
+from mgl2d.math.rect import Rect
+
+# Corners of QuadDrawable's vertex buffer, in drawing order
+CORNERS = [(0, 0), (0, 1), (1, 1), (1, 0)]
+
+
+def quad_drawable_matrix(x, y, size_x, size_y, anchor_x, anchor_y, scale_x, scale_y, angle, flip_x, flip_y):
+    # Model matrix of a QuadDrawable with these properties
+    scale_x = -scale_x if flip_x else scale_x
+    scale_y = -scale_y if flip_y else scale_y
+    return (Matrix4.translate(x, y, 0) * Matrix4.rotate_z(angle) * Matrix4.scale(scale_x, scale_y, 1) *
+            Matrix4.translate(-anchor_x, -anchor_y, 0) * Matrix4.scale(size_x, size_y, 1))
+
+
+def random_quad(rng):
+    return dict(x=rng.uniform(-500, 500), y=rng.uniform(-500, 500),
+                size_x=rng.uniform(1, 100), size_y=rng.uniform(1, 100),
+                anchor_x=rng.uniform(-20, 50), anchor_y=rng.uniform(-20, 50),
+                scale_x=rng.uniform(0.25, 3), scale_y=rng.uniform(0.25, 3),
+                angle=rng.uniform(-math.pi * 2, math.pi * 2),
+                flip_x=rng.random() < 0.3, flip_y=rng.random() < 0.3)
+
+
+def add_quad(batch, texture, q, **kwargs):
+    batch.add(texture, q['x'], q['y'], q['size_x'] * q['scale_x'], q['size_y'] * q['scale_y'],
+              q['anchor_x'] * q['scale_x'], q['anchor_y'] * q['scale_y'], q['angle'],
+              flip_x=q['flip_x'], flip_y=q['flip_y'], **kwargs)
+
+
+def test_build_quad_vertices_matches_quad_drawable():
+    rng = random.Random(0)
+    quads = [random_quad(rng) for _ in range(200)]
+    batch = SpriteBatch(capacity=16, sort=False)
+    texture = object()
+    for q in quads:
+        add_quad(batch, texture, q)
+    vertices, runs = batch.build_vertices()
+    assert vertices.shape == (len(quads) * 4, VERTEX_SIZE)
+    assert runs == [(None, texture, 0, len(quads))]
+
+    for index, q in enumerate(quads):
+        m = quad_drawable_matrix(**q).m
+        for corner, (cx, cy) in enumerate(CORNERS):
+            expected = np.array([cx, cy, 0, 1]) @ m
+            vertex = vertices[index * 4 + corner]
+            assert np.allclose(vertex[:2], expected[:2], rtol=1e-5, atol=1e-3)
+            assert tuple(vertex[2:4]) == (cx, cy)
+            assert tuple(vertex[4:8]) == (1, 1, 1, 1)
+
+
+def test_build_quad_vertices_uvs_and_colors():
+    quads = np.zeros((2, QUAD_COLUMNS), dtype=np.float32)
+    quads[0] = (10, 20, 4, 2, 0, 0, 0, 0.25, 0.5, 0.25, 0.125, 0.1, 0.2, 0.3, 0.4)
+    quads[1] = (0, 0, 1, 1, 0, 0, 0, 0, 0, 1, 1, 1, 1, 1, 1)
+    out = np.full((16, VERTEX_SIZE), -1, dtype=np.float32)
+    vertices = build_quad_vertices(quads, out)
+    assert vertices.shape == (8, VERTEX_SIZE) and np.shares_memory(vertices, out)
+    assert np.allclose(vertices[:4, :2], [(10, 20), (10, 22), (14, 22), (14, 20)])
+    assert np.allclose(vertices[:4, 2:4], [(0.25, 0.5), (0.25, 0.625), (0.5, 0.625), (0.5, 0.5)])
+    assert np.allclose(vertices[:4, 4:8], [(0.1, 0.2, 0.3, 0.4)] * 4)
+    assert np.all(out[8:] == -1)
+
+
+def test_build_quad_indices():
+    assert build_quad_indices(2).tolist() == [0, 1, 2, 0, 2, 3, 4, 5, 6, 4, 6, 7]
+
+
+def test_find_runs():
+    assert find_runs(np.array([], dtype=np.int32)) == []
+    assert find_runs(np.array([3])) == [(3, 0, 1)]
+    keys = np.array([0, 0, 1, 1, 1, 2, 0, 0])
+    assert find_runs(keys) == [(0, 0, 2), (1, 2, 3), (2, 5, 1), (0, 6, 2)]
+
+
+def test_runs_sorted_by_texture():
+    textures = [object() for _ in range(3)]
+    rng = random.Random(1)
+    order = [rng.randrange(3) for _ in range(100)]
+    for sort in (True, False):
+        batch = SpriteBatch(capacity=8, sort=sort)
+        for index, texture_index in enumerate(order):
+            batch.add(textures[texture_index], index, 0, 1, 1)
+        quads, runs = batch.get_runs()
+        assert len(batch) == len(order)
+        assert sum(count for shader, texture, start, count in runs) == len(order)
+        if sort:
+            assert len(runs) == 3
+        else:
+            assert len(runs) == 1 + sum(1 for a, b in zip(order, order[1:]) if a != b)
+        # Every run only has quads of its texture, in the order they were added
+        for shader, texture, start, count in runs:
+            added = [x for x, t in enumerate(order) if textures[t] is texture]
+            positions = quads[start:start + count, 0].astype(int).tolist()
+            assert all(textures[order[x]] is texture for x in positions)
+            assert positions == sorted(positions)
+            if sort:
+                assert positions == added
+
+
+def test_runs_split_by_shader():
+    texture = object()
+    shaders = [object(), object()]
+    batch = SpriteBatch()
+    batch.add(texture, 0, 0, 1, 1, shader=shaders[0])
+    batch.add(texture, 1, 0, 1, 1, shader=shaders[1])
+    batch.add(texture, 2, 0, 1, 1, shader=shaders[0])
+    quads, runs = batch.get_runs()
+    assert runs == [(shaders[0], texture, 0, 2), (shaders[1], texture, 2, 1)]
+    batch.begin()
+    assert len(batch) == 0
+
+
+def test_add_atlas_region():
+    region = AtlasRegion('tile', 32, 16)
+    region.texture = texture = object()
+    region._set_location(0, 64, 32, 256, 128)
+    batch = SpriteBatch()
+    batch.add(region, 0, 0, 32, 16)
+    batch.add(region, 0, 0, 16, 16, uv_rect=Rect(0.5, 0, 0.5, 1))
+    vertices, runs = batch.build_vertices()
+    assert runs == [(None, texture, 0, 2)]
+    assert np.allclose(vertices[:4, 2:4], [(0.25, 0.25), (0.25, 0.375), (0.375, 0.375), (0.375, 0.25)])
+    assert np.allclose(vertices[4:8, 2:4], [(0.3125, 0.25), (0.3125, 0.375), (0.375, 0.375), (0.375, 0.25)])
+
+
+def test_quad_drawable_atlas_region_uvs():
+    # Drawn without a batch, a region covers the same part of its page
+    region = AtlasRegion('tile', 32, 16)
+    region.texture = object()
+    region._set_location(0, 64, 32, 256, 128)
+    batch = SpriteBatch()
+    batch.add(region, 0, 0, 32, 16)
+    vertices, _ = batch.build_vertices()
+    uvs = texture_coordinates(region)
+    assert uvs.dtype == np.float32
+    assert np.allclose(uvs.reshape(-1, 2), vertices[:4, 2:4])
+    assert np.array_equal(texture_coordinates(object()), np.array(CORNERS, dtype=np.float32).ravel())
@@ -0,0 +1,209 @@
+import os
+import random
+
+from PIL import Image
+
+from mgl2d.graphics.texture_atlas import SkylinePacker, TextureAtlas, next_power_of_two
+from mgl2d.math.rect import Rect
+
+
+def overlaps(a, b):
+    # Rects as (x, y, w, h)
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+def make_image(width, height, seed):
+    rng = random.Random(seed)
+    image = Image.new('RGBA', (width, height))
+    image.putdata([(rng.randrange(256), rng.randrange(256), rng.randrange(256), 255)
+                   for _ in range(width * height)])
+    return image
+
+
+def make_atlas(sizes, **kwargs):
+    atlas = TextureAtlas(**kwargs)
+    images = {}
+    for index, (width, height) in enumerate(sizes):
+        name = f'image_{index}'
+        images[name] = make_image(width, height, index)
+        atlas.add_image(name, images[name])
+    return atlas, images
+
+
+def random_sizes(count, seed=0, max_size=40):
+    rng = random.Random(seed)
+    return [(rng.randint(1, max_size), rng.randint(1, max_size)) for _ in range(count)]
+
+
+def test_next_power_of_two():
+    assert [next_power_of_two(n) for n in (0, 1, 2, 3, 4, 5, 100)] == [1, 1, 2, 4, 4, 8, 128]
+
+
+def test_skyline_packer_no_overlaps():
+    rng = random.Random(1)
+    packer = SkylinePacker(256, 256)
+    placed = []
+    for _ in range(300):
+        width, height = rng.randint(1, 50), rng.randint(1, 50)
+        position = packer.insert(width, height)
+        if position is None:
+            continue
+        x, y = position
+        assert 0 <= x and x + width <= 256
+        assert 0 <= y and y + height <= 256
+        for other in placed:
+            assert not overlaps((x, y, width, height), other)
+        placed.append((x, y, width, height))
+    assert len(placed) > 20
+    assert packer.used_area == sum(w * h for x, y, w, h in placed)
+    assert packer.used_width <= 256 and packer.used_height <= 256
+
+
+def test_skyline_packer_rejects_too_large():
+    packer = SkylinePacker(64, 32)
+    assert packer.insert(65, 1) is None
+    assert packer.insert(1, 33) is None
+    assert packer.insert(64, 32) == (0, 0)
+    assert packer.insert(1, 1) is None
+
+
+def check_atlas(atlas, images):
+    padding, extrude = atlas.padding, atlas.extrude
+    border_rects = {}
+    for name, region in atlas.regions.items():
+        assert region.is_packed
+        page = atlas.pages[region.page_index]
+        x, y, w, h = int(region.rect.x), int(region.rect.y), region.width, region.height
+        assert (w, h) == images[name].size
+        assert x - extrude >= 0 and y - extrude >= 0
+        assert x + w + extrude <= page.size[0] and y + h + extrude <= page.size[1]
+
+        # Texture coordinates of the region inside the page
+        uv = region.uv_rect
+        assert (uv.x, uv.y, uv.w, uv.h) == (x / page.size[0], y / page.size[1], w / page.size[0], h / page.size[1])
+
+        # The pixels of the region are the source image
+        assert page.crop((x, y, x + w, y + h)).tobytes() == images[name].tobytes()
+
+        # The extruded border repeats the closest pixel of the region
+        for e in range(1, extrude + 1):
+            for i in range(h):
+                assert page.getpixel((x - e, y + i)) == page.getpixel((x, y + i))
+                assert page.getpixel((x + w - 1 + e, y + i)) == page.getpixel((x + w - 1, y + i))
+            for i in range(-extrude, w + extrude):
+                column = min(max(x + i, x), x + w - 1)
+                assert page.getpixel((x + i, y - e)) == page.getpixel((column, y))
+                assert page.getpixel((x + i, y + h - 1 + e)) == page.getpixel((column, y + h - 1))
+
+        border_rects.setdefault(region.page_index, []).append(
+            (x - extrude, y - extrude, w + extrude * 2 + padding, h + extrude * 2 + padding))
+
+    # Regions with their extrusion and padding don't overlap
+    for rects in border_rects.values():
+        for index, rect in enumerate(rects):
+            for other in rects[index + 1:]:
+                assert not overlaps(rect, other)
+
+    # Padding is left empty
+    if padding > 0:
+        for name, region in atlas.regions.items():
+            page = atlas.pages[region.page_index]
+            x, y, w, h = int(region.rect.x), int(region.rect.y), region.width, region.height
+            right = x + w + extrude
+            if right < page.size[0]:
+                for i in range(y - extrude, y + h + extrude):
+                    assert page.getpixel((right, i)) == (0, 0, 0, 0)
+
+
+def test_pack():
+    atlas, images = make_atlas(random_sizes(60), padding=1, extrude=0)
+    atlas.pack()
+    assert len(atlas.pages) == 1
+    check_atlas(atlas, images)
+
+
+def test_pack_padding_and_extrusion():
+    for padding, extrude in ((0, 1), (2, 1), (1, 3)):
+        atlas, images = make_atlas(random_sizes(40, seed=padding + extrude), padding=padding, extrude=extrude)
+        atlas.pack()
+        check_atlas(atlas, images)
+
+
+def test_pack_power_of_two_pages():
+    atlas, images = make_atlas(random_sizes(30), power_of_two=True)
+    atlas.pack()
+    for page in atlas.pages:
+        assert page.size == (next_power_of_two(page.size[0]), next_power_of_two(page.size[1]))
+
+
+def test_pack_several_pages():
+    atlas, images = make_atlas(random_sizes(50, max_size=30), max_page_size=64, padding=1, extrude=1)
+    atlas.pack()
+    assert len(atlas.pages) > 1
+    for page in atlas.pages:
+        assert page.size[0] <= 64 and page.size[1] <= 64
+    check_atlas(atlas, images)
+
+
+def test_pack_too_large_image():
+    atlas, images = make_atlas([(40, 10)], max_page_size=32)
+    try:
+        atlas.pack()
+        assert False
+    except ValueError:
+        pass
+
+
+def test_add_image_part():
+    image = make_image(32, 16, 0)
+    atlas = TextureAtlas(extrude=1)
+    atlas.add_image('full', image)
+    atlas.add_image('part', image, Rect(8, 4, 10, 6))
+    assert atlas.add_image('part', image) is atlas.get_region('part')
+    atlas.pack()
+    check_atlas(atlas, {'full': image, 'part': image.crop((8, 4, 18, 10))})
+    region = atlas.get_region('part')
+    uv = region.get_uv_rect(Rect(5, 0, 5, 6))
+    assert uv.x == region.uv_rect.x + region.uv_rect.w / 2
+    assert uv.w == region.uv_rect.w / 2
+    assert uv.h == region.uv_rect.h
+
+
+def test_save_load(tmp_path):
+    sizes = random_sizes(25)
+    atlas, images = make_atlas(sizes, padding=2, extrude=1)
+    atlas.pack()
+    file_name = os.path.join(str(tmp_path), 'atlas.json')
+    atlas.save(file_name, atlas.get_key())
+
+    loaded, _ = make_atlas(sizes, padding=2, extrude=1)
+    assert loaded.load(file_name)
+    assert loaded.to_dictionary() == atlas.to_dictionary()
+    for name, region in atlas.regions.items():
+        loaded_region = loaded.get_region(name)
+        assert loaded_region.page_index == region.page_index
+        assert (loaded_region.uv_rect.x, loaded_region.uv_rect.y) == (region.uv_rect.x, region.uv_rect.y)
+    assert [page.tobytes() for page in loaded.pages] == [page.tobytes() for page in atlas.pages]
+    check_atlas(loaded, images)
+
+    # The descriptor only fits an atlas with the same regions
+    other, _ = make_atlas(sizes[:-1], padding=2, extrude=1)
+    assert not other.load(file_name)
+
+
+def test_build_uses_cache(tmp_path):
+    sizes = random_sizes(10)
+    atlas, images = make_atlas(sizes)
+    atlas.build(cache_dir=str(tmp_path))
+    assert os.path.exists(os.path.join(str(tmp_path), atlas.get_key() + '.json'))
+
+    cached, _ = make_atlas(sizes)
+    cached.pack = None
+    cached.build(cache_dir=str(tmp_path))
+    assert cached.to_dictionary() == atlas.to_dictionary()
+    check_atlas(cached, images)
+
+    # Different pixels give a different key
+    changed, _ = make_atlas(sizes)
+    changed.add_image('extra', make_image(3, 3, 99))
+    assert changed.get_key() != atlas.get_key()
@@ -0,0 +1,108 @@
+import math
+import random
+
+import numpy as np
+
+from mgl2d.math.matrix4 import Matrix4
+from mgl2d.math.transform2d import Transform2D
+
+
+class MatrixChain(object):
+    # QuadDrawable's original transform: translate * rotate_z * scale * anchor * size
+    def __init__(self, pos_x, pos_y, size_x, size_y, anchor_x, anchor_y, scale_x, scale_y, angle):
+        self.set_position(pos_x, pos_y)
+        self.set_size(size_x, size_y)
+        self.set_anchor(anchor_x, anchor_y)
+        self.set_scale(scale_x, scale_y)
+        self.set_angle(angle)
+
+    def set_position(self, x, y):
+        self.translation = Matrix4.translate(x, y, 0)
+
+    def set_size(self, x, y):
+        self.size = Matrix4.scale(x, y, 1)
+
+    def set_anchor(self, x, y):
+        self.anchor = Matrix4.translate(-x, -y, 0)
+
+    def set_scale(self, x, y):
+        self.scale = Matrix4.scale(x, y, 1)
+
+    def set_angle(self, radians):
+        self.rotation = Matrix4.rotate_z(radians)
+
+    @property
+    def matrix(self):
+        return self.translation * self.rotation * self.scale * self.anchor * self.size
+
+
+def random_args(rng, name):
+    if name == 'set_angle':
+        return (rng.uniform(-math.pi * 2, math.pi * 2),)
+    if name == 'set_scale':
+        # Negative scales are used by QuadDrawable to flip
+        return (rng.choice((-1, 1)) * rng.uniform(0.1, 4), rng.choice((-1, 1)) * rng.uniform(0.1, 4))
+    return rng.uniform(-300, 300), rng.uniform(-300, 300)
+
+
+def assert_same(transform, chain):
+    assert transform.matrix.m.dtype == np.float32
+    assert np.allclose(transform.matrix.m, chain.matrix.m, rtol=1e-5, atol=1e-2)
+
+
+def test_initial_matrix():
+    args = (10, 20, 30, 40, 5, 6, 2, -1, 0.5)
+    assert_same(Transform2D(*args), MatrixChain(*args))
+    assert_same(Transform2D(), MatrixChain(0, 0, 1, 1, 0, 0, 1, 1, 0))
+
+
+def test_each_component():
+    rng = random.Random(0)
+    for name in ('set_position', 'set_size', 'set_anchor', 'set_scale', 'set_angle'):
+        args = (1, 2, 30, 40, 5, 6, 1.5, 0.5, 0.25)
+        transform = Transform2D(*args)
+        chain = MatrixChain(*args)
+        assert_same(transform, chain)
+        for _ in range(20):
+            values = random_args(rng, name)
+            getattr(transform, name)(*values)
+            getattr(chain, name)(*values)
+            assert_same(transform, chain)
+
+
+def test_position_after_linear_change():
+    # Only the translation is rewritten on a move, it has to include the anchor offset
+    transform = Transform2D(0, 0, 10, 10, 3, 4, 2, 2, 1.0)
+    chain = MatrixChain(0, 0, 10, 10, 3, 4, 2, 2, 1.0)
+    for name, values in (('set_angle', (0.3,)), ('set_position', (50, 60)), ('set_anchor', (-1, 7)),
+                         ('set_position', (-5, 2)), ('set_position', (8, 9)), ('set_scale', (-1, 3))):
+        getattr(transform, name)(*values)
+        getattr(chain, name)(*values)
+        assert_same(transform, chain)
+
+
+def test_random_updates():
+    rng = random.Random(1)
+    names = ('set_position', 'set_size', 'set_anchor', 'set_scale', 'set_angle')
+    transform = Transform2D()
+    chain = MatrixChain(0, 0, 1, 1, 0, 0, 1, 1, 0)
+    for _ in range(500):
+        # Several changes can happen between two reads of the matrix
+        for name in rng.sample(names, rng.randint(1, 3)):
+            values = random_args(rng, name)
+            getattr(transform, name)(*values)
+            getattr(chain, name)(*values)
+        if rng.random() < 0.1:
+            transform.invalidate()
+        assert_same(transform, chain)
+
+
+def test_matrix_updated_in_place():
+    transform = Transform2D(0, 0, 10, 10)
+    matrix = transform.matrix
+    transform.set_position(5, 6)
+    assert transform.matrix is matrix
+    assert tuple(matrix.m[3, :2]) == (5, 6)
+    transform.set_angle(math.pi / 2)
+    assert transform.matrix is matrix
+    assert np.allclose(matrix.m, MatrixChain(5, 6, 10, 10, 0, 0, 1, 1, math.pi / 2).matrix.m, atol=1e-5)
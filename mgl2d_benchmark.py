@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+CPU side benchmarks of the mgl2d drawing code, no GL context is needed.
+
+Usage:
+
+    python mgl2d_benchmark.py [--sprites 10000] [--textures 1 8 64] [--frames 20] [--updates 100000]
+"""
+
+import argparse
+import random
+import time
+import timeit
+
+import numpy
+
+from mgl2d.graphics.sprite_batch import SpriteBatch
+from mgl2d.math.matrix4 import Matrix4
+from mgl2d.math.transform2d import Transform2D
+
+
+def make_sprites(num_sprites, num_textures, seed=0):
+    rnd = random.Random(seed)
+    # Any hashable object works as texture as long as nothing is drawn
+    textures = [object() for _ in range(num_textures)]
+    return [(rnd.choice(textures), rnd.uniform(0, 800), rnd.uniform(0, 600), rnd.uniform(0, 6.28))
+            for _ in range(num_sprites)]
+
+
+def time_per_frame(func, sprites, frames):
+    start = time.perf_counter()
+    for _ in range(frames):
+        draw_calls = func(sprites)
+    return (time.perf_counter() - start) / frames, draw_calls
+
+
+def draw_quad_drawables(sprites, transforms):
+    # The model matrix QuadDrawable computes for each sprite moved since the last frame
+    for sprite in sprites:
+        texture, x, y, angle = sprite
+        transform = transforms.get(id(sprite))
+        if transform is None:
+            transform = transforms[id(sprite)] = Transform2D(size_x=32, size_y=32, anchor_x=16, anchor_y=16)
+        transform.set_position(x, y)
+        transform.set_angle(angle)
+        transform.matrix
+    return len(sprites)
+
+
+def draw_sprite_batch(sprites, batch):
+    batch.begin()
+    for texture, x, y, angle in sprites:
+        batch.add(texture, x, y, 32, 32, 16, 16, angle)
+    vertices, runs = batch.build_vertices()
+    return len(runs)
+
+
+def bench_sprite_batch(num_sprites, textures, frames):
+    print('%-22s %8s %9s %11s %10s' % ('draw', 'sprites', 'textures', 'draw calls', 'ms/frame'))
+    for num_textures in textures:
+        sprites = make_sprites(num_sprites, num_textures)
+        # The transforms and the batch are kept from one frame to the next
+        transforms = {}
+        batch = SpriteBatch(capacity=1024)
+        for name, func in (('QuadDrawable', lambda sprites: draw_quad_drawables(sprites, transforms)),
+                           ('SpriteBatch', lambda sprites: draw_sprite_batch(sprites, batch))):
+            duration, draw_calls = time_per_frame(func, sprites, frames)
+            print('%-22s %8d %9d %11d %10.2f' % (name, num_sprites, num_textures, draw_calls, duration * 1000))
+
+
+class MatrixChainTransform(object):
+    # How QuadDrawable computed its model matrix before Transform2D
+    def __init__(self):
+        self._m_translation = Matrix4.translate(0, 0, 0)
+        self._m_size = Matrix4.scale(1, 1, 1)
+        self._m_anchor = Matrix4.translate(0, 0, 0)
+        self._m_rotation = Matrix4.rotate_z(0)
+        self._m_scale = Matrix4.scale(1, 1, 1)
+        self._m_transform = None
+        self._is_transform_invalid = True
+
+    def set_position(self, x, y):
+        self._m_translation = Matrix4.translate(x, y, 0)
+        self._is_transform_invalid = True
+
+    def set_size(self, x, y):
+        self._m_size = Matrix4.scale(x, y, 1)
+        self._is_transform_invalid = True
+
+    def set_anchor(self, x, y):
+        self._m_anchor = Matrix4.translate(-x, -y, 0)
+        self._is_transform_invalid = True
+
+    def set_scale(self, x, y):
+        self._m_scale = Matrix4.scale(x, y, 1)
+        self._is_transform_invalid = True
+
+    def set_angle(self, radians):
+        self._m_rotation = Matrix4.rotate_z(radians)
+        self._is_transform_invalid = True
+
+    @property
+    def matrix(self):
+        if self._is_transform_invalid:
+            self._m_transform = self._m_translation * self._m_rotation * self._m_scale * self._m_anchor * self._m_size
+            self._is_transform_invalid = False
+        return self._m_transform
+
+
+def move(transform):
+    transform.set_position(10, 20)
+    return transform.matrix
+
+
+def move_glyph(transform):
+    # What Font.draw_string changes for each character
+    transform.set_size(12, 16)
+    transform.set_position(10, 20)
+    return transform.matrix
+
+
+def update_all(transform):
+    transform.set_position(10, 20)
+    transform.set_size(32, 32)
+    transform.set_anchor(16, 16)
+    transform.set_scale(-2, 1)
+    transform.set_angle(0.5)
+    return transform.matrix
+
+
+def bench_transform(updates):
+    print('%-22s %14s %14s %8s' % ('update', 'matrices [us]', 'closed [us]', 'speedup'))
+    for func in (move, move_glyph, update_all):
+        old, new = MatrixChainTransform(), Transform2D()
+        assert numpy.allclose(func(old).m, func(new).m, atol=1e-4)
+        t_old = timeit.timeit(lambda: func(old), number=updates) / updates
+        t_new = timeit.timeit(lambda: func(new), number=updates) / updates
+        print('%-22s %14.2f %14.2f %8.1f' % (func.__name__, t_old * 1e6, t_new * 1e6, t_old / t_new))
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description='mgl2d benchmarks')
+    arg_parser.add_argument('--sprites', type=int, default=10000)
+    arg_parser.add_argument('--textures', type=int, nargs='+', default=[1, 8, 64])
+    arg_parser.add_argument('--frames', type=int, default=20)
+    arg_parser.add_argument('--updates', type=int, default=100000)
+    args = arg_parser.parse_args()
+    bench_sprite_batch(args.sprites, args.textures, args.frames)
+    bench_transform(args.updates)
@@ -1,5 +1,5 @@
 from .core import dispatch
 from .dispatcher import (Dispatcher, halt_ordering, restart_ordering,
-    MDNotImplementedError)
+    MDNotImplementedError, CompiledDispatcher, dispatchers, clear_caches)
 
 __version__ = '0.6.0'
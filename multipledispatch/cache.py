@@ -0,0 +1,134 @@
+from collections import namedtuple, OrderedDict
+from functools import partial
+from weakref import ref
+
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+def make_cache(maxsize=None, weak=False):
+    """ The dispatch cache of a policy
+
+    >>> make_cache()
+    {}
+    >>> make_cache(128).maxsize
+    128
+    >>> make_cache(weak=True)
+    <WeakTypeCache of 0 entries>
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Largest number of entries, the least recently used entry is dropped
+        for a new one.  The cache is unbounded by default.
+    weak : bool, optional
+        Don't keep the types in the keys alive, entries are dropped when one
+        of their types is garbage collected.
+    """
+    if maxsize is not None and maxsize < 1:
+        raise ValueError('Cache size must be positive: %r' % (maxsize,))
+    if weak:
+        return WeakTypeCache(maxsize)
+    if maxsize is None:
+        return {}
+    return LRUCache(maxsize)
+
+
+class LRUCache(OrderedDict):
+    """ Dict holding the ``maxsize`` most recently used entries
+
+    >>> cache = LRUCache(2)
+    >>> cache['a'] = 1
+    >>> cache['b'] = 2
+    >>> cache['a']
+    1
+    >>> cache['c'] = 3
+    >>> sorted(cache)
+    ['a', 'c']
+    """
+
+    def __init__(self, maxsize):
+        super(LRUCache, self).__init__()
+        self.maxsize = maxsize
+
+    def __getitem__(self, key, getitem=OrderedDict.__getitem__,
+                    move_to_end=OrderedDict.move_to_end):
+        value = getitem(self, key)
+        move_to_end(self, key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key not in self and len(self) >= self.maxsize:
+            self.popitem(last=False)
+        OrderedDict.__setitem__(self, key, value)
+
+    def __reduce__(self):
+        return self.__class__, (self.maxsize,)
+
+
+def _ids(key):
+    """ Key of the ids of the types of a key """
+    if type(key) is tuple:
+        return tuple([id(typ) for typ in key])
+    return id(key)
+
+
+class WeakTypeCache(object):
+    """ Dispatch cache which doesn't keep the types of its keys alive
+
+    Keys are types or tuples of types.  The entries are stored under the ids
+    of the types and dropped when one of the types is garbage collected.
+
+    >>> cache = WeakTypeCache()
+    >>> class A(object): pass
+    >>> cache[(A, int)] = 'implementation'
+    >>> cache[(A, int)]
+    'implementation'
+    >>> del A
+    >>> import gc; _ = gc.collect()
+    >>> len(cache)
+    0
+    """
+    __slots__ = 'maxsize', '_entries', '_refs', '__weakref__'
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize
+        self._entries = {} if maxsize is None else LRUCache(maxsize)
+        self._refs = {}  # {id(type): (weakref to type, {keys of entries})}
+
+    def __getitem__(self, key):
+        if type(key) is tuple:
+            return self._entries[tuple([id(typ) for typ in key])]
+        return self._entries[id(key)]
+
+    def __setitem__(self, key, value):
+        ids = _ids(key)
+        for typ in key if type(key) is tuple else (key,):
+            try:
+                keys = self._refs[id(typ)][1]
+            except KeyError:
+                keys = set()
+                self._refs[id(typ)] = (ref(typ, partial(self._collected,
+                                                        id(typ))), keys)
+            keys.add(ids)
+        self._entries[ids] = value
+
+    def __contains__(self, key):
+        return _ids(key) in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self._refs.clear()
+
+    def _collected(self, type_id, reference):
+        for ids in self._refs.pop(type_id, (None, ()))[1]:
+            self._entries.pop(ids, None)
+
+    def __reduce__(self):
+        return self.__class__, (self.maxsize,)
+
+    def __repr__(self):
+        return '<WeakTypeCache of %d entries>' % len(self)
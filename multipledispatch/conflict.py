@@ -1,3 +1,5 @@
+from bisect import bisect_right, insort
+
 from .utils import _toposort, groupby
 from .variadic import isvariadic
 
@@ -119,3 +121,165 @@ def ordering(signatures):
             edges[s] = []
     edges = dict((k, [b for a, b in v]) for k, v in edges.items())
     return _toposort(edges)
+
+
+def _plain(typ):
+    """ issubclass(other, typ) only depends on the mro of other """
+    return type(typ).__subclasscheck__ is type.__subclasscheck__
+
+
+class Ordering(object):
+    """ Incrementally maintained ``ordering`` and ``ambiguities``
+
+    ``add`` compares a new signature only with the signatures it may be
+    consistent with: the ones of the same length whose types at some
+    position are all sub- or superclasses of its type at that position, and
+    the variadic ones.  The signature is placed right after the signatures
+    which supercede it, which is before the ones it supercedes, ambiguities
+    are added and the ones the signature breaks are removed.
+
+    Like ``ordering``, which checks the signatures added last first when
+    nothing else decides, a signature comes before the signatures added
+    earlier which neither supercede it nor are superceded by it.  Among
+    three or more such signatures the order can still differ from the one
+    of ``ordering``, which depends on all the signatures.
+
+    >>> class A(object): pass
+    >>> class B(A): pass
+    >>> order = Ordering([(A, B)])
+    >>> order.add((B, A))
+    >>> list(map(set, order.ambiguities)) == [set([(A, B), (B, A)])]
+    True
+    >>> order.add((B, B))
+    >>> order.signatures[0] == (B, B), order.ambiguities
+    (True, set())
+    """
+    __slots__ = ('ambiguities', '_ranks', '_sorted', '_signatures', '_index',
+                 '_variadic', '_types', '_below', '_special')
+
+    def __init__(self, signatures=()):
+        self.ambiguities = set()
+        self._ranks = {}  # {signature: position in the ordering}
+        self._sorted = []  # the ranks in increasing order
+        self._signatures = None
+        self._index = {}  # {(length, position): {type: {signature}}}
+        self._variadic = []
+        self._types = set()
+        self._below = {}  # {type: {added type with type in its mro}}
+        self._special = set()  # added types with their own __subclasscheck__
+        for signature in signatures:
+            self.add(signature)
+
+    def __len__(self):
+        return len(self._ranks)
+
+    def __contains__(self, signature):
+        return tuple(signature) in self._ranks
+
+    @property
+    def signatures(self):
+        """ The signatures in the order to check, first to last """
+        if self._signatures is None:
+            self._signatures = sorted(self._ranks, key=self._ranks.get)
+        return self._signatures
+
+    def add(self, signature):
+        signature = tuple(signature)
+        if signature in self._ranks:
+            return
+
+        candidates = self._candidates(signature)
+        self._insert(signature,
+                     [c for c in candidates if edge(c, signature)],
+                     [c for c in candidates if edge(signature, c)])
+
+        # signatures superceding the new one and another break their ambiguity
+        above = [c for c in candidates if supercedes(c, signature)]
+        for c in candidates:
+            if (ambiguous(signature, c)
+                    and not any(supercedes(d, c) for d in above)):
+                pair = (signature, c) if hash(signature) < hash(c) else (c, signature)
+                self.ambiguities.add(pair)
+        below = set(c for c in candidates if supercedes(signature, c))
+        if len(below) > 1:
+            self.ambiguities = set((a, b) for a, b in self.ambiguities
+                                   if a not in below or b not in below)
+
+        if not signature or isvariadic(signature[-1]):
+            self._variadic.append(signature)
+        else:
+            n = len(signature)
+            for i, typ in enumerate(signature):
+                self._add_type(typ)
+                index = self._index.setdefault((n, i), {})
+                index.setdefault(typ, set()).add(signature)
+
+    def _insert(self, signature, before, after):
+        """ Rank signature right after the signatures before, before after """
+        self._signatures = None
+        low = max(self._ranks[c] for c in before) if before else None
+        high = min(self._ranks[c] for c in after) if after else None
+        if low is not None and high is not None and low >= high:
+            # superceding is not transitive for these signatures
+            self._ranks[signature] = 0
+            self._set_ranks(ordering(self._ranks))
+            return
+
+        if low is None:
+            rank = self._sorted[0] - 1 if self._sorted else 0
+        else:
+            i = bisect_right(self._sorted, low)
+            if i == len(self._sorted):
+                rank = low + 1
+            elif low < (low + self._sorted[i]) / 2. < self._sorted[i]:
+                rank = (low + self._sorted[i]) / 2.
+            else:
+                # no rank left after low, spread the ranks out
+                self._set_ranks(self.signatures)
+                return self._insert(signature, before, after)
+        self._ranks[signature] = rank
+        insort(self._sorted, rank)
+
+    def _set_ranks(self, signatures):
+        self._signatures = None
+        self._ranks = dict((s, i) for i, s in enumerate(signatures))
+        self._sorted = list(range(len(self._ranks)))
+
+    def _candidates(self, signature):
+        """ The added signatures which may be consistent with signature """
+        if not signature or isvariadic(signature[-1]):
+            return list(self._ranks)
+
+        n = len(signature)
+        smallest = None
+        for i, typ in enumerate(signature):
+            index = self._index.get((n, i), {})
+            sets = [index[t] for t in self._related(typ) if t in index]
+            size = sum(map(len, sets))
+            if smallest is None or size < smallest[0]:
+                smallest = size, sets
+            if not size:
+                break
+        candidates = set(self._variadic)
+        candidates.update(*smallest[1])
+        return list(candidates)
+
+    def _related(self, typ):
+        """ The added types which are sub- or superclasses of typ """
+        if _plain(typ):
+            related = set(self._below.get(typ, ()))
+        else:
+            related = set(t for t in self._types if issubclass(t, typ))
+        related.update(t for t in typ.__mro__ if t in self._types)
+        related.update(t for t in self._special
+                       if issubclass(t, typ) or issubclass(typ, t))
+        return related
+
+    def _add_type(self, typ):
+        if typ in self._types:
+            return
+        self._types.add(typ)
+        for base in typ.__mro__:
+            self._below.setdefault(base, set()).add(typ)
+        if not _plain(typ):
+            self._special.add(typ)
@@ -1,7 +1,8 @@
 import inspect
 import sys
 
-from .dispatcher import Dispatcher, MethodDispatcher, ambiguity_warn
+from .dispatcher import (Dispatcher, MethodDispatcher, CompiledDispatcher,
+                         CompiledMethodDispatcher, ambiguity_warn)
 
 global_namespace = dict()
 
@@ -32,6 +33,24 @@ def dispatch(*types, **kwargs):
     >>> f(3.0)
     2.0
 
+    Use a ``CompiledDispatcher`` with the compiled keyword argument, when
+    the function is first dispatched in its namespace
+
+    >>> @dispatch(int, compiled=True)
+    ... def double(x):
+    ...     return 2 * x
+    >>> double(3), double.hits, double.misses
+    (6, 0, 1)
+
+    Bound the dispatch cache, or don't keep the types of the calls alive,
+    with the cache_size and weak_cache keyword arguments
+
+    >>> @dispatch(object, cache_size=128, weak_cache=True)
+    ... def name(x):
+    ...     return type(x).__name__
+    >>> name(1), name.cache_info().maxsize
+    ('int', 128)
+
     Specify an isolated namespace with the namespace keyword argument
 
     >>> my_namespace = dict()
@@ -50,6 +69,9 @@ def dispatch(*types, **kwargs):
     ...         self.data = [datum]
     """
     namespace = kwargs.get('namespace', global_namespace)
+    compiled = kwargs.get('compiled', False)
+    cache = {'cache_size': kwargs.get('cache_size'),
+             'weak_cache': kwargs.get('weak_cache', False)}
 
     types = tuple(types)
 
@@ -57,13 +79,14 @@ def dispatch(*types, **kwargs):
         name = func.__name__
 
         if ismethod(func):
-            dispatcher = inspect.currentframe().f_back.f_locals.get(
-                name,
-                MethodDispatcher(name),
-            )
+            dispatcher = inspect.currentframe().f_back.f_locals.get(name)
+            if dispatcher is None:
+                dispatcher = (CompiledMethodDispatcher(name, **cache)
+                              if compiled else MethodDispatcher(name, **cache))
         else:
             if name not in namespace:
-                namespace[name] = Dispatcher(name)
+                namespace[name] = (CompiledDispatcher(name, **cache)
+                                   if compiled else Dispatcher(name, **cache))
             dispatcher = namespace[name]
 
         dispatcher.add(types, func)
@@ -1,6 +1,9 @@
 from warnings import warn
 import inspect
-from .conflict import ordering, ambiguities, super_signature, AmbiguityWarning
+from types import MethodType
+from weakref import WeakSet
+from .cache import CacheInfo, make_cache, WeakTypeCache
+from .conflict import Ordering, super_signature, AmbiguityWarning
 from .utils import expand_tuples
 from .variadic import Variadic, isvariadic
 import itertools as itl
@@ -47,6 +50,31 @@ def restart_ordering(on_ambiguity=ambiguity_warn):
     )
 
 
+_dispatchers = WeakSet()
+
+
+def dispatchers():
+    """ The dispatchers which are alive
+
+    >>> f = Dispatcher('f')
+    >>> f in dispatchers()
+    True
+    >>> [(d.name, d.cache_info()) for d in dispatchers()]  # doctest: +SKIP
+    [('f', CacheInfo(hits=0, misses=0, maxsize=None, currsize=0)), ...]
+    """
+    return list(_dispatchers)
+
+
+def clear_caches():
+    """ Clear the dispatch caches of all dispatchers
+
+    The implementations are resolved again on the next calls, except the ones
+    frozen dispatchers resolved up front.
+    """
+    for dispatcher in dispatchers():
+        dispatcher.cache_clear()
+
+
 def variadic_signature_matches_iter(types, full_signature):
     """Check if a set of input types matches a variadic signature.
 
@@ -116,15 +144,27 @@ class Dispatcher(object):
     4
     >>> f(3.0)
     2.0
+
+    The implementations resolved for the types of the calls are cached.  The
+    cache is unbounded by default, ``cache_size`` keeps only the most
+    recently used entries and ``weak_cache`` drops the entries of types
+    which are garbage collected.  See ``make_cache``.
+
+    >>> g = Dispatcher('g', cache_size=256, weak_cache=True)
     """
-    __slots__ = '__name__', 'name', 'funcs', '_ordering', '_cache', 'doc'
+    __slots__ = ('__name__', 'name', 'funcs', '_ordering', '_order', '_cache',
+                 'doc', 'hits', 'misses', '__weakref__')
 
-    def __init__(self, name, doc=None):
+    def __init__(self, name, doc=None, cache_size=None, weak_cache=False):
         self.name = self.__name__ = name
         self.funcs = {}
         self.doc = doc
 
-        self._cache = {}
+        self._order = Ordering()
+        self._cache = make_cache(cache_size, weak_cache)
+        self.hits = 0
+        self.misses = 0
+        _dispatchers.add(self)
 
     def register(self, *types, **kwargs):
         """ register dispatcher with new implementation
@@ -241,7 +281,9 @@ class Dispatcher(object):
             else:
                 new_signature.append(typ)
 
-        self.funcs[tuple(new_signature)] = func
+        new_signature = tuple(new_signature)
+        self.funcs[new_signature] = func
+        self._order.add(new_signature)
         self._cache.clear()
 
         try:
@@ -257,8 +299,12 @@ class Dispatcher(object):
             return self.reorder()
 
     def reorder(self, on_ambiguity=ambiguity_warn):
-        self._ordering = od = ordering(self.funcs)
-        amb = ambiguities(self.funcs)
+        if (len(self._order) != len(self.funcs) or
+                not all(sig in self._order for sig in self.funcs)):
+            # funcs was changed without add
+            self._order = Ordering(self.funcs)
+        self._ordering = od = self._order.signatures
+        amb = set(self._order.ambiguities)
         if amb:
             on_ambiguity(self, amb)
         return od
@@ -267,6 +313,7 @@ class Dispatcher(object):
         types = tuple([type(arg) for arg in args])
         try:
             func = self._cache[types]
+            self.hits += 1
         except KeyError:
             func = self.dispatch(*types)
             if not func:
@@ -274,6 +321,7 @@ class Dispatcher(object):
                     'Could not find signature for %s: <%s>' %
                     (self.name, str_signature(types)))
             self._cache[types] = func
+            self.misses += 1
         try:
             return func(*args, **kwargs)
 
@@ -350,15 +398,47 @@ class Dispatcher(object):
 
         return self.dispatch(*types)
 
+    def cache_info(self):
+        """ Statistics of the dispatch cache
+
+        >>> f = Dispatcher('f', cache_size=2)
+        >>> f.add((object,), lambda x: x)
+        >>> f(1), f('a'), f(2.0), f(1)
+        (1, 'a', 2.0, 1)
+        >>> f.cache_info()
+        CacheInfo(hits=0, misses=4, maxsize=2, currsize=2)
+
+        Returns
+        -------
+        CacheInfo
+            Named tuple of the calls found in the cache, the calls resolved
+            from the ordering, the largest and the current number of entries.
+        """
+        return CacheInfo(self.hits, self.misses,
+                         getattr(self._cache, 'maxsize', None),
+                         len(self._cache))
+
+    def cache_clear(self):
+        """ Clear the dispatch cache and its statistics """
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
     def __getstate__(self):
         return {'name': self.name,
-                'funcs': self.funcs}
+                'funcs': self.funcs,
+                'cache_size': getattr(self._cache, 'maxsize', None),
+                'weak_cache': isinstance(self._cache, WeakTypeCache)}
 
     def __setstate__(self, d):
         self.name = d['name']
         self.funcs = d['funcs']
-        self._ordering = ordering(self.funcs)
-        self._cache = dict()
+        self._order = Ordering(self.funcs)
+        self._ordering = self._order.signatures
+        self._cache = make_cache(d.get('cache_size'), d.get('weak_cache'))
+        self.hits = 0
+        self.misses = 0
+        _dispatchers.add(self)
 
     @property
     def __doc__(self):
@@ -435,6 +515,244 @@ class MethodDispatcher(Dispatcher):
         return func(self.obj, *args, **kwargs)
 
 
+_caller_template = """
+def call({args}**kwargs):
+    key = {key}
+    try:
+        func = table[key]
+        dispatcher.hits += 1
+    except KeyError:
+        func = dispatcher._miss(key)
+    try:
+        return func({args}**kwargs)
+    except MDNotImplementedError:
+        return dispatcher._call_next(key, ({args}), kwargs)
+"""
+
+
+class CompiledDispatcher(Dispatcher):
+    """ Dispatcher resolving implementations through a flat table
+
+    Single argument calls are looked up by the type of the argument, other
+    calls by the tuple of argument types.  ``caller(n)`` returns a function
+    specialized for ``n`` positional arguments which skips the generic
+    ``__call__``.  ``freeze`` resolves a declared set of signatures up front
+    and rejects further implementations.
+
+    ``hits`` and ``misses`` count the calls found in the table and the calls
+    resolved from the ordering.
+
+    >>> f = CompiledDispatcher('f')
+    >>> f.add((int,), lambda x: x + 1)
+    >>> f.add((object,), lambda x: x)
+    >>> f(1), f('a'), f(2)
+    (2, 'a', 3)
+    >>> f.hits, f.misses
+    (1, 2)
+
+    See Also:
+        Dispatcher
+    """
+    __slots__ = '_callers', '_frozen', '_resolved'
+
+    def __init__(self, name, doc=None, cache_size=None, weak_cache=False):
+        super(CompiledDispatcher, self).__init__(
+            name, doc=doc, cache_size=cache_size, weak_cache=weak_cache)
+        self._callers = {}
+        self._frozen = False
+        self._resolved = {}  # {table key: implementation} resolved by freeze
+
+    @property
+    def frozen(self):
+        return self._frozen
+
+    def add(self, signature, func):
+        if self._frozen:
+            raise RuntimeError('Cannot add implementations to frozen '
+                               'dispatcher %s' % self.name)
+        super(CompiledDispatcher, self).add(signature, func)
+
+    def freeze(self, *signatures):
+        """ Resolve signatures up front and reject further implementations
+
+        >>> f = CompiledDispatcher('f')
+        >>> f.add((object, object), lambda x, y: 'objects')
+        >>> f.add((int, int), lambda x, y: 'ints')
+        >>> f = f.freeze((int, int), (int, str))
+        >>> f(1, 'a'), f.misses
+        ('objects', 0)
+
+        Parameters
+        ----------
+        signatures : types or tuples of types
+            Types of the arguments of the calls to resolve.  Calls with
+            other types are still resolved on their first use.  The
+            resolved signatures are kept when the cache is cleared.
+        """
+        for signature in signatures:
+            if not isinstance(signature, tuple):
+                signature = (signature,)
+            func = self.dispatch(*signature)
+            if not func:
+                raise NotImplementedError(
+                    'Could not find signature for %s: <%s>' %
+                    (self.name, str_signature(signature)))
+            self._resolved[_table_key(signature)] = func
+            self._cache[_table_key(signature)] = func
+
+        self._frozen = True
+        return self
+
+    def cache_clear(self):
+        """ Clear the dispatch cache and its statistics, keeping the
+        signatures resolved by ``freeze`` """
+        super(CompiledDispatcher, self).cache_clear()
+        for key, func in self._resolved.items():
+            self._cache[key] = func
+
+    def caller(self, n):
+        """ Function calling the dispatcher with ``n`` positional arguments
+
+        >>> f = CompiledDispatcher('f')
+        >>> f.add((int, int), lambda x, y: x + y)
+        >>> add = f.caller(2)
+        >>> add(1, 2)
+        3
+        """
+        try:
+            return self._callers[n]
+        except KeyError:
+            pass
+
+        args = ['a%d' % i for i in range(n)]
+        if n == 1:
+            key = 'type(a0)'
+        else:
+            key = '(%s)' % ''.join('type(%s), ' % arg for arg in args)
+        source = _caller_template.format(
+            args=''.join('%s, ' % arg for arg in args), key=key)
+
+        namespace = {'table': self._cache, 'dispatcher': self,
+                     'MDNotImplementedError': MDNotImplementedError}
+        exec(source, namespace)
+        call = namespace['call']
+        call.__name__ = self.name
+        self._callers[n] = call
+        return call
+
+    def __call__(self, *args, **kwargs):
+        if len(args) == 1:
+            key = type(args[0])
+        elif len(args) == 2:
+            key = (type(args[0]), type(args[1]))
+        else:
+            key = tuple([type(arg) for arg in args])
+        try:
+            func = self._cache[key]
+            self.hits += 1
+        except KeyError:
+            func = self._miss(key)
+        try:
+            return func(*args, **kwargs)
+        except MDNotImplementedError:
+            return self._call_next(key, args, kwargs)
+
+    def _miss(self, key):
+        types = key if isinstance(key, tuple) else (key,)
+        func = self.dispatch(*types)
+        if not func:
+            raise NotImplementedError(
+                'Could not find signature for %s: <%s>' %
+                (self.name, str_signature(types)))
+        self._cache[key] = func
+        self.misses += 1
+        return func
+
+    def _call_next(self, key, args, kwargs):
+        """ Call the implementations after the first one raising
+        MDNotImplementedError """
+        types = key if isinstance(key, tuple) else (key,)
+        funcs = self.dispatch_iter(*types)
+        next(funcs)  # burn first
+        for func in funcs:
+            try:
+                return func(*args, **kwargs)
+            except MDNotImplementedError:
+                pass
+
+        raise NotImplementedError(
+            "Matching functions for "
+            "%s: <%s> found, but none completed successfully" % (
+                self.name, str_signature(types),
+            ),
+        )
+
+    def __setstate__(self, d):
+        super(CompiledDispatcher, self).__setstate__(d)
+        self._callers = {}
+        self._frozen = False
+        self._resolved = {}
+
+
+def _table_key(types):
+    """ Key of the types of a call in the table of a CompiledDispatcher """
+    return types[0] if len(types) == 1 else tuple(types)
+
+
+class CompiledMethodDispatcher(CompiledDispatcher):
+    """ Compiled dispatch of methods based on type signature
+
+    Unlike ``MethodDispatcher`` the dispatcher isn't modified when it is
+    looked up on an instance, it returns a bound method.
+
+    See Also:
+        CompiledDispatcher
+        MethodDispatcher
+    """
+    __slots__ = ('_method',)
+
+    get_func_params = MethodDispatcher.__dict__['get_func_params']
+
+    def __init__(self, name, doc=None, cache_size=None, weak_cache=False):
+        super(CompiledMethodDispatcher, self).__init__(
+            name, doc=doc, cache_size=cache_size, weak_cache=weak_cache)
+        self._method = self._method_caller()
+
+    def _method_caller(self):
+        dispatcher = self
+
+        def method(obj, *args, **kwargs):
+            if len(args) == 1:
+                key = type(args[0])
+            elif len(args) == 2:
+                key = (type(args[0]), type(args[1]))
+            else:
+                key = tuple([type(arg) for arg in args])
+            try:
+                func = dispatcher._cache[key]
+                dispatcher.hits += 1
+            except KeyError:
+                func = dispatcher._miss(key)
+            try:
+                return func(obj, *args, **kwargs)
+            except MDNotImplementedError:
+                return dispatcher._call_next(key, (obj,) + args, kwargs)
+        method.__name__ = self.name
+        return method
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return MethodType(self._method, instance)
+
+    def __setstate__(self, d):
+        super(CompiledMethodDispatcher, self).__setstate__(d)
+        self._method = self._method_caller()
+
+    def __call__(self, obj, *args, **kwargs):
+        return self._method(obj, *args, **kwargs)
+
+
 def str_signature(sig):
     """ String representation of type signature
 
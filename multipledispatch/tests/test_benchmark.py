@@ -1,4 +1,5 @@
-from multipledispatch import dispatch
+from multipledispatch import dispatch, Dispatcher, CompiledDispatcher
+from multipledispatch.conflict import ordering, ambiguities
 import pytest
 
 
@@ -52,3 +53,109 @@ def test_benchmark_add_and_use_instance(benchmark):
         mul('x', 5)
         mul(1, 2, 3., 4., 5.)
         mul(1, 2, 3, 4, 5)
+
+
+compiled_namespace = {}
+
+
+@dispatch(int, namespace=compiled_namespace, compiled=True)
+def isint(x):
+    return True
+
+
+@dispatch(object, namespace=compiled_namespace)
+def isint(x):
+    return False
+
+
+@dispatch(object, object, namespace=compiled_namespace)
+def isint(x, y):
+    return False
+
+
+compiled_isint = compiled_namespace['isint']
+
+
+@pytest.mark.parametrize("val", [1, 'a'])
+def test_benchmark_call_single_dispatch_compiled(benchmark, val):
+    benchmark(compiled_isint, val)
+
+
+@pytest.mark.parametrize("val", [1, 'a'])
+def test_benchmark_call_single_dispatch_caller(benchmark, val):
+    benchmark(compiled_isint.caller(1), val)
+
+
+@pytest.mark.parametrize("val", [(1, 4)])
+def test_benchmark_call_multiple_dispatch_compiled(benchmark, val):
+    benchmark(compiled_isint, *val)
+
+
+@pytest.mark.parametrize("val", [(1, 4)])
+def test_benchmark_call_multiple_dispatch_caller(benchmark, val):
+    benchmark(compiled_isint.caller(2), *val)
+
+
+class Shape(object):
+    @dispatch(int)
+    def scale(self, x):
+        return x
+
+    @dispatch(int, compiled=True)
+    def compiled_scale(self, x):
+        return x
+
+
+def test_benchmark_call_method(benchmark):
+    benchmark(Shape().scale, 1)
+
+
+def test_benchmark_call_method_compiled(benchmark):
+    shape = Shape()
+    benchmark(lambda: shape.compiled_scale(1))
+
+
+def test_benchmark_call_method_lookup(benchmark):
+    shape = Shape()
+    benchmark(lambda: shape.scale(1))
+
+
+@pytest.mark.parametrize("cache", [{'cache_size': 64}, {'weak_cache': True}],
+                         ids=['lru', 'weak'])
+@pytest.mark.parametrize("compiled", [False, True])
+def test_benchmark_call_cache_policy(benchmark, cache, compiled):
+    f = (CompiledDispatcher if compiled else Dispatcher)('f', **cache)
+    f.add((int,), lambda x: True)
+    f.add((object,), lambda x: False)
+    benchmark(f, 1)
+
+
+def signatures(n):
+    classes = [type('T%d' % i, (object,), {}) for i in range(n)]
+    return ([(cls,) for cls in classes] +
+            [(cls, object) for cls in classes] +
+            [(object,)])
+
+
+@pytest.mark.parametrize("n", [10, 100, 1000])
+def test_benchmark_register_and_call(benchmark, n):
+    sigs = signatures(n)
+
+    @benchmark
+    def inner():
+        f = Dispatcher('f')
+        for sig in sigs:
+            f.add(sig, lambda *args: True)
+        f(1)
+
+
+@pytest.mark.parametrize("n", [10, 100, 1000])
+def test_benchmark_full_ordering(benchmark, n):
+    sigs = signatures(n)
+
+    def inner():
+        ordering(sigs)
+        ambiguities(sigs)
+
+    # the full ordering is quadratic, a single round is slow enough
+    benchmark.pedantic(inner, rounds=1, iterations=1)
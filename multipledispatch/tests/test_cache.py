@@ -0,0 +1,65 @@
+import gc
+import pickle
+
+from multipledispatch.cache import make_cache, LRUCache, WeakTypeCache
+from multipledispatch.utils import raises
+
+
+class A(object): pass
+
+
+def test_make_cache():
+    assert type(make_cache()) is dict
+    assert type(make_cache(10)) is LRUCache
+    assert type(make_cache(weak=True)) is WeakTypeCache
+    assert make_cache(10, weak=True).maxsize == 10
+    assert raises(ValueError, lambda: make_cache(0))
+
+
+def test_lru_cache():
+    cache = LRUCache(2)
+    cache[(int,)] = 1
+    cache[(float,)] = 2
+    assert cache[(int,)] == 1
+    cache[(str,)] = 3
+    assert set(cache) == set([(int,), (str,)])
+    cache[(str,)] = 4
+    assert len(cache) == 2
+    assert raises(KeyError, lambda: cache[(float,)])
+
+
+def test_weak_type_cache():
+    cache = WeakTypeCache()
+    B = type('B', (A,), {})
+    cache[(A, B)] = 1
+    cache[B] = 2
+    cache[(A, int)] = 3
+    assert cache[(A, B)] == 1
+    assert cache[B] == 2
+    assert (A, B) in cache
+    assert raises(KeyError, lambda key=(B, A): cache[key])
+
+    del B
+    gc.collect()
+    assert len(cache) == 1
+    assert cache[(A, int)] == 3
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_weak_type_cache_size():
+    cache = WeakTypeCache(2)
+    cache[(A,)] = 1
+    cache[(int,)] = 2
+    cache[(A,)]
+    cache[(float,)] = 3
+    assert (A,) in cache and (float,) in cache
+    assert (int,) not in cache
+
+
+def test_pickle():
+    cache = pickle.loads(pickle.dumps(LRUCache(3)))
+    assert cache.maxsize == 3 and not cache
+    cache = pickle.loads(pickle.dumps(WeakTypeCache(3)))
+    assert cache.maxsize == 3 and not len(cache)
@@ -1,5 +1,6 @@
 from multipledispatch.conflict import (supercedes, ordering, ambiguities,
-        ambiguous, super_signature, consistent)
+        ambiguous, super_signature, consistent, edge, Ordering)
+from numbers import Number, Integral
 from multipledispatch.dispatcher import Variadic
 
 
@@ -61,6 +62,69 @@ def test_ordering():
     assert ord[-1] == (A, A) or ord[-1] == (A, C)
 
 
+def _test_incremental_ordering(signatures):
+    order = Ordering()
+    for i, signature in enumerate(signatures):
+        order.add(signature)
+        added = list(map(tuple, signatures[:i + 1]))
+        result = order.signatures
+        assert set(result) == set(added)
+        for a in added:
+            for b in added:
+                if edge(a, b):
+                    assert result.index(a) < result.index(b)
+        expected = ambiguities(added)
+        assert (set(map(frozenset, expected)) ==
+                set(map(frozenset, order.ambiguities)))
+
+
+def test_incremental_ordering():
+    _test_incremental_ordering([[A, A], [A, B], [B, A], [B, B], [A, C]])
+    _test_incremental_ordering([[A], [B], [A, B], [B, A], [A, C], [B, B]])
+    _test_incremental_ordering([[B, B], [A, B], [B, A], [A, A]])
+    _test_incremental_ordering([[object], [A], [C], [B], [int], [Number],
+                                [Integral], [object, object], [bool, A]])
+
+
+def test_incremental_ordering_variadic():
+    _test_incremental_ordering([(A, Variadic[B]), (B,), (Variadic[A],),
+                                (), (A, B), (Variadic[object],),
+                                (B, A, Variadic[C]), (B, B, C)])
+
+
+def test_incremental_ordering_nested():
+    classes = [object]
+    for i in range(100):
+        classes.append(type('T%d' % i, (classes[-1],), {}))
+    order = Ordering([(classes[0],), (classes[-1],)])
+    for cls in classes[-2:0:-1]:
+        order.add((cls,))
+    assert order.signatures == [(cls,) for cls in classes[::-1]]
+
+
+def _first_match(signatures, types):
+    for signature in signatures:
+        if all(map(issubclass, types, signature)):
+            return signature
+
+
+def test_incremental_ordering_ties():
+    # Without a more specific signature the one added last is checked first,
+    # as with ordering
+    class D(A, C): pass
+    types = [A, B, C, D, object]
+    signatures = [(a, b) for a in types for b in types]
+    for first in signatures:
+        for second in signatures:
+            if first == second:
+                continue
+            result = Ordering([first, second]).signatures
+            expected = ordering([first, second])
+            for types_ in signatures:
+                assert (_first_match(result, types_) ==
+                        _first_match(expected, types_))
+
+
 def test_type_mro():
     assert super_signature([[object], [type]]) == [type]
 
@@ -203,3 +203,33 @@ def test_methods_multiple_dispatch():
     assert foo.f(A(), A()) == 1
     assert foo.f(A(), C()) == 2
     assert foo.f(C(), C()) == 2
+
+
+def test_compiled():
+    @dispatch(int, compiled=True)
+    def compiled_f(x):
+        return x + 1
+
+    @dispatch(float)
+    def compiled_f(x):
+        return x - 1
+
+    assert compiled_f(1) == 2
+    assert compiled_f(1.0) == 0.0
+    assert compiled_f.misses == 2
+
+
+def test_compiled_methods():
+    class Foo(object):
+        @dispatch(float, compiled=True)
+        def f(self, x):
+            return x - 1
+
+        @dispatch(int)
+        def f(self, x):
+            return x + 1
+
+    foo = Foo()
+    assert foo.f(1) == 2
+    assert foo.f(1.0) == 0.0
+    assert Foo.f.misses == 2
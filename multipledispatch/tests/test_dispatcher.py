@@ -1,8 +1,14 @@
 
 import warnings
 
+import gc
+import pickle
+import weakref
+
 from multipledispatch.dispatcher import (Dispatcher, MDNotImplementedError,
-                                         MethodDispatcher)
+                                         MethodDispatcher, CompiledDispatcher,
+                                         CompiledMethodDispatcher, dispatchers,
+                                         clear_caches)
 from multipledispatch.conflict import ambiguities
 from multipledispatch.utils import raises
 
@@ -94,6 +100,29 @@ def test_on_ambiguity():
     assert ambiguities[0]
 
 
+def test_ambiguity_last_added_wins():
+    class A(object): pass
+    class B(A): pass
+
+    for signatures in [[(A, B), (B, A)], [(B, A), (A, B)]]:
+        f = Dispatcher('f')
+        for signature in signatures:
+            f.add(signature, lambda x, y, signature=signature: signature)
+        f.reorder(on_ambiguity=lambda dispatcher, amb: None)
+        assert f(B(), B()) == signatures[-1]
+        assert f(A(), B()) == (A, B)
+        assert f(B(), A()) == (B, A)
+
+
+def test_funcs_changed_without_add():
+    f = Dispatcher('f')
+    f.add((object,), identity)
+    assert f('a') == 'a'
+    f.funcs[(int,)] = inc
+    f.reorder()
+    assert f(True) == 2
+
+
 def test_serializable():
     f = Dispatcher('f')
     f.add((int,), inc)
@@ -110,6 +139,66 @@ def test_serializable():
     assert g('hello') == 'hello'
 
 
+def test_cache_info():
+    f = Dispatcher('f')
+    f.add((int,), inc)
+    f.add((object,), identity)
+    assert f(1) == 2 and f(2) == 3 and f('a') == 'a'
+    assert f.cache_info() == (1, 2, None, 2)
+
+    f.cache_clear()
+    assert f.cache_info() == (0, 0, None, 0)
+    assert f(1) == 2
+
+
+def test_cache_size():
+    f = Dispatcher('f', cache_size=2)
+    f.add((object,), identity)
+    for x in [1, 'a', 1.0, 1]:
+        assert f(x) == x
+    assert f.cache_info() == (0, 4, 2, 2)
+    assert f(1.0) == 1.0
+    assert f.cache_info().hits == 1
+
+
+def test_weak_cache():
+    for cls in [Dispatcher, CompiledDispatcher]:
+        f = cls('f', weak_cache=True)
+        f.add((object,), identity)
+        f.add((object, object), lambda x, y: y)
+        for i in range(10):
+            T = type('T', (object,), {})
+            assert f(T(), i) == i
+            assert isinstance(f(T()), T)
+        del T
+        gc.collect()
+        assert f.cache_info().currsize == 0
+
+
+def test_cache_policy_serializable():
+    f = Dispatcher('f', cache_size=10, weak_cache=True)
+    f.add((int,), inc)
+    g = pickle.loads(pickle.dumps(f))
+    assert g(1) == 2
+    assert g.cache_info() == (0, 1, 10, 1)
+
+
+def test_registry():
+    f = Dispatcher('f')
+    f.add((int,), inc)
+    assert f(1) == 2
+    assert f in dispatchers()
+
+    clear_caches()
+    assert f.cache_info() == (0, 0, None, 0)
+
+    # the registry doesn't keep dispatchers alive
+    ref = weakref.ref(f)
+    del f
+    gc.collect()
+    assert ref() is None
+
+
 def test_raise_error_on_non_class():
     f = Dispatcher('f')
     assert raises(TypeError, lambda: f.add((1,), inc))
@@ -421,3 +510,180 @@ def test_vararg_ordering():
     assert f('a', ['a']) == 2
     assert f(1) == 3
     assert f() == 3
+
+
+def test_compiled_dispatcher():
+    f = CompiledDispatcher('f')
+    f.add((int,), inc)
+    f.add((float,), dec)
+    f.add((object, object), lambda x, y: 'pair')
+    f.add((int, int, int), lambda x, y, z: x + y + z)
+
+    class MyInt(int):
+        pass
+
+    assert f(1) == 2
+    assert f(1.0) == 0.0
+    assert f(MyInt(1)) == 2
+    assert f(1, 'a') == 'pair'
+    assert f(1, 2, 3) == 6
+    assert raises(NotImplementedError, lambda: f('a'))
+
+
+def test_compiled_dispatcher_counters():
+    f = CompiledDispatcher('f')
+    f.add((int,), inc)
+    f.add((int, int), lambda x, y: x + y)
+
+    f(1)
+    f(2)
+    f(1, 2)
+    f(3, 4)
+    f(5, 6)
+    assert (f.hits, f.misses) == (3, 2)
+
+    f.add((float,), dec)
+    assert f(1) == 2
+    assert f.misses == 3
+
+
+def test_compiled_caller():
+    f = CompiledDispatcher('f')
+    f.add((int,), inc)
+    f.add((int, int), lambda x, y: x + y)
+    f.add((), lambda: 'none')
+
+    call1 = f.caller(1)
+    assert call1 is f.caller(1)
+    assert call1(1) == 2
+    assert f.caller(2)(1, 2) == 3
+    assert f.caller(0)() == 'none'
+    assert raises(NotImplementedError, lambda: call1('a'))
+    assert (f.hits, f.misses) == (0, 3)
+
+    f.add((float,), dec)
+    assert call1(1.0) == 0.0
+
+
+def test_compiled_keyword_arguments():
+    f = CompiledDispatcher('f')
+
+    @f.register(int)
+    def scale(x, factor=1):
+        return x * factor
+
+    assert f(2, factor=3) == 6
+    assert f.caller(1)(2, factor=4) == 8
+
+
+def test_compiled_not_implemented():
+    f = CompiledDispatcher('f')
+
+    @f.register(object)
+    def _1(x):
+        return 'default'
+
+    @f.register(int)
+    def _2(x):
+        if x % 2 == 0:
+            return 'even'
+        else:
+            raise MDNotImplementedError()
+
+    for call in (f, f.caller(1)):
+        assert call('hello') == 'default'
+        assert call(2) == 'even'
+        assert call(3) == 'default'
+
+
+def test_compiled_vararg():
+    f = CompiledDispatcher('f')
+
+    @f.register([int])
+    def total(*args):
+        return sum(args)
+
+    assert f() == 0
+    assert f(1, 2, 3) == 6
+    assert f.caller(4)(1, 2, 3, 4) == 10
+
+
+def test_freeze():
+    f = CompiledDispatcher('f')
+    f.add((object,), identity)
+    f.add((int,), inc)
+
+    assert f.freeze(int, (float,), (str,)) is f
+    assert f.frozen
+    assert f(1) == 2
+    assert f(1.0) == 1.0
+    assert (f.hits, f.misses) == (2, 0)
+
+    assert raises(RuntimeError, lambda: f.add((float,), dec))
+    assert f([]) == []
+    assert f.misses == 1
+
+
+def test_freeze_cache_clear():
+    f = CompiledDispatcher('f', cache_size=2)
+    f.add((object,), identity)
+    f.add((int,), inc)
+    f.freeze(int, (float,))
+    add = f.caller(1)
+    f([])
+
+    f.cache_clear()
+    assert f.cache_info().currsize == 2
+    assert f(1) == 2 and add(1.0) == 1.0
+    assert (f.hits, f.misses) == (2, 0)
+
+    clear_caches()
+    assert f(1) == 2 and add(1.0) == 1.0
+    assert (f.hits, f.misses) == (2, 0)
+    assert f('a') == 'a'
+    assert f.misses == 1
+
+
+def test_freeze_missing_signature():
+    f = CompiledDispatcher('f')
+    f.add((int,), inc)
+
+    assert raises(NotImplementedError, lambda: f.freeze(str))
+
+
+def test_compiled_serializable():
+    f = CompiledDispatcher('f')
+    f.add((int,), inc)
+    f.add((object,), identity)
+    f(1)
+
+    import pickle
+    g = pickle.loads(pickle.dumps(f))
+
+    assert g(1) == 2
+    assert g('hello') == 'hello'
+    assert g.caller(1)(2) == 3
+    assert (g.hits, g.misses) == (1, 2)
+
+
+def test_compiled_method_dispatcher():
+
+    class Test(object):
+        f = CompiledMethodDispatcher('f')
+
+        @f.register(int)
+        def _f_int(self, x):
+            return self, x + 1
+
+        @f.register(int, int)
+        def _f_ints(self, x, y):
+            return self, x + y
+
+    a = Test()
+    b = Test()
+    method = a.f
+    assert b.f(1) == (b, 2)
+    assert method(1) == (a, 2)
+    assert a.f(1, 2) == (a, 3)
+    assert Test.f(b, 3) == (b, 4)
+    assert Test.f.hits == 2
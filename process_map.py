@@ -13,14 +13,7 @@ from PIL import Image
 
 THIS_DIR = os.path.dirname(os.path.realpath(__file__))
 
-def get_file_sha1sum(file_descriptor, blocksize=2**20):
-    sha1sum = hashlib.sha1()
-    while True:
-        fbuf = file_descriptor.read(blocksize)
-        if not fbuf:
-            break
-        sha1sum.update(fbuf)
-    return sha1sum.hexdigest()
+get_file_sha1sum = tiledtmxloader.tmxcache.get_file_sha1sum
 
 class MapResourceLoader(tiledtmxloader.tmxreader.AbstractResourceLoader):
     def load(self, tile_map):
@@ -30,7 +23,7 @@ class MapResourceLoader(tiledtmxloader.tmxreader.AbstractResourceLoader):
             if layer.is_object_group:
                 continue
 
-            for gid in layer.decoded_content:
+            for gid in layer.unique_gids():
                 if gid not in self.indexed_tiles:
                     if gid & self.FLIP_X or gid & self.FLIP_Y or gid & self.FLIP_DIAGONAL:
                         image_gid = gid & ~(self.FLIP_X | self.FLIP_Y | self.FLIP_DIAGONAL)
@@ -58,6 +51,8 @@ class MapResourceLoader(tiledtmxloader.tmxreader.AbstractResourceLoader):
         if img is None:
             print("~ Image: '{}'".format(filename))
             img = Image.open(filename)
+            # decode now, PIL decodes lazily which is not thread safe
+            img.load()
             self._img_cache[filename] = img
         return img
 
@@ -68,7 +63,7 @@ class MapResourceLoader(tiledtmxloader.tmxreader.AbstractResourceLoader):
         #print("~ Image Part: '{}' ({}, {}, {}, {}, {})".format(filename, xpos, ypos, width, height, colorkey))
         source_img = self._load_image(filename, colorkey)
         crop_rectangle = (xpos, ypos, xpos + width, ypos + height)
-        return self._load_image(filename).crop(crop_rectangle)
+        return source_img.crop(crop_rectangle)
 
     def _load_image_parts(self, filename, margin, spacing, tile_width, tile_height, colorkey=None):
         source_img = self._load_image(filename, colorkey)
@@ -80,17 +75,25 @@ class MapResourceLoader(tiledtmxloader.tmxreader.AbstractResourceLoader):
         images = []
         for y_pos in range(margin, height, tile_height_spacing):
             for x_pos in range(margin, width, tile_width_spacing):
-                img_part = self._load_image_part(filename, x_pos, y_pos, tile_width, tile_height, colorkey)
+                img_part = source_img.crop((x_pos, y_pos, x_pos + tile_width, y_pos + tile_height))
                 images.append(img_part)
         return images
 
+    def _get_image_data(self, image):
+        return repr((image.mode, image.size)).encode('ascii') + image.tobytes()
+
     def get_indexed_tiles(self):
         return self.indexed_tiles
 
     def save_tile_images(self, directory):
         os.makedirs(directory, exist_ok=True)
-        for id, (offsetx, neg_offsety, img) in self.indexed_tiles.items():
-            print("~ Tile '{}' ({}, {}): {}".format(id, offsetx, neg_offsety, img))
+        saved = set()
+        for gid, (offsetx, neg_offsety, img) in self.indexed_tiles.items():
+            print("~ Tile '{}' ({}, {}): {}".format(gid, offsetx, neg_offsety, img))
+            # with a tile_store tiles with the same pixels share the image
+            if id(img) in saved:
+                continue
+            saved.add(id(img))
             sha1sum = hashlib.sha1()
             output = io.BytesIO()
             img.save(output, format='PNG')
@@ -101,12 +104,18 @@ class MapResourceLoader(tiledtmxloader.tmxreader.AbstractResourceLoader):
             with open(filename, 'wb') as f:
                 f.write(output.getvalue())
 
-def main():
+def main(cache_dir=None, max_workers=0, deduplicate=False):
     map_filename = os.path.join(THIS_DIR, 'data', 'maps', 'test.tmx')
     print("~ Map: '{}'".format(map_filename))
-    map = tiledtmxloader.tmxreader.TileMapParser().parse_decode(map_filename)
-    resources = MapResourceLoader()
+    if cache_dir:
+        map = tiledtmxloader.tmxcache.TileMapCache(cache_dir).parse_decode(map_filename)
+    else:
+        map = tiledtmxloader.tmxreader.TileMapParser().parse_decode(map_filename)
+    tile_store = tiledtmxloader.tmxreader.TileImageStore() if deduplicate else None
+    resources = MapResourceLoader(max_workers, tile_store=tile_store)
     resources.load(map)
+    if tile_store is not None:
+        print("~ Tile images: {}".format(tile_store.get_statistics()))
     assert map.orientation == "orthogonal"
     all_sprite_layers = []
 
@@ -178,6 +187,9 @@ def main():
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='World Demo')
     parser.add_argument('-v', '--verbose', action="store_true", help="verbose output" )
+    parser.add_argument('--cache-dir', help="directory to cache the parsed map in" )
+    parser.add_argument('--workers', type=int, default=0, help="number of threads to load the tile sets with" )
+    parser.add_argument('--dedup', action="store_true", help="share the images of identical tiles" )
     args = parser.parse_args()
 
     if args.verbose:
@@ -185,4 +197,4 @@ if __name__ == '__main__':
     else:
         print("~ Not so verbose")
 
-    sys.exit(main())
+    sys.exit(main(args.cache_dir, args.workers, args.dedup))
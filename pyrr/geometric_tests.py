@@ -437,3 +437,216 @@ def ray_intersect_sphere(ray, sphere):
         if t >= 0:
             ret.append(ray_origin + ray_direction * t)
     return ret
+
+
+"""
+Batched tests.
+
+The functions below test arrays of primitives at once, the leading dimensions
+of the arguments are broadcast against each other:
+
+ * one-to-many: ``ray_intersect_aabbs(ray, aabbs)`` with a ray of shape (2,3)
+   and aabbs of shape (N,2,3) returns arrays of shape (N,).
+ * many-to-many, pairwise: rays of shape (N,2,3) and aabbs of shape (N,2,3)
+   return arrays of shape (N,).
+ * many-to-many, all pairs: ``ray_intersect_aabbs(rays[:, None], aabbs[None])``
+   returns arrays of shape (N,M).
+
+Ray tests return a hit mask and the distance along the ray to the hit in
+units of the ray direction, infinity where nothing is hit. Use
+:func:`ray_points` to turn distances into points.
+"""
+
+def _dot(a, b):
+    return np.einsum('...i,...i->...', a, b)
+
+@all_parameters_as_numpy_arrays
+def ray_points(rays, distances):
+    """Calculates the points at distances along rays.
+
+    :param numpy.array rays: The rays, shape (...,2,3).
+    :param numpy.array distances: The distances along the rays, shape (...).
+    :rtype: numpy.array
+    :return: The points, shape (...,3). Infinite distances give
+        points which aren't finite.
+    """
+    with np.errstate(invalid='ignore'):
+        return rays[..., 0, :] + rays[..., 1, :] * distances[..., None]
+
+@all_parameters_as_numpy_arrays
+def ray_intersect_aabbs(rays, aabbs):
+    """Calculates where rays hit AABBs.
+
+    Batched version of ray_intersect_aabb, rays starting inside an
+    AABB hit it where they leave it.
+
+    :param numpy.array rays: The rays, shape (...,2,3).
+    :param numpy.array aabbs: The AABBs, shape (...,2,3).
+    :rtype: tuple of numpy.array
+    :return: The hit mask and the distances along the rays.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        origin = rays[..., 0, None, :]
+        direction = rays[..., 1, None, :]
+        dir_fraction = np.where(direction == 0.0, np.inf, 1.0 / direction)
+        t = (aabbs - origin) * dir_fraction
+
+        # fmin and fmax ignore the nan of origins on a slab the ray is parallel to
+        tmin = np.fmin(t[..., 0, :], t[..., 1, :]).max(axis=-1)
+        tmax = np.fmax(t[..., 0, :], t[..., 1, :]).min(axis=-1)
+
+    hits = (tmax >= 0.0) & (tmin <= tmax)
+    distances = np.where(hits, np.where(tmin >= 0.0, tmin, tmax), np.inf)
+    return hits, distances
+
+@all_parameters_as_numpy_arrays
+def ray_intersect_spheres(rays, spheres):
+    """Calculates where rays first hit spheres.
+
+    Batched version of ray_intersect_sphere, returning the nearest
+    intersection in front of the ray origin. The ray directions
+    don't need to be of unit length.
+
+    :param numpy.array rays: The rays, shape (...,2,3).
+    :param numpy.array spheres: The spheres, shape (...,4).
+    :rtype: tuple of numpy.array
+    :return: The hit mask and the distances along the rays.
+    """
+    relative_origin = rays[..., 0, :] - spheres[..., :3]
+    direction = rays[..., 1, :]
+
+    a = _dot(direction, direction)
+    b = 2.0 * _dot(direction, relative_origin)
+    c = _dot(relative_origin, relative_origin) - spheres[..., 3] ** 2
+    delta = b * b - 4.0 * a * c
+
+    root = np.sqrt(np.maximum(delta, 0.0))
+    near = (-b - root) / (2.0 * a)
+    far = (-b + root) / (2.0 * a)
+    t = np.where(near >= 0.0, near, far)
+
+    hits = (delta >= 0.0) & (t >= 0.0)
+    return hits, np.where(hits, t, np.inf)
+
+@all_parameters_as_numpy_arrays
+def ray_intersect_planes(rays, planes, front_only=False):
+    """Calculates where rays intersect planes.
+
+    Batched version of ray_intersect_plane. As with the single version,
+    intersections behind the ray origin are hits with a negative distance.
+
+    :param numpy.array rays: The rays, shape (...,2,3).
+    :param numpy.array planes: The planes, shape (...,4).
+    :param boolean front_only: Specifies if the rays should
+        only hit the front of the planes.
+    :rtype: tuple of numpy.array
+    :return: The hit mask and the distances along the rays.
+        Rays parallel to a plane don't hit it.
+    """
+    normals = planes[..., :3]
+    rd_n = _dot(rays[..., 1, :], normals)
+    pd = planes[..., 3] * _dot(normals, normals)
+
+    hits = rd_n != 0.0
+    if front_only:
+        hits &= rd_n < 0.0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = (pd - _dot(rays[..., 0, :], normals)) / rd_n
+    return hits, np.where(hits, t, np.inf)
+
+@all_parameters_as_numpy_arrays
+def point_intersect_aabbs(points, aabbs):
+    """Checks if points are inside or touching AABBs.
+
+    :param numpy.array points: The points, shape (...,3).
+    :param numpy.array aabbs: The AABBs, shape (...,2,3).
+    :rtype: numpy.array
+    :return: The mask of the points inside the AABBs.
+    """
+    return ((points >= aabbs[..., 0, :]) & (points <= aabbs[..., 1, :])).all(axis=-1)
+
+@all_parameters_as_numpy_arrays
+def point_intersect_spheres(points, spheres):
+    """Checks if points are inside or touching spheres.
+
+    :param numpy.array points: The points, shape (...,3).
+    :param numpy.array spheres: The spheres, shape (...,4).
+    :rtype: numpy.array
+    :return: The mask of the points inside the spheres.
+    """
+    delta = points - spheres[..., :3]
+    return _dot(delta, delta) <= spheres[..., 3] ** 2
+
+@all_parameters_as_numpy_arrays
+def point_intersect_rectangles(points, rects):
+    """Checks if points are inside or touching 2D rectangles.
+
+    Batched version of point_intersect_rectangle, for 3D points
+    the Z axis will be ignored.
+
+    :param numpy.array points: The points, shape (...,2) or (...,3).
+    :param numpy.array rects: The rectangles, shape (...,2,2).
+    :rtype: numpy.array
+    :return: The mask of the points inside the rectangles.
+    """
+    corner = rects[..., 0, :]
+    opposite = corner + rects[..., 1, :]
+    xy = points[..., :2]
+    return ((xy >= np.minimum(corner, opposite)) & (xy <= np.maximum(corner, opposite))).all(axis=-1)
+
+@all_parameters_as_numpy_arrays
+def point_height_above_planes(points, planes):
+    """Calculates how high points are above planes.
+
+    Batched version of point_height_above_plane.
+
+    :param numpy.array points: The points, shape (...,3).
+    :param numpy.array planes: The planes, shape (...,4).
+    :rtype: numpy.array
+    :return: The heights, negative for points behind the planes.
+    """
+    normals = planes[..., :3]
+    return _dot(normals, points) - planes[..., 3] * _dot(normals, normals)
+
+@all_parameters_as_numpy_arrays
+def point_closest_point_on_planes(points, planes):
+    """Calculates the points on planes closest to points.
+
+    Batched version of point_closest_point_on_plane.
+
+    :param numpy.array points: The points, shape (...,3).
+    :param numpy.array planes: The planes, shape (...,4).
+    :rtype: numpy.array
+    :return: The closest points, shape (...,3).
+    """
+    normals = planes[..., :3]
+    return points - normals * point_height_above_planes(points, planes)[..., None]
+
+@all_parameters_as_numpy_arrays
+def sphere_does_intersect_spheres(s1, s2):
+    """Checks which spheres overlap.
+
+    Batched version of sphere_does_intersect_sphere.
+
+    :param numpy.array s1: The first spheres, shape (...,4).
+    :param numpy.array s2: The second spheres, shape (...,4).
+    :rtype: numpy.array
+    :return: The mask of the overlapping spheres.
+    """
+    delta = s2[..., :3] - s1[..., :3]
+    return _dot(delta, delta) <= (s1[..., 3] + s2[..., 3]) ** 2
+
+@all_parameters_as_numpy_arrays
+def sphere_penetration_spheres(s1, s2):
+    """Calculates the distances spheres have penetrated into one another.
+
+    Batched version of sphere_penetration_sphere.
+
+    :param numpy.array s1: The first spheres, shape (...,4).
+    :param numpy.array s2: The second spheres, shape (...,4).
+    :rtype: numpy.array
+    :return: The overlaps, 0.0 for spheres which don't overlap.
+    """
+    distance = np.linalg.norm(s2[..., :3] - s1[..., :3], axis=-1)
+    return np.maximum(s1[..., 3] + s2[..., 3] - distance, 0.0)
@@ -5,6 +5,7 @@ __all__ = [
     'base',
     'matrix33',
     'matrix44',
+    'operators',
     'quaternion',
     'vector3',
     'vector4',
@@ -25,3 +26,6 @@ from .quaternion import Quaternion
 from .vector3 import Vector3
 from .vector4 import Vector4
 
+# replaces the dispatched operators of the classes above
+from . import operators
+
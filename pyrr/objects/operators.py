@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+"""Table driven operators for the pyrr object types.
+
+The operators of the object classes are declared with multipledispatch,
+which resolves the implementation from the type of the operand on every
+call. :func:`install_operators` replaces each of them with a function
+which looks the type of the operand up in a table instead. The tables are
+filled for the pyrr objects and the common numeric types when the classes
+are created. Other types are resolved by the dispatcher, the implementations
+of the most recently used ones are kept in a cache of ``resolved_cache_size``
+entries.
+
+The common combinations of operands of exactly the expected type don't
+convert the operand again and accept an ``out`` array which receives the
+result. The functions of this module give access to them:
+::
+
+    from pyrr.objects import operators
+
+    # m = m * rotation without allocating a new matrix
+    operators.multiply(m, rotation, out=m)
+
+The tables are built once, implementations added to the dispatchers
+later are only used for types which aren't in the tables yet.
+"""
+from __future__ import absolute_import
+import math
+from numbers import Number
+import numpy as np
+from multipledispatch.cache import make_cache
+from multipledispatch.dispatcher import MethodDispatcher, str_signature
+from .. import matrix33, matrix44, quaternion
+from .matrix33 import Matrix33
+from .matrix44 import Matrix44
+from .quaternion import Quaternion
+from .vector3 import Vector3
+from .vector4 import Vector4
+
+#: The types the operator tables are filled for when they are built.
+operand_types = (Matrix33, Matrix44, Quaternion, Vector3, Vector4, np.ndarray, list,
+                 int, float, np.float32, np.float64, np.int32, np.int64)
+
+#: Entries of the cache of the implementations of the types which aren't in the tables.
+resolved_cache_size = 64
+
+_number_types = tuple(t for t in operand_types if issubclass(t, (Number, np.number)))
+
+
+def _dispatched(func):
+    """Implementation calling a dispatched function, copying the result to out."""
+    def implementation(self, other, out=None):
+        result = func(self, other)
+        if out is None:
+            return result
+        out[...] = result
+        return out
+    return implementation
+
+
+def _make_operator(name, dispatcher, implementations):
+    table = {}
+    resolved = make_cache(resolved_cache_size)
+
+    def operator(self, other, out=None):
+        try:
+            implementation = table[type(other)]
+        except KeyError:
+            try:
+                implementation = resolved[type(other)]
+            except KeyError:
+                func = dispatcher.dispatch(type(other))
+                if not func:
+                    raise NotImplementedError('Could not find signature for %s: <%s>' %
+                                              (name, str_signature((type(other),))))
+                implementation = resolved[type(other)] = _dispatched(func)
+        return implementation(self, other, out)
+
+    for operand_type in operand_types:
+        func = dispatcher.dispatch(operand_type)
+        if func:
+            table[operand_type] = _dispatched(func)
+    table.update(implementations)
+
+    operator.__name__ = name
+    operator.__doc__ = dispatcher.__doc__
+    operator.dispatcher = dispatcher
+    operator.table = table
+    operator.resolved = resolved
+    return operator
+
+
+def install_operators(cls, implementations=None):
+    """Replaces the dispatched operators of a class with table driven ones.
+
+    :param cls: The pyrr object class.
+    :param implementations: {operator name: {operand type: implementation}}
+        of the implementations to use instead of the dispatched ones.
+        Implementations are called with the object, the operand and out.
+    """
+    implementations = implementations or {}
+    for name, value in list(vars(cls).items()):
+        dispatcher = getattr(value, 'dispatcher', value)
+        if isinstance(dispatcher, MethodDispatcher):
+            setattr(cls, name, _make_operator(name, dispatcher, implementations.get(name, {})))
+
+
+########################
+# Implementations
+def _ufunc(ufunc, cls):
+    def implementation(self, other, out=None):
+        result = ufunc(self, other, out=out)
+        return result if out is not None else result.view(cls)
+    return implementation
+
+
+def _matrix_product(cls):
+    # pyrr matrices multiply as other . self
+    def implementation(self, other, out=None):
+        if out is None:
+            return np.dot(other, self).view(cls)
+        try:
+            return np.dot(other, self, out=out)
+        except ValueError:
+            # numpy.dot only writes to C contiguous arrays of the type of the result
+            return np.matmul(other, self, out=out)
+    return implementation
+
+
+def _rotation(quat):
+    """The rows of matrix33.create_from_quaternion of a float64 unit quaternion, None for others."""
+    if quat.dtype != np.float64:
+        return None
+    qx, qy, qz, qw = quat.tolist()
+    # the same test for normalized quaternions as np.isclose
+    if not abs(math.sqrt(qx * qx + qy * qy + qz * qz + qw * qw) - 1.) <= 1e-8 + 1e-5:
+        return None
+
+    # same operations as matrix33.create_from_quaternion
+    sqw = qw**2
+    sqx = qx**2
+    sqy = qy**2
+    sqz = qz**2
+    qxy = qx * qy
+    qzw = qz * qw
+    qxz = qx * qz
+    qyw = qy * qw
+    qyz = qy * qz
+    qxw = qx * qw
+
+    invs = 1 / (sqx + sqy + sqz + sqw)
+    return (
+        (( sqx - sqy - sqz + sqw) * invs, 2.0 * (qxy - qzw) * invs, 2.0 * (qxz + qyw) * invs),
+        (2.0 * (qxy + qzw) * invs, (-sqx + sqy - sqz + sqw) * invs, 2.0 * (qyz - qxw) * invs),
+        (2.0 * (qxz - qyw) * invs, 2.0 * (qyz + qxw) * invs, (-sqx - sqy + sqz + sqw) * invs),
+    )
+
+
+def _matrix_quaternion(cls, module):
+    product = _matrix_product(cls)
+
+    def implementation(self, other, out=None):
+        rows = _rotation(other)
+        if rows is None:
+            rotation = module.create_from_quaternion(other)
+        else:
+            rotation = np.identity(cls._shape[0])
+            rotation[:3, :3] = rows
+        return product(self, rotation, out)
+    return implementation
+
+
+def _matrix44_vector3(self, other, out=None):
+    # same operations as matrix44.apply_to_vector
+    vec4 = np.empty(4, dtype=other.dtype)
+    vec4[:3] = other
+    vec4[3] = 1.
+    vec4 = np.dot(vec4, self)
+    w = vec4[3]
+    if abs(w) <= 1e-8:
+        result = np.full(3, np.inf, dtype=vec4.dtype)
+    else:
+        result = vec4[:3] / w
+    if out is None:
+        return result.view(Vector3)
+    out[:] = result
+    return out
+
+
+def _vector_product(cls):
+    # vectors are row vectors, other . self
+    def implementation(self, other, out=None):
+        if out is None:
+            return np.dot(other, self).view(cls)
+        try:
+            return np.dot(other, self, out=out)
+        except ValueError:
+            # numpy.dot only writes to C contiguous arrays of the type of the result
+            return np.matmul(other, self, out=out)
+    return implementation
+
+
+def _cross(a, b):
+    # same operations as numpy.cross
+    ax, ay, az = a
+    bx, by, bz = b
+    return ay * bz - az * by, az * bx - ax * bz, ax * by - ay * bx
+
+
+def _quaternion_cross(q1, q2):
+    # same operations as quaternion.cross
+    q1x, q1y, q1z, q1w = q1
+    q2x, q2y, q2z, q2w = q2
+    return (
+         q1x * q2w + q1y * q2z - q1z * q2y + q1w * q2x,
+        -q1x * q2z + q1y * q2w + q1z * q2x + q1w * q2y,
+         q1x * q2y - q1y * q2x + q1z * q2w + q1w * q2z,
+        -q1x * q2x - q1y * q2y - q1z * q2z + q1w * q2w,
+    )
+
+
+def _float64_result(func, cls, fallback):
+    """Implementation computing the result of float64 operands with Python floats."""
+    def implementation(self, other, out=None):
+        if self.dtype != np.float64 or other.dtype != np.float64:
+            return _dispatched(fallback)(self, other, out)
+        result = func(self.tolist(), other.tolist())
+        if out is None:
+            return np.array(result).view(cls)
+        out[:] = result
+        return out
+    return implementation
+
+
+def _vector3_dot(self, other, out=None):
+    if self.dtype != np.float64 or other.dtype != np.float64:
+        return _dispatched(Vector3.dot)(self, other, out)
+    (ax, ay, az), (bx, by, bz) = self.tolist(), other.tolist()
+    return np.float64(ax * bx + ay * by + az * bz)
+
+
+def _quaternion_vector(cls):
+    def rotate(q, v):
+        # same operations as quaternion.apply_to_vector
+        vector = v + [0.0] if len(v) == 3 else v
+        result = _quaternion_cross(q, _quaternion_cross(vector, (-q[0], -q[1], -q[2], q[3])))
+        return result[:len(v)]
+    return _float64_result(rotate, cls, lambda q, v: cls(quaternion.apply_to_vector(q, v)))
+
+
+def _arithmetic(cls, operand_types):
+    """The element wise operators of a class for operands of the given types."""
+    table = {}
+    for name, ufunc in (('__add__', np.add), ('__sub__', np.subtract), ('__mul__', np.multiply),
+                        ('__truediv__', np.true_divide), ('__div__', np.true_divide)):
+        table[name] = dict((operand_type, _ufunc(ufunc, cls)) for operand_type in operand_types)
+    return table
+
+
+def _matrix_implementations(cls, module):
+    implementations = _arithmetic(cls, _number_types)
+    # matrices only add and subtract matrices of their own size
+    implementations['__add__'][cls] = _ufunc(np.add, cls)
+    implementations['__sub__'][cls] = _ufunc(np.subtract, cls)
+    implementations['__mul__'].update({
+        cls: _matrix_product(cls),
+        Quaternion: _matrix_quaternion(cls, module),
+    })
+    return implementations
+
+
+_matrix44 = _matrix_implementations(Matrix44, matrix44)
+_matrix44['__mul__'].update({Vector3: _matrix44_vector3, Vector4: _vector_product(Vector4)})
+
+_matrix33 = _matrix_implementations(Matrix33, matrix33)
+_matrix33['__mul__'][Vector3] = _vector_product(Vector3)
+
+_vector3 = _arithmetic(Vector3, (Vector3,) + _number_types)
+_vector3['__xor__'] = {Vector3: _float64_result(_cross, Vector3, Vector3.cross)}
+_vector3['__or__'] = {Vector3: _vector3_dot}
+
+_vector4 = _arithmetic(Vector4, (Vector4,) + _number_types)
+
+_quaternion = {
+    '__mul__': {
+        Quaternion: _float64_result(_quaternion_cross, Quaternion, Quaternion.cross),
+        Vector3: _quaternion_vector(Vector3),
+        Vector4: _quaternion_vector(Vector4),
+    },
+}
+
+install_operators(Matrix33, _matrix33)
+install_operators(Matrix44, _matrix44)
+install_operators(Quaternion, _quaternion)
+install_operators(Vector3, _vector3)
+install_operators(Vector4, _vector4)
+
+
+########################
+# Functions
+def add(a, b, out=None):
+    """Returns a + b, written to out when given.
+    """
+    return type(a).__add__(a, b, out)
+
+
+def subtract(a, b, out=None):
+    """Returns a - b, written to out when given.
+    """
+    return type(a).__sub__(a, b, out)
+
+
+def multiply(a, b, out=None):
+    """Returns a * b, written to out when given.
+    """
+    return type(a).__mul__(a, b, out)
+
+
+def divide(a, b, out=None):
+    """Returns a / b, written to out when given.
+    """
+    return type(a).__truediv__(a, b, out)
+
+
+def cross(a, b, out=None):
+    """Returns a ^ b, the cross product of two Vector3, written to out when given.
+    """
+    return type(a).__xor__(a, b, out)
@@ -0,0 +1,137 @@
+import numpy as np
+import pytest
+
+from pyrr import Matrix33, Matrix44, Quaternion, Vector3, Vector4
+from pyrr.objects import operators
+
+CLASSES = (Matrix33, Matrix44, Quaternion, Vector3, Vector4)
+NAMES = ('__add__', '__sub__', '__mul__', '__truediv__', '__xor__', '__or__', '__ne__', '__eq__')
+
+
+def objects(cls):
+    rng = np.random.RandomState(CLASSES.index(cls))
+    if cls is Quaternion:
+        return [Quaternion.from_eulers(rng.uniform(-1, 1, 3)), Quaternion(rng.uniform(-1, 1, 4)),
+                Quaternion(rng.uniform(-1, 1, 4).astype(np.float32))]
+    if cls in (Matrix33, Matrix44):
+        size = cls._shape[0]
+        return [cls(rng.uniform(-1, 1, (size, size))), cls.from_scale(rng.uniform(1, 2, 3)),
+                cls(rng.uniform(-1, 1, (size, size)).astype(np.float32))]
+    return [cls(rng.uniform(-1, 1, cls._shape)), cls(rng.uniform(-1, 1, cls._shape).astype(np.float32))]
+
+
+def operands():
+    result = [2, 0.5, np.float32(1.5), np.float64(-2.0), np.int32(3), np.int64(4)]
+    for cls in CLASSES:
+        result.extend(objects(cls))
+    result.extend([np.arange(3.0), np.arange(4.0), np.eye(3), np.eye(4), [1.0, 2.0, 3.0], [1.0, 2.0, 3.0, 4.0],
+                   np.arange(3.0).view(Array), np.eye(4).view(Array)])
+    return result
+
+
+class Array(np.ndarray):
+    """An operand type which isn't in the operator tables"""
+
+
+def call(func, a, b):
+    try:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return func(a, b)
+    except Exception as e:
+        return type(e)
+
+
+def close(a, b, **kwargs):
+    # The pyrr objects overload | which numpy.allclose uses
+    return np.allclose(np.asarray(a), np.asarray(b), **kwargs)
+
+
+def assert_same(expected, result):
+    if isinstance(expected, type):
+        assert result is expected
+        return
+    assert type(result) is type(expected)
+    assert np.shape(result) == np.shape(expected)
+    assert np.asarray(result).dtype == np.asarray(expected).dtype
+    assert close(result, expected, rtol=1e-6, atol=1e-12, equal_nan=True)
+
+
+def dispatched_operators(cls):
+    for name in NAMES:
+        operator = vars(cls).get(name)
+        if getattr(operator, 'dispatcher', None) is not None:
+            yield name, operator
+
+
+def test_same_as_dispatchers():
+    compared = 0
+    for cls in CLASSES:
+        for name, operator in dispatched_operators(cls):
+            for a in objects(cls):
+                for b in operands():
+                    expected = call(lambda a, b: operator.dispatcher.__get__(a, cls)(b), a, b)
+                    assert_same(expected, call(getattr(cls, name), a, b))
+                    compared += 1
+    assert compared > 1000
+
+
+def test_out():
+    rng = np.random.RandomState(1)
+    m = Matrix44(rng.uniform(-1, 1, (4, 4)))
+    r = Matrix44.from_eulers(rng.uniform(-1, 1, 3))
+    expected = m * r
+    result = operators.multiply(m, r, out=m)
+    assert result is m
+    assert close(m, expected)
+
+    q = Quaternion.from_eulers(rng.uniform(-1, 1, 3))
+    expected = m * q
+    assert operators.multiply(m, q, out=m) is m
+    assert close(m, expected)
+
+    v = Vector3(rng.uniform(-1, 1, 3))
+    out = Vector3()
+    assert operators.multiply(m, v, out=out) is out
+    assert close(out, m * v)
+    assert operators.multiply(q, v, out=out) is out
+    assert close(out, q * v)
+    w = Vector3(rng.uniform(-1, 1, 3))
+    assert operators.cross(v, w, out=out) is out
+    assert close(out, v ^ w)
+
+    for func, op in ((operators.add, np.add), (operators.subtract, np.subtract),
+                     (operators.multiply, np.multiply), (operators.divide, np.true_divide)):
+        a = Vector4(rng.uniform(1, 2, 4))
+        b = Vector4(rng.uniform(1, 2, 4))
+        expected = op(a, b)
+        assert func(a, b, out=a) is a
+        assert close(a, expected)
+        expected = op(a, 2.0)
+        assert func(a, 2.0, out=a) is a
+        assert close(a, expected)
+
+    # Operands resolved by the dispatcher write to out as well
+    n = Matrix33(rng.uniform(-1, 1, (3, 3)))
+    for other in (rng.uniform(-1, 1, (3, 3)).tolist(), rng.uniform(-1, 1, (3, 3)).view(Array)):
+        expected = n * other
+        out = Matrix33()
+        assert operators.multiply(n, other, out=out) is out
+        assert close(out, expected)
+    assert Array in Matrix33.__mul__.resolved
+
+
+def test_other_types_are_not_kept():
+    m = Matrix44.identity()
+    operator = Matrix44.__mul__
+    table_size = len(operator.table)
+    subclasses = [type('Array%d' % i, (np.ndarray,), {}) for i in range(500)]
+    for subclass in subclasses:
+        other = np.eye(4).view(subclass)
+        assert np.array_equal(m * other, np.eye(4))
+    assert len(operator.table) == table_size
+    assert len(operator.resolved) <= operators.resolved_cache_size
+
+
+def test_unknown_type():
+    with pytest.raises(NotImplementedError):
+        Matrix44.identity() * 'text'
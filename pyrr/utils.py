@@ -93,7 +93,7 @@ def solve_quadratic_equation(a, b, c):
         # Why not use simple form:
         # s1 = (-b + math.sqrt(delta)) / (2 * a)
         # s2 = (-b - math.sqrt(delta)) / (2 * a)
-        q = -0.5 * (b + np.math.sqrt(delta)) if b > 0 else -0.5 * (b - np.math.sqrt(delta))
+        q = -0.5 * (b + np.sqrt(delta)) if b > 0 else -0.5 * (b - np.sqrt(delta))
         s1 = q / a
         s2 = c / q
         return [s1, s2]
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmarks of the pyrr object operators against the dispatched ones, and of the batched
+geometric tests against loops over the single tests.
+
+Usage:
+
+    python pyrr_benchmark.py [--sizes 10 100 1000 10000 100000 1000000] [--loop-limit 10000] [--calls 100000]
+"""
+
+import argparse
+import time
+import timeit
+
+import numpy
+
+from pyrr import Matrix33, Matrix44, Quaternion, Vector3, Vector4, geometric_tests
+
+
+def make_primitives(n, seed=0):
+    rnd = numpy.random.RandomState(seed)
+    centers = rnd.uniform(-100, 100, (n, 3))
+    extents = rnd.uniform(0.5, 5, (n, 3))
+    directions = rnd.normal(size=(n, 3))
+    directions /= numpy.linalg.norm(directions, axis=1)[:, None]
+    normals = rnd.normal(size=(n, 3))
+    normals /= numpy.linalg.norm(normals, axis=1)[:, None]
+    return {
+        'rays': numpy.stack([rnd.uniform(-100, 100, (n, 3)), directions], axis=1),
+        'aabbs': numpy.stack([centers - extents, centers + extents], axis=1),
+        'spheres': numpy.concatenate([centers, extents[:, :1]], axis=1),
+        'planes': numpy.concatenate([normals, rnd.uniform(-100, 100, (n, 1))], axis=1),
+        'points': rnd.uniform(-100, 100, (n, 3)),
+        'rects': rnd.uniform(-100, 100, (n, 2, 2)),
+    }
+
+
+# (name, single test, batched test, first and second primitive)
+TESTS = (
+    ('ray aabb', geometric_tests.ray_intersect_aabb, geometric_tests.ray_intersect_aabbs, 'rays', 'aabbs'),
+    ('ray sphere', geometric_tests.ray_intersect_sphere, geometric_tests.ray_intersect_spheres, 'rays', 'spheres'),
+    ('ray plane', geometric_tests.ray_intersect_plane, geometric_tests.ray_intersect_planes, 'rays', 'planes'),
+    ('point rectangle', geometric_tests.point_intersect_rectangle, geometric_tests.point_intersect_rectangles,
+     'points', 'rects'),
+    ('sphere sphere', geometric_tests.sphere_does_intersect_sphere, geometric_tests.sphere_does_intersect_spheres,
+     'spheres', 'spheres'),
+)
+
+
+def time_loop(single, first, second, loop_limit, one_to_many):
+    """Seconds for the single test over all elements, measured on up to loop_limit elements"""
+    count = min(len(second), loop_limit)
+    start = time.perf_counter()
+    if one_to_many:
+        for i in range(count):
+            single(first[0], second[i])
+    else:
+        for i in range(count):
+            single(first[i], second[i])
+    return (time.perf_counter() - start) * len(second) / count
+
+
+def time_batched(batched, first, second, one_to_many):
+    repeat = max(1, 100000 // len(second))
+    start = time.perf_counter()
+    for _ in range(repeat):
+        batched(first[0] if one_to_many else first, second)
+    return (time.perf_counter() - start) / repeat
+
+
+def bench_tests(sizes, loop_limit):
+    print('%-16s %-12s %9s %12s %12s %9s' % ('test', 'form', 'n', 'loop [ms]', 'batched [ms]', 'speedup'))
+    for name, single, batched, first_name, second_name in TESTS:
+        for one_to_many in (True, False):
+            for n in sizes:
+                primitives = make_primitives(n)
+                first, second = primitives[first_name], primitives[second_name]
+                loop_time = time_loop(single, first, second, loop_limit, one_to_many)
+                batched_time = time_batched(batched, first, second, one_to_many)
+                print('%-16s %-12s %9d %12.3f %12.3f %9.1f' % (name, 'one-to-many' if one_to_many else 'pairwise', n,
+                                                               loop_time * 1000, batched_time * 1000,
+                                                               loop_time / batched_time))
+
+
+def operator_cases():
+    """(name, operator, a, b, out) of the common operator combinations"""
+    m44 = Matrix44.from_x_rotation(0.5)
+    m33 = Matrix33.from_y_rotation(0.5)
+    quat = Quaternion.from_z_rotation(0.5)
+    v3 = Vector3([1., 2., 3.])
+    v4 = Vector4([1., 2., 3., 1.])
+    return (
+        ('Matrix44 * Matrix44', '__mul__', m44, Matrix44.from_y_rotation(0.2), Matrix44()),
+        ('Matrix44 * Vector3', '__mul__', m44, v3, Vector3()),
+        ('Matrix44 * Vector4', '__mul__', m44, v4, Vector4()),
+        ('Matrix44 * Quaternion', '__mul__', m44, quat, Matrix44()),
+        ('Matrix44 * float', '__mul__', m44, 2.0, Matrix44()),
+        ('Matrix44 + Matrix44', '__add__', m44, m44, Matrix44()),
+        ('Matrix33 * Matrix33', '__mul__', m33, m33, Matrix33()),
+        ('Matrix33 * Vector3', '__mul__', m33, v3, Vector3()),
+        ('Vector3 + Vector3', '__add__', v3, v3, Vector3()),
+        ('Vector3 * float', '__mul__', v3, 2.0, Vector3()),
+        ('Vector3 ^ Vector3', '__xor__', v3, Vector3([0., 1., 0.]), Vector3()),
+        ('Vector3 | Vector3', '__or__', v3, v3, None),
+        ('Vector4 - Vector4', '__sub__', v4, v4, Vector4()),
+        ('Quaternion * Quaternion', '__mul__', quat, Quaternion.from_x_rotation(0.2), Quaternion()),
+        ('Quaternion * Vector3', '__mul__', quat, v3, Vector3()),
+    )
+
+
+def bench_operators(calls):
+    print('%-24s %14s %10s %10s %9s' % ('operator', 'dispatch [us]', 'table [us]', 'out [us]', 'speedup'))
+    for name, operator_name, a, b, out in operator_cases():
+        operator = getattr(type(a), operator_name)
+        dispatched = operator.dispatcher.__get__(a, type(a))
+        dispatch_time = timeit.timeit(lambda: dispatched(b), number=calls) / calls
+        table_time = timeit.timeit(lambda: operator(a, b), number=calls) / calls
+        out_time = timeit.timeit(lambda: operator(a, b, out), number=calls) / calls if out is not None else None
+        print('%-24s %14.2f %10.2f %10s %9.1f' % (name, dispatch_time * 1e6, table_time * 1e6,
+                                                  '%.2f' % (out_time * 1e6) if out_time else '',
+                                                  dispatch_time / table_time))
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description='pyrr benchmarks')
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000, 100000, 1000000])
+    arg_parser.add_argument('--loop-limit', type=int, default=10000,
+                            help='largest number of single tests timed, longer loops are extrapolated')
+    arg_parser.add_argument('--calls', type=int, default=100000, help='calls of each operator')
+    args = arg_parser.parse_args()
+    bench_operators(args.calls)
+    bench_tests(args.sizes, args.loop_limit)
@@ -34,7 +34,7 @@
 import logging
 
 from pywavefront.exceptions import PywavefrontException
-from pywavefront.obj import ObjParser
+from pywavefront.obj import MeshChunk, ObjParser
 from pywavefront.wavefront import Wavefront
 
 __version__ = '1.3.1'
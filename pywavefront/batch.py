@@ -0,0 +1,297 @@
+# ----------------------------------------------------------------------------
+# PyWavefront
+# Copyright (c) 2018 Kurt Yoder
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#  * Neither the name of PyWavefront nor the names of its
+#    contributors may be used to endorse or promote products
+#    derived from this software without specific prior written
+#    permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------------
+"""
+Loads many obj files in a process pool.
+
+Each worker parses a file and packs all of its buffers into one block of shared memory, so the
+results don't travel through pickle as lists of floats. Material libraries are parsed once in the
+calling process and shared by all the models referencing them.
+
+    with BatchLoader(indexed=True) as loader:
+        for wavefront in loader.load(file_names):
+            upload(wavefront)
+"""
+from array import array
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+import copy
+from itertools import chain
+import logging
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import os
+from pathlib import Path
+import threading
+
+from pywavefront.cache import SECTION_ALIGNMENT
+from pywavefront.exceptions import PywavefrontException
+from pywavefront.lod import LodLevel
+from pywavefront.material import Material, MaterialParser
+from pywavefront.mesh import Mesh
+from pywavefront.obj import ObjParser
+from pywavefront.parser import auto_consume
+from pywavefront.wavefront import Wavefront
+
+logger = logging.getLogger("pywavefront")
+
+
+class BatchLoader:
+    """Loads obj files in worker processes, returning futures or an iterator of Wavefront instances"""
+    material_parser_cls = MaterialParser
+
+    def __init__(self, max_workers=None, strict=False, encoding="utf-8", create_materials=False,
+                 collect_faces=False, cache=False, bulk=False, indexed=False, bounds=False):
+        """
+        Create a batch loader. The wavefront options are the same for all the files.
+        The vertex data is always stored in arrays, as with use_arrays.
+        :param max_workers: Number of worker processes, defaults to the number of processors
+        """
+        self.options = {
+            "strict": strict,
+            "encoding": encoding,
+            "collect_faces": collect_faces,
+            "cache": cache,
+            "bulk": bulk,
+            "indexed": indexed,
+            "bounds": bounds,
+        }
+        self.create_materials = create_materials
+        self.executor = ProcessPoolExecutor(max_workers=max_workers)
+
+        # Parsed material libraries by resolved path
+        self.libraries = {}
+        self.libraries_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+    def submit(self, file_name):
+        """Start loading a file, returns a Future of the Wavefront"""
+        result = Future()
+        result.set_running_or_notify_cancel()
+
+        def done(worker_future):
+            try:
+                result.set_result(self.create_wavefront(file_name, worker_future.result()))
+            except Exception as e:
+                result.set_exception(e)
+
+        self.executor.submit(load_shared, str(file_name), self.options).add_done_callback(done)
+        return result
+
+    def load(self, file_names, ordered=False):
+        """
+        Load all the files, yielding each Wavefront as soon as it's loaded
+        :param ordered: Yield in the order of file_names instead
+        """
+        futures = [self.submit(file_name) for file_name in file_names]
+        for future in (futures if ordered else as_completed(futures)):
+            yield future.result()
+
+    def create_wavefront(self, file_name, shared):
+        """Build a Wavefront from the description and shared memory block of a worker"""
+        name, description = shared
+        memory = SharedMemory(name=name)
+        try:
+            buffers = {key: read_buffer(memory, *section) for key, section in description['buffers'].items()}
+        finally:
+            memory.close()
+            memory.unlink()
+
+        wavefront = Wavefront(file_name, parse=False, use_arrays=True, **self.options)
+        wavefront.mtllibs = description['mtllibs']
+        wavefront.vertices = buffers['vertices']
+        wavefront.vertex_colors = buffers['vertex_colors']
+
+        directory = Path(file_name).parent
+        for mtllib in description['mtllibs']:
+            for material in self.get_library(directory / mtllib).values():
+                wavefront.materials[material.name] = copy_material(material)
+
+        for material_name, is_default, vertex_format, lods, bounds in description['materials']:
+            material = wavefront.materials.get(material_name)
+            if material is None:
+                if not is_default and not self.create_materials:
+                    raise PywavefrontException('Unknown material: %s' % material_name)
+                material = wavefront.materials[material_name] = Material(material_name, is_default=True)
+
+            material.vertex_format = vertex_format
+            material.vertices = buffers['material:' + material_name]
+            material.indices = buffers.get('indices:' + material_name)
+            material.lods = [LodLevel(ratio, buffers['lod:%d:%s' % (level, material_name)], error)
+                             for level, (ratio, error) in enumerate(lods)]
+            material.aabb, material.sphere = bounds
+
+        for index, (mesh_name, material_names, bounds) in enumerate(description['meshes']):
+            mesh = Mesh(mesh_name, has_faces=self.options['collect_faces'])
+            mesh.aabb, mesh.sphere = bounds
+            mesh.materials = [wavefront.materials[material_name] for material_name in material_names]
+            faces = buffers.get('faces:%d' % index)
+            if faces is not None:
+                mesh.faces = [list(face) for face in zip(*[iter(faces)] * 3)]
+            wavefront.add_mesh(mesh)
+
+        return wavefront
+
+    def get_library(self, path):
+        """Parse a material library, or return the materials parsed before"""
+        key = path.resolve()
+        with self.libraries_lock:
+            materials = self.libraries.get(key)
+            if materials is None:
+                try:
+                    materials = self.material_parser_cls(
+                        path,
+                        encoding=self.options['encoding'],
+                        strict=self.options['strict'],
+                        collect_faces=self.options['collect_faces'],
+                    ).materials
+                except IOError:
+                    if not self.create_materials:
+                        raise
+                    materials = {}
+                self.libraries[key] = materials
+        return materials
+
+
+def load_many(file_names, max_workers=None, ordered=False, **kwargs):
+    """Load obj files in a process pool, yielding each Wavefront as soon as it's loaded"""
+    with BatchLoader(max_workers=max_workers, **kwargs) as loader:
+        yield from loader.load(file_names, ordered=ordered)
+
+
+def copy_material(material):
+    """Copy of a library material without vertex data. Textures are shared"""
+    result = copy.copy(material)
+    for name in ('diffuse', 'ambient', 'specular', 'emissive'):
+        setattr(result, name, list(getattr(material, name)))
+    result.vertex_format = ""
+    result.vertices = array('f')
+    result.indices = None
+    result.lods = []
+    result.compact = None
+    result.gl_floats = None
+    result.gl_indices = None
+    return result
+
+
+def read_buffer(memory, offset, length, typecode):
+    values = array(typecode)
+    values.frombytes(memory.buf[offset:offset + length])
+    return values
+
+
+class WorkerObjParser(ObjParser):
+    """Leaves the material libraries to the batch loader, materials are only referenced by name"""
+
+    @auto_consume
+    def parse_mtllib(self):
+        self.wavefront.mtllibs.append(" ".join(self.values[1:]))
+
+    @auto_consume
+    def parse_usemtl(self):
+        name = " ".join(self.values[1:])
+        self.material = self.wavefront.materials.get(name)
+        if self.material is None:
+            self.material = Material(name, has_faces=self.collect_faces)
+            self.wavefront.materials[name] = self.material
+
+        if self.mesh is not None:
+            self.mesh.add_material(self.material)
+
+
+class WorkerWavefront(Wavefront):
+    parser_cls = WorkerObjParser
+
+
+def load_shared(file_name, options):
+    """
+    Parse an obj file in a worker process.
+    Returns the name of a shared memory block holding all the buffers and a description of the model
+    """
+    wavefront = WorkerWavefront(file_name, use_arrays=True, create_materials=True, **options)
+
+    buffers = [
+        ('vertices', wavefront.vertices, 'f'),
+        ('vertex_colors', wavefront.vertex_colors, 'f'),
+    ]
+    materials = []
+    for material in wavefront.materials.values():
+        materials.append((material.name, material.is_default, material.vertex_format,
+                          [(lod.ratio, lod.error) for lod in material.lods],
+                          (material.aabb, material.sphere)))
+        buffers.append(('material:' + material.name, material.vertices, 'f'))
+        if material.indices is not None:
+            index_format = 'H' if material.indices.itemsize == 2 else 'I'
+            buffers.append(('indices:' + material.name, material.indices, index_format))
+            for level, lod in enumerate(material.lods):
+                buffers.append(('lod:%d:%s' % (level, material.name), lod.indices, index_format))
+
+    meshes = []
+    for index, mesh in enumerate(wavefront.mesh_list):
+        meshes.append((mesh.name, [material.name for material in mesh.materials], (mesh.aabb, mesh.sphere)))
+        if options['collect_faces']:
+            buffers.append(('faces:%d' % index, array('q', chain.from_iterable(mesh.faces)), 'q'))
+
+    # Aligned offset of each buffer in the block
+    sections = {}
+    size = 0
+    for key, values, typecode in buffers:
+        data = memoryview(values).cast('B')
+        size += -size % SECTION_ALIGNMENT
+        sections[key] = (size, len(data), typecode)
+        size += len(data)
+
+    memory = SharedMemory(create=True, size=max(size, 1))
+    if os.name == 'posix':
+        # The calling process unlinks the block, the tracker of the worker must not remove it at exit
+        resource_tracker.unregister(memory._name, 'shared_memory')
+    try:
+        for key, values, typecode in buffers:
+            offset, length, typecode = sections[key]
+            memory.buf[offset:offset + length] = memoryview(values).cast('B')
+    finally:
+        memory.close()
+
+    return memory.name, {
+        "mtllibs": wavefront.mtllibs,
+        "materials": materials,
+        "meshes": meshes,
+        "buffers": sections,
+    }
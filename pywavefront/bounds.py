@@ -0,0 +1,95 @@
+# ----------------------------------------------------------------------------
+# PyWavefront
+# Copyright (c) 2018 Kurt Yoder
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#  * Neither the name of PyWavefront nor the names of its
+#    contributors may be used to endorse or promote products
+#    derived from this software without specific prior written
+#    permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------------
+"""
+Bounding boxes and spheres of materials and meshes, as pyrr aabbs and spheres.
+Computed after parsing for a Wavefront loaded with bounds=True, when numpy and pyrr are installed.
+"""
+import logging
+
+try:
+    import numpy
+    import pyrr
+except ImportError:
+    numpy = None
+    pyrr = None
+
+logger = logging.getLogger("pywavefront")
+
+
+def bounding_volumes(points):
+    """
+    The pyrr aabb and the sphere around the center of the aabb of an array of positions.
+    Returns (None, None) for no points
+
+    :param points: Array of shape (n, 3)
+    """
+    if len(points) == 0:
+        return None, None
+
+    aabb = pyrr.aabb.create_from_points(points)
+    center = pyrr.aabb.centre_point(aabb)
+    radius = numpy.sqrt(((points - center) ** 2).sum(axis=1).max())
+    return aabb, pyrr.sphere.create(center, radius, dtype=aabb.dtype)
+
+
+def vertex_positions(vertices, vertex_size):
+    """The positions of interleaved vertices as an array of shape (n, 3)"""
+    return numpy.asarray(vertices, dtype=numpy.float32).reshape(-1, vertex_size)[:, -3:]
+
+
+def set_material_bounds(materials):
+    """Set the aabb and sphere of materials from their vertices"""
+    if pyrr is None:
+        return
+
+    for material in materials:
+        if material.vertex_format:
+            material.aabb, material.sphere = bounding_volumes(
+                vertex_positions(material.vertices, material.vertex_size))
+
+
+def set_mesh_bounds(meshes, points):
+    """
+    Set the aabb and sphere of meshes
+
+    :param meshes: The meshes
+    :param points: {mesh: list of arrays of shape (n, 3) with the positions used by the mesh}
+    """
+    if pyrr is None:
+        return
+
+    for mesh in meshes:
+        parts = points.get(mesh)
+        if parts:
+            mesh.aabb, mesh.sphere = bounding_volumes(numpy.concatenate(parts))
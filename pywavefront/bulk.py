@@ -0,0 +1,405 @@
+# ----------------------------------------------------------------------------
+# PyWavefront
+# Copyright (c) 2018 Kurt Yoder
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#  * Neither the name of PyWavefront nor the names of its
+#    contributors may be used to endorse or promote products
+#    derived from this software without specific prior written
+#    permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------------
+"""
+Bulk reader for obj files.
+
+The file is read in large blocks and the lines of each block are classified at once.
+Consecutive v, vt, vn and f statements are parsed as a single run with numpy, all other
+statements go through the regular parser dispatch one line at a time.
+"""
+import gzip
+import io
+import logging
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from pywavefront.exceptions import PywavefrontException
+
+logger = logging.getLogger("pywavefront")
+
+# Line kinds
+OTHER, VERTEX, TEX_COORD, NORMAL, FACE = range(5)
+
+SPACE = ord(' ')
+TAB = ord('\t')
+NEWLINE = ord('\n')
+
+
+class BulkObjReader:
+    """
+    Reads the obj file of an ObjParser in array mode in large blocks.
+
+    Produces the same vertex data, formats and faces as the line parser. Runs that can't be
+    parsed in bulk, such as statements with trailing comments, blank uv indices or indices out
+    of range, are handed over to the line parser unchanged. Only runs longer than a block are
+    split, the face format of each part is then taken from its first face.
+    The file encoding must be ASCII compatible.
+    """
+    # Size in bytes of the blocks read from the file
+    block_size = 2 ** 24
+
+    def __init__(self, parser):
+        """
+        :param parser: The ObjParser to read the file for. Must use arrays
+        """
+        if numpy is None:
+            raise PywavefrontException("Bulk parsing requires numpy")
+
+        self.parser = parser
+        self.wavefront = parser.wavefront
+
+    def read(self):
+        """Parse the whole file"""
+        for _ in self.read_chunks(stream=False):
+            pass
+
+    def read_chunks(self, stream=True):
+        """
+        Parse the whole file, yielding the chunks the parser closes at its stream boundaries.
+        See :meth:`ObjParser.stream`
+
+        :param stream: Stop at the stream boundaries. Nothing is yielded when False
+        """
+        rest = b''
+        for block in self.read_blocks():
+            if rest:
+                block = rest + block
+            # The last run can continue in the next block
+            end = yield from self.parse_block(block, final=False, stream=stream)
+            rest = block[end:]
+
+        if rest:
+            yield from self.parse_block(rest, stream=stream)
+
+    def read_blocks(self):
+        """Yields blocks of complete lines, each ending with a newline"""
+        file_name = self.parser.file_name
+        # FIXME: Converting to str for now for py34 compatibility
+        if file_name.suffix == ".gz":
+            fd = gzip.open(str(file_name), mode='rb')
+        else:
+            fd = open(str(file_name), mode='rb')
+
+        with fd:
+            rest = b''
+            while True:
+                data = fd.read(self.block_size)
+                if not data:
+                    break
+
+                end = data.rfind(b'\n') + 1
+                if end == 0:
+                    rest += data
+                    continue
+
+                yield rest + data[:end]
+                rest = data[end:]
+
+            if rest:
+                yield rest + b'\n'
+
+    def parse_block(self, block, final=True, stream=False):
+        """
+        Split a block in runs of lines of the same kind and parse each run.
+        Yields the chunks closed while streaming
+
+        :param block: Complete lines
+        :param final: Parse the last run as well, unless it's the only one
+        :param stream: Stop at the stream boundaries of the parser
+        :return: Offset of the first line that wasn't parsed
+        """
+        buf = numpy.frombuffer(block, dtype=numpy.uint8)
+        ends = numpy.flatnonzero(buf == NEWLINE)
+        starts = numpy.empty_like(ends)
+        starts[0] = 0
+        starts[1:] = ends[:-1] + 1
+
+        kinds = classify_lines(buf, starts)
+        bounds = numpy.concatenate(([0], numpy.flatnonzero(kinds[1:] != kinds[:-1]) + 1, [len(kinds)]))
+
+        if not final and len(bounds) > 2:
+            bounds = bounds[:-1]
+
+        for first, last in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            begin = starts[first]
+            end = ends[last - 1] + 1
+            yield from self.parse_run(int(kinds[first]), buf[begin:end], starts[first:last] - begin, stream)
+
+        return int(ends[bounds[-1] - 1]) + 1
+
+    def parse_run(self, kind, run, line_starts, stream=False):
+        """
+        Parse consecutive lines of the same kind. Yields the chunks closed while streaming
+
+        :param kind: The kind of all the lines
+        :param run: uint8 array with the lines
+        :param line_starts: Offset of each line in the run
+        :param stream: Stop at the stream boundaries of the parser
+        """
+        parsed = False
+        if kind == VERTEX:
+            parsed = self.parse_vertices(run, line_starts)
+        elif kind == TEX_COORD:
+            parsed = self.parse_tex_coords(run, line_starts)
+        elif kind == NORMAL:
+            parsed = self.parse_normals(run, line_starts)
+        elif kind == FACE:
+            parsed = self.parse_faces(run, line_starts)
+
+        if not parsed:
+            yield from self.dispatch(run, stream)
+
+    def dispatch(self, run, stream=False):
+        """Parse the lines with the regular parser dispatch. Yields the chunks closed while streaming"""
+        parser = self.parser
+        text = run.tobytes().decode(parser.encoding)
+        # Universal newlines, like reading the file in text mode
+        parser.lines = iter(io.StringIO(text, newline=None))
+        parser.line = None
+
+        stop_at = parser.stream_boundaries if stream else None
+        while parser.dispatch_lines(stop_at):
+            chunk = parser.take_chunk()
+            if chunk is not None:
+                yield chunk
+            parser.dispatch_statement()
+
+    def parse_vertices(self, run, line_starts):
+        values, counts = parse_numbers(run, line_starts, 1, numpy.float64)
+        if values is None or counts.min() < 3:
+            return False
+
+        offsets = numpy.cumsum(counts) - counts
+        positions = values[offsets[:, None] + numpy.arange(3)]
+
+        # Same as ObjParser.add_vertices_to_arrays
+        has_color = counts == 6
+        color_runs = self.parser.vertex_color_runs
+        changed = numpy.empty_like(has_color)
+        changed[0] = has_color[0] != (len(color_runs) % 2 == 1)
+        changed[1:] = has_color[1:] != has_color[:-1]
+        color_runs += (numpy.flatnonzero(changed) + len(self.wavefront.vertices) // 3).tolist()
+
+        colors = self.wavefront.vertex_colors
+        if len(colors) or has_color.any():
+            run_colors = numpy.zeros_like(positions)
+            run_colors[has_color] = values[offsets[has_color, None] + numpy.arange(3, 6)]
+            colors.frombytes(bytes(4 * (len(self.wavefront.vertices) - len(colors))))
+            colors.frombytes(run_colors.astype(numpy.float32).tobytes())
+
+        self.wavefront.vertices.frombytes(positions.astype(numpy.float32).tobytes())
+        return True
+
+    def parse_tex_coords(self, run, line_starts):
+        values, counts = parse_numbers(run, line_starts, 2, numpy.float64)
+        if values is None or counts.min() < 2:
+            return False
+
+        offsets = numpy.cumsum(counts) - counts
+        tex_coords = values[offsets[:, None] + numpy.arange(2)]
+        self.parser.tex_coords.frombytes(tex_coords.astype(numpy.float32).tobytes())
+        return True
+
+    def parse_normals(self, run, line_starts):
+        values, counts = parse_numbers(run, line_starts, 2, numpy.float64)
+        if values is None or counts.min() < 3:
+            return False
+
+        offsets = numpy.cumsum(counts) - counts
+        normals = values[offsets[:, None] + numpy.arange(3)]
+        self.parser.normals.frombytes(normals.astype(numpy.float32).tobytes())
+        return True
+
+    def parse_faces(self, run, line_starts):
+        """
+        Resolve the indices, triangulate and emit interleaved vertex data like consume_faces_to_array,
+        or the face corners in indexed mode
+        """
+        parser = self.parser
+        end = line_starts[1] if len(line_starts) > 1 else len(run)
+        first_values = run[:end].tobytes().decode(parser.encoding).split()
+
+        run = run.copy()
+        run[line_starts] = SPACE
+        corners = count_tokens(run, line_starts)
+        if corners.min() < 3:
+            return False
+
+        # The format of the first corner must be used by all the corners
+        parts = first_values[1].split('/')
+        if len(parts) > 3:
+            return False
+        has_vt = len(parts) >= 2 and parts[1] != ''
+        has_vn = len(parts) == 3
+
+        data = run.tobytes()
+        if data.count(b'/') != corners.sum() * (len(parts) - 1):
+            return False
+        if has_vn and not has_vt:
+            data = data.replace(b'//', b' ')
+        elif b'//' in data:
+            # Blank uv indices
+            return False
+
+        stride = 1 + has_vt + has_vn
+        indices = parse_array(data.replace(b'/', b' '), numpy.int64, corners.sum() * stride)
+        if indices is None:
+            return False
+        indices = indices.reshape(-1, stride) - 1
+
+        num_vertices = len(self.wavefront.vertices) // 3
+        v_index = resolve_indices(indices[:, 0], num_vertices)
+        t_index = resolve_indices(indices[:, 1], len(parser.tex_coords) // 2) if has_vt else None
+        n_index = resolve_indices(indices[:, -1], len(parser.normals) // 3) if has_vn else None
+        if v_index is None or (has_vt and t_index is None) or (has_vn and n_index is None):
+            return False
+
+        parser.values = first_values
+        parser.begin_faces()
+        has_vt, has_vn, has_colors = parser.set_face_vertex_format()
+
+        order = triangulate(corners)
+        v_order = v_index[order]
+
+        if parser.collect_faces:
+            parser.mesh.faces += v_order.reshape(-1, 3).tolist()
+
+        if parser.indexed:
+            missing = numpy.full(len(order), -1, dtype=numpy.int64)
+            face_corners = numpy.stack((
+                v_order,
+                t_index[order] if has_vt else missing,
+                n_index[order] if has_vn else missing,
+            ), axis=1)
+            parser.get_face_corners().frombytes(face_corners.tobytes())
+            return True
+
+        columns = []
+        if has_vt:
+            columns.append(as_rows(parser.tex_coords, 2)[t_index[order]])
+        if has_colors:
+            columns.append(as_rows(self.wavefront.vertex_colors, 3)[v_order])
+        if has_vn:
+            columns.append(as_rows(parser.normals, 3)[n_index[order]])
+        columns.append(as_rows(self.wavefront.vertices, 3)[v_order])
+        parser.material.vertices.frombytes(numpy.concatenate(columns, axis=1).tobytes())
+        return True
+
+
+def classify_lines(buf, starts):
+    """Returns the kind of each line from its first three characters"""
+    last = len(buf) - 1
+    c0 = buf[starts]
+    c1 = buf[numpy.minimum(starts + 1, last)]
+    c2 = buf[numpy.minimum(starts + 2, last)]
+    space1 = (c1 == SPACE) | (c1 == TAB)
+    space2 = (c2 == SPACE) | (c2 == TAB)
+    is_v = c0 == ord('v')
+
+    kinds = numpy.full(len(starts), OTHER, dtype=numpy.int8)
+    kinds[is_v & space1] = VERTEX
+    kinds[is_v & (c1 == ord('t')) & space2] = TEX_COORD
+    kinds[is_v & (c1 == ord('n')) & space2] = NORMAL
+    kinds[(c0 == ord('f')) & space1] = FACE
+    return kinds
+
+
+def count_tokens(run, line_starts):
+    """Count the whitespace separated tokens of each line"""
+    is_space = run <= SPACE
+    token_starts = ~is_space
+    token_starts[1:] &= is_space[:-1]
+    return numpy.add.reduceat(token_starts, line_starts, dtype=numpy.int64)
+
+
+def parse_numbers(run, line_starts, prefix_length, dtype):
+    """
+    Blank the statement of each line and parse all the numbers.
+    Returns the values and the number of values on each line, or (None, None)
+    """
+    run = run.copy()
+    for i in range(prefix_length):
+        run[line_starts + i] = SPACE
+
+    counts = count_tokens(run, line_starts)
+    values = parse_array(run.tobytes(), dtype, counts.sum())
+    if values is None:
+        return None, None
+    return values, counts
+
+
+def parse_array(data, dtype, expected):
+    """Parse whitespace separated numbers, returns None unless all of the expected values are read"""
+    try:
+        values = numpy.fromstring(data, dtype=dtype, sep=' ')
+    except ValueError:
+        return None
+
+    if len(values) != expected:
+        return None
+    return values
+
+
+def resolve_indices(indices, count):
+    """Resolve negative indices like the line parser, returns None if any index is out of range"""
+    indices = numpy.where(indices < 0, indices + count + 1, indices)
+    if len(indices) and (indices.min() < 0 or indices.max() >= count):
+        return None
+    return indices
+
+
+def triangulate(corners):
+    """
+    Fan triangulation of faces with the given number of corners, in the order of consume_faces:
+    (v_1, v_2, v_3) and then (v_j, v_1, v_{j - 1}) for each remaining corner.
+    Returns the corner offsets of all triangles as a flat array
+    """
+    triangles = corners - 2
+    face_offsets = numpy.repeat(numpy.cumsum(corners) - corners, triangles)
+    local = numpy.arange(triangles.sum()) - numpy.repeat(numpy.cumsum(triangles) - triangles, triangles)
+    first = local == 0
+
+    order = numpy.empty((len(local), 3), dtype=numpy.int64)
+    order[:, 0] = numpy.where(first, face_offsets, face_offsets + local + 2)
+    order[:, 1] = numpy.where(first, face_offsets + 1, face_offsets)
+    order[:, 2] = numpy.where(first, face_offsets + 2, face_offsets + local + 1)
+    return order.ravel()
+
+
+def as_rows(values, size):
+    """View a flat array('f') as rows of size floats"""
+    return numpy.frombuffer(values, dtype=numpy.float32).reshape(-1, size)
@@ -0,0 +1,253 @@
+# ----------------------------------------------------------------------------
+# PyWavefront
+# Copyright (c) 2018 Kurt Yoder
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#  * Neither the name of PyWavefront nor the names of its
+#    contributors may be used to endorse or promote products
+#    derived from this software without specific prior written
+#    permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------------
+"""
+Bounding volume hierarchy over the aabbs of meshes for frustum culling and picking.
+
+    wavefront = pywavefront.Wavefront('city.obj', bounds=True)
+    bvh = BVH.from_meshes(wavefront.mesh_list)
+    visible = bvh.cull(frustum_planes(model_view @ projection))
+    picked = bvh.pick(pyrr.ray.create(origin, direction))
+
+The tree is stored in flat arrays in depth first order: the left child of a node is the next
+node and the items of each node are a contiguous range of the reordered items.
+"""
+import logging
+
+try:
+    import numpy
+    import pyrr
+except ImportError:
+    numpy = None
+    pyrr = None
+
+from pywavefront.exceptions import PywavefrontException
+
+logger = logging.getLogger("pywavefront")
+
+
+def frustum_planes(matrix):
+    """
+    The left, right, bottom, top, near and far planes of a pyrr model view projection matrix
+    as an array of pyrr planes of shape (6, 4). Points inside the frustum are on the side
+    the normals point to.
+
+    :param matrix: pyrr matrix, model_view * projection
+    """
+    if pyrr is None:
+        raise PywavefrontException("Frustum culling requires pyrr")
+
+    # pyrr matrices transform row vectors, so the clip coordinates are the columns
+    m = numpy.asarray(matrix, dtype=numpy.float64)
+    x, y, z, w = m[:, 0], m[:, 1], m[:, 2], m[:, 3]
+    planes = numpy.array([w + x, w - x, w + y, w - y, w + z, w - z])
+    planes /= numpy.linalg.norm(planes[:, :3], axis=1)[:, None]
+    # a * x + b * y + c * z + d >= 0 inside, pyrr planes are n . p = distance
+    planes[:, 3] *= -1
+    return planes
+
+
+def transform_aabb(aabb, matrix):
+    """
+    The pyrr aabb around an aabb transformed by a pyrr matrix, for aabbs of shape (2, 3) or (n, 2, 3)
+
+    :param aabb: pyrr aabb
+    :param matrix: pyrr matrix of shape (4, 4)
+    """
+    aabb = numpy.asarray(aabb)
+    matrix = numpy.asarray(matrix)
+    center = (aabb[..., 0, :] + aabb[..., 1, :]) / 2
+    extent = (aabb[..., 1, :] - aabb[..., 0, :]) / 2
+    center = center.dot(matrix[:3, :3]) + matrix[3, :3]
+    extent = extent.dot(numpy.abs(matrix[:3, :3]))
+    return numpy.stack([center - extent, center + extent], axis=-2)
+
+
+def box_plane_sides(aabbs, planes):
+    """
+    Distances of the centers and projected half extents of aabbs of shape (n, 2, 3) to planes
+    of shape (k, 4), both of shape (n, k)
+    """
+    center = (aabbs[:, 0] + aabbs[:, 1]) / 2
+    extent = (aabbs[:, 1] - aabbs[:, 0]) / 2
+    return center.dot(planes[:, :3].T) - planes[:, 3], extent.dot(numpy.abs(planes[:, :3].T))
+
+
+class BVH:
+    """Bounding volume hierarchy over items with a pyrr aabb each"""
+    # Maximum number of items in a leaf
+    leaf_size = 4
+
+    def __init__(self, aabbs, items=None):
+        """
+        Build the tree by splitting the items at the median of the longest axis of their centers
+
+        :param aabbs: pyrr aabbs of shape (n, 2, 3)
+        :param items: The items returned by cull and pick, the indices of the aabbs when not given
+        """
+        if numpy is None:
+            raise PywavefrontException("BVH requires numpy and pyrr")
+
+        self.aabbs = numpy.asarray(aabbs, dtype=numpy.float64).reshape(-1, 2, 3)
+        items = list(range(len(self.aabbs))) if items is None else list(items)
+
+        self.order = numpy.arange(len(self.aabbs))
+        self.node_aabbs = []
+        self.node_starts = []
+        self.node_counts = []
+        self.node_rights = []
+        if len(self.aabbs):
+            self.build(0, len(self.aabbs), (self.aabbs[:, 0] + self.aabbs[:, 1]) / 2)
+
+        self.node_aabbs = numpy.array(self.node_aabbs).reshape(-1, 2, 3)
+        self.node_starts = numpy.array(self.node_starts, dtype=numpy.int64)
+        self.node_counts = numpy.array(self.node_counts, dtype=numpy.int64)
+        self.node_rights = numpy.array(self.node_rights, dtype=numpy.int64)
+
+        # Items and aabbs in tree order
+        self.aabbs = self.aabbs[self.order]
+        self.items = [items[i] for i in self.order]
+
+    @classmethod
+    def from_meshes(cls, meshes):
+        """Tree over the meshes with bounds"""
+        meshes = [mesh for mesh in meshes if mesh.aabb is not None]
+        return cls([mesh.aabb for mesh in meshes], meshes)
+
+    def __len__(self):
+        return len(self.items)
+
+    def build(self, start, end, centers):
+        """Add the node of the items start:end and its children, returns the index of the node"""
+        node = len(self.node_starts)
+        indices = self.order[start:end]
+        aabbs = self.aabbs[indices]
+        self.node_aabbs.append([aabbs[:, 0].min(axis=0), aabbs[:, 1].max(axis=0)])
+        self.node_starts.append(start)
+        self.node_counts.append(end - start)
+        self.node_rights.append(-1)
+
+        if end - start <= self.leaf_size:
+            return node
+
+        node_centers = centers[indices]
+        axis = numpy.argmax(node_centers.max(axis=0) - node_centers.min(axis=0))
+        middle = (start + end) // 2
+        self.order[start:end] = indices[numpy.argpartition(node_centers[:, axis], middle - start)]
+
+        self.build(start, middle, centers)
+        self.node_rights[node] = self.build(middle, end, centers)
+        return node
+
+    def cull(self, planes):
+        """
+        The items with an aabb intersecting the volume inside all planes, in tree order
+
+        :param planes: pyrr planes of shape (k, 4), such as :func:`frustum_planes`
+        """
+        planes = numpy.asarray(planes, dtype=numpy.float64)
+        ranges = []
+        leaf_items = []
+        nodes = numpy.zeros(1 if len(self.items) else 0, dtype=numpy.int64)
+
+        while len(nodes):
+            distance, radius = box_plane_sides(self.node_aabbs[nodes], planes)
+            # Nodes outside any plane are dropped, nodes inside all planes are kept whole
+            intersecting = (distance + radius >= 0).all(axis=1)
+            inside = (distance - radius >= 0).all(axis=1)[intersecting]
+            nodes = nodes[intersecting]
+
+            ranges.extend(zip(self.node_starts[nodes[inside]].tolist(), self.node_counts[nodes[inside]].tolist()))
+            nodes = nodes[~inside]
+            rights = self.node_rights[nodes]
+            leaves = nodes[rights < 0]
+            leaf_items.extend(range(start, start + count) for start, count in
+                              zip(self.node_starts[leaves].tolist(), self.node_counts[leaves].tolist()))
+            nodes = numpy.concatenate([nodes[rights >= 0] + 1, rights[rights >= 0]])
+
+        indices = [index for start, count in ranges for index in range(start, start + count)]
+        if leaf_items:
+            candidates = numpy.fromiter((index for run in leaf_items for index in run), dtype=numpy.int64)
+            distance, radius = box_plane_sides(self.aabbs[candidates], planes)
+            indices.extend(candidates[(distance + radius >= 0).all(axis=1)].tolist())
+
+        indices.sort()
+        return [self.items[index] for index in indices]
+
+    def pick(self, ray):
+        """
+        The item with the nearest aabb hit by a pyrr ray and the distance along the ray,
+        0 when the ray starts inside the aabb. Returns (None, None) when nothing is hit.
+
+        :param ray: pyrr ray
+        """
+        ray = numpy.asarray(ray, dtype=numpy.float64)
+        best_item, best_distance = None, numpy.inf
+        stack = [(0.0, 0)] if len(self.items) else []
+
+        while stack:
+            distance, node = stack.pop()
+            if distance > best_distance:
+                continue
+
+            right = self.node_rights[node]
+            if right < 0:
+                start = self.node_starts[node]
+                for index in range(start, start + self.node_counts[node]):
+                    distance = self.ray_distance(ray, self.aabbs[index])
+                    if distance is not None and distance < best_distance:
+                        best_item, best_distance = self.items[index], distance
+                continue
+
+            hits = []
+            for child in (node + 1, right):
+                distance = self.ray_distance(ray, self.node_aabbs[child])
+                if distance is not None and distance <= best_distance:
+                    hits.append((distance, child))
+            # Visit the nearest child first
+            stack.extend(sorted(hits, reverse=True))
+
+        if best_item is None:
+            return None, None
+        return best_item, best_distance
+
+    @staticmethod
+    def ray_distance(ray, aabb):
+        """Distance along the ray to an aabb, 0 inside the aabb, None when the ray misses it"""
+        if (ray[0] >= aabb[0]).all() and (ray[0] <= aabb[1]).all():
+            return 0.0
+
+        point = pyrr.geometric_tests.ray_intersect_aabb(ray, aabb)
+        if point is None:
+            return None
+        return float(numpy.linalg.norm(point - ray[0]))
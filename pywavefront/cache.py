@@ -33,19 +33,36 @@
 # ----------------------------------------------------------------------------
 """
 Parser and metadata handler for cached binary versions of obj files
+
+Format 2 stores every vertex and index buffer as raw little endian data at a 16 byte aligned
+offset. Uncompressed files are memory mapped and the buffers exposed as numpy views without
+copying. Files in format 0.1 are gzipped streams of the buffers and are still readable.
 """
+from array import array
 import gzip
 import json
 import logging
+import mmap
 import struct
 import os
+import sys
+import zlib
 from datetime import datetime
 from pathlib import Path
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from pywavefront.lod import LodLevel
 from pywavefront.material import Material, MaterialParser
 
 logger = logging.getLogger("pywavefront")
 
+# Byte alignment of each buffer in format 2
+SECTION_ALIGNMENT = 16
+
 
 def cache_name(path):
     """Generate the name of the binary cache file"""
@@ -57,16 +74,26 @@ def meta_name(path):
     return path.with_suffix(path.suffix + '.json')
 
 
+def checksum(data):
+    """CRC32 of a buffer"""
+    return zlib.crc32(data) & 0xffffffff
+
+
 class CacheLoader:
     material_parser_cls = MaterialParser
 
-    def __init__(self, file_name, wavefront, strict=False, create_materials=False, encoding='utf-8', parse=True, **kwargs):
+    # Compare the checksums of the buffers in format 2 caches. Reads all the data once.
+    verify_checksums = True
+
+    def __init__(self, file_name, wavefront, strict=False, create_materials=False, encoding='utf-8', parse=True,
+                 use_arrays=False, **kwargs):
         self.wavefront = wavefront
         self.file_name = Path(file_name)
         self.path = self.file_name.parent
         self.encoding = encoding
         self.strict = strict
         self.dir = self.file_name.parent
+        self.use_arrays = use_arrays
         self.meta = None
 
     def parse(self):
@@ -83,13 +110,23 @@ class CacheLoader:
 
             return False
 
+        self.meta = Meta.from_file(meta_name(self.file_name))
+        if not self.meta.matches_source(self.file_name):
+            logger.info("%s changed since the cache was created", self.file_name)
+            return False
+
+        if self.meta.version not in ("0.1", Meta.format_version):
+            logger.info("%s has a cache of unknown version %s", self.file_name, self.meta.version)
+            return False
+
         logger.info("%s loading cached version", self.file_name)
 
-        self.meta = Meta.from_file(meta_name(self.file_name))
         self._parse_mtllibs()
-        self._load_vertex_buffers()
+        if self.meta.version == "0.1":
+            self._load_vertex_buffers()
+            return True
 
-        return True
+        return self._load_sections()
 
     def load_vertex_buffer(self, fd, material, length):
         """
@@ -99,25 +136,106 @@ class CacheLoader:
         :param material: The material these vertices belong to
         :param length: Byte length of the vertex data
         """
-        material.vertices = struct.unpack('{}f'.format(length // 4), fd.read(length))
+        if self.use_arrays:
+            material.vertices = array('f')
+            material.vertices.frombytes(fd.read(length))
+        else:
+            material.vertices = struct.unpack('{}f'.format(length // 4), fd.read(length))
+
+    def load_section(self, data, offset, length, typecode):
+        """
+        Expose a buffer of a format 2 cache. Numpy views share the memory of the mapped file,
+        without numpy the data is copied into an array.
+
+        :param data: The mapped or decompressed cache file
+        :param offset: Byte offset of the buffer
+        :param length: Byte length of the buffer
+        :param typecode: array typecode of the values
+        """
+        if numpy is not None:
+            return numpy.frombuffer(data, dtype=numpy.dtype(typecode).newbyteorder('<'),
+                                    count=length // struct.calcsize(typecode), offset=offset)
+
+        values = array(typecode)
+        values.frombytes(data[offset:offset + length])
+        if sys.byteorder == 'big':
+            values.byteswap()
+        return values
+
+    def _get_material(self, name):
+        mat = self.wavefront.materials.get(name)
+        if not mat:
+            mat = Material(name=name, is_default=True)
+            self.wavefront.materials[mat.name] = mat
+        return mat
 
     def _load_vertex_buffers(self):
-        """Load each vertex buffer into each material"""
+        """Load each vertex buffer into each material from a 0.1 cache"""
         # FIXME: Coverting path to str to not break library mocking
         fd = gzip.open(str(cache_name(self.file_name)), 'rb')
 
         for buff in self.meta.vertex_buffers:
-
-            mat = self.wavefront.materials.get(buff['material'])
-            if not mat:
-                mat = Material(name=buff['material'], is_default=True)
-                self.wavefront.materials[mat.name] = mat
-
+            mat = self._get_material(buff['material'])
             mat.vertex_format = buff['vertex_format']
             self.load_vertex_buffer(fd, mat, buff['byte_length'])
 
+            # Indexed materials store the index buffer after the vertices
+            if buff.get('index_format'):
+                mat.indices = array(buff['index_format'])
+                mat.indices.frombytes(fd.read(buff['index_byte_length']))
+
         fd.close()
 
+    def _load_sections(self):
+        """Load the buffers of a format 2 cache. Returns False if the cache is damaged"""
+        try:
+            data = self._read_cache_file()
+        except (OSError, EOFError, zlib.error):
+            data = None
+
+        sections = []
+        for buff in self.meta.vertex_buffers:
+            entries = [('vertices', 'f', buff['byte_offset'], buff['byte_length'], buff['checksum'])]
+            if buff.get('index_format'):
+                entries.append(('indices', buff['index_format'], buff['index_byte_offset'],
+                                buff['index_byte_length'], buff['index_checksum']))
+                entries += [(lod, buff['index_format'], lod['byte_offset'], lod['byte_length'], lod['checksum'])
+                            for lod in buff.get('lods', [])]
+
+            for target, typecode, offset, length, expected in entries:
+                if data is None or offset + length > len(data) or (
+                        self.verify_checksums and checksum(memoryview(data)[offset:offset + length]) != expected):
+                    logger.warning("%s has a damaged cache file, parsing the obj file", self.file_name)
+                    return False
+
+                sections.append((buff, target, self.load_section(data, offset, length, typecode)))
+
+        for buff, target, values in sections:
+            mat = self._get_material(buff['material'])
+            if target == 'vertices':
+                mat.vertex_format = buff['vertex_format']
+                mat.vertices = values
+                mat.lods = []
+            elif target == 'indices':
+                mat.indices = values
+            else:
+                mat.lods.append(LodLevel(target['ratio'], values, target['error']))
+
+        return True
+
+    def _read_cache_file(self):
+        """Map the cache file into memory, compressed files are read into a bytearray"""
+        # FIXME: Coverting path to str to not break library mocking
+        if self.meta.compression == 'gzip':
+            with gzip.open(str(cache_name(self.file_name)), 'rb') as fd:
+                return bytearray(fd.read())
+
+        with open(str(cache_name(self.file_name)), 'rb') as fd:
+            if os.fstat(fd.fileno()).st_size == 0:
+                return bytearray()
+            # Copy on write keeps the views writable without touching the file
+            return mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_COPY)
+
     def _parse_mtllibs(self):
         """Load mtl files"""
         for mtllib in self.meta.mtllibs:
@@ -131,61 +249,163 @@ class CacheLoader:
 
             for name, material in materials.items():
                 self.wavefront.materials[name] = material
+            self.wavefront.mtllibs.append(mtllib)
 
 
 class CacheWriter:
 
-    def __init__(self, file_name, wavefront):
-        self.file_name = file_name
+    def __init__(self, file_name, wavefront, compress=False):
+        """
+        :param file_name: The obj file the cache is created for
+        :param wavefront: The loaded wavefront
+        :param compress: Gzip the buffers. Smaller files, but they can't be memory mapped
+        """
+        self.file_name = Path(file_name)
         self.wavefront = wavefront
+        self.compress = compress
         self.meta = Meta()
 
     def write(self):
         logger.info("%s creating cache", self.file_name)
 
         self.meta.mtllibs = self.wavefront.mtllibs
+        self.meta.compression = 'gzip' if self.compress else None
+        self.meta.set_source(self.file_name)
 
         offset = 0
-        fd = gzip.open(cache_name(self.file_name), 'wb')
+        if self.compress:
+            fd = gzip.open(cache_name(self.file_name), 'wb')
+        else:
+            fd = open(cache_name(self.file_name), 'wb')
 
         for mat in self.wavefront.materials.values():
 
             if len(mat.vertices) == 0:
                 continue
 
+            vertices = self._as_bytes(mat.vertices, 'f')
+            offset, vertex_offset = self._write_section(fd, offset, vertices)
+
+            index_format = None
+            index_offset = index_checksum = 0
+            indices = b''
+            lods = []
+            if mat.indices is not None:
+                index_format = 'H' if mat.indices.itemsize == 2 else 'I'
+                indices = self._as_bytes(mat.indices, index_format)
+                index_checksum = checksum(indices)
+                offset, index_offset = self._write_section(fd, offset, indices)
+
+                # Levels of detail index the same vertices
+                for lod in mat.lods:
+                    lod_indices = self._as_bytes(lod.indices, index_format)
+                    offset, lod_offset = self._write_section(fd, offset, lod_indices)
+                    lods.append({
+                        "ratio": lod.ratio,
+                        "error": lod.error,
+                        "byte_offset": lod_offset,
+                        "byte_length": len(lod_indices),
+                        "checksum": checksum(lod_indices),
+                    })
+
             self.meta.add_vertex_buffer(
                 mat.name,
                 mat.vertex_format,
-                offset,
-                len(mat.vertices) * 4,
+                vertex_offset,
+                len(vertices),
+                checksum=checksum(vertices),
+                index_format=index_format,
+                index_byte_offset=index_offset,
+                index_byte_length=len(indices),
+                index_checksum=index_checksum,
+                lods=lods,
             )
-            offset += len(mat.vertices) * 4
-            fd.write(struct.pack('{}f'.format(len(mat.vertices)), *mat.vertices))
 
         fd.close()
         self.meta.write(meta_name(self.file_name))
 
+    def _as_bytes(self, values, typecode):
+        """Little endian bytes of a buffer"""
+        if isinstance(values, (list, tuple)):
+            return struct.pack('<{}{}'.format(len(values), typecode), *values)
+
+        if sys.byteorder == 'big':
+            values = array(typecode, values)
+            values.byteswap()
+        # Written straight from the buffer of arrays
+        return memoryview(values).cast('B')
+
+    def _write_section(self, fd, offset, data):
+        """Write data at the next aligned offset, returns the new offset and the offset of the data"""
+        padding = -offset % SECTION_ALIGNMENT
+        fd.write(bytes(padding))
+        fd.write(data)
+        return offset + padding + len(data), offset + padding
+
 
 class Meta:
     """
     Metadata for binary obj cache files
     """
-    format_version = "0.1"
+    format_version = "2"
 
     def __init__(self, **kwargs):
         self._mtllibs = kwargs.get('mtllibs') or []
         self._vertex_buffers = kwargs.get('vertex_buffers') or []
         self._version = kwargs.get('version') or self.format_version
         self._created_at = kwargs.get('created_at') or datetime.now().isoformat()
-
-    def add_vertex_buffer(self, material, vertex_format, byte_offset, byte_length):
-        """Add a vertex buffer"""
-        self._vertex_buffers.append({
+        self.compression = kwargs.get('compression')
+        # Size and modification time of the obj file the cache was created from
+        self.source_size = kwargs.get('source_size')
+        self.source_mtime_ns = kwargs.get('source_mtime_ns')
+
+    def add_vertex_buffer(self, material, vertex_format, byte_offset, byte_length, checksum=None,
+                          index_format=None, index_byte_offset=0, index_byte_length=0, index_checksum=None,
+                          lods=None):
+        """
+        Add a vertex buffer
+        :param checksum: CRC32 of the vertex data
+        :param index_format: array typecode of the index buffer, if indexed
+        :param index_byte_offset: Byte offset of the index buffer
+        :param index_byte_length: Byte length of the index buffer
+        :param index_checksum: CRC32 of the index buffer
+        :param lods: ratio, error, byte_offset, byte_length and checksum of each level of detail
+                     index buffer, in index_format
+        """
+        buffer = {
             "material": material,
             "vertex_format": vertex_format,
             "byte_offset": byte_offset,
             "byte_length": byte_length,
-        })
+            "checksum": checksum,
+        }
+        if index_format:
+            buffer["index_format"] = index_format
+            buffer["index_byte_offset"] = index_byte_offset
+            buffer["index_byte_length"] = index_byte_length
+            buffer["index_checksum"] = index_checksum
+        if lods:
+            buffer["lods"] = lods
+
+        self._vertex_buffers.append(buffer)
+
+    def set_source(self, path):
+        """Record the size and modification time of the obj file"""
+        stat = os.stat(str(path))
+        self.source_size = stat.st_size
+        self.source_mtime_ns = stat.st_mtime_ns
+
+    def matches_source(self, path):
+        """Is the cache up to date with the obj file? Always true for caches without source information"""
+        if self.source_size is None:
+            return True
+
+        try:
+            stat = os.stat(str(path))
+        except OSError:
+            # Only the cache is distributed
+            return True
+        return stat.st_size == self.source_size and stat.st_mtime_ns == self.source_mtime_ns
 
     @classmethod
     def from_file(cls, path):
@@ -203,6 +423,9 @@ class Meta:
                     "version": self._version,
                     "mtllibs": self._mtllibs,
                     "vertex_buffers": self._vertex_buffers,
+                    "compression": self.compression,
+                    "source_size": self.source_size,
+                    "source_mtime_ns": self.source_mtime_ns,
                 },
                 indent=2,
             ))
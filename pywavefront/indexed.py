@@ -0,0 +1,125 @@
+# ----------------------------------------------------------------------------
+# PyWavefront
+# Copyright (c) 2018 Kurt Yoder
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#  * Neither the name of PyWavefront nor the names of its
+#    contributors may be used to endorse or promote products
+#    derived from this software without specific prior written
+#    permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------------
+"""
+Builds indexed vertex buffers from the face corners collected by the parser.
+
+Each triangle corner is a (v, vt, vn) index triple, -1 for missing indices. Corners with the same
+triple share a vertex, so the interleaved data of a closed mesh is stored about once per position
+instead of once per triangle corner.
+"""
+from array import array
+import logging
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from pywavefront.exceptions import PywavefrontException
+
+logger = logging.getLogger("pywavefront")
+
+# Largest number of vertices addressed with 16 bit indices
+MAX_SHORT_INDEX_VERTICES = 2 ** 16
+
+
+def unique_corners(corners):
+    """
+    Find the unique (v, vt, vn) triples of an array of shape (n, 3).
+    Returns the unique triples in order of first use and the index of each corner
+    """
+    if len(corners) == 0:
+        return corners, numpy.empty(0, dtype=numpy.int64)
+
+    # Pack the triple in a single int64 key when the ranges allow it, sorting rows is much slower
+    ranges = corners.max(axis=0) + 2
+    if float(ranges[0]) * float(ranges[1]) * float(ranges[2]) < 2 ** 63:
+        keys = (corners[:, 0] * ranges[1] + corners[:, 1] + 1) * ranges[2] + corners[:, 2] + 1
+        _, first, inverse = numpy.unique(keys, return_index=True, return_inverse=True)
+    else:
+        _, first, inverse = numpy.unique(corners, axis=0, return_index=True, return_inverse=True)
+
+    order = numpy.argsort(first)
+    rank = numpy.empty_like(order)
+    rank[order] = numpy.arange(len(order))
+    return corners[first[order]], rank[inverse.ravel()]
+
+
+def build_indexed_buffers(corners, vertex_format, positions, colors, tex_coords, normals):
+    """
+    Build the unique interleaved vertices and the index buffer of a material
+
+    :param corners: flat array('q') with the (v, vt, vn) triple of each triangle corner
+    :param vertex_format: The vertex format of the material, such as T2F_N3F_V3F
+    :param positions: flat array('f') with 3 floats per vertex
+    :param colors: flat array('f') with 3 floats per vertex, or empty
+    :param tex_coords: flat array('f') with 2 floats per texture coordinate
+    :param normals: flat array('f') with 3 floats per normal
+    :return: (vertices, indices) as array('f') and array('H') or array('I')
+    """
+    if numpy is None:
+        raise PywavefrontException("Indexed mode requires numpy")
+
+    corners = numpy.frombuffer(corners, dtype=numpy.int64).reshape(-1, 3)
+    unique, indices = unique_corners(corners)
+
+    columns = []
+    if "T2F" in vertex_format:
+        columns.append(_gather(tex_coords, 2, unique[:, 1], "texture coordinate"))
+    if "C3F" in vertex_format:
+        columns.append(_gather(colors, 3, unique[:, 0], "vertex color"))
+    if "N3F" in vertex_format:
+        columns.append(_gather(normals, 3, unique[:, 2], "normal"))
+    columns.append(_gather(positions, 3, unique[:, 0], "vertex"))
+
+    vertices = array('f')
+    vertices.frombytes(numpy.concatenate(columns, axis=1).tobytes())
+
+    if len(unique) <= MAX_SHORT_INDEX_VERTICES:
+        index_buffer = array('H')
+        index_buffer.frombytes(indices.astype(numpy.uint16).tobytes())
+    else:
+        index_buffer = array('I')
+        index_buffer.frombytes(indices.astype(numpy.uint32).tobytes())
+
+    return vertices, index_buffer
+
+
+def _gather(values, size, indices, name):
+    """Rows of a flat float array for each index"""
+    rows = numpy.frombuffer(values, dtype=numpy.float32).reshape(-1, size) if len(values) else \
+        numpy.empty((0, size), dtype=numpy.float32)
+    if len(indices) and (indices.min() < 0 or indices.max() >= len(rows)):
+        raise PywavefrontException("Face references a %s that doesn't exist" % name)
+    return rows[indices]
@@ -0,0 +1,352 @@
+# ----------------------------------------------------------------------------
+# PyWavefront
+# Copyright (c) 2018 Kurt Yoder
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#  * Neither the name of PyWavefront nor the names of its
+#    contributors may be used to endorse or promote products
+#    derived from this software without specific prior written
+#    permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------------
+"""
+Level of detail generation for the indexed buffers of a loaded Wavefront.
+
+Each level is an index buffer into the unchanged vertex buffer of a material, made by collapsing
+edges in order of their quadric error (Garland and Heckbert). Vertices are collapsed onto one of
+their neighbours, so no vertices are created. Vertices sharing a position are collapsed together,
+vertices of open borders are kept and seam vertices only move along their seam.
+Levels are written to and loaded from the cache with the rest of the buffers:
+
+    wavefront = pywavefront.Wavefront('city.obj', indexed=True)
+    generate_lods(wavefront, ratios=(0.5, 0.25, 0.1))
+    CacheWriter('city.obj', wavefront).write()
+"""
+from array import array
+from collections import namedtuple
+import heapq
+import logging
+import math
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pyrr
+except ImportError:
+    pyrr = None
+
+from pywavefront.bounds import bounding_volumes, vertex_positions
+from pywavefront.exceptions import PywavefrontException
+
+logger = logging.getLogger("pywavefront")
+
+# A simplified index buffer. ratio is the fraction of triangles kept and error the largest
+# quadric error of the collapses, as a distance in the units of the positions
+LodLevel = namedtuple('LodLevel', 'ratio indices error')
+
+
+def generate_lods(wavefront, ratios=(0.5, 0.25, 0.125)):
+    """
+    Generate the levels of detail of every material with an index buffer.
+    Each level is simplified further from the previous one. Levels are stored in material.lods,
+    most detailed first, and the triangle counts and errors are logged.
+
+    :param wavefront: A Wavefront loaded with indexed=True
+    :param ratios: Fraction of the triangles to keep in each level
+    """
+    if numpy is None:
+        raise PywavefrontException("LOD generation requires numpy")
+
+    for material in wavefront.materials.values():
+        if material.indices is None:
+            if len(material.vertices):
+                raise PywavefrontException("LOD generation requires index buffers, load with indexed=True")
+            continue
+
+        positions = numpy.asarray(material.vertices, dtype=numpy.float64).reshape(-1, material.vertex_size)[:, -3:]
+        simplifier = Simplifier(positions, material.indices)
+        typecode = 'H' if material.indices.itemsize == 2 else 'I'
+
+        material.lods = []
+        for ratio in sorted(ratios, reverse=True):
+            indices, error = simplifier.simplify(int(simplifier.num_triangles * ratio))
+            level = LodLevel(len(indices) / 3 / max(simplifier.num_triangles, 1), array(typecode, indices), error)
+            material.lods.append(level)
+            logger.info("%s: LOD %s: %d of %d triangles, error %g", material.name, ratio,
+                        len(indices) // 3, simplifier.num_triangles, error)
+
+
+class Simplifier:
+    """
+    Quadric error metric edge collapse of an indexed triangle mesh.
+    Call simplify() with decreasing triangle counts for a chain of levels.
+    """
+
+    def __init__(self, positions, indices):
+        """
+        :param positions: Array of shape (n, 3) with the position of each vertex
+        :param indices: Triangle indices into the positions
+        """
+        triangles = numpy.asarray(indices, dtype=numpy.int64).reshape(-1, 3)
+
+        # The collapses move points, the vertices at a point are its wedges
+        points, point_of = numpy.unique(numpy.asarray(positions, dtype=numpy.float64), axis=0, return_inverse=True)
+        point_of = point_of.reshape(-1)
+        corners = point_of[triangles]
+
+        coords = points[corners]
+        normals = numpy.cross(coords[:, 1] - coords[:, 0], coords[:, 2] - coords[:, 0])
+        lengths = numpy.sqrt((normals ** 2).sum(axis=1))
+        valid = ((lengths > 0) & (corners[:, 0] != corners[:, 1]) &
+                 (corners[:, 1] != corners[:, 2]) & (corners[:, 2] != corners[:, 0]))
+        areas = numpy.where(valid, lengths / 2, 0.0)
+        unit = normals / numpy.where(valid, lengths, 1.0)[:, None]
+        planes = numpy.column_stack((unit, -(unit * coords[:, 0]).sum(axis=1)))
+
+        # Upper triangle of the outer product of each plane, weighted by the triangle area
+        rows, columns = numpy.triu_indices(4)
+        face_quadrics = planes[:, rows] * planes[:, columns] * areas[:, None]
+        quadrics = numpy.zeros((len(points), 10))
+        weights = numpy.zeros(len(points))
+        for i in range(3):
+            numpy.add.at(quadrics, corners[valid, i], face_quadrics[valid])
+            numpy.add.at(weights, corners[valid, i], areas[valid])
+
+        # Points on open borders and non manifold edges stay in place
+        edges = numpy.sort(numpy.concatenate([corners[valid][:, [i, (i + 1) % 3]] for i in range(3)]), axis=1)
+        edges, counts = numpy.unique(edges, axis=0, return_counts=True)
+        locked = numpy.zeros(len(points), dtype=bool)
+        locked[edges[counts != 2].ravel()] = True
+
+        self.num_triangles = int(valid.sum())
+        self.points = points.tolist()
+        self.point_of = point_of.tolist()
+        self.triangles = triangles.tolist()
+        self.alive = valid.tolist()
+        self.locked = locked.tolist()
+        self.collapsed = [False] * len(points)
+        self.quadrics = quadrics.tolist()
+        self.weights = weights.tolist()
+        self.point_triangles = [set() for _ in range(len(points))]
+        for t in numpy.flatnonzero(valid).tolist():
+            for w in self.triangles[t]:
+                self.point_triangles[self.point_of[w]].add(t)
+
+        self.num_alive = self.num_triangles
+        self.max_cost = 0.0
+
+        # Both directions of every edge, costs computed like cost()
+        sources = numpy.concatenate((edges[:, 0], edges[:, 1]))
+        targets = numpy.concatenate((edges[:, 1], edges[:, 0]))
+        movable = ~locked[sources]
+        sources, targets = sources[movable], targets[movable]
+        costs = evaluate_quadric((quadrics[sources] + quadrics[targets]).T, points[targets].T)
+        weight = weights[sources] + weights[targets]
+        costs = numpy.maximum(costs, 0.0) / numpy.where(weight > 0, weight, 1.0) * (weight > 0)
+
+        self.heap = list(zip(costs.tolist(), sources.tolist(), targets.tolist()))
+        heapq.heapify(self.heap)
+
+    def simplify(self, target):
+        """
+        Collapse edges until at most target triangles are left or no collapse is possible.
+        Returns the indices of the remaining triangles and the error so far
+        """
+        heap = self.heap
+        while self.num_alive > target and heap:
+            cost, a, b = heapq.heappop(heap)
+            if self.collapsed[a] or self.collapsed[b]:
+                continue
+
+            # Costs only grow as quadrics are merged, so outdated entries are pushed back
+            current = self.cost(a, b)
+            if current > cost:
+                heapq.heappush(heap, (current, a, b))
+                continue
+
+            if self.collapse(a, b):
+                self.max_cost = max(self.max_cost, cost)
+
+        indices = [w for t, triangle in enumerate(self.triangles) if self.alive[t] for w in triangle]
+        return indices, math.sqrt(self.max_cost)
+
+    def cost(self, a, b):
+        """Mean squared distance of point b to the planes around a and b"""
+        weight = self.weights[a] + self.weights[b]
+        if weight == 0:
+            return 0.0
+
+        x, y, z = self.points[b]
+        error = evaluate_quadric(self.quadrics[a], (x, y, z)) + evaluate_quadric(self.quadrics[b], (x, y, z))
+        return max(error, 0.0) / weight
+
+    def neighbours(self, p):
+        return {self.point_of[w] for t in self.point_triangles[p] for w in self.triangles[t]} - {p}
+
+    def collapse(self, a, b):
+        """Move point a onto point b. Returns False if that would break the mesh"""
+        point_of = self.point_of
+        shared = [t for t in self.point_triangles[a] if any(point_of[w] == b for w in self.triangles[t])]
+        moved = [t for t in self.point_triangles[a] if t not in shared]
+        if not shared:
+            return False
+
+        # Points next to both a and b must be the opposite corners of the edge, or the mesh pinches
+        if len(self.neighbours(a) & self.neighbours(b)) != len(shared):
+            return False
+
+        wedges = self.map_wedges(a, b, shared, moved)
+        if wedges is None or self.flips(a, b, moved):
+            return False
+
+        for t in shared:
+            self.alive[t] = False
+            self.num_alive -= 1
+            for w in self.triangles[t]:
+                self.point_triangles[point_of[w]].discard(t)
+
+        for t in moved:
+            triangle = self.triangles[t]
+            for i, w in enumerate(triangle):
+                if point_of[w] == a:
+                    triangle[i] = wedges[w]
+            self.point_triangles[b].add(t)
+
+        self.point_triangles[a] = set()
+        self.collapsed[a] = True
+        self.quadrics[b] = [i + j for i, j in zip(self.quadrics[a], self.quadrics[b])]
+        self.weights[b] += self.weights[a]
+
+        for n in self.neighbours(b):
+            if not self.locked[b]:
+                heapq.heappush(self.heap, (self.cost(b, n), b, n))
+            if not self.locked[n]:
+                heapq.heappush(self.heap, (self.cost(n, b), n, b))
+        return True
+
+    def map_wedges(self, a, b, shared, moved):
+        """
+        Find the wedge of b replacing each wedge of a, following the edges between them.
+        Returns None if a wedge of a has no or several matches, as when crossing a seam
+        """
+        wedges = {}
+        for t in shared:
+            wedge_a = wedge_b = None
+            for w in self.triangles[t]:
+                if self.point_of[w] == a:
+                    wedge_a = w
+                elif self.point_of[w] == b:
+                    wedge_b = w
+            if wedges.setdefault(wedge_a, wedge_b) != wedge_b:
+                return None
+
+        for t in moved:
+            for w in self.triangles[t]:
+                if self.point_of[w] == a and w not in wedges:
+                    return None
+        return wedges
+
+    def flips(self, a, b, moved):
+        """Does moving point a onto b turn any of the moved triangles over?"""
+        for t in moved:
+            p0, p1, p2 = (self.points[self.point_of[w]] for w in self.triangles[t])
+            q0, q1, q2 = (self.points[b] if self.point_of[w] == a else self.points[self.point_of[w]]
+                          for w in self.triangles[t])
+            if dot(cross(p0, p1, p2), cross(q0, q1, q2)) <= 0:
+                return True
+        return False
+
+
+def evaluate_quadric(q, point):
+    """Value of the quadric with upper triangle q at a point, works on numpy columns as well"""
+    x, y, z = point
+    return (q[0] * x * x + 2 * q[1] * x * y + 2 * q[2] * x * z + 2 * q[3] * x +
+            q[4] * y * y + 2 * q[5] * y * z + 2 * q[6] * y +
+            q[7] * z * z + 2 * q[8] * z + q[9])
+
+
+def cross(p0, p1, p2):
+    """Normal of a triangle, scaled by twice its area"""
+    ux, uy, uz = p1[0] - p0[0], p1[1] - p0[1], p1[2] - p0[2]
+    vx, vy, vz = p2[0] - p0[0], p2[1] - p0[1], p2[2] - p0[2]
+    return uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+
+
+def dot(u, v):
+    return u[0] * v[0] + u[1] * v[1] + u[2] * v[2]
+
+
+def bounding_sphere(material):
+    """A pyrr sphere around the positions of a material"""
+    if pyrr is None:
+        raise PywavefrontException("Bounding spheres require pyrr")
+
+    if material.sphere is not None:
+        return material.sphere
+
+    sphere = bounding_volumes(vertex_positions(material.vertices, material.vertex_size))[1]
+    return sphere if sphere is not None else pyrr.sphere.create(radius=0.0)
+
+
+def projected_size(size, sphere, model_view, projection, viewport_height):
+    """
+    Size in pixels of a length at the point of a sphere closest to the camera.
+    Returns infinity when the camera is inside the sphere.
+
+    :param size: A length in model space
+    :param sphere: pyrr sphere around the mesh in model space
+    :param model_view: pyrr model view matrix
+    :param projection: pyrr projection matrix
+    :param viewport_height: Height of the viewport in pixels
+    """
+    if pyrr is None:
+        raise PywavefrontException("LOD selection requires pyrr")
+
+    center = pyrr.matrix44.apply_to_vector(model_view, numpy.append(sphere[:3], 1.0))
+    projection = numpy.asarray(projection)
+    # Clip space w of the closest point, 1 in orthographic projections
+    w = numpy.dot(center, projection[:, 3]) - sphere[3] * numpy.linalg.norm(projection[:3, 3])
+    if w <= 0:
+        return math.inf
+    return size * projection[1, 1] * viewport_height / 2 / w
+
+
+def select_lod(lods, sphere, model_view, projection, viewport_height, pixel_error=1.0):
+    """
+    Choose the least detailed level whose error stays below pixel_error on screen.
+    Returns 0 for the full index buffer or n for lods[n - 1].
+
+    :param lods: The levels of a material, most detailed first
+    :param pixel_error: Largest error in pixels allowed
+    """
+    level = 0
+    for i, lod in enumerate(lods):
+        if projected_size(lod.error, sphere, model_view, projection, viewport_height) > pixel_error:
+            break
+        level = i + 1
+    return level
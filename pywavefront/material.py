@@ -83,8 +83,18 @@ class Material:
         # Interleaved array of floats in GL_T2F_N3F_V3F format
         self.vertex_format = ""
         self.vertices = []
+        # Triangle indices into the vertices in indexed mode, array('H') or array('I')
+        self.indices = None
+        # Simplified index buffers into the same vertices, see pywavefront.lod
+        self.lods = []
+        # CompactVertices of the vertices, see pywavefront.quantize
+        self.compact = None
+        # pyrr aabb and sphere around the vertices, set after parsing with bounds=True
+        self.aabb = None
+        self.sphere = None
 
         self.gl_floats = None
+        self.gl_indices = None
 
     @property
     def has_normals(self):
@@ -50,6 +50,10 @@ class Mesh:
         # algorithm.
         self.faces = []
 
+        # pyrr aabb and sphere around the faces, set after parsing with bounds=True
+        self.aabb = None
+        self.sphere = None
+
     def has_material(self, new_material):
         """Determine whether we already have a material of this name."""
         for material in self.materials:
@@ -31,11 +31,24 @@
 # ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 # ----------------------------------------------------------------------------
+from array import array
+from bisect import bisect_right
 from collections import namedtuple
+from itertools import chain
 import logging
 import time
 
+try:
+    import numpy
+    import pyrr
+except ImportError:
+    numpy = None
+    pyrr = None
+
+from pywavefront.bounds import set_material_bounds, set_mesh_bounds, vertex_positions
+from pywavefront.bulk import BulkObjReader
 from pywavefront.exceptions import PywavefrontException
+from pywavefront.indexed import build_indexed_buffers
 from pywavefront.parser import Parser, auto_consume
 from pywavefront.material import Material, MaterialParser
 from pywavefront.mesh import Mesh
@@ -43,15 +56,27 @@ from pywavefront.cache import Meta, CacheWriter, CacheLoader
 
 logger = logging.getLogger("pywavefront")
 
+# Vertex data of the faces of a mesh using one material, detached from the material when streaming.
+# vertices is laid out in the material's vertex_format, indices is None unless in indexed mode
+MeshChunk = namedtuple('MeshChunk', 'mesh material vertex_format vertices indices')
+
 
 class ObjParser(Parser):
     """This parser parses lines from .obj files."""
     material_parser_cls = MaterialParser
     cache_loader_cls = CacheLoader
     cache_writer_cls = CacheWriter
+    bulk_reader_cls = BulkObjReader
+
+    # Number of floats collected before they are moved into an array buffer
+    array_flush_size = 2 ** 16
+
+    # Statements closing the current chunk when streaming
+    stream_boundaries = ('o', 'usemtl', 'usemat')
 
     def __init__(self, wavefront, file_name, strict=False, encoding="utf-8",
-                 create_materials=False, collect_faces=False, parse=True, cache=False):
+                 create_materials=False, collect_faces=False, parse=True, cache=False, use_arrays=False,
+                 bulk=False, indexed=False, cache_compression=False, bounds=False):
         """
         Create a new obj parser
         :param wavefront: The wavefront object
@@ -60,7 +85,13 @@ class ObjParser(Parser):
         :param encoding: Encoding to read the text files
         :param create_materials: Create materials if they don't exist
         :param cache: Cache the loaded obj files in binary format
+        :param cache_compression: Compress the cache files instead of storing memory mappable buffers
         :param parse: Should parse be called immediately or manually called later?
+        :param use_arrays: Store vertex data in flat array('f') buffers instead of lists
+        :param bulk: Read the file in large blocks and parse runs of v, vt, vn and f statements with numpy.
+                     Implies use_arrays
+        :param indexed: Store unique vertices and an index buffer per material. Implies use_arrays
+        :param bounds: Compute the aabb and sphere of the meshes and materials
         """
         super(ObjParser, self).__init__(file_name, strict=strict, encoding=encoding)
         self.wavefront = wavefront
@@ -70,11 +101,30 @@ class ObjParser(Parser):
         self.create_materials = create_materials
         self.collect_faces = collect_faces
         self.cache = cache
+        self.cache_compression = cache_compression
         self.cache_loaded = None
+        self.bulk = bulk
+        self.indexed = indexed
+        self.use_arrays = use_arrays or bulk or indexed
+        self.bounds = bounds
+
+        # Stores normals and texcoords for the entire file.
+        # In array mode these are flat float arrays with 3 and 2 values per element
+        self.normals = array('f') if self.use_arrays else []
+        self.tex_coords = array('f') if self.use_arrays else []
+
+        # In array mode the indices of the vertices starting a run of vertices with a color
+        # and of the vertices ending it, alternating. Colors of vertices outside the runs are padding
+        self.vertex_color_runs = []
 
-        # Stores normals and texcoords for the entire file
-        self.normals = []
-        self.tex_coords = []
+        # In indexed mode the (v, vt, vn) index triple of each triangle corner per material name.
+        # The vertex buffers are built from these when parsing is done
+        self.face_corners = {}
+
+        # (mesh, material, start) of each run of faces, start being the length of the material's
+        # vertex buffer or face corners when the run began. Used for the bounds of the meshes, only
+        # collected with bounds=True
+        self.face_runs = []
 
         if parse:
             self.parse()
@@ -87,10 +137,72 @@ class ObjParser(Parser):
             self.load_cache()
 
         if not self.cache_loaded:
-            super(ObjParser, self).parse()
+            if self.bulk:
+                self.bulk_reader_cls(self).read()
+                if self.auto_post_parse:
+                    self.post_parse()
+            else:
+                super(ObjParser, self).parse()
 
         logger.info("%s: Load time: %s", self.file_name, time.time() - start)
 
+    def stream(self):
+        """
+        Parse the file, yielding a MeshChunk each time an o or usemtl statement or the end of the file
+        completes the faces of the current mesh and material.
+
+        The vertex data of a chunk is detached from its material before it's yielded, so the parser
+        only holds on to the chunk it's building. The positions, colors, normals and texture
+        coordinates are still kept for the whole file since any face can reference them.
+        Materials used by several meshes produce a chunk for each. The cache is neither loaded nor written.
+        """
+        start = time.time()
+
+        if self.bulk:
+            yield from self.bulk_reader_cls(self).read_chunks()
+        else:
+            while self.dispatch_lines(self.stream_boundaries):
+                chunk = self.take_chunk()
+                if chunk is not None:
+                    yield chunk
+                self.dispatch_statement()
+
+        chunk = self.take_chunk()
+        if chunk is not None:
+            yield chunk
+
+        logger.info("%s: Stream time: %s", self.file_name, time.time() - start)
+
+    def take_chunk(self):
+        """
+        Detach the vertex data collected for the current mesh and material since the last chunk.
+        Returns None if there is none
+        """
+        material = self.material
+        if material is None or self.mesh is None:
+            return None
+
+        if self.indexed:
+            corners = self.face_corners.pop(material.name, None)
+            if not corners:
+                return None
+            vertices, indices = build_indexed_buffers(
+                corners,
+                material.vertex_format,
+                self.wavefront.vertices,
+                self.wavefront.vertex_colors,
+                self.tex_coords,
+                self.normals,
+            )
+        else:
+            vertices, indices = material.vertices, None
+            if not vertices:
+                return None
+            material.vertices = array('f') if self.use_arrays else []
+
+        self.face_runs = [run for run in self.face_runs if run[1] is not material]
+        return MeshChunk(self.mesh, material, material.vertex_format, vertices, indices)
+
     def load_cache(self):
         """Loads the file using cached data"""
         self.cache_loaded = self.cache_loader_cls(
@@ -100,16 +212,61 @@ class ObjParser(Parser):
             create_materials=self.create_materials,
             encoding=self.encoding,
             parse=self.parse,
+            use_arrays=self.use_arrays,
         ).parse()
 
+        if self.cache_loaded and self.bounds:
+            set_material_bounds(self.wavefront.materials.values())
+
     def post_parse(self):
         """Called after parsing is done"""
+        if self.bounds:
+            self.compute_mesh_bounds()
+
+        if self.indexed:
+            self.build_indexed_buffers()
+
+        if self.bounds:
+            set_material_bounds(self.wavefront.materials.values())
+
         if self.cache and not self.cache_loaded:
-            self.cache_writer_cls(self.file_name, self.wavefront).write()
+            self.cache_writer_cls(self.file_name, self.wavefront, compress=self.cache_compression).write()
 
     # methods for parsing types of wavefront lines
     def parse_v(self):
-        self.wavefront.vertices += list(self.consume_vertices())
+        if self.use_arrays:
+            self.add_vertices_to_arrays(self.consume_vertices())
+        else:
+            self.wavefront.vertices += list(self.consume_vertices())
+
+        # Since list() also consumes StopIteration we need to sanity check the line
+        # to make sure the parser advances
+        if self.values and self.values[0] == "v":
+            self.next_line()
+
+    def add_vertices_to_arrays(self, vertices):
+        """
+        Append vertices to the flat position and color arrays of the wavefront.
+        Once a vertex has a color, the vertices without one get black.
+        """
+        positions = self.wavefront.vertices
+        colors = self.wavefront.vertex_colors
+        color_runs = self.vertex_color_runs
+
+        for vertex in vertices:
+            if (len(vertex) == 6) != (len(color_runs) % 2 == 1):
+                color_runs.append(len(positions) // 3)
+            if len(vertex) == 6:
+                if len(colors) < len(positions):
+                    colors.frombytes(bytes(4 * (len(positions) - len(colors))))
+                colors.extend(vertex[3:])
+            elif colors:
+                colors.extend((0.0, 0.0, 0.0))
+            positions.extend(vertex[:3])
+
+    def vertex_has_color(self, index):
+        """In array mode, whether the vertex at index was given a color"""
+        return bisect_right(self.vertex_color_runs, index) % 2 == 1
 
     def consume_vertices(self):
         """
@@ -148,7 +305,10 @@ class ObjParser(Parser):
                 break
 
     def parse_vn(self):
-        self.normals += list(self.consume_normals())
+        if self.use_arrays:
+            self.normals.extend(chain.from_iterable(self.consume_normals()))
+        else:
+            self.normals += list(self.consume_normals())
 
         # Since list() also consumes StopIteration we need to sanity check the line
         # to make sure the parser advances
@@ -178,7 +338,10 @@ class ObjParser(Parser):
                 break
 
     def parse_vt(self):
-        self.tex_coords += list(self.consume_texture_coordinates())
+        if self.use_arrays:
+            self.tex_coords.extend(chain.from_iterable(self.consume_texture_coordinates()))
+        else:
+            self.tex_coords += list(self.consume_texture_coordinates())
 
         # Since list() also consumes StopIteration we need to sanity check the line
         # to make sure the parser advances
@@ -250,6 +413,27 @@ class ObjParser(Parser):
         self.wavefront.add_mesh(self.mesh)
 
     def parse_f(self):
+        self.begin_faces()
+
+        collected_faces = []
+        if self.indexed:
+            self.consume_face_corners(self.get_face_corners(), collected_faces if self.collect_faces else None)
+        elif self.use_arrays:
+            self.consume_faces_to_array(self.material.vertices, collected_faces if self.collect_faces else None)
+        else:
+            consumed_vertices = self.consume_faces(collected_faces if self.collect_faces else None)
+            self.material.vertices += list(consumed_vertices)
+
+        if self.collect_faces:
+            self.mesh.faces += list(collected_faces)
+
+        # Since list() also consumes StopIteration we need to sanity check the line
+        # to make sure the parser advances
+        if self.values and self.values[0] == "f":
+            self.next_line()
+
+    def begin_faces(self):
+        """Make sure there is a current material and mesh to add faces to"""
         # Add default material if not created
         if self.material is None:
             self.material = Material(
@@ -267,17 +451,45 @@ class ObjParser(Parser):
 
         self.mesh.add_material(self.material)
 
-        collected_faces = []
-        consumed_vertices = self.consume_faces(collected_faces if self.collect_faces else None)
-        self.material.vertices += list(consumed_vertices)
-
-        if self.collect_faces:
-            self.mesh.faces += list(collected_faces)
+        if self.use_arrays and not isinstance(self.material.vertices, array):
+            self.material.vertices = array('f', self.material.vertices)
+
+        if self.bounds:
+            self.face_runs.append((self.mesh, self.material, self.face_data_length(self.material)))
+
+    def face_data_length(self, material):
+        """Length of the vertex buffer, or the face corners in indexed mode, faces are added to"""
+        if self.indexed:
+            return len(self.face_corners.get(material.name, ()))
+        return len(material.vertices)
+
+    def compute_mesh_bounds(self):
+        """Set the bounds of each mesh from the positions used by its runs of faces"""
+        if pyrr is None or not self.face_runs:
+            return
+
+        if self.indexed:
+            positions = vertex_positions(self.wavefront.vertices, 3)
+
+        points = {}
+        ends = {}
+        for mesh, material, start in reversed(self.face_runs):
+            end = ends.get(material.name)
+            if end is None:
+                end = self.face_data_length(material)
+            ends[material.name] = start
+            if end == start:
+                continue
+
+            if self.indexed:
+                corners = numpy.frombuffer(self.face_corners[material.name], dtype=numpy.int64)[start:end]
+                points.setdefault(mesh, []).append(positions[corners[::3]])
+            else:
+                points.setdefault(mesh, []).append(
+                    vertex_positions(material.vertices[start:end], material.vertex_size))
 
-        # Since list() also consumes StopIteration we need to sanity check the line
-        # to make sure the parser advances
-        if self.values and self.values[0] == "f":
-            self.next_line()
+        set_mesh_bounds(self.wavefront.mesh_list, points)
+        self.face_runs = []
 
     def consume_faces(self, collected_faces = None):
         """
@@ -322,51 +534,7 @@ class ObjParser(Parser):
                 yield v
 
 
-        # Figure out the format of the first vertex
-        # We raise an exception if any following vertex has a different format
-        # NOTE: Order is always v/vt/vn where v is mandatory and vt and vn is optional
-        has_vt = False
-        has_vn = False
-        has_colors = False
-
-        parts = self.values[1].split('/')
-        # We assume texture coordinates are present
-        if len(parts) == 2:
-            has_vt = True
-
-        # We have a vn, but not necessarily a vt
-        elif len(parts) == 3:
-            # Check for empty vt "1//1"
-            if parts[1] != '':
-                has_vt = True
-            has_vn = True
-
-        # Are we referencing vertex with color info?
-        vindex = int(parts[0])
-        if vindex < 0:
-            vindex += len(self.wavefront.vertices)
-        else:
-            vindex -= 1
-
-        vertex = self.wavefront.vertices[vindex]
-        has_colors = len(vertex) == 6
-
-        # Prepare vertex format string
-        vertex_format = "_".join(e[0] for e in [
-            ("T2F", has_vt),
-            ("C3F", has_colors),
-            ("N3F", has_vn),
-            ("V3F", True)
-        ] if e[1])
-
-        # If the material already have vertex data, ensure the same format is used
-        if self.material.vertex_format and self.material.vertex_format != vertex_format:
-            raise ValueError((
-                "Trying to merge vertex data with different format: {}. "
-                "Material {} has vertex format {}"
-            ).format(vertex_format, self.material.name, self.material.vertex_format))
-
-        self.material.vertex_format = vertex_format
+        has_vt, has_vn, has_colors = self.set_face_vertex_format()
 
         # The first iteration processes the current/first f statement.
         # The loop continues until there are no more f-statements or StopIteration is raised by generator
@@ -438,3 +606,220 @@ class ObjParser(Parser):
 
             if self.values[0] != "f":
                 break
+
+    def consume_faces_to_array(self, buffer, collected_faces=None):
+        """
+        Consume all consecutive faces into a flat array('f') buffer.
+        Produces the same interleaved data and faces as :meth:`consume_faces`
+        """
+        has_vt, has_vn, has_colors = self.set_face_vertex_format()
+
+        positions = self.wavefront.vertices
+        colors = self.wavefront.vertex_colors
+        tex_coords = self.tex_coords
+        normals = self.normals
+        num_vertices = len(positions) // 3
+        num_tex_coords = len(tex_coords) // 2
+        num_normals = len(normals) // 3
+
+        data = []
+        while True:
+            indices = []
+            corners = []
+
+            for v in self.values[1:]:
+                parts = v.split('/')
+                v_index = int(parts[0]) - 1
+                if v_index < 0:
+                    v_index += num_vertices + 1
+
+                # Interleaved values of the face corner
+                corner = []
+                if has_vt:
+                    # uv field might be blank
+                    try:
+                        t_index = int(parts[1]) - 1
+                    except ValueError:
+                        t_index = 0
+                    if t_index < 0:
+                        t_index += num_tex_coords + 1
+                    corner += tex_coords[t_index * 2:t_index * 2 + 2]
+                if has_colors:
+                    corner += colors[v_index * 3:v_index * 3 + 3]
+                if has_vn:
+                    n_index = int(parts[2]) - 1
+                    if n_index < 0:
+                        n_index += num_normals + 1
+                    corner += normals[n_index * 3:n_index * 3 + 3]
+                corner += positions[v_index * 3:v_index * 3 + 3]
+
+                indices.append(v_index)
+                corners.append(corner)
+
+            # Same triangulation as consume_faces
+            data += corners[0]
+            data += corners[1]
+            data += corners[2]
+            for i in range(3, len(corners)):
+                data += corners[i]
+                data += corners[0]
+                data += corners[i - 1]
+
+            if collected_faces is not None:
+                collected_faces.append([indices[0], indices[1], indices[2]])
+                for i in range(3, len(indices)):
+                    collected_faces.append([indices[i], indices[0], indices[i - 1]])
+
+            if len(data) >= self.array_flush_size:
+                buffer.extend(data)
+                data = []
+
+            # Break out of the loop when there are no more f statements
+            try:
+                self.next_line()
+            except StopIteration:
+                break
+
+            if not self.values:
+                break
+
+            if self.values[0] != "f":
+                break
+
+        buffer.extend(data)
+
+    def get_face_corners(self):
+        """The face corners of the current material in indexed mode"""
+        return self.face_corners.setdefault(self.material.name, array('q'))
+
+    def consume_face_corners(self, corners, collected_faces=None):
+        """
+        Consume all consecutive faces as the (v, vt, vn) index triples of the triangle corners,
+        -1 for indices the format doesn't have. Same triangulation as :meth:`consume_faces`
+        """
+        has_vt, has_vn, has_colors = self.set_face_vertex_format()
+
+        num_vertices = len(self.wavefront.vertices) // 3
+        num_tex_coords = len(self.tex_coords) // 2
+        num_normals = len(self.normals) // 3
+
+        while True:
+            face = []
+            for v in self.values[1:]:
+                parts = v.split('/')
+                v_index = int(parts[0]) - 1
+                if v_index < 0:
+                    v_index += num_vertices + 1
+
+                t_index = -1
+                if has_vt:
+                    # uv field might be blank
+                    try:
+                        t_index = int(parts[1]) - 1
+                    except ValueError:
+                        t_index = 0
+                    if t_index < 0:
+                        t_index += num_tex_coords + 1
+
+                n_index = -1
+                if has_vn:
+                    n_index = int(parts[2]) - 1
+                    if n_index < 0:
+                        n_index += num_normals + 1
+
+                face.append((v_index, t_index, n_index))
+
+            triangles = [(face[0], face[1], face[2])]
+            for i in range(3, len(face)):
+                triangles.append((face[i], face[0], face[i - 1]))
+
+            for triangle in triangles:
+                corners.extend(chain.from_iterable(triangle))
+                if collected_faces is not None:
+                    collected_faces.append([corner[0] for corner in triangle])
+
+            # Break out of the loop when there are no more f statements
+            try:
+                self.next_line()
+            except StopIteration:
+                break
+
+            if not self.values:
+                break
+
+            if self.values[0] != "f":
+                break
+
+    def build_indexed_buffers(self):
+        """Turn the face corners of each material into unique vertices and an index buffer"""
+        for name, corners in self.face_corners.items():
+            material = self.wavefront.materials[name]
+            material.vertices, material.indices = build_indexed_buffers(
+                corners,
+                material.vertex_format,
+                self.wavefront.vertices,
+                self.wavefront.vertex_colors,
+                self.tex_coords,
+                self.normals,
+            )
+
+        self.face_corners = {}
+
+    def set_face_vertex_format(self):
+        """
+        Figure out the format of the first vertex of the current face and set it on the material.
+        Returns a (has_vt, has_vn, has_colors) tuple
+        """
+        # We raise an exception if any following vertex has a different format
+        # NOTE: Order is always v/vt/vn where v is mandatory and vt and vn is optional
+        has_vt = False
+        has_vn = False
+        has_colors = False
+
+        parts = self.values[1].split('/')
+        # We assume texture coordinates are present
+        if len(parts) == 2:
+            has_vt = True
+
+        # We have a vn, but not necessarily a vt
+        elif len(parts) == 3:
+            # Check for empty vt "1//1"
+            if parts[1] != '':
+                has_vt = True
+            has_vn = True
+
+        # Are we referencing vertex with color info?
+        vindex = int(parts[0])
+        if self.use_arrays:
+            if vindex < 0:
+                vindex += len(self.wavefront.vertices) // 3
+            else:
+                vindex -= 1
+
+            has_colors = self.vertex_has_color(vindex)
+        else:
+            if vindex < 0:
+                vindex += len(self.wavefront.vertices)
+            else:
+                vindex -= 1
+
+            vertex = self.wavefront.vertices[vindex]
+            has_colors = len(vertex) == 6
+
+        # Prepare vertex format string
+        vertex_format = "_".join(e[0] for e in [
+            ("T2F", has_vt),
+            ("C3F", has_colors),
+            ("N3F", has_vn),
+            ("V3F", True)
+        ] if e[1])
+
+        # If the material already have vertex data, ensure the same format is used
+        if self.material.vertex_format and self.material.vertex_format != vertex_format:
+            raise ValueError((
+                "Trying to merge vertex data with different format: {}. "
+                "Material {} has vertex format {}"
+            ).format(vertex_format, self.material.name, self.material.vertex_format))
+
+        self.material.vertex_format = vertex_format
+        return has_vt, has_vn, has_colors
@@ -0,0 +1,309 @@
+# ----------------------------------------------------------------------------
+# PyWavefront
+# Copyright (c) 2018 Kurt Yoder
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#  * Neither the name of PyWavefront nor the names of its
+#    contributors may be used to endorse or promote products
+#    derived from this software without specific prior written
+#    permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------------
+"""
+Reordering of indexed meshes for the GPU.
+
+    optimize_vertex_cache   Orders triangles to reuse the post transform vertex cache (Forsyth)
+    optimize_overdraw       Sorts clusters of triangles so outward facing ones are drawn first
+    optimize_vertex_fetch   Orders vertices by first use in the index buffer
+
+All of them are deterministic. optimize() runs them on every indexed material of a Wavefront
+and reports the ACMR (cache misses per triangle) and ATVR (cache misses per vertex) before and
+after. The reordered buffers are written to the cache like any others:
+
+    wavefront = pywavefront.Wavefront('city.obj', indexed=True)
+    optimize(wavefront, overdraw=True)
+    CacheWriter('city.obj', wavefront).write()
+"""
+from array import array
+from collections import namedtuple
+import logging
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from pywavefront.exceptions import PywavefrontException
+
+logger = logging.getLogger("pywavefront")
+
+# Entries of the FIFO cache simulated by cache_stats, as on most GPUs
+DEFAULT_FIFO_SIZE = 16
+# Entries of the LRU cache modelled while ordering triangles
+DEFAULT_LRU_SIZE = 32
+
+CacheStats = namedtuple('CacheStats', 'acmr atvr')
+
+
+def optimize(wavefront, overdraw=False, cache_size=DEFAULT_LRU_SIZE):
+    """
+    Reorder the triangles and vertices of every material with an index buffer.
+    Levels of detail are reordered with their material.
+    Returns {material name: (CacheStats before, CacheStats after)}
+
+    :param wavefront: A Wavefront loaded with indexed=True
+    :param overdraw: Also sort triangle clusters to reduce overdraw, at a small cost in cache hits
+    :param cache_size: Size of the vertex cache to optimize for
+    """
+    report = {}
+    for material in wavefront.materials.values():
+        if material.indices is None:
+            continue
+
+        typecode = 'H' if material.indices.itemsize == 2 else 'I'
+        num_vertices = len(material.vertices) // material.vertex_size
+        before = cache_stats(material.indices, num_vertices)
+
+        indices = optimize_vertex_cache(material.indices, num_vertices, cache_size)
+        if overdraw:
+            indices = optimize_overdraw(indices, material.vertices, material.vertex_size)
+
+        lods = [optimize_vertex_cache(lod.indices, num_vertices, cache_size) for lod in material.lods]
+        vertices, remap = optimize_vertex_fetch(material.vertices, indices, material.vertex_size)
+
+        material.vertices = vertices
+        material.indices = array(typecode, (remap[i] for i in indices))
+        material.lods = [lod._replace(indices=array(typecode, (remap[i] for i in indices)))
+                         for lod, indices in zip(material.lods, lods)]
+        material.gl_floats = None
+        material.gl_indices = None
+        material.compact = None
+
+        after = cache_stats(material.indices, num_vertices)
+        report[material.name] = before, after
+        logger.info("%s: ACMR %.3f -> %.3f, ATVR %.3f -> %.3f", material.name,
+                    before.acmr, after.acmr, before.atvr, after.atvr)
+
+    return report
+
+
+def cache_stats(indices, num_vertices, cache_size=DEFAULT_FIFO_SIZE):
+    """
+    Simulate a FIFO post transform cache.
+    Returns the average cache misses per triangle (ACMR) and per referenced vertex (ATVR)
+
+    :param indices: Triangle indices
+    :param num_vertices: Number of vertices the indices refer to
+    :param cache_size: Entries of the cache
+    """
+    indices = as_list(indices)
+    timestamps = [-cache_size - 1] * num_vertices
+    referenced = [False] * num_vertices
+    misses = 0
+    for index in indices:
+        referenced[index] = True
+        # A vertex is in the cache if fewer than cache_size misses happened since it was loaded
+        if misses - timestamps[index] > cache_size:
+            timestamps[index] = misses
+            misses += 1
+
+    num_triangles = len(indices) // 3
+    num_referenced = sum(referenced)
+    return CacheStats(misses / num_triangles if num_triangles else 0.0,
+                      misses / num_referenced if num_referenced else 0.0)
+
+
+def vertex_score_tables(cache_size):
+    """Scores of a vertex by LRU cache position and by number of remaining triangles"""
+    position_scores = []
+    for position in range(cache_size):
+        if position < 3:
+            # The vertices of the last triangle are equally likely to be reused
+            position_scores.append(0.75)
+        else:
+            position_scores.append((1 - (position - 3) / (cache_size - 3)) ** 1.5)
+
+    # Favour vertices with few triangles left to finish them off
+    valence_scores = [0.0] + [2.0 * valence ** -0.5 for valence in range(1, 65)]
+    return position_scores, valence_scores
+
+
+def optimize_vertex_cache(indices, num_vertices, cache_size=DEFAULT_LRU_SIZE):
+    """
+    Order triangles to reuse vertices while they are in the cache, with Tom Forsyth's
+    linear speed vertex cache optimisation. Returns the reordered indices as a list.
+
+    :param indices: Triangle indices
+    :param num_vertices: Number of vertices the indices refer to
+    :param cache_size: Entries of the modelled LRU cache
+    """
+    indices = as_list(indices)
+    triangles = [tuple(indices[i:i + 3]) for i in range(0, len(indices) - len(indices) % 3, 3)]
+    position_scores, valence_scores = vertex_score_tables(cache_size)
+
+    vertex_triangles = [[] for _ in range(num_vertices)]
+    for t, triangle in enumerate(triangles):
+        for v in triangle:
+            vertex_triangles[v].append(t)
+
+    def vertex_score(v, position):
+        valence = len(vertex_triangles[v])
+        if valence == 0:
+            return -1.0
+        score = position_scores[position] if position >= 0 else 0.0
+        return score + (valence_scores[valence] if valence < len(valence_scores) else 2.0 * valence ** -0.5)
+
+    vertex_scores = [vertex_score(v, -1) for v in range(num_vertices)]
+    triangle_scores = [sum(vertex_scores[v] for v in triangle) for triangle in triangles]
+    emitted = [False] * len(triangles)
+
+    result = []
+    cache = []
+    best = -1
+    # Next triangle in input order, used when no triangle touches the cache
+    scan = 0
+    for _ in range(len(triangles)):
+        if best < 0:
+            while emitted[scan]:
+                scan += 1
+            best = scan
+
+        triangle = triangles[best]
+        result.extend(triangle)
+        emitted[best] = True
+        for v in triangle:
+            vertex_triangles[v].remove(best)
+
+        cache = list(triangle) + [v for v in cache if v not in triangle]
+        evicted = cache[cache_size:]
+        del cache[cache_size:]
+
+        for position, v in enumerate(cache):
+            vertex_scores[v] = vertex_score(v, position)
+        for v in evicted:
+            vertex_scores[v] = vertex_score(v, -1)
+
+        # Rescore the triangles around the cache, ties go to the earliest triangle
+        best = -1
+        best_score = -1.0
+        for v in cache + evicted:
+            for t in vertex_triangles[v]:
+                a, b, c = triangles[t]
+                score = triangle_scores[t] = vertex_scores[a] + vertex_scores[b] + vertex_scores[c]
+                if v in evicted:
+                    continue
+                if score > best_score or (score == best_score and t < best):
+                    best, best_score = t, score
+
+    return result
+
+
+def optimize_overdraw(indices, vertices, vertex_size, cache_size=DEFAULT_FIFO_SIZE):
+    """
+    Split cache optimized indices in clusters where the cache starts over and draw the clusters
+    facing away from the center of the mesh first, as they are more likely to occlude the others.
+    Returns the reordered indices as a list.
+
+    :param indices: Triangle indices, ordered by optimize_vertex_cache
+    :param vertices: Interleaved vertex data ending with the position
+    :param vertex_size: Floats per vertex
+    :param cache_size: Entries of the FIFO cache, a cluster starts with a triangle missing all of it
+    """
+    if numpy is None:
+        raise PywavefrontException("Overdraw optimization requires numpy")
+
+    triangles = numpy.asarray(indices, dtype=numpy.int64).reshape(-1, 3)
+    if len(triangles) == 0:
+        return []
+
+    timestamps = [-cache_size - 1] * (int(triangles.max()) + 1)
+    misses = 0
+    starts = []
+    for t, triangle in enumerate(triangles.tolist()):
+        missed = 0
+        for v in triangle:
+            if misses - timestamps[v] > cache_size:
+                timestamps[v] = misses
+                misses += 1
+                missed += 1
+        if missed == 3:
+            starts.append(t)
+
+    positions = numpy.asarray(vertices, dtype=numpy.float64).reshape(-1, vertex_size)[:, -3:]
+    corners = positions[triangles]
+    normals = numpy.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    areas = numpy.sqrt((normals ** 2).sum(axis=1))
+    centroids = corners.mean(axis=1)
+    center = (centroids * areas[:, None]).sum(axis=0) / max(areas.sum(), 1e-30)
+
+    # Area weighted centroid and summed normal of each cluster
+    cluster_normals = numpy.add.reduceat(normals, starts)
+    cluster_centroids = numpy.add.reduceat(centroids * areas[:, None], starts)
+    cluster_areas = numpy.add.reduceat(areas, starts)
+    cluster_centroids /= numpy.maximum(cluster_areas, 1e-30)[:, None]
+    lengths = numpy.sqrt((cluster_normals ** 2).sum(axis=1))
+    cluster_normals /= numpy.maximum(lengths, 1e-30)[:, None]
+
+    keys = ((cluster_centroids - center) * cluster_normals).sum(axis=1)
+    order = numpy.argsort(-keys, kind='stable')
+    bounds = starts + [len(triangles)]
+    return [v for c in order.tolist() for v in triangles[bounds[c]:bounds[c + 1]].ravel().tolist()]
+
+
+def optimize_vertex_fetch(vertices, indices, vertex_size):
+    """
+    Order vertices by first use in the index buffer, unused ones last.
+    Returns the reordered vertices as array('f') and the new position of each old vertex
+
+    :param vertices: Interleaved vertex data
+    :param indices: Triangle indices
+    :param vertex_size: Floats per vertex
+    """
+    num_vertices = len(vertices) // vertex_size
+    remap = [-1] * num_vertices
+    order = []
+    for index in as_list(indices):
+        if remap[index] < 0:
+            remap[index] = len(order)
+            order.append(index)
+    for index in range(num_vertices):
+        if remap[index] < 0:
+            remap[index] = len(order)
+            order.append(index)
+
+    result = array('f')
+    if numpy is not None:
+        rows = numpy.asarray(vertices, dtype=numpy.float32).reshape(-1, vertex_size)
+        result.frombytes(rows[order].tobytes())
+    else:
+        source = memoryview(array('f', vertices))
+        for index in order:
+            result.extend(source[index * vertex_size:(index + 1) * vertex_size])
+    return result, remap
+
+
+def as_list(values):
+    """Python ints of an array, numpy array or list"""
+    return values if isinstance(values, list) else values.tolist()
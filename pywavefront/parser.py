@@ -112,6 +112,18 @@ class Parser:
         Parse all the lines in the obj file
         Determines what type of line we are and dispatch appropriately.
         """
+        self.dispatch_lines()
+
+        if self.auto_post_parse:
+            self.post_parse()
+
+    def dispatch_lines(self, stop_at=None):
+        """
+        Dispatch lines until the line generator is exhausted
+
+        :param stop_at: Statements to stop at. The line of the statement is left unconsumed
+        :return: True if stopped at one of the stop_at statements
+        """
         try:
             # Continues until `next_line()` raises StopIteration
             # This can trigger here or in parse functions in the subclass
@@ -126,12 +138,16 @@ class Parser:
                     self.consume_line()
                     continue
 
-                self.dispatcher.get(self.values[0], self.parse_fallback)()
+                if stop_at and self.values[0] in stop_at:
+                    return True
+
+                self.dispatch_statement()
         except StopIteration:
-            pass
+            return False
 
-        if self.auto_post_parse:
-            self.post_parse()
+    def dispatch_statement(self):
+        """Parse the statement on the current line"""
+        self.dispatcher.get(self.values[0], self.parse_fallback)()
 
     def post_parse(self):
         """Override to trigger operations after parsing is complete"""
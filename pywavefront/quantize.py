@@ -0,0 +1,255 @@
+# ----------------------------------------------------------------------------
+# PyWavefront
+# Copyright (c) 2018 Kurt Yoder
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#  * Neither the name of PyWavefront nor the names of its
+#    contributors may be used to endorse or promote products
+#    derived from this software without specific prior written
+#    permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------------
+"""
+Compact vertex formats for the interleaved float buffers of materials.
+
+    position  3 x float16, normalized to [-1, 1] with a per material scale and offset, padded to 8 bytes
+    normal    2 x snorm16, octahedral encoding
+    uv        2 x unorm16, normalized to [0, 1] with a per material scale and offset
+    color     4 x unorm8, alpha is always 255
+
+A T2F_N3F_V3F vertex takes 16 bytes instead of 32. Every attribute starts on a 4 byte boundary.
+The VertexLayout describes the attributes for glVertexAttribPointer and only depends on the
+vertex format. The Quantization holds the per material values the shader decodes positions and
+uvs with:
+
+    position = position_in * position_scale + position_offset
+    uv = uv_in * uv_scale + uv_offset
+"""
+from collections import namedtuple
+import logging
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from pywavefront.exceptions import PywavefrontException
+
+logger = logging.getLogger("pywavefront")
+
+# A vertex attribute. type is a numpy type code, normalized integers map to [0, 1] or [-1, 1]
+VertexAttribute = namedtuple('VertexAttribute', 'name location components type normalized offset')
+
+# Attributes and size in bytes of a compact vertex
+VertexLayout = namedtuple('VertexLayout', 'vertex_format stride attributes')
+
+# Per material decoding of positions and uvs, each a tuple of floats
+Quantization = namedtuple('Quantization', 'position_scale position_offset uv_scale uv_offset')
+
+# Compact vertex data of a material, data is a numpy uint8 array of stride bytes per vertex
+CompactVertices = namedtuple('CompactVertices', 'data layout quantization')
+
+# (name, floats in the vertex format, components stored, type, normalized, bytes stored)
+ATTRIBUTES = {
+    'V3F': ('position', 3, 3, 'f2', False, 8),
+    'N3F': ('normal', 3, 2, 'i2', True, 4),
+    'T2F': ('uv', 2, 2, 'u2', True, 4),
+    'C3F': ('color', 3, 3, 'u1', True, 4),
+}
+
+# Order of the attributes in compact vertices, the position is at location 0
+ATTRIBUTE_ORDER = ('V3F', 'N3F', 'T2F', 'C3F')
+
+
+def vertex_layout(vertex_format):
+    """The compact layout of a vertex format like T2F_N3F_V3F"""
+    parts = vertex_format.split('_')
+    if not parts or any(part not in ATTRIBUTES for part in parts) or 'V3F' not in parts:
+        raise PywavefrontException("Vertex format '%s' can't be quantized" % vertex_format)
+
+    attributes = []
+    offset = 0
+    for part in ATTRIBUTE_ORDER:
+        if part in parts:
+            name, _, components, type_code, normalized, size = ATTRIBUTES[part]
+            attributes.append(VertexAttribute(name, len(attributes), components, type_code, normalized, offset))
+            offset += size
+
+    return VertexLayout(vertex_format, offset, tuple(attributes))
+
+
+def quantize(wavefront):
+    """Set material.compact to the compact vertices of every material with vertex data"""
+    for material in wavefront.materials.values():
+        if len(material.vertices) == 0:
+            continue
+
+        material.compact = quantize_vertices(material.vertices, material.vertex_format)
+        logger.info("%s: %d bytes in %s, %d bytes compact", material.name, len(material.vertices) * 4,
+                    material.vertex_format, material.compact.data.nbytes)
+
+
+def quantize_vertices(vertices, vertex_format):
+    """
+    Encode interleaved float vertices in the compact layout of their format
+
+    :param vertices: Interleaved floats in the vertex format
+    :param vertex_format: Format like T2F_N3F_V3F
+    :return: CompactVertices
+    """
+    if numpy is None:
+        raise PywavefrontException("Vertex quantization requires numpy")
+
+    layout = vertex_layout(vertex_format)
+    columns = split_columns(vertices, vertex_format)
+    data = numpy.zeros((len(columns['V3F']), layout.stride), dtype=numpy.uint8)
+
+    positions = columns['V3F']
+    position_scale, position_offset = value_range(positions, centered=True)
+    uv_scale, uv_offset = (1.0, 1.0), (0.0, 0.0)
+    if 'T2F' in columns:
+        uv_scale, uv_offset = value_range(columns['T2F'], centered=False)
+
+    for attribute, part in zip(layout.attributes, (part for part in ATTRIBUTE_ORDER if part in columns)):
+        values = columns[part]
+        if part == 'V3F':
+            encoded = ((values - position_offset) / position_scale).astype('<f2')
+        elif part == 'N3F':
+            encoded = numpy.round(encode_octahedral(values) * 32767).astype('<i2')
+        elif part == 'T2F':
+            encoded = numpy.round(numpy.clip((values - uv_offset) / uv_scale, 0, 1) * 65535).astype('<u2')
+        else:
+            encoded = numpy.round(numpy.clip(values, 0, 1) * 255).astype('u1')
+            encoded = numpy.column_stack((encoded, numpy.full(len(encoded), 255, dtype='u1')))
+
+        encoded = numpy.ascontiguousarray(encoded).view(numpy.uint8).reshape(len(values), -1)
+        data[:, attribute.offset:attribute.offset + encoded.shape[1]] = encoded
+
+    quantization = Quantization(tuple(position_scale.tolist()), tuple(position_offset.tolist()),
+                                tuple(uv_scale.tolist() if 'T2F' in columns else uv_scale),
+                                tuple(uv_offset.tolist() if 'T2F' in columns else uv_offset))
+    return CompactVertices(data.ravel(), layout, quantization)
+
+
+def dequantize_vertices(compact):
+    """Decode compact vertices back to interleaved float32 values in their vertex format"""
+    layout, quantization = compact.layout, compact.quantization
+    rows = compact.data.reshape(-1, layout.stride)
+
+    decoded = {}
+    for attribute in layout.attributes:
+        dtype = numpy.dtype('<' + attribute.type if attribute.type != 'u1' else 'u1')
+        size = dtype.itemsize * attribute.components
+        values = numpy.ascontiguousarray(rows[:, attribute.offset:attribute.offset + size]).view(dtype)
+        values = values.astype(numpy.float64)
+        if attribute.name == 'position':
+            decoded['V3F'] = values * quantization.position_scale + quantization.position_offset
+        elif attribute.name == 'normal':
+            decoded['N3F'] = decode_octahedral(numpy.maximum(values / 32767, -1))
+        elif attribute.name == 'uv':
+            decoded['T2F'] = values / 65535 * quantization.uv_scale + quantization.uv_offset
+        else:
+            decoded['C3F'] = values / 255
+
+    parts = layout.vertex_format.split('_')
+    return numpy.column_stack([decoded[part] for part in parts]).astype(numpy.float32).ravel()
+
+
+def quantization_error(vertices, compact):
+    """
+    Largest error of each attribute after decoding, as {attribute name: error}.
+    The normal error is an angle in radians, the others are absolute differences.
+    """
+    original = split_columns(vertices, compact.layout.vertex_format)
+    decoded = split_columns(dequantize_vertices(compact), compact.layout.vertex_format)
+
+    errors = {}
+    for attribute, part in zip(compact.layout.attributes, (part for part in ATTRIBUTE_ORDER if part in original)):
+        if part == 'N3F':
+            expected = original[part] / numpy.maximum(numpy.linalg.norm(original[part], axis=1), 1e-30)[:, None]
+            # atan2 stays accurate for small angles, unlike arccos
+            sines = numpy.linalg.norm(numpy.cross(expected, decoded[part]), axis=1)
+            angles = numpy.arctan2(sines, (expected * decoded[part]).sum(axis=1))
+            errors[attribute.name] = float(angles.max()) if len(angles) else 0.0
+        else:
+            errors[attribute.name] = float(numpy.abs(original[part] - decoded[part]).max()) if len(original[part]) else 0.0
+    return errors
+
+
+def split_columns(vertices, vertex_format):
+    """The values of each attribute of interleaved vertices, as {'T2F': array of shape (n, 2), ...}"""
+    parts = vertex_format.split('_')
+    sizes = [ATTRIBUTES[part][1] for part in parts]
+    rows = numpy.asarray(vertices, dtype=numpy.float64).reshape(-1, sum(sizes))
+
+    columns = {}
+    offset = 0
+    for part, size in zip(parts, sizes):
+        columns[part] = rows[:, offset:offset + size]
+        offset += size
+    return columns
+
+
+def value_range(values, centered):
+    """
+    Scale and offset mapping the values to [-1, 1] when centered, else to [0, 1].
+    Axes without extent get a scale of 1
+    """
+    if len(values) == 0:
+        return numpy.ones(values.shape[1]), numpy.zeros(values.shape[1])
+
+    low, high = values.min(axis=0), values.max(axis=0)
+    extent = high - low
+    if centered:
+        extent = extent / 2
+        offset = (low + high) / 2
+    else:
+        offset = low
+    return numpy.where(extent > 0, extent, 1.0), offset
+
+
+def encode_octahedral(normals):
+    """Map unit vectors onto the [-1, 1] square of an octahedron unfolded over the z < 0 half"""
+    lengths = numpy.abs(normals).sum(axis=1)
+    n = normals / numpy.where(lengths > 0, lengths, 1.0)[:, None]
+    x, y, z = n[:, 0], n[:, 1], n[:, 2]
+    sign_x = numpy.where(x >= 0, 1.0, -1.0)
+    sign_y = numpy.where(y >= 0, 1.0, -1.0)
+    folded = z < 0
+    return numpy.column_stack((
+        numpy.where(folded, (1 - numpy.abs(y)) * sign_x, x),
+        numpy.where(folded, (1 - numpy.abs(x)) * sign_y, y),
+    ))
+
+
+def decode_octahedral(encoded):
+    """Unit vectors of octahedral encoded values, the inverse of encode_octahedral"""
+    x, y = encoded[:, 0].copy(), encoded[:, 1].copy()
+    z = 1 - numpy.abs(x) - numpy.abs(y)
+    t = numpy.maximum(-z, 0)
+    x -= numpy.where(x >= 0, t, -t)
+    y -= numpy.where(y >= 0, t, -t)
+    normals = numpy.column_stack((x, y, z))
+    return normals / numpy.linalg.norm(normals, axis=1)[:, None]
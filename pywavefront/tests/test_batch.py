@@ -0,0 +1,104 @@
+import glob
+import os
+
+import numpy
+
+import pywavefront
+from pywavefront.batch import BatchLoader, load_many
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, 'data')
+
+OBJ_FILES = sorted(glob.glob(os.path.join(DATA_DIR, 'box', '*.obj'))) + [
+    os.path.join(DATA_DIR, 'uv_sphere.obj'),
+    os.path.join(DATA_DIR, 'earth.obj'),
+]
+
+
+def assert_same_bounds(expected, other):
+    for name in ('aabb', 'sphere'):
+        value = getattr(expected, name)
+        if value is None:
+            assert getattr(other, name) is None
+        else:
+            assert numpy.array_equal(getattr(other, name), value)
+            assert getattr(other, name).dtype == value.dtype
+
+
+def assert_same_scene(expected, scene):
+    assert scene.mtllibs == expected.mtllibs
+    assert list(scene.materials) == list(expected.materials)
+    for name, material in expected.materials.items():
+        other = scene.materials[name]
+        assert other.vertex_format == material.vertex_format
+        assert other.is_default == material.is_default
+        assert other.diffuse == material.diffuse
+        assert (other.texture is None) == (material.texture is None)
+        assert_same_bounds(material, other)
+        assert numpy.array_equal(numpy.asarray(other.vertices), numpy.asarray(material.vertices))
+        if material.indices is None:
+            assert other.indices is None
+        else:
+            assert other.indices.typecode == material.indices.typecode
+            assert numpy.array_equal(numpy.asarray(other.indices), numpy.asarray(material.indices))
+
+    assert numpy.array_equal(numpy.asarray(scene.vertices), numpy.asarray(expected.vertices))
+    assert numpy.array_equal(numpy.asarray(scene.vertex_colors), numpy.asarray(expected.vertex_colors))
+    assert [mesh.name for mesh in scene.mesh_list] == [mesh.name for mesh in expected.mesh_list]
+    for mesh, other in zip(expected.mesh_list, scene.mesh_list):
+        assert [m.name for m in other.materials] == [m.name for m in mesh.materials]
+        assert_same_bounds(mesh, other)
+        assert [list(face) for face in other.faces] == [list(face) for face in mesh.faces]
+
+
+def test_same_as_sequential_loads():
+    for options in ({}, {'indexed': True, 'collect_faces': True}, {'bulk': True}, {'bounds': True},
+                    {'indexed': True, 'bounds': True}):
+        with BatchLoader(max_workers=2, **options) as loader:
+            scenes = list(loader.load(OBJ_FILES, ordered=True))
+        assert [scene.file_name for scene in scenes] == OBJ_FILES
+        for file_name, scene in zip(OBJ_FILES, scenes):
+            expected = pywavefront.Wavefront(file_name, use_arrays=True, **options)
+            assert_same_scene(expected, scene)
+
+
+def test_bounds():
+    with BatchLoader(max_workers=2, bounds=True) as loader:
+        scenes = list(loader.load(OBJ_FILES, ordered=True))
+    for scene in scenes:
+        assert all(mesh.aabb is not None and mesh.sphere is not None for mesh in scene.mesh_list)
+        assert all(material.aabb is not None for material in scene.materials.values() if material.vertex_format)
+
+
+def test_load_many_unordered():
+    scenes = list(load_many(OBJ_FILES, max_workers=2))
+    assert sorted(scene.file_name for scene in scenes) == sorted(OBJ_FILES)
+
+
+def test_libraries_parsed_once():
+    box_files = [file_name for file_name in OBJ_FILES if os.path.dirname(file_name).endswith('box')]
+    with BatchLoader(max_workers=2) as loader:
+        scenes = list(loader.load(box_files, ordered=True))
+        assert len(loader.libraries) == 1
+    materials = [scene.materials['Material'] for scene in scenes]
+    # Every model has its own material, sharing the texture
+    assert len(set(id(material) for material in materials)) == len(scenes)
+    assert len(set(id(material.texture) for material in materials)) == 1
+
+
+def test_unknown_material(tmp_path):
+    file_name = os.path.join(str(tmp_path), 'unknown.obj')
+    with open(file_name, 'w') as obj_file:
+        obj_file.write("v 0 0 0\nv 1 0 0\nv 1 1 0\nusemtl missing\nf 1 2 3\n")
+
+    with BatchLoader(max_workers=1) as loader:
+        future = loader.submit(file_name)
+        try:
+            future.result()
+            assert False
+        except pywavefront.PywavefrontException:
+            pass
+
+    with BatchLoader(max_workers=1, create_materials=True) as loader:
+        scene = loader.submit(file_name).result()
+    assert scene.materials['missing'].vertex_format == 'V3F'
+    assert list(scene.materials['missing'].vertices) == [0, 0, 0, 1, 0, 0, 1, 1, 0]
@@ -0,0 +1,111 @@
+import glob
+import os
+
+import numpy
+
+import pywavefront
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, 'data')
+
+OBJ_FILES = sorted(glob.glob(os.path.join(DATA_DIR, 'box', '*.obj'))) + [
+    os.path.join(DATA_DIR, 'uv_sphere.obj'),
+    os.path.join(DATA_DIR, 'earth.obj'),
+]
+
+MODES = ({}, {'use_arrays': True}, {'bulk': True}, {'indexed': True})
+
+# Two objects apart from each other, the first one uses a material twice
+TWO_OBJECTS_OBJ = """\
+v 0 0 0
+v 1 0 0
+v 1 1 0
+v 0 1 0
+v 5 5 5
+v 6 5 5
+v 6 7 5
+v 5 7 8
+vn 0 0 1
+o first
+usemtl red
+f 1//1 2//1 3//1
+usemtl blue
+f 1//1 3//1 4//1
+usemtl red
+f 2//1 3//1 4//1
+o second
+usemtl red
+f 5//1 6//1 7//1 8//1
+"""
+
+
+def assert_bounds(aabb, sphere, points):
+    """The aabb is the tightest box around the points and the sphere contains them all"""
+    points = numpy.asarray(points, dtype=numpy.float32)
+    assert numpy.array_equal(aabb[0], points.min(axis=0))
+    assert numpy.array_equal(aabb[1], points.max(axis=0))
+    assert numpy.allclose(sphere[:3], (aabb[0] + aabb[1]) / 2)
+    distances = numpy.linalg.norm(points - sphere[:3], axis=1)
+    assert distances.max() <= sphere[3] * (1 + 1e-6)
+    assert numpy.isclose(distances.max(), sphere[3])
+
+
+def material_positions(material):
+    rows = numpy.asarray(material.vertices, dtype=numpy.float32).reshape(-1, material.vertex_size)
+    return rows[:, -3:]
+
+
+def mesh_positions(scene, mesh):
+    """The positions used by the faces of a mesh loaded with collect_faces"""
+    positions = numpy.asarray([vertex[:3] for vertex in scene.vertices], dtype=numpy.float32)
+    return positions[sorted(set(index for face in mesh.faces for index in face))]
+
+
+def test_material_bounds():
+    for file_name in OBJ_FILES:
+        for options in MODES:
+            scene = pywavefront.Wavefront(file_name, bounds=True, **options)
+            for material in scene.materials.values():
+                if not material.vertex_format:
+                    assert material.aabb is None and material.sphere is None
+                    continue
+                assert_bounds(material.aabb, material.sphere, material_positions(material))
+
+
+def test_bounds_are_optional():
+    for options in MODES:
+        scene = pywavefront.Wavefront(OBJ_FILES[-1], **options)
+        assert all(mesh.aabb is None and mesh.sphere is None for mesh in scene.mesh_list)
+        assert all(m.aabb is None and m.sphere is None for m in scene.materials.values())
+
+
+def test_mesh_bounds(tmp_path):
+    file_name = os.path.join(str(tmp_path), 'two_objects.obj')
+    with open(file_name, 'w') as obj_file:
+        obj_file.write(TWO_OBJECTS_OBJ)
+
+    for path in OBJ_FILES + [file_name]:
+        expected = pywavefront.Wavefront(path, create_materials=True, collect_faces=True)
+        for options in MODES:
+            scene = pywavefront.Wavefront(path, create_materials=True, bounds=True, **options)
+            for mesh, other in zip(expected.mesh_list, scene.mesh_list):
+                assert_bounds(other.aabb, other.sphere, mesh_positions(expected, mesh))
+
+    scene = pywavefront.Wavefront(file_name, create_materials=True, bounds=True)
+    first, second = scene.mesh_list
+    assert numpy.array_equal(first.aabb, [[0, 0, 0], [1, 1, 0]])
+    assert numpy.array_equal(second.aabb, [[5, 5, 5], [6, 7, 8]])
+
+
+def test_cached_material_bounds(tmp_path):
+    for name in ('uv_sphere.obj', 'uv_sphere.mtl', 'terran.png'):
+        with open(os.path.join(DATA_DIR, name), 'rb') as source:
+            with open(os.path.join(str(tmp_path), name), 'wb') as target:
+                target.write(source.read())
+    file_name = os.path.join(str(tmp_path), 'uv_sphere.obj')
+
+    expected = pywavefront.Wavefront(file_name, cache=True, bounds=True)
+    scene = pywavefront.Wavefront(file_name, cache=True, bounds=True)
+    assert scene.parser.cache_loaded
+    for name, material in expected.materials.items():
+        assert numpy.array_equal(scene.materials[name].aabb, material.aabb)
+        assert numpy.array_equal(scene.materials[name].sphere, material.sphere)
@@ -0,0 +1,108 @@
+import numpy
+import pyrr
+
+from pywavefront.bvh import BVH, frustum_planes, transform_aabb
+
+
+def random_aabbs(rng, count):
+    centers = rng.uniform(-50, 50, size=(count, 3))
+    extents = rng.uniform(0.1, 5, size=(count, 3))
+    return numpy.stack([centers - extents, centers + extents], axis=1)
+
+
+def box_corners(aabb):
+    return numpy.array([[aabb[i][0], aabb[j][1], aabb[k][2]] for i in (0, 1) for j in (0, 1) for k in (0, 1)])
+
+
+def brute_force_cull(aabbs, planes):
+    """Indices of the aabbs with a corner inside each plane"""
+    return [i for i, aabb in enumerate(aabbs)
+            if all((box_corners(aabb).dot(plane[:3]) - plane[3] >= 0).any() for plane in planes)]
+
+
+def slab_distance(ray, aabb):
+    """Distance along a ray to an aabb by the slab method, 0 inside, None when missed"""
+    origin, direction = ray
+    near, far = 0.0, numpy.inf
+    for axis in range(3):
+        if direction[axis] == 0:
+            if not aabb[0][axis] <= origin[axis] <= aabb[1][axis]:
+                return None
+            continue
+        t0 = (aabb[0][axis] - origin[axis]) / direction[axis]
+        t1 = (aabb[1][axis] - origin[axis]) / direction[axis]
+        near, far = max(near, min(t0, t1)), min(far, max(t0, t1))
+    return near if near <= far else None
+
+
+def random_cameras(rng, count):
+    projection = pyrr.matrix44.create_perspective_projection(60, 1.5, 1, 80)
+    for _ in range(count):
+        eye = rng.uniform(-60, 60, size=3)
+        target = rng.uniform(-20, 20, size=3)
+        yield eye, target, pyrr.matrix44.multiply(pyrr.matrix44.create_look_at(eye, target, [0, 1, 0]), projection)
+
+
+def test_cull_same_as_brute_force():
+    rng = numpy.random.RandomState(3)
+    for count in (0, 1, 4, 5, 37, 500):
+        aabbs = random_aabbs(rng, count)
+        bvh = BVH(aabbs)
+        assert len(bvh) == count
+        for _, _, matrix in random_cameras(rng, 20):
+            planes = frustum_planes(matrix)
+            assert sorted(bvh.cull(planes)) == brute_force_cull(aabbs, planes)
+
+
+def test_cull_items():
+    rng = numpy.random.RandomState(5)
+    aabbs = random_aabbs(rng, 100)
+    items = ['item%d' % i for i in range(100)]
+    bvh = BVH(aabbs, items)
+    planes = frustum_planes(next(random_cameras(rng, 1))[2])
+    assert sorted(bvh.cull(planes)) == sorted(items[i] for i in brute_force_cull(aabbs, planes))
+    # A frustum around everything keeps every item
+    everything = numpy.array([[1, 0, 0, -100], [-1, 0, 0, -100], [0, 1, 0, -100],
+                              [0, -1, 0, -100], [0, 0, 1, -100], [0, 0, -1, -100]], dtype=numpy.float64)
+    assert sorted(bvh.cull(everything)) == sorted(items)
+
+
+def test_pick_same_as_brute_force():
+    rng = numpy.random.RandomState(9)
+    for count in (0, 1, 7, 300):
+        aabbs = random_aabbs(rng, count)
+        bvh = BVH(aabbs)
+        for eye, target, _ in random_cameras(rng, 50):
+            direction = (target - eye) / numpy.linalg.norm(target - eye)
+            ray = numpy.array([eye, direction])
+            item, distance = bvh.pick(ray)
+
+            distances = [slab_distance(ray, aabb) for aabb in aabbs]
+            hits = [d for d in distances if d is not None]
+            if not hits:
+                assert (item, distance) == (None, None)
+                continue
+            assert numpy.isclose(distance, min(hits), atol=1e-6)
+            assert numpy.isclose(distances[item], min(hits), atol=1e-6)
+
+
+def test_pick_from_inside():
+    aabbs = numpy.array([[[-1, -1, -1], [1, 1, 1]], [[3, -1, -1], [4, 1, 1]]], dtype=numpy.float64)
+    bvh = BVH(aabbs)
+    assert bvh.pick(numpy.array([[0, 0, 0], [1, 0, 0]])) == (0, 0.0)
+    item, distance = bvh.pick(numpy.array([[2, 0, 0], [1, 0, 0]]))
+    assert item == 1 and numpy.isclose(distance, 1)
+    assert bvh.pick(numpy.array([[2, 0, 0], [0, 1, 0]])) == (None, None)
+
+
+def test_transform_aabb():
+    rng = numpy.random.RandomState(13)
+    aabbs = random_aabbs(rng, 20)
+    matrix = pyrr.matrix44.multiply(
+        pyrr.matrix44.create_from_eulers([0.3, 1.1, -0.4]),
+        pyrr.matrix44.create_from_translation([1, -2, 3]))
+    transformed = transform_aabb(aabbs, matrix)
+    for aabb, result in zip(aabbs, transformed):
+        corners = box_corners(aabb).dot(matrix[:3, :3]) + matrix[3, :3]
+        assert numpy.allclose(result, [corners.min(axis=0), corners.max(axis=0)])
+        assert numpy.allclose(transform_aabb(aabb, matrix), result)
@@ -0,0 +1,126 @@
+import math
+import os
+import shutil
+
+import numpy
+import pyrr
+
+import pywavefront
+from pywavefront.cache import CacheWriter
+from pywavefront.exceptions import PywavefrontException
+from pywavefront.lod import generate_lods, projected_size, select_lod, bounding_sphere
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, 'data')
+
+RATIOS = (0.75, 0.5, 0.25, 0.1)
+
+
+def load_sphere(**kwargs):
+    return pywavefront.Wavefront(os.path.join(DATA_DIR, 'uv_sphere.obj'), indexed=True, **kwargs)
+
+
+def test_generate_lods():
+    for file_name in ('uv_sphere.obj', 'earth.obj', os.path.join('box', 'box-V3F.obj')):
+        scene = pywavefront.Wavefront(os.path.join(DATA_DIR, file_name), indexed=True)
+        generate_lods(scene, RATIOS)
+        for material in scene.materials.values():
+            if material.indices is None:
+                continue
+            num_triangles = len(material.indices) // 3
+            num_vertices = len(material.vertices) // material.vertex_size
+            assert len(material.lods) == len(RATIOS)
+
+            previous = (num_triangles, 0.0)
+            for ratio, lod in zip(RATIOS, material.lods):
+                assert lod.indices.typecode == material.indices.typecode
+                assert len(lod.indices) % 3 == 0
+                assert max(lod.indices) < num_vertices
+                lod_triangles = len(lod.indices) // 3
+                assert lod.ratio == lod_triangles / num_triangles
+                # Each level has at most as many triangles and at least the error of the previous one
+                assert lod_triangles <= previous[0]
+                assert lod.error >= previous[1]
+                previous = (lod_triangles, lod.error)
+
+
+def test_sphere_reaches_ratios():
+    scene = load_sphere()
+    generate_lods(scene, RATIOS)
+    material = scene.materials['Material.terran.png']
+    num_triangles = len(material.indices) // 3
+    for ratio, lod in zip(RATIOS, material.lods):
+        assert len(lod.indices) // 3 <= int(num_triangles * ratio) + 1
+        assert lod.error > 0
+    # The simplified sphere stays close to the unit sphere
+    positions = numpy.asarray(material.vertices).reshape(-1, material.vertex_size)[:, -3:]
+    assert material.lods[-1].error < 0.5
+    used = numpy.unique(numpy.asarray(material.lods[-1].indices))
+    assert numpy.allclose(numpy.linalg.norm(positions[used], axis=1), 1.0, atol=1e-3)
+
+
+def test_ratios_in_any_order():
+    scene = load_sphere()
+    generate_lods(scene, (0.25, 0.5))
+    assert [lod.ratio > 0.4 for lod in scene.materials['Material.terran.png'].lods] == [True, False]
+
+
+def test_requires_index_buffers():
+    scene = pywavefront.Wavefront(os.path.join(DATA_DIR, 'uv_sphere.obj'), use_arrays=True)
+    try:
+        generate_lods(scene)
+        assert False
+    except PywavefrontException:
+        pass
+
+
+def test_cache_round_trip(tmp_path):
+    for name in ('uv_sphere.obj', 'uv_sphere.mtl', 'terran.png'):
+        shutil.copy(os.path.join(DATA_DIR, name), str(tmp_path))
+    file_name = os.path.join(str(tmp_path), 'uv_sphere.obj')
+
+    scene = pywavefront.Wavefront(file_name, indexed=True)
+    generate_lods(scene, RATIOS)
+    CacheWriter(file_name, scene).write()
+
+    cached = pywavefront.Wavefront(file_name, indexed=True, cache=True)
+    assert cached.parser.cache_loaded
+    for name, material in scene.materials.items():
+        other = cached.materials[name]
+        assert len(other.lods) == len(material.lods)
+        for lod, other_lod in zip(material.lods, other.lods):
+            assert other_lod.ratio == lod.ratio
+            assert other_lod.error == lod.error
+            assert numpy.array_equal(numpy.asarray(other_lod.indices), numpy.asarray(lod.indices))
+
+
+def test_select_lod():
+    scene = load_sphere()
+    generate_lods(scene, RATIOS)
+    material = scene.materials['Material.terran.png']
+    sphere = bounding_sphere(material)
+    projection = pyrr.matrix44.create_perspective_projection(60, 4 / 3, 0.1, 1000)
+
+    levels = []
+    for distance in (1.5, 2, 5, 10, 50, 200):
+        model_view = pyrr.matrix44.create_from_translation([0, 0, -distance])
+        levels.append(select_lod(material.lods, sphere, model_view, projection, 600))
+    # Farther away, less detail
+    assert levels == sorted(levels)
+    assert levels[0] == 0
+    assert levels[-1] == len(material.lods)
+
+    # A looser error gives less detail
+    model_view = pyrr.matrix44.create_from_translation([0, 0, -10])
+    assert select_lod(material.lods, sphere, model_view, projection, 600, pixel_error=100) >= \
+        select_lod(material.lods, sphere, model_view, projection, 600, pixel_error=1)
+
+
+def test_projected_size():
+    projection = pyrr.matrix44.create_perspective_projection(90, 1, 0.1, 100)
+    sphere = numpy.array([0.0, 0.0, 0.0, 1.0])
+    # Inside the sphere
+    assert projected_size(1, sphere, pyrr.matrix44.create_identity(), projection, 100) == math.inf
+
+    # A unit length at distance 10 - 1 with a 90 degrees field of view spans 1 / 9 of half the viewport
+    model_view = pyrr.matrix44.create_from_translation([0, 0, -10])
+    assert abs(projected_size(1, sphere, model_view, projection, 100) - 50 / 9) < 1e-6
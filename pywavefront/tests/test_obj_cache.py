@@ -0,0 +1,184 @@
+import gzip
+import glob
+import json
+import os
+import shutil
+import struct
+from pathlib import Path
+
+import numpy
+
+import pywavefront
+from pywavefront.cache import Meta, cache_name, meta_name
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, 'data')
+
+
+def copy_data(tmp_path):
+    """Copy the boxes and the uv sphere, the caches are written next to the obj files"""
+    directory = str(tmp_path)
+    file_names = []
+    for file_name in sorted(glob.glob(os.path.join(DATA_DIR, 'box', '*'))):
+        shutil.copy(file_name, directory)
+        if file_name.endswith('.obj'):
+            file_names.append(os.path.join(directory, os.path.basename(file_name)))
+    for name in ('uv_sphere.obj', 'uv_sphere.mtl', 'terran.png'):
+        shutil.copy(os.path.join(DATA_DIR, name), directory)
+    file_names.append(os.path.join(directory, 'uv_sphere.obj'))
+    return file_names
+
+
+def assert_same_buffers(expected, scene):
+    assert sorted(scene.materials) == sorted(expected.materials)
+    for name, material in expected.materials.items():
+        other = scene.materials[name]
+        assert other.vertex_format == material.vertex_format
+        assert numpy.array_equal(numpy.asarray(other.vertices, dtype=numpy.float32),
+                                 numpy.asarray(material.vertices, dtype=numpy.float32))
+        if material.indices is None:
+            assert other.indices is None
+        else:
+            assert numpy.array_equal(numpy.asarray(other.indices), numpy.asarray(material.indices))
+            assert numpy.asarray(other.indices).itemsize == material.indices.itemsize
+
+
+def load(file_name, **kwargs):
+    return pywavefront.Wavefront(file_name, cache=True, **kwargs)
+
+
+def test_round_trip(tmp_path):
+    for file_name in copy_data(tmp_path):
+        for options in ({}, {'use_arrays': True}, {'indexed': True}, {'cache_compression': True}):
+            for path in (cache_name(Path(file_name)), meta_name(Path(file_name))):
+                if path.exists():
+                    path.unlink()
+            expected = load(file_name, **options)
+            assert not expected.parser.cache_loaded
+            assert os.path.exists(file_name + '.bin') and os.path.exists(file_name + '.json')
+            scene = load(file_name, **options)
+            assert scene.parser.cache_loaded
+            assert scene.mtllibs == expected.mtllibs
+            assert_same_buffers(expected, scene)
+
+            meta = Meta.from_file(file_name + '.json')
+            assert meta.version == Meta.format_version
+            assert meta.compression == ('gzip' if options.get('cache_compression') else None)
+            for buff in meta.vertex_buffers:
+                assert buff['byte_offset'] % 16 == 0
+
+
+def test_memory_mapped_views(tmp_path):
+    file_name = copy_data(tmp_path)[-1]
+    load(file_name, indexed=True)
+    scene = load(file_name, indexed=True)
+    material = scene.materials['Material.terran.png']
+    # Views of the mapped file, writable without changing it
+    assert isinstance(material.vertices, numpy.ndarray)
+    assert isinstance(material.indices, numpy.ndarray)
+    assert material.vertices.dtype == numpy.float32
+    assert material.indices.dtype == numpy.uint16
+    with open(file_name + '.bin', 'rb') as fd:
+        data = fd.read()
+    material.vertices[:] = 0
+    with open(file_name + '.bin', 'rb') as fd:
+        assert fd.read() == data
+
+
+def test_changed_source_invalidates_cache(tmp_path):
+    file_name = copy_data(tmp_path)[0]
+    load(file_name)
+    assert load(file_name).parser.cache_loaded
+
+    # Remove the last face
+    with open(file_name) as fd:
+        lines = fd.readlines()
+    last_face = max(i for i, line in enumerate(lines) if line.startswith('f '))
+    del lines[last_face]
+    with open(file_name, 'w') as fd:
+        fd.writelines(lines)
+
+    scene = load(file_name)
+    assert not scene.parser.cache_loaded
+    assert_same_buffers(pywavefront.Wavefront(file_name), scene)
+    # The cache was written again for the new file
+    cached = load(file_name)
+    assert cached.parser.cache_loaded
+    assert_same_buffers(scene, cached)
+
+
+def test_damaged_cache_is_parsed_again(tmp_path):
+    file_name = copy_data(tmp_path)[-1]
+    expected = pywavefront.Wavefront(file_name)
+    load(file_name)
+    meta = Meta.from_file(file_name + '.json')
+    offset = meta.vertex_buffers[0]['byte_offset'] + 100
+
+    # One changed byte fails the CRC of its buffer
+    with open(file_name + '.bin', 'r+b') as fd:
+        fd.seek(offset)
+        value = fd.read(1)
+        fd.seek(offset)
+        fd.write(bytes([value[0] ^ 0xff]))
+    scene = load(file_name)
+    assert not scene.parser.cache_loaded
+    assert_same_buffers(expected, scene)
+
+    # A truncated file as well, after the cache has been written again
+    assert load(file_name).parser.cache_loaded
+    with open(file_name + '.bin', 'r+b') as fd:
+        fd.truncate(offset)
+    scene = load(file_name)
+    assert not scene.parser.cache_loaded
+    assert_same_buffers(expected, scene)
+
+
+def test_checksums_can_be_skipped(tmp_path, monkeypatch):
+    file_name = copy_data(tmp_path)[-1]
+    load(file_name)
+    with open(file_name + '.bin', 'r+b') as fd:
+        fd.seek(Meta.from_file(file_name + '.json').vertex_buffers[0]['byte_offset'])
+        fd.write(b'\0\0\0\0')
+    monkeypatch.setattr(pywavefront.cache.CacheLoader, 'verify_checksums', False)
+    assert load(file_name).parser.cache_loaded
+
+
+def test_unknown_version_is_parsed_again(tmp_path):
+    file_name = copy_data(tmp_path)[-1]
+    expected = pywavefront.Wavefront(file_name)
+    load(file_name)
+    for version in ("1", "3"):
+        with open(file_name + '.json') as fd:
+            data = json.load(fd)
+        data['version'] = version
+        with open(file_name + '.json', 'w') as fd:
+            json.dump(data, fd)
+        scene = load(file_name)
+        assert not scene.parser.cache_loaded
+        assert_same_buffers(expected, scene)
+        # The cache was written again in the current format
+        assert Meta.from_file(file_name + '.json').version == Meta.format_version
+        assert load(file_name).parser.cache_loaded
+
+
+def write_v01_cache(file_name, scene):
+    """Write a cache in the 0.1 format: a gzipped stream of the buffers"""
+    meta = Meta(version="0.1", mtllibs=scene.mtllibs)
+    with gzip.open(file_name + '.bin', 'wb') as fd:
+        for material in scene.materials.values():
+            if not material.vertices:
+                continue
+            data = struct.pack('{}f'.format(len(material.vertices)), *material.vertices)
+            fd.write(data)
+            meta.add_vertex_buffer(material.name, material.vertex_format, 0, len(data))
+    meta.write(file_name + '.json')
+
+
+def test_load_v01_cache(tmp_path):
+    for file_name in copy_data(tmp_path):
+        expected = pywavefront.Wavefront(file_name)
+        write_v01_cache(file_name, expected)
+        for use_arrays in (False, True):
+            scene = load(file_name, use_arrays=use_arrays)
+            assert scene.parser.cache_loaded
+            assert scene.mtllibs == expected.mtllibs
+            assert_same_buffers(expected, scene)
@@ -0,0 +1,95 @@
+import glob
+import os
+from collections import Counter
+
+import numpy
+
+import pywavefront
+from pywavefront.lod import generate_lods
+from pywavefront.optimize import optimize, cache_stats
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, 'data')
+
+OBJ_FILES = sorted(glob.glob(os.path.join(DATA_DIR, 'box', '*.obj'))) + [
+    os.path.join(DATA_DIR, 'uv_sphere.obj'),
+]
+
+
+def triangles(vertices, vertex_size, indices):
+    """Count the triangles by vertex data, starting each at its smallest corner to keep the winding"""
+    rows = numpy.asarray(vertices, dtype=numpy.float32).reshape(-1, vertex_size)
+    corners = [rows[i].tobytes() for i in numpy.asarray(indices, dtype=numpy.int64).tolist()]
+    result = Counter()
+    for t in range(0, len(corners), 3):
+        triangle = corners[t:t + 3]
+        first = triangle.index(min(triangle))
+        result[tuple(triangle[first:] + triangle[:first])] += 1
+    return result
+
+
+def load(file_name):
+    scene = pywavefront.Wavefront(file_name, indexed=True)
+    return [m for m in scene.materials.values() if m.indices is not None], scene
+
+
+def test_same_triangles():
+    for file_name in OBJ_FILES:
+        for overdraw in (False, True):
+            expected, _ = load(file_name)
+            materials, scene = load(file_name)
+            optimize(scene, overdraw=overdraw)
+            for material, other in zip(expected, materials):
+                assert other.indices.typecode == material.indices.typecode
+                assert len(other.vertices) == len(material.vertices)
+                assert triangles(other.vertices, other.vertex_size, other.indices) == \
+                    triangles(material.vertices, material.vertex_size, material.indices)
+
+
+def test_cache_misses_do_not_increase():
+    for file_name in OBJ_FILES:
+        expected, _ = load(file_name)
+        materials, scene = load(file_name)
+        report = optimize(scene)
+        for material, other in zip(expected, materials):
+            num_vertices = len(material.vertices) // material.vertex_size
+            before = cache_stats(material.indices, num_vertices)
+            after = cache_stats(other.indices, num_vertices)
+            assert report[material.name] == (before, after)
+            assert after.acmr <= before.acmr
+            assert after.atvr <= before.atvr
+
+
+def test_vertices_in_first_use_order():
+    for file_name in OBJ_FILES:
+        materials, scene = load(file_name)
+        optimize(scene, overdraw=True)
+        for material in materials:
+            first_use = numpy.unique(numpy.asarray(material.indices), return_index=True)[1]
+            assert len(first_use) == len(material.vertices) // material.vertex_size
+            assert numpy.all(numpy.diff(first_use) > 0)
+
+
+def test_deterministic():
+    for file_name in OBJ_FILES:
+        for overdraw in (False, True):
+            buffers = []
+            for _ in range(2):
+                materials, scene = load(file_name)
+                optimize(scene, overdraw=overdraw)
+                buffers.append([(m.vertices.tobytes(), m.indices.tobytes()) for m in materials])
+            assert buffers[0] == buffers[1]
+
+
+def test_lods_reordered_with_material():
+    file_name = os.path.join(DATA_DIR, 'uv_sphere.obj')
+    expected, expected_scene = load(file_name)
+    generate_lods(expected_scene, (0.5, 0.25))
+    materials, scene = load(file_name)
+    generate_lods(scene, (0.5, 0.25))
+    optimize(scene)
+
+    for material, other in zip(expected, materials):
+        for lod, other_lod in zip(material.lods, other.lods):
+            assert other_lod.indices.typecode == lod.indices.typecode
+            assert triangles(other.vertices, other.vertex_size, other_lod.indices) == \
+                triangles(material.vertices, material.vertex_size, lod.indices)
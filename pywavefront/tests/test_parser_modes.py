@@ -0,0 +1,166 @@
+import glob
+import os
+
+import numpy
+
+import pywavefront
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, 'data')
+
+OBJ_FILES = sorted(glob.glob(os.path.join(DATA_DIR, 'box', '*.obj'))) + [
+    os.path.join(DATA_DIR, 'uv_sphere.obj'),
+    os.path.join(DATA_DIR, 'earth.obj'),
+]
+
+# Vertices with and without colors, each face only references one kind
+MIXED_COLORS_OBJ = """\
+v 0 0 0
+v 1 0 0
+v 1 1 0
+v 0 0 1 1.0 0.5 0.25
+v 1 0 1 0.5 0.25 1.0
+v 1 1 1 0.25 1.0 0.5
+v 0 1 1 0.0 0.0 0.0
+v 0 0 2
+v 1 0 2
+v 1 1 2
+usemtl plain
+f 1 2 3
+usemtl colored
+f 4 5 6 7
+usemtl plain_after
+f 8 9 10
+f -3 -2 -1
+usemtl colored_negative
+f -6 -5 -4
+"""
+
+
+def write_mixed_colors_obj(tmp_path):
+    file_name = os.path.join(str(tmp_path), 'mixed_colors.obj')
+    with open(file_name, 'w') as obj_file:
+        obj_file.write(MIXED_COLORS_OBJ)
+    return file_name
+
+
+def triangle_vertices(material):
+    """The interleaved vertex data of each triangle corner, expanding the index buffer in indexed mode"""
+    vertices = numpy.asarray(material.vertices, dtype=numpy.float32).reshape(-1, material.vertex_size)
+    if material.indices is not None:
+        vertices = vertices[numpy.asarray(material.indices, dtype=numpy.int64)]
+    return vertices
+
+
+def assert_same_scene(expected, scene):
+    """Compare the materials, meshes and vertex data of a default scene with one loaded in another mode"""
+    assert list(scene.materials) == list(expected.materials)
+    for name, material in expected.materials.items():
+        other = scene.materials[name]
+        assert other.vertex_format == material.vertex_format
+        assert numpy.array_equal(triangle_vertices(other), triangle_vertices(material))
+
+    assert [mesh.name for mesh in scene.mesh_list] == [mesh.name for mesh in expected.mesh_list]
+    for mesh, other in zip(expected.mesh_list, scene.mesh_list):
+        assert [m.name for m in other.materials] == [m.name for m in mesh.materials]
+        assert [list(face) for face in other.faces] == [list(face) for face in mesh.faces]
+
+    positions = numpy.asarray([vertex[:3] for vertex in expected.vertices], dtype=numpy.float32)
+    assert numpy.array_equal(numpy.asarray(scene.vertices, dtype=numpy.float32).reshape(-1, 3), positions)
+
+
+def test_arrays_same_as_lists():
+    for file_name in OBJ_FILES:
+        expected = pywavefront.Wavefront(file_name, collect_faces=True)
+        scene = pywavefront.Wavefront(file_name, collect_faces=True, use_arrays=True)
+        assert_same_scene(expected, scene)
+
+
+def test_arrays_vertex_colors():
+    file_name = os.path.join(DATA_DIR, 'box', 'box-C3F_V3F.obj')
+    expected = pywavefront.Wavefront(file_name)
+    scene = pywavefront.Wavefront(file_name, use_arrays=True)
+    colors = [vertex[3:] for vertex in expected.vertices]
+    assert numpy.array_equal(numpy.asarray(scene.vertex_colors).reshape(-1, 3),
+                             numpy.asarray(colors, dtype=numpy.float32))
+
+
+def test_mixed_vertex_colors(tmp_path):
+    # The format of a face depends on the vertices it references, not on the rest of the file
+    file_name = write_mixed_colors_obj(tmp_path)
+    expected = pywavefront.Wavefront(file_name, create_materials=True, collect_faces=True)
+    assert [(name, m.vertex_format) for name, m in expected.materials.items()] == [
+        ('plain', 'V3F'), ('colored', 'C3F_V3F'), ('plain_after', 'V3F'), ('colored_negative', 'C3F_V3F')]
+
+    for mode in ('use_arrays', 'bulk', 'indexed'):
+        scene = pywavefront.Wavefront(file_name, create_materials=True, collect_faces=True, **{mode: True})
+        assert_same_scene(expected, scene)
+        # Vertices without a color get black ones in the color array
+        assert list(scene.vertex_colors[:9]) == [0.0] * 9
+        assert list(scene.vertex_colors[21:]) == [0.0] * 9
+
+
+def test_bulk_same_as_lists():
+    for file_name in OBJ_FILES:
+        expected = pywavefront.Wavefront(file_name, collect_faces=True)
+        scene = pywavefront.Wavefront(file_name, collect_faces=True, bulk=True)
+        assert_same_scene(expected, scene)
+
+
+def test_bulk_small_blocks(monkeypatch):
+    # Runs continue across the blocks
+    monkeypatch.setattr(pywavefront.bulk.BulkObjReader, 'block_size', 97)
+    for file_name in OBJ_FILES[:-1]:
+        expected = pywavefront.Wavefront(file_name, collect_faces=True)
+        scene = pywavefront.Wavefront(file_name, collect_faces=True, bulk=True)
+        assert_same_scene(expected, scene)
+
+
+def test_bulk_falls_back_to_line_parser(tmp_path):
+    # Trailing comments, indented statements, blank uv indices and polygons
+    file_name = os.path.join(str(tmp_path), 'fallback.obj')
+    with open(file_name, 'w') as obj_file:
+        obj_file.write(
+            "v 0 0 0 # first\n"
+            "v 1 0 0\n"
+            "v 1 1 0\n"
+            "v 0 1 0\n"
+            "vt 0 0\n"
+            "vt 1 0\n"
+            "vn 0 0 1\n"
+            "\tv 0 0 1\n"
+            "usemtl blank_uv\n"
+            "f 1//1 2//1 3//1\n"
+            "f 1//1 3//1 4//1\n"
+            "usemtl polygons\n"
+            "f 1/1/1 2/2/1 3/2/1 4/1/1 5/1/1\n"
+            "f -5/-2/-1 -4/-1/-1 -3/-1/-1\n"
+        )
+    expected = pywavefront.Wavefront(file_name, create_materials=True, collect_faces=True)
+    scene = pywavefront.Wavefront(file_name, create_materials=True, collect_faces=True, bulk=True)
+    assert_same_scene(expected, scene)
+
+
+def test_indexed_same_as_lists():
+    for file_name in OBJ_FILES:
+        expected = pywavefront.Wavefront(file_name, collect_faces=True)
+        for bulk in (False, True):
+            scene = pywavefront.Wavefront(file_name, collect_faces=True, indexed=True, bulk=bulk)
+            assert_same_scene(expected, scene)
+            for material in scene.materials.values():
+                if not material.vertex_format:
+                    continue
+                assert material.indices.typecode == 'H'
+                assert len(material.indices) == len(expected.materials[material.name].vertices) // \
+                    material.vertex_size
+                # Every vertex is used and the vertices are in order of first use
+                first_use = numpy.unique(numpy.asarray(material.indices), return_index=True)[1]
+                assert len(first_use) == len(material.vertices) // material.vertex_size
+                assert numpy.all(numpy.diff(first_use) > 0)
+
+
+def test_indexed_shares_vertices():
+    # The 8 corners of a box with one color each
+    scene = pywavefront.Wavefront(os.path.join(DATA_DIR, 'box', 'box-C3F_V3F.obj'), indexed=True)
+    material = scene.materials['Material']
+    assert len(material.vertices) // material.vertex_size == 8
+    assert len(material.indices) == 36
@@ -0,0 +1,99 @@
+import glob
+import os
+
+import numpy
+
+import pywavefront
+from pywavefront.quantize import (
+    quantize_vertices, dequantize_vertices, quantization_error, split_columns,
+    encode_octahedral, decode_octahedral,
+)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, 'data')
+
+OBJ_FILES = sorted(glob.glob(os.path.join(DATA_DIR, 'box', '*.obj'))) + [
+    os.path.join(DATA_DIR, 'uv_sphere.obj'),
+]
+
+# Largest normal error in radians, a snorm16 step spread over the octahedron
+MAX_NORMAL_ANGLE = 1e-4
+
+
+def materials():
+    for file_name in OBJ_FILES:
+        scene = pywavefront.Wavefront(file_name)
+        for material in scene.materials.values():
+            if len(material.vertices):
+                yield material
+
+
+def test_error_bounds():
+    for material in materials():
+        compact = quantize_vertices(material.vertices, material.vertex_format)
+        errors = quantization_error(material.vertices, compact)
+        columns = split_columns(material.vertices, material.vertex_format)
+
+        # float16 keeps 11 bits of the position normalized to [-1, 1]
+        positions = columns['V3F']
+        extent = (positions.max(axis=0) - positions.min(axis=0)).max()
+        assert errors['position'] <= extent / 2 * 2 ** -11
+
+        if 'N3F' in columns:
+            assert errors['normal'] <= MAX_NORMAL_ANGLE
+        if 'T2F' in columns:
+            uvs = columns['T2F']
+            extent = (uvs.max(axis=0) - uvs.min(axis=0)).max()
+            assert errors['uv'] <= extent / 65535 + 1e-6
+        if 'C3F' in columns:
+            # The box colors are 0 or 1
+            assert errors['color'] == 0.0
+
+        assert set(errors) == set(attribute.name for attribute in compact.layout.attributes)
+
+
+def test_round_trip_keeps_format():
+    for material in materials():
+        compact = quantize_vertices(material.vertices, material.vertex_format)
+        decoded = dequantize_vertices(compact)
+        assert decoded.dtype == numpy.float32
+        assert len(decoded) == len(material.vertices)
+        assert compact.data.nbytes == compact.layout.stride * (len(material.vertices) // material.vertex_size)
+
+
+def test_compact_size():
+    scene = pywavefront.Wavefront(os.path.join(DATA_DIR, 'uv_sphere.obj'))
+    material = scene.materials['Material.terran.png']
+    assert material.vertex_format == 'T2F_N3F_V3F'
+    compact = quantize_vertices(material.vertices, material.vertex_format)
+    assert compact.layout.stride == 16
+    assert len(material.vertices) * 4 == 2 * compact.data.nbytes
+
+
+def test_octahedral_round_trip():
+    rng = numpy.random.RandomState(7)
+    normals = rng.normal(size=(10000, 3))
+    axes = numpy.vstack((numpy.eye(3), -numpy.eye(3)))
+    normals = numpy.vstack((normals / numpy.linalg.norm(normals, axis=1)[:, None], axes))
+    assert (normals[:, 2] < 0).sum() > 4000
+
+    encoded = encode_octahedral(normals)
+    assert numpy.all(numpy.abs(encoded) <= 1)
+    assert numpy.allclose(decode_octahedral(encoded), normals, atol=1e-12)
+
+    # Stored as snorm16
+    decoded = decode_octahedral(numpy.round(encoded * 32767) / 32767)
+    angles = numpy.arctan2(numpy.linalg.norm(numpy.cross(normals, decoded), axis=1), (normals * decoded).sum(axis=1))
+    assert angles.max() <= MAX_NORMAL_ANGLE
+    # The axes are exact
+    assert numpy.array_equal(decoded[-6:], axes)
+
+
+def test_octahedral_normal_error():
+    rng = numpy.random.RandomState(11)
+    normals = rng.normal(size=(1000, 3)) * rng.uniform(0.5, 2, size=(1000, 1))
+    positions = rng.uniform(-3, 5, size=(1000, 3))
+    vertices = numpy.column_stack((normals, positions)).ravel()
+    compact = quantize_vertices(vertices, 'N3F_V3F')
+    errors = quantization_error(vertices, compact)
+    assert errors['normal'] <= MAX_NORMAL_ANGLE
+    assert errors['position'] <= 4 * 2 ** -11
@@ -0,0 +1,100 @@
+import glob
+import os
+
+import numpy
+
+import pywavefront
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, 'data')
+
+OBJ_FILES = sorted(glob.glob(os.path.join(DATA_DIR, 'box', '*.obj'))) + [
+    os.path.join(DATA_DIR, 'uv_sphere.obj'),
+    os.path.join(DATA_DIR, 'earth.obj'),
+]
+
+# Two objects sharing a material, the material is used again after another one
+SHARED_MATERIALS_OBJ = """\
+v 0 0 0
+v 1 0 0
+v 1 1 0
+v 0 1 0
+vn 0 0 1
+o first
+usemtl red
+f 1//1 2//1 3//1
+usemtl blue
+f 1//1 3//1 4//1
+usemtl red
+f 2//1 3//1 4//1
+o second
+usemtl red
+f 4//1 3//1 2//1 1//1
+"""
+
+
+def triangle_vertices(vertices, vertex_format, indices):
+    size = 3 + 2 * ('T2F' in vertex_format) + 3 * ('C3F' in vertex_format) + 3 * ('N3F' in vertex_format)
+    vertices = numpy.asarray(vertices, dtype=numpy.float32).reshape(-1, size)
+    if indices is not None:
+        vertices = vertices[numpy.asarray(indices, dtype=numpy.int64)]
+    return vertices
+
+
+def assert_chunks_same_as_parse(file_name, **options):
+    expected = pywavefront.Wavefront(file_name, **options)
+    scene = pywavefront.Wavefront(file_name, parse=False, **options)
+    chunks = list(scene.stream())
+    assert chunks
+
+    streamed = {}
+    for chunk in chunks:
+        assert chunk.material.name in expected.materials
+        assert chunk.vertex_format == expected.materials[chunk.material.name].vertex_format
+        assert chunk.mesh in scene.mesh_list
+        assert chunk.material in chunk.mesh.materials
+        assert (chunk.indices is not None) == bool(options.get('indexed'))
+        streamed.setdefault(chunk.material.name, []).append(
+            triangle_vertices(chunk.vertices, chunk.vertex_format, chunk.indices))
+        # The vertex data is detached from the material
+        assert len(chunk.material.vertices) == 0
+
+    for name, material in expected.materials.items():
+        if not material.vertex_format:
+            continue
+        assert numpy.array_equal(
+            numpy.concatenate(streamed[name]),
+            triangle_vertices(material.vertices, material.vertex_format, material.indices))
+    return chunks
+
+
+def test_stream_same_as_parse():
+    for file_name in OBJ_FILES:
+        for options in ({}, {'use_arrays': True}, {'bulk': True}, {'indexed': True}, {'indexed': True, 'bulk': True}):
+            assert_chunks_same_as_parse(file_name, **options)
+
+
+def test_stream_small_blocks(monkeypatch):
+    monkeypatch.setattr(pywavefront.bulk.BulkObjReader, 'block_size', 131)
+    for file_name in OBJ_FILES[:-1]:
+        assert_chunks_same_as_parse(file_name, bulk=True)
+
+
+def test_stream_boundaries(tmp_path):
+    file_name = os.path.join(str(tmp_path), 'shared.obj')
+    with open(file_name, 'w') as obj_file:
+        obj_file.write(SHARED_MATERIALS_OBJ)
+
+    for options in ({}, {'use_arrays': True}, {'bulk': True}, {'indexed': True}):
+        chunks = assert_chunks_same_as_parse(file_name, create_materials=True, **options)
+        assert [(chunk.mesh.name, chunk.material.name) for chunk in chunks] == [
+            ('first', 'red'), ('first', 'blue'), ('first', 'red'), ('second', 'red')]
+        assert [len(triangle_vertices(chunk.vertices, chunk.vertex_format, chunk.indices)) for chunk in chunks] == \
+            [3, 3, 3, 6]
+
+
+def test_stream_callback():
+    file_name = os.path.join(DATA_DIR, 'uv_sphere.obj')
+    chunks = []
+    scene = pywavefront.Wavefront(file_name, parse=False, use_arrays=True)
+    assert scene.stream(chunks.append) is None
+    assert [chunk.material.name for chunk in chunks] == ['Material.terran.png']
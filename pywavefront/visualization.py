@@ -31,6 +31,7 @@
 # ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 # ----------------------------------------------------------------------------
+
 import pyglet
 from pyglet.gl import *
 
@@ -80,8 +81,15 @@ def draw_materials(materials, lighting_enabled=True, textures_enabled=True):
 def draw_material(material, face=GL_FRONT_AND_BACK, lighting_enabled=True, textures_enabled=True):
     """Draw a single material"""
     if material.gl_floats is None:
-        material.gl_floats = (GLfloat * len(material.vertices))(*material.vertices)
+        if not isinstance(material.vertices, (list, tuple)):
+            # Shares the memory of arrays and numpy views
+            material.gl_floats = (GLfloat * len(material.vertices)).from_buffer(material.vertices)
+        else:
+            material.gl_floats = (GLfloat * len(material.vertices))(*material.vertices)
         material.triangle_count = len(material.vertices) / material.vertex_size
+        if material.indices is not None:
+            index_type = GLushort if material.indices.itemsize == 2 else GLuint
+            material.gl_indices = (index_type * len(material.indices)).from_buffer(material.indices)
 
     vertex_format = VERTEX_FORMATS.get(material.vertex_format)
     if not vertex_format:
@@ -115,7 +123,11 @@ def draw_material(material, face=GL_FRONT_AND_BACK, lighting_enabled=True, textu
         glColor4f(*material.ambient)
 
     glInterleavedArrays(vertex_format, 0, material.gl_floats)
-    glDrawArrays(GL_TRIANGLES, 0, int(material.triangle_count))
+    if material.indices is not None:
+        index_type = GL_UNSIGNED_SHORT if material.indices.itemsize == 2 else GL_UNSIGNED_INT
+        glDrawElements(GL_TRIANGLES, len(material.indices), index_type, material.gl_indices)
+    else:
+        glDrawArrays(GL_TRIANGLES, 0, int(material.triangle_count))
 
     glPopAttrib()
     glPopClientAttrib()
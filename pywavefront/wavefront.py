@@ -31,6 +31,7 @@
 # ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 # ----------------------------------------------------------------------------
+from array import array
 import logging
 from pywavefront import ObjParser
 import pathlib
@@ -53,6 +54,11 @@ class Wavefront:
         collect_faces=False,
         parse=True,
         cache=False,
+        use_arrays=False,
+        bulk=False,
+        indexed=False,
+        cache_compression=False,
+        bounds=False,
     ):
         """
         Create a Wavefront instance
@@ -61,12 +67,25 @@ class Wavefront:
         :param encoding: What text encoding the parser should use
         :param create_materials: Create materials if they don't exist
         :param parse: Should parse be called immediately or manually called later?
+        :param cache: Cache the loaded obj files in binary format. Caches are memory mapped when loaded
+                      and their vertex and index buffers are numpy views if numpy is installed
+        :param cache_compression: Gzip the cache files. Smaller, but they can't be memory mapped
+        :param use_arrays: Store vertex data in flat array('f') buffers instead of lists.
+                           vertices then holds 3 floats per vertex and vertex_colors the colors, if any.
+        :param bulk: Parse runs of statements in bulk with numpy instead of line by line. Implies use_arrays
+        :param indexed: Deduplicate the vertices of each material on their (v, vt, vn) indices.
+                        Each material then has an array('H') or array('I') index buffer in indices.
+                        Implies use_arrays
+        :param bounds: Set the pyrr aabb and sphere of every mesh and material after parsing.
+                       Requires numpy and pyrr
         """
         self.file_name = file_name
         self.mtllibs = []
         self.materials = {}
         self.meshes = {}        # Name mapping
-        self.vertices = []
+        use_arrays = use_arrays or bulk or indexed
+        self.vertices = array('f') if use_arrays else []
+        self.vertex_colors = array('f') if use_arrays else []
         self.mesh_list = []     # Also includes anonymous meshes
 
         self.parser = self.parser_cls(
@@ -77,12 +96,32 @@ class Wavefront:
             create_materials=create_materials,
             collect_faces=collect_faces,
             parse=parse,
-            cache=cache)
+            cache=cache,
+            use_arrays=use_arrays,
+            bulk=bulk,
+            indexed=indexed,
+            cache_compression=cache_compression,
+            bounds=bounds)
 
     def parse(self):
         """Manually call the parser. This is used when parse=False"""
         self.parser.parse()
 
+    def stream(self, callback=None):
+        """
+        Parse the file chunk by chunk instead of all at once. Used with parse=False.
+        See :meth:`ObjParser.stream`
+
+        :param callback: Called with each MeshChunk as it's completed
+        :return: A generator of MeshChunks when no callback is given
+        """
+        chunks = self.parser.stream()
+        if callback is None:
+            return chunks
+
+        for chunk in chunks:
+            callback(chunk)
+
     def add_mesh(self, the_mesh):
         self.mesh_list.append(the_mesh)
         self.meshes[the_mesh.name] = the_mesh
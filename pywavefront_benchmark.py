@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Benchmarks of pywavefront on generated obj files.
+
+Usage:
+
+    python pywavefront_benchmark.py [--grid 300] [--sizes 1 10 100] [--files 32] [--blocks 64] [--objects 10000]
+"""
+
+import argparse
+import logging
+import math
+import os
+import tempfile
+import time
+import shutil
+import tracemalloc
+from pathlib import Path
+
+import numpy
+import pyrr
+
+import pywavefront
+from pywavefront.batch import BatchLoader
+from pywavefront.bvh import BVH, box_plane_sides, frustum_planes
+from pywavefront.cache import cache_name, meta_name
+from pywavefront.optimize import optimize
+from pywavefront.quantize import quantize, quantization_error
+
+
+def write_grid_obj(file_name, size):
+    """Write a size x size grid of quads with uvs and normals, like an exported height map"""
+    with open(file_name, 'w') as obj_file:
+        obj_file.write('o Grid\n')
+        for y in range(size + 1):
+            obj_file.write(''.join('v %f %f %f\n' % (x * 0.1, y * 0.1, ((x * y) % 7) * 0.01)
+                                   for x in range(size + 1)))
+        for y in range(size + 1):
+            obj_file.write(''.join('vt %f %f\n' % (x / size, y / size) for x in range(size + 1)))
+        obj_file.write('vn 0.000000 0.000000 1.000000\n')
+        for y in range(size):
+            faces = []
+            for x in range(size):
+                i = y * (size + 1) + x + 1
+                j = i + size + 1
+                faces.append('f %d/%d/1 %d/%d/1 %d/%d/1 %d/%d/1\n' % (i, i, i + 1, i + 1, j + 1, j + 1, j, j))
+            obj_file.write(''.join(faces))
+
+
+def write_city_obj(file_name, num_blocks, size):
+    """Write num_blocks objects of size x size quads each, alternating between two materials"""
+    with open(os.path.splitext(file_name)[0] + '.mtl', 'w') as mtl_file:
+        mtl_file.write('newmtl Concrete\nKd 0.6 0.6 0.6\nnewmtl Glass\nKd 0.2 0.3 0.4\n')
+
+    with open(file_name, 'w') as obj_file:
+        obj_file.write('mtllib %s\n' % (os.path.splitext(os.path.basename(file_name))[0] + '.mtl'))
+        offset = 0
+        for block in range(num_blocks):
+            obj_file.write('o Block%d\n' % block)
+            obj_file.write(''.join('v %f %f %f\n' % (block * 10 + x * 0.1, y * 0.1, (x * y) % 5)
+                                   for y in range(size + 1) for x in range(size + 1)))
+            obj_file.write('vn 0.000000 0.000000 1.000000\n')
+            for material in ('Concrete', 'Glass'):
+                obj_file.write('usemtl %s\n' % material)
+                faces = []
+                for y in range(size // 2) if material == 'Concrete' else range(size // 2, size):
+                    for x in range(size):
+                        i = offset + y * (size + 1) + x + 1
+                        j = i + size + 1
+                        faces.append('f %d//%d %d//%d %d//%d %d//%d\n' % (i, block + 1, i + 1, block + 1,
+                                                                           j + 1, block + 1, j, block + 1))
+                obj_file.write(''.join(faces))
+            offset += (size + 1) ** 2
+
+
+def write_sized_obj(file_name, megabytes):
+    """Write a grid obj of about the given size"""
+    # A grid cell takes about 110 bytes: one v, one vt and one f line
+    write_grid_obj(file_name, max(1, int(math.sqrt(megabytes * 2 ** 20 / 110))))
+
+
+def measure_memory(func, *args, **kwargs):
+    """Return the result, the peak and the retained traced memory in bytes of a single call"""
+    tracemalloc.start()
+    result = func(*args, **kwargs)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak, retained
+
+
+def measure_time(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def bench_memory(file_name):
+    size = os.path.getsize(file_name)
+    print('%-22s %10s %10s %13s' % ('%.1f MB obj' % (size / 2.0 ** 20), 'load [s]', 'peak [MB]', 'retained [MB]'))
+    for name, kwargs in (('lists', {}), ('use_arrays', {'use_arrays': True}), ('indexed', {'indexed': True})):
+        duration = measure_time(pywavefront.Wavefront, file_name, **kwargs)[1]
+        wavefront, peak, retained = measure_memory(pywavefront.Wavefront, file_name, **kwargs)
+        print('%-22s %10.2f %10.1f %13.1f' % (name, duration, peak / 2.0 ** 20, retained / 2.0 ** 20))
+        del wavefront
+
+
+def buffer_bytes(wavefront):
+    """Bytes of the vertex and index buffers of all materials"""
+    return sum(len(material.vertices) * 4 + (len(material.indices) * material.indices.itemsize
+                                             if material.indices is not None else 0)
+               for material in wavefront.materials.values())
+
+
+def bench_indexed(file_name):
+    print('%-22s %12s %12s %8s' % ('buffers', 'soup [MB]', 'indexed [MB]', 'ratio'))
+    soup = buffer_bytes(pywavefront.Wavefront(file_name, use_arrays=True))
+    indexed = buffer_bytes(pywavefront.Wavefront(file_name, indexed=True))
+    print('%-22s %12.1f %12.1f %8.2f' % (os.path.basename(file_name), soup / 2.0 ** 20, indexed / 2.0 ** 20,
+                                         indexed / soup))
+
+
+def bench_quantize(file_name):
+    print('%-22s %12s %12s %8s  %s' % ('compact vertices', 'float [MB]', 'compact [MB]', 'ratio', 'max error'))
+    wavefront = pywavefront.Wavefront(file_name, indexed=True)
+    quantize(wavefront)
+    for material in wavefront.materials.values():
+        if material.compact is None:
+            continue
+        size = len(material.vertices) * 4
+        errors = quantization_error(material.vertices, material.compact)
+        print('%-22s %12.2f %12.2f %8.2f  %s' % (material.vertex_format, size / 2.0 ** 20,
+                                                 material.compact.data.nbytes / 2.0 ** 20,
+                                                 size / material.compact.data.nbytes,
+                                                 ' '.join('%s %.1e' % item for item in errors.items())))
+
+
+def bench_optimize(file_name):
+    print('%-22s %8s %8s %8s %8s %10s' % ('vertex cache', 'ACMR in', 'ACMR out', 'ATVR in', 'ATVR out', 'time [s]'))
+    for name, overdraw in (('optimize', False), ('optimize + overdraw', True)):
+        wavefront = pywavefront.Wavefront(file_name, indexed=True)
+        report, duration = measure_time(optimize, wavefront, overdraw=overdraw)
+        for before, after in report.values():
+            print('%-22s %8.3f %8.3f %8.3f %8.3f %10.2f' % (name, before.acmr, after.acmr, before.atvr, after.atvr,
+                                                             duration))
+
+
+def random_cameras(num_cameras, extent, seed=0):
+    """pyrr model view matrices looking from and at random points"""
+    rnd = numpy.random.RandomState(seed)
+    return [pyrr.matrix44.create_look_at(rnd.uniform(-extent, extent, 3), rnd.uniform(-extent, extent, 3), [0, 1, 0])
+            for _ in range(num_cameras)]
+
+
+def cull_loop(aabbs, planes):
+    """Test the aabb of each object one at a time, as a draw loop would"""
+    return [i for i, aabb in enumerate(aabbs) if (sum(box_plane_sides(aabb[None], planes)) >= 0).all()]
+
+
+def cull_numpy(aabbs, planes):
+    distance, radius = box_plane_sides(aabbs, planes)
+    return numpy.flatnonzero((distance + radius >= 0).all(axis=1)).tolist()
+
+
+def pick_loop(aabbs, ray):
+    best, best_distance = None, numpy.inf
+    for i, aabb in enumerate(aabbs):
+        distance = BVH.ray_distance(ray, aabb)
+        if distance is not None and distance < best_distance:
+            best, best_distance = i, distance
+    return best
+
+
+def bench_bvh(num_objects, num_cameras=10):
+    # Objects of 1 to 10 units scattered in a cube, the far plane sees a part of them
+    rnd = numpy.random.RandomState(0)
+    extent = 20.0 * num_objects ** (1 / 3.0)
+    centers = rnd.uniform(-extent, extent, (num_objects, 3))
+    sizes = rnd.uniform(0.5, 5.0, (num_objects, 3))
+    aabbs = numpy.stack([centers - sizes, centers + sizes], axis=1)
+
+    bvh, build_time = measure_time(BVH, aabbs)
+    projection = pyrr.matrix44.create_perspective_projection(60.0, 1.5, 1.0, extent)
+    cameras = random_cameras(num_cameras, extent)
+    frustums = [frustum_planes(numpy.dot(model_view, projection)) for model_view in cameras]
+    # Rays from the cameras through the center of the screen
+    rays = [pyrr.ray.create(pyrr.matrix44.inverse(model_view)[3, :3], -pyrr.matrix44.inverse(model_view)[2, :3])
+            for model_view in cameras]
+
+    print('%-22s %8s %10s %10s %8s %8s' % ('%d objects' % num_objects, 'visible', 'cull [ms]', 'pick [ms]',
+                                           'cull x', 'pick x'))
+    visible = sum(len(cull_numpy(aabbs, planes)) for planes in frustums) // num_cameras
+    loop_cull = measure_time(lambda: [cull_loop(aabbs, planes) for planes in frustums])[1] / num_cameras
+    loop_pick = measure_time(lambda: [pick_loop(aabbs, ray) for ray in rays])[1] / num_cameras
+    print('%-22s %8d %10.2f %10.2f' % ('brute force loop', visible, loop_cull * 1000, loop_pick * 1000))
+    numpy_cull = measure_time(lambda: [cull_numpy(aabbs, planes) for planes in frustums])[1] / num_cameras
+    print('%-22s %8d %10.2f %10s %8.1f' % ('brute force numpy', visible, numpy_cull * 1000, '',
+                                           loop_cull / numpy_cull))
+    bvh_cull = measure_time(lambda: [bvh.cull(planes) for planes in frustums])[1] / num_cameras
+    bvh_pick = measure_time(lambda: [bvh.pick(ray) for ray in rays])[1] / num_cameras
+    print('%-22s %8d %10.2f %10.2f %8.1f %8.1f' % ('BVH (build %.0f ms)' % (build_time * 1000), visible,
+                                                   bvh_cull * 1000, bvh_pick * 1000, loop_cull / bvh_cull,
+                                                   loop_pick / bvh_pick))
+
+
+def remove_cache(file_name):
+    for name in (cache_name, meta_name):
+        path = name(Path(file_name))
+        if path.exists():
+            path.unlink()
+
+
+def bench_cache(file_name):
+    print('%-22s %10s %10s' % ('cache', 'load [ms]', 'size [MB]'))
+    parse_time = measure_time(pywavefront.Wavefront, file_name, use_arrays=True)[1]
+    print('%-22s %10.1f' % ('no cache', parse_time * 1000))
+    for name, compression in (('mapped', False), ('compressed', True)):
+        remove_cache(file_name)
+        pywavefront.Wavefront(file_name, use_arrays=True, cache=True, cache_compression=compression)
+        duration = measure_time(pywavefront.Wavefront, file_name, use_arrays=True, cache=True)[1]
+        size = os.path.getsize(str(cache_name(Path(file_name))))
+        print('%-22s %10.1f %10.1f' % (name, duration * 1000, size / 2.0 ** 20))
+    remove_cache(file_name)
+
+
+def stream_chunks(file_name, **kwargs):
+    """Stream the file dropping each chunk, returns the number of chunks"""
+    wavefront = pywavefront.Wavefront(file_name, parse=False, **kwargs)
+    return sum(1 for _ in wavefront.stream())
+
+
+def bench_stream(file_name):
+    size = os.path.getsize(file_name)
+    print('%-22s %10s %12s %10s %13s' % ('%.1f MB city obj' % (size / 2.0 ** 20), 'load [s]', 'first [ms]',
+                                         'peak [MB]', 'retained [MB]'))
+    for name, kwargs in (('use_arrays', {'use_arrays': True}), ('bulk', {'bulk': True})):
+        duration = measure_time(pywavefront.Wavefront, file_name, **kwargs)[1]
+        wavefront, peak, retained = measure_memory(pywavefront.Wavefront, file_name, **kwargs)
+        print('%-22s %10.2f %12s %10.1f %13.1f' % (name, duration, '', peak / 2.0 ** 20, retained / 2.0 ** 20))
+        del wavefront
+
+        start = time.perf_counter()
+        next(pywavefront.Wavefront(file_name, parse=False, **kwargs).stream())
+        first = time.perf_counter() - start
+        duration = measure_time(stream_chunks, file_name, **kwargs)[1]
+        _, peak, retained = measure_memory(stream_chunks, file_name, **kwargs)
+        print('%-22s %10.2f %12.1f %10.1f %13.1f' % (name + ' streamed', duration, first * 1000,
+                                                     peak / 2.0 ** 20, retained / 2.0 ** 20))
+
+
+def bench_batch(tmp_dir, grid_file, num_files):
+    file_names = []
+    for i in range(num_files):
+        file_names.append(os.path.join(tmp_dir, 'batch%d.obj' % i))
+        shutil.copy(grid_file, file_names[-1])
+
+    print('%-22s %8s %10s %12s' % ('loading', 'files', 'total [s]', 'first [ms]'))
+    start = time.perf_counter()
+    first = None
+    for file_name in file_names:
+        pywavefront.Wavefront(file_name, use_arrays=True)
+        first = first or time.perf_counter() - start
+    print('%-22s %8d %10.2f %12.1f' % ('sequential', num_files, time.perf_counter() - start, first * 1000))
+
+    start = time.perf_counter()
+    first = None
+    with BatchLoader() as loader:
+        for wavefront in loader.load(file_names):
+            first = first or time.perf_counter() - start
+    print('%-22s %8d %10.2f %12.1f' % ('BatchLoader (%d cpus)' % os.cpu_count(), num_files,
+                                         time.perf_counter() - start, first * 1000))
+
+    for file_name in file_names:
+        os.remove(file_name)
+
+
+def bench_throughput(tmp_dir, sizes):
+    print('%-22s %10s %10s %10s %8s' % ('parser', 'size [MB]', 'load [s]', 'MB/s', 'speedup'))
+    for megabytes in sizes:
+        file_name = os.path.join(tmp_dir, 'sized.obj')
+        write_sized_obj(file_name, megabytes)
+        size = os.path.getsize(file_name) / 2.0 ** 20
+
+        line_time = measure_time(pywavefront.Wavefront, file_name, use_arrays=True)[1]
+        bulk_time = measure_time(pywavefront.Wavefront, file_name, bulk=True)[1]
+        print('%-22s %10.1f %10.2f %10.1f' % ('lines', size, line_time, size / line_time))
+        print('%-22s %10.1f %10.2f %10.1f %8.1f' % ('bulk', size, bulk_time, size / bulk_time, line_time / bulk_time))
+        os.remove(file_name)
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description='pywavefront benchmarks')
+    arg_parser.add_argument('--grid', type=int, default=300)
+    arg_parser.add_argument('--sizes', type=float, nargs='+', default=[1, 10, 100],
+                            help='sizes in MB of the obj files parsed to measure the throughput, up to 1000')
+    arg_parser.add_argument('--files', type=int, default=32, help='number of grid files loaded by the batch loader')
+    arg_parser.add_argument('--blocks', type=int, default=64, help='number of objects in the streamed city file')
+    arg_parser.add_argument('--objects', type=int, default=10000, help='number of objects culled and picked')
+    args = arg_parser.parse_args()
+    pywavefront.configure_logging(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        grid_file = os.path.join(tmp_dir, 'grid.obj')
+        write_grid_obj(grid_file, args.grid)
+        bench_memory(grid_file)
+        bench_indexed(grid_file)
+        bench_optimize(grid_file)
+        bench_quantize(grid_file)
+        bench_cache(grid_file)
+        city_file = os.path.join(tmp_dir, 'city.obj')
+        write_city_obj(city_file, args.blocks, 60)
+        bench_stream(city_file)
+        bench_bvh(args.objects)
+        bench_batch(tmp_dir, grid_file, args.files)
+        bench_throughput(tmp_dir, args.sizes)
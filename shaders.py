@@ -1,3 +1,4 @@
+import ctypes
 from enum import Enum
 from pathlib import Path
 from functools import lru_cache
@@ -230,3 +231,105 @@ SHADER_PROGRAMS = {
 @lru_cache(maxsize=None)  # Boundless cache
 def get_shader_program(id):
     return SHADER_PROGRAMS[id]()
+
+
+# OpenGL types of the numpy type codes used by compact vertex layouts
+GL_ATTRIBUTE_TYPES = {
+    'f2': GL_HALF_FLOAT,
+    'f4': GL_FLOAT,
+    'i2': GL_SHORT,
+    'u2': GL_UNSIGNED_SHORT,
+    'u1': GL_UNSIGNED_BYTE,
+}
+
+# GLSL input of each compact attribute
+COMPACT_INPUTS = {
+    'position': 'vec3 position',
+    'normal': 'vec2 normal_in',
+    'uv': 'vec2 uv_in',
+    'color': 'vec3 color_in',
+}
+
+# Values the compact vertex shader passes on
+COMPACT_OUTPUTS = {
+    'normal': 'vec3 normal_out',
+    'uv': 'vec2 uv_out',
+    'color': 'vec3 color_out',
+}
+
+def set_vertex_attrib_pointers(layout):
+    """Point the attributes of the bound VAO at a buffer of vertices in a pywavefront.quantize.VertexLayout"""
+    for attribute in layout.attributes:
+        glEnableVertexAttribArray(attribute.location)
+        glVertexAttribPointer(attribute.location, attribute.components, GL_ATTRIBUTE_TYPES[attribute.type],
+                              GL_TRUE if attribute.normalized else GL_FALSE, layout.stride,
+                              ctypes.c_void_p(attribute.offset))
+
+def set_quantization_uniforms(program, quantization):
+    """Set the uniforms decoding the positions and uvs of a material's compact vertices"""
+    program.set_uniform_3f('position_scale', *quantization.position_scale)
+    program.set_uniform_3f('position_offset', *quantization.position_offset)
+    program.set_uniform_2f('uv_scale', *quantization.uv_scale)
+    program.set_uniform_2f('uv_offset', *quantization.uv_offset)
+
+def shader_program_compact(layout):
+    names = [attribute.name for attribute in layout.attributes]
+    inputs = "\n".join(f"        layout(location={attribute.location}) in {COMPACT_INPUTS[attribute.name]};"
+                       for attribute in layout.attributes)
+    outputs = "".join(f"        out {COMPACT_OUTPUTS[name]};\n" for name in names if name in COMPACT_OUTPUTS)
+
+    vertex_shader = f"""
+        #version 330 core
+
+        uniform mat4 model;
+        uniform mat4 projection;
+        uniform vec3 position_scale;
+        uniform vec3 position_offset;
+        uniform vec2 uv_scale;
+        uniform vec2 uv_offset;
+
+{inputs}
+
+{outputs}
+        vec3 decode_octahedral(vec2 e) {{
+            vec3 n = vec3(e, 1.0 - abs(e.x) - abs(e.y));
+            float t = max(-n.z, 0.0);
+            n.x += n.x >= 0.0 ? -t : t;
+            n.y += n.y >= 0.0 ? -t : t;
+            return normalize(n);
+        }}
+
+        void main() {{
+            vec4 vertex_world = model * vec4(position * position_scale + position_offset, 1);
+            gl_Position = projection * vertex_world;
+            {"normal_out = mat3(model) * decode_octahedral(normal_in);" if 'normal' in names else ""}
+            {"uv_out = uv_in * uv_scale + uv_offset;" if 'uv' in names else ""}
+            {"color_out = color_in;" if 'color' in names else ""}
+        }}
+    """
+
+    if 'uv' in names:
+        color = "texture(tex, uv_out)" + (" * vec4(color_out, 1)" if 'color' in names else "")
+    elif 'color' in names:
+        color = "vec4(color_out, 0.5)"
+    else:
+        color = "vec4(0.5, 0.5, 0.5, 0.5)"
+
+    fragment_shader = f"""
+        #version 330 core
+
+{outputs.replace('out ', 'in ')}
+        out vec4 color;
+
+        uniform sampler2D tex;
+
+        void main() {{
+            color = {color};
+        }}
+    """
+
+    return ShaderProgram.from_sources(vert_source=vertex_shader, frag_source=fragment_shader)
+
+@lru_cache(maxsize=None)  # One program per layout
+def get_compact_shader_program(layout):
+    return shader_program_compact(layout)
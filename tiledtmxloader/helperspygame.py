@@ -64,8 +64,9 @@ class ResourceLoaderPygame(tmxreader.AbstractResourceLoader):
 
     """
 
-    def __init__(self):
-        tmxreader.AbstractResourceLoader.__init__(self)
+    def __init__(self, max_workers=0, executor=None, tile_store=None):
+        tmxreader.AbstractResourceLoader.__init__(self, max_workers, executor, \
+                                                                    tile_store)
 
     def load(self, tile_map):
         tmxreader.AbstractResourceLoader.load(self, tile_map)
@@ -74,7 +75,7 @@ class ResourceLoaderPygame(tmxreader.AbstractResourceLoader):
         # ISSUE 17: flipped tiles
         for layer in self.world_map.layers:
             if not layer.is_object_group:
-                for gid in layer.decoded_content:
+                for gid in layer.unique_gids():
                     if gid not in self.indexed_tiles:
                         if gid & self.FLIP_X or gid & self.FLIP_Y or gid & self.FLIP_DIAGONAL:
                             image_gid = gid & ~(self.FLIP_X | self.FLIP_Y | self.FLIP_DIAGONAL)
@@ -87,7 +88,7 @@ class ResourceLoaderPygame(tmxreader.AbstractResourceLoader):
                                     img = pygame.transform.rotate(img, 90)
                             else:
                                 img = pygame.transform.flip(img, bool(gid & self.FLIP_X), bool(gid & self.FLIP_Y))
-                            self.indexed_tiles[gid] = (offx, offy, img)
+                            self._add_tile(gid, offx, offy, img)
                         elif gid == 0:  # 0 means no tile!
                             continue
                         else:
@@ -111,7 +112,7 @@ class ResourceLoaderPygame(tmxreader.AbstractResourceLoader):
         images = []
         for y_pos in range(margin, height, tile_height_spacing):
             for x_pos in range(margin, width, tile_width_spacing):
-                img_part = self._load_image_part(filename, x_pos, y_pos, \
+                img_part = self._get_image_part(source_img, x_pos, y_pos, \
                                                  tile_width, tile_height, colorkey)
                 images.append(img_part)
         return images
@@ -122,6 +123,14 @@ class ResourceLoaderPygame(tmxreader.AbstractResourceLoader):
         Loads a image from a sprite sheet.
         """
         source_img = self._load_image(filename, colorkey)
+        return self._get_image_part(source_img, xpos, ypos, width, height, \
+                                                                    colorkey)
+
+    def _get_image_part(self, source_img, xpos, ypos, width, height, \
+                         colorkey=None):
+        """
+        Copies a part of an already loaded sprite sheet.
+        """
         ## ISSUE 4:
         ##  The following usage seems to be broken in pygame (1.9.1.):
         ##  img_part = pygame.Surface((tile_width, tile_height), 0, source_img)
@@ -154,6 +163,10 @@ class ResourceLoaderPygame(tmxreader.AbstractResourceLoader):
             img.set_colorkey(colorkey, pygame.RLEACCEL)
         return img
 
+    def _get_image_data(self, image):
+        return repr((image.get_size(), image.get_colorkey())).encode('ascii') + \
+                                        pygame.image.tostring(image, "RGBA")
+
         # def get_sprites(self):
         # pass
 
@@ -72,16 +72,27 @@ class ResourceLoaderPyglet(tmxreader.AbstractResourceLoader):
     methods use a colorkey parameter. A colorkey is only useful for pygame.
     This loader adds its own pyglet-specific parameter to deal with
     pyglet.image.load's capability to work with file-like objects.
-    
+
+    The images are always loaded one after another: creating textures and
+    changing pyglet.resource.path has to happen in the thread that owns the
+    GL context, so max_workers and executor are not supported.
+
     """
 
+    def __init__(self, max_workers=0, executor=None, tile_store=None):
+        if max_workers != 0 or executor is not None:
+            raise ValueError('pyglet images can not be loaded concurrently, ' \
+                             'use max_workers=0 and no executor')
+        tmxreader.AbstractResourceLoader.__init__(self, 0, None, tile_store)
+        self._tile_images = {} # {gid: decoded image}, only with a tile_store
+
     def load(self, tile_map):
         tmxreader.AbstractResourceLoader.load(self, tile_map)
         # ISSUE 17: flipped tiles
         for layer in self.world_map.layers:
             if layer.is_object_group:
                 continue
-            for gid in layer.decoded_content:
+            for gid in layer.unique_gids():
                 if gid not in self.indexed_tiles:
                     if gid & self.FLIP_X or gid & self.FLIP_Y or gid & self.FLIP_DIAGONAL:
                         image_gid = gid & ~(self.FLIP_X | self.FLIP_Y | self.FLIP_DIAGONAL)
@@ -100,7 +111,11 @@ class ResourceLoaderPyglet(tmxreader.AbstractResourceLoader):
                             tex2 = tex.get_transform(flip_x=bool(gid & self.FLIP_X), flip_y=bool(gid & self.FLIP_Y))
                         tex2.anchor_x = tex.anchor_x = orig_anchor_x
                         tex2.anchor_y = tex.anchor_y = orig_anchor_y
-                        self.indexed_tiles[gid] = (offset_x, offset_y, tex2)
+                        data = None
+                        if self.tile_store is not None:
+                            data = self._get_flipped_image_data(self._tile_images[image_gid], gid)
+                        self._add_tile(gid, offset_x, offset_y, tex2, data)
+        self._tile_images.clear()
 
     def _load_image(self, filename, file_like_obj=None):
         """Load a single image.
@@ -121,6 +136,10 @@ class ResourceLoaderPyglet(tmxreader.AbstractResourceLoader):
             if file_like_obj is not None:
                 # TODO: oder decoders???
                 img = pyglet.image.load(filename, file_like_obj, pyglet.image.codecs.get_decoders("*.png")[0])
+            elif self.tile_store is not None:
+                # keep the decoded pixels, _add_tile creates the textures
+                # only for the unique tiles
+                img = pyglet.image.load(filename)
             else:
                 # add the file to the resources so it goes into the same texture atlas
                 directory_name = os.path.dirname(filename)
@@ -183,6 +202,53 @@ class ResourceLoaderPyglet(tmxreader.AbstractResourceLoader):
         # TODO: Ask myself why this extra indirection is necessary.
         return self._load_image(file_like_obj, file_like_obj)
 
+    def _get_image_data(self, image):
+        """Returns the size and the RGBA pixels of an image.
+
+        With a tile_store the tiles are still decoded images at this point,
+        so no texture is read back.
+
+        """
+        data = image.get_image_data()
+        return repr((image.width, image.height)).encode('ascii') + \
+                                    data.get_data('RGBA', image.width * 4)
+
+    def _get_flipped_image_data(self, image, gid):
+        """Returns what _get_image_data returns for image flipped like gid."""
+        width = image.width
+        data = image.get_image_data().get_data('RGBA', width * 4)
+        # the rows go from the bottom to the top, like in pyglet
+        rows = [[data[idx:idx + 4] for idx in range(row_idx, row_idx + width * 4, 4)] \
+                                for row_idx in range(0, len(data), width * 4)]
+        if gid & self.FLIP_DIAGONAL:
+            columns = [list(column) for column in zip(*rows)]
+            if gid & self.FLIP_X:
+                # get_transform(rotate=90) rotates clockwise
+                rows = columns[::-1]
+            elif gid & self.FLIP_Y:
+                rows = [column[::-1] for column in columns]
+        else:
+            if gid & self.FLIP_X:
+                rows = [row[::-1] for row in rows]
+            if gid & self.FLIP_Y:
+                rows = rows[::-1]
+        return repr((len(rows[0]), len(rows))).encode('ascii') + \
+                                    b''.join(b''.join(row) for row in rows)
+
+    def _add_tile(self, gid, offsetx, offsety, image, data=None):
+        """Adds a tile image to indexed_tiles as texture.
+
+        With a tile_store the decoded image is added to the store first and
+        only the stored image is turned into a texture, so there is one
+        texture per unique tile.
+
+        """
+        tmxreader.AbstractResourceLoader._add_tile(self, gid, offsetx, offsety, image, data)
+        if self.tile_store is not None and image is not None:
+            offsetx, offsety, image = self.indexed_tiles[gid]
+            self._tile_images[gid] = image
+            self.indexed_tiles[gid] = (offsetx, offsety, image.get_texture())
+
 
 #  -----------------------------------------------------------------------------
 
@@ -0,0 +1,200 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmarks for the tmxreader on synthetic maps.
+
+Usage::
+
+    python benchmark.py [--sizes 256 512 1024 2048 4096] [--xml-sizes 128 256 512]
+                        [--lazy-size 512] [--cache-size 2048]
+                        [--tile-sets 16] [--workers 2 4 8]
+
+"""
+
+import sys
+import os
+import time
+import argparse
+import base64
+import zlib
+import tracemalloc
+import tempfile
+import glob
+
+THIS_DIR = os.path.abspath(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, os.path.join(THIS_DIR, os.pardir, os.pardir))
+
+import numpy
+
+from tiledtmxloader import tmxreader
+from tiledtmxloader import tmxcache
+
+#  -----------------------------------------------------------------------------
+
+def make_layer(size, encoding, compression=None, seed=0):
+    """
+    Creates a TileLayer of size x size tiles with random gids, encoded as
+    Tiled would write it.
+    """
+    gids = numpy.random.RandomState(seed).randint(0, 256, size * size).astype('<u4')
+    layer = tmxreader.TileLayer()
+    layer.width = layer.height = size
+    layer.encoding = encoding
+    layer.compression = compression
+    if encoding == 'base64':
+        data = gids.tobytes()
+        if compression == 'zlib':
+            data = zlib.compress(data)
+        layer.encoded_content = base64.b64encode(data).decode('latin-1')
+    elif encoding == 'csv':
+        rows = gids.reshape(size, size).astype(str)
+        layer.encoded_content = ",\n".join(",".join(row) for row in rows)
+    return layer
+
+def measure(func, *args):
+    """
+    Returns (seconds, peak memory in bytes) of a single call.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(*args)
+    duration = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return duration, peak
+
+def bench_decode(sizes):
+    world_map = tmxreader.TileMap()
+    print("%-22s %6s %12s %12s %12s %12s" % ("encoding", "size", "array [s]", \
+                                "numpy [s]", "array [MB]", "numpy [MB]"))
+    for encoding, compression in (('base64', None), ('base64', 'zlib'), ('csv', None)):
+        for size in sizes:
+            layer = make_layer(size, encoding, compression)
+            t_old, m_old = measure(world_map._decode_layer_array, layer)
+            t_new, m_new = measure(world_map._decode_layer, layer)
+            print("%-22s %6d %12.4f %12.4f %12.1f %12.1f" % ( \
+                            encoding + "/" + str(compression), size, t_old, t_new, \
+                            m_old / 2.0 ** 20, m_new / 2.0 ** 20))
+
+def write_map(file_name, size, num_layers=2, encoding=None, compression=None):
+    """
+    Writes a map with num_layers layers of size x size tiles.
+    """
+    if encoding:
+        data = make_layer(size, encoding, compression).encoded_content
+    else:
+        gids = numpy.random.RandomState(0).randint(0, 256, size * size)
+        data = "".join('<tile gid="%d"/>' % gid for gid in gids)
+    attrs = ""
+    if encoding:
+        attrs += ' encoding="%s"' % encoding
+    if compression:
+        attrs += ' compression="%s"' % compression
+    with open(file_name, "w") as tmx_file:
+        tmx_file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        tmx_file.write('<map version="1.0" orientation="orthogonal" width="%d" height="%d" tilewidth="32" tileheight="32">\n' % (size, size))
+        for idx in range(num_layers):
+            tmx_file.write('<layer name="layer%d" width="%d" height="%d"><data%s>%s</data></layer>\n' % (idx, size, size, attrs, data))
+        tmx_file.write('</map>\n')
+
+def bench_parse(sizes):
+    print("%-22s %6s %12s %12s %12s %12s" % ("xml map", "size", "minidom [s]", \
+                                "iter [s]", "minidom [MB]", "iter [MB]"))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            file_name = os.path.join(tmp_dir, "map%d.tmx" % size)
+            write_map(file_name, size)
+            for method in ('parse', 'parse_decode'):
+                t_old, m_old = measure(getattr(tmxreader.TileMapParser(), method), file_name)
+                t_new, m_new = measure(getattr(tmxreader.TileMapIterParser(), method), file_name)
+                print("%-22s %6d %12.4f %12.4f %12.1f %12.1f" % (method, size, \
+                                t_old, t_new, m_old / 2.0 ** 20, m_new / 2.0 ** 20))
+
+def bench_lazy(size, num_layers=40):
+    print("%-22s %6s %12s %12s" % ("%d layers, zlib" % num_layers, "size", "[s]", "[MB]"))
+
+    def touch_one_layer(file_name):
+        world_map = tmxreader.TileMapParser().parse_decode(file_name, lazy=True)
+        world_map.layers[0].content2D
+
+    def get_chunk(file_name):
+        world_map = tmxreader.TileMapParser().parse_decode(file_name, lazy=True)
+        for layer in world_map.layers:
+            layer.get_chunk(0, 0, 32, 32)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_name = os.path.join(tmp_dir, "lazy.tmx")
+        write_map(file_name, size, num_layers, 'base64', 'zlib')
+        for name, func in (('parse_decode', tmxreader.TileMapParser().parse_decode), \
+                            ('lazy, one layer', touch_one_layer), \
+                            ('lazy, 32x32 chunks', get_chunk)):
+            duration, peak = measure(func, file_name)
+            print("%-22s %6d %12.4f %12.1f" % (name, size, duration, peak / 2.0 ** 20))
+
+def bench_cache(size):
+    print("%-32s %12s %12s %12s" % ("cache", "parse [s]", "cold [s]", "warm [s]"))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_names = [file_name for file_name in \
+                        sorted(glob.glob(os.path.join(THIS_DIR, "**", "*.tmx"), recursive=True)) \
+                        if not file_name.endswith("invalid_version.tmx")]
+        large_map = os.path.join(tmp_dir, "large.tmx")
+        write_map(large_map, size, 8, 'base64', 'zlib')
+        file_names.append(large_map)
+        cache = tmxcache.TileMapCache(os.path.join(tmp_dir, "cache"))
+        for file_name in file_names:
+            t_parse = measure(tmxreader.TileMapParser().parse_decode, file_name)[0]
+            t_cold = measure(cache.parse_decode, file_name)[0]
+            t_warm = measure(cache.parse_decode, file_name)[0]
+            print("%-32s %12.4f %12.4f %12.4f" % (os.path.basename(file_name), \
+                                                    t_parse, t_cold, t_warm))
+
+def write_tile_set_map(tmp_dir, num_tile_sets, image_size, tile_size=32):
+    """
+    Writes a map using num_tile_sets tile set images filled with noise.
+    """
+    import pygame
+    file_name = os.path.join(tmp_dir, "tile_sets.tmx")
+    num_tiles = (image_size // tile_size) ** 2
+    with open(file_name, "w") as tmx_file:
+        tmx_file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        tmx_file.write('<map version="1.0" orientation="orthogonal" width="1" height="1" tilewidth="%d" tileheight="%d">\n' % (tile_size, tile_size))
+        for idx in range(num_tile_sets):
+            pixels = numpy.random.RandomState(idx).randint(0, 256, (image_size, image_size, 3))
+            image_name = "tile_set%d.png" % idx
+            pygame.image.save(pygame.surfarray.make_surface(pixels), os.path.join(tmp_dir, image_name))
+            tmx_file.write('<tileset firstgid="%d" name="ts%d" tilewidth="%d" tileheight="%d"><image source="%s"/></tileset>\n' % \
+                                (1 + idx * num_tiles, idx, tile_size, tile_size, image_name))
+        tmx_file.write('<layer name="layer" width="1" height="1"><data encoding="csv">1</data></layer>\n')
+        tmx_file.write('</map>\n')
+    return file_name
+
+def bench_resources(num_tile_sets, image_size, workers):
+    from tiledtmxloader import helperspygame
+    print("%-22s %6s %12s" % ("%d tile sets %dpx" % (num_tile_sets, image_size), "workers", "[s]"))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        world_map = tmxreader.TileMapParser().parse_decode( \
+                        write_tile_set_map(tmp_dir, num_tile_sets, image_size))
+        for max_workers in [0] + workers:
+            loader = helperspygame.ResourceLoaderPygame(max_workers)
+            duration = measure(loader.load, world_map)[0]
+            print("%-22s %6d %12.4f" % ("ResourceLoaderPygame", max_workers, duration))
+
+#  -----------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description='tmxreader benchmarks')
+    arg_parser.add_argument('--sizes', type=int, nargs='+', \
+                            default=[256, 512, 1024, 2048, 4096])
+    arg_parser.add_argument('--xml-sizes', type=int, nargs='+', \
+                            default=[128, 256, 512])
+    arg_parser.add_argument('--lazy-size', type=int, default=512)
+    arg_parser.add_argument('--cache-size', type=int, default=2048)
+    arg_parser.add_argument('--tile-sets', type=int, default=16)
+    arg_parser.add_argument('--workers', type=int, nargs='+', default=[2, 4, 8])
+    args = arg_parser.parse_args()
+    bench_decode(args.sizes)
+    bench_parse(args.xml_sizes)
+    bench_lazy(args.lazy_size)
+    bench_cache(args.cache_size)
+    bench_resources(args.tile_sets, 1024, args.workers)
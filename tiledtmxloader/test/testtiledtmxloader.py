@@ -12,9 +12,15 @@ sys.path.insert(0, p)
 # print sys.path
 
 import os
+import glob
+import array
+import shutil
+import struct
+import tempfile
 import unittest
 
 import tiledtmxloader
+import tiledtmxloader.tmxcache
 
 
 _has_pygame = False
@@ -117,6 +123,38 @@ class MapLoadTestsPygame(unittest.TestCase):
             world_map = tiledtmxloader.tmxreader.TileMapParser().parse_decode("minix_base64_gzip_dtd.tmx")
             self.resourceloader.load(world_map)
             
+    def test_concurrent_load_same_as_serial(self):
+        if _has_pygame:
+            for file_name in ("map.tmx", "mini4/mini4.tmx", "platformer_test.tmx"):
+                world_map = tiledtmxloader.tmxreader.TileMapParser().parse_decode(file_name)
+                serial_loader = tiledtmxloader.helperspygame.ResourceLoaderPygame()
+                serial_loader.load(world_map)
+                concurrent_loader = tiledtmxloader.helperspygame.ResourceLoaderPygame(max_workers=4)
+                concurrent_loader.load(world_map)
+                self.assertEqual(list(serial_loader.indexed_tiles.keys()), list(concurrent_loader.indexed_tiles.keys()))
+                for gid, (offx, offy, img) in serial_loader.indexed_tiles.items():
+                    con_offx, con_offy, con_img = concurrent_loader.indexed_tiles[gid]
+                    self.assertEqual((offx, offy), (con_offx, con_offy))
+                    self.assertEqual(pygame.image.tostring(img, "RGBA"), pygame.image.tostring(con_img, "RGBA"))
+
+    def test_tile_store_shares_identical_images(self):
+        if _has_pygame:
+            world_map = tiledtmxloader.tmxreader.TileMapParser().parse_decode("map.tmx")
+            loader = tiledtmxloader.helperspygame.ResourceLoaderPygame()
+            loader.load(world_map)
+            tile_store = tiledtmxloader.tmxreader.TileImageStore()
+            dedup_loader = tiledtmxloader.helperspygame.ResourceLoaderPygame(tile_store=tile_store)
+            dedup_loader.load(world_map)
+            self.assertEqual(list(loader.indexed_tiles.keys()), list(dedup_loader.indexed_tiles.keys()))
+            for gid, (offx, offy, img) in loader.indexed_tiles.items():
+                dedup_offx, dedup_offy, dedup_img = dedup_loader.indexed_tiles[gid]
+                self.assertEqual((offx, offy), (dedup_offx, dedup_offy))
+                self.assertEqual(pygame.image.tostring(img, "RGBA"), pygame.image.tostring(dedup_img, "RGBA"))
+            statistics = tile_store.get_statistics()
+            num_images = len(set(id(img) for offx, offy, img in dedup_loader.indexed_tiles.values()))
+            self.assertEqual(statistics["unique"], num_images)
+            self.assertTrue(statistics["duplicates"] > 0)
+
     def test_get_list_of_quad_coords(self):
         if _has_pygame:
             layer = tiledtmxloader.helperspygame.SpriteLayer
@@ -150,6 +188,273 @@ class MapLoadTestsPygame(unittest.TestCase):
     
 #  -----------------------------------------------------------------------------
 
+class DecodeTests(unittest.TestCase):
+
+    MAPS = ("minix_xml.tmx", "minix_cvs.tmx", "minix_base64_zlib.tmx",
+            "minix_base64_uncompressed.tmx", "minix_base64_gzip.tmx",
+            "map_flip.tmx", "platformer_test.tmx")
+
+    def setUp(self):
+        os.chdir(THIS_DIR)
+        if tiledtmxloader.tmxreader.numpy is None:
+            self.skipTest("needs module 'numpy' installed for testing")
+
+    def test_numpy_decoding_matches_array_decoding(self):
+        for file_name in self.MAPS:
+            world_map = tiledtmxloader.tmxreader.TileMapParser().parse(file_name)
+            for layer in world_map.layers:
+                if layer.is_object_group:
+                    continue
+                world_map._decode_layer_array(layer)
+                expected = list(layer.decoded_content)
+                world_map._decode_layer(layer)
+                self.assertEqual(tiledtmxloader.tmxreader.numpy.uint32, layer.decoded_content.dtype)
+                self.assertEqual(expected, layer.decoded_content.tolist(), file_name)
+
+    def test_grid_is_height_by_width_view(self):
+        world_map = tiledtmxloader.tmxreader.TileMapParser().parse_decode("minix_base64_zlib.tmx")
+        layer = world_map.layers[0]
+        grid = layer.grid
+        self.assertEqual((layer.height, layer.width), grid.shape)
+        self.assertTrue(grid.base is layer.decoded_content)
+        for ypos in range(layer.height):
+            for xpos in range(layer.width):
+                self.assertEqual(layer.decoded_content[xpos + ypos * layer.width], grid[ypos, xpos])
+
+    def test_content2D_is_view_of_decoded_content(self):
+        world_map = tiledtmxloader.tmxreader.TileMapParser().parse_decode("map_flip.tmx")
+        for layer in world_map.layers:
+            if layer.is_object_group:
+                continue
+            self.assertEqual((layer.width, layer.height), layer.content2D.shape)
+            self.assertTrue(tiledtmxloader.tmxreader.numpy.shares_memory(layer.content2D, layer.decoded_content))
+            for ypos in range(layer.height):
+                for xpos in range(layer.width):
+                    self.assertEqual(layer.decoded_content[xpos + ypos * layer.width], layer.content2D[xpos][ypos])
+
+    def test_content2D_without_numpy(self):
+        numpy = tiledtmxloader.tmxreader.numpy
+        tiledtmxloader.tmxreader.numpy = None
+        try:
+            world_map = tiledtmxloader.tmxreader.TileMapParser().parse_decode("minix_cvs.tmx")
+        finally:
+            tiledtmxloader.tmxreader.numpy = numpy
+        layer = world_map.layers[0]
+        self.assertEqual(layer.width, len(layer.content2D))
+        for xpos in range(layer.width):
+            self.assertEqual(layer.height, len(layer.content2D[xpos]))
+            for ypos in range(layer.height):
+                self.assertEqual(layer.decoded_content[xpos + ypos * layer.width], layer.content2D[xpos][ypos])
+
+    def test_lazy_decoding(self):
+        for file_name in self.MAPS:
+            expected = tiledtmxloader.tmxreader.TileMapParser().parse_decode(file_name)
+            captured = tiledtmxloader.tmxreader.TileMapParser().parse_decode(file_name, lazy=True)
+            for exp_layer, cap_layer in zip(expected.layers, captured.layers):
+                if exp_layer.is_object_group:
+                    continue
+                self.assertTrue(cap_layer._decoded_content is None)
+                self.assertEqual(exp_layer.content2D.tolist(), cap_layer.content2D.tolist())
+                self.assertEqual(exp_layer.decoded_content.tolist(), cap_layer.decoded_content.tolist())
+                cap_layer.clear_decoded()
+                self.assertTrue(cap_layer._decoded_content is None)
+                self.assertEqual(exp_layer.decoded_content.tolist(), cap_layer.decoded_content.tolist())
+
+    def test_get_chunk(self):
+        windows = ((0, 0, 1, 1), (3, 2, 5, 7), (1, 1, 4, 0), (-2, 3, 4, 4), (5, 5, 1000, 1000))
+        for file_name in self.MAPS:
+            expected = tiledtmxloader.tmxreader.TileMapParser().parse_decode(file_name)
+            captured = tiledtmxloader.tmxreader.TileMapParser().parse_decode(file_name, lazy=True)
+            for exp_layer, cap_layer in zip(expected.layers, captured.layers):
+                if exp_layer.is_object_group:
+                    continue
+                for xpos, ypos, width, height in windows:
+                    exp_chunk = exp_layer.get_chunk(xpos, ypos, width, height)
+                    cap_chunk = cap_layer.get_chunk(xpos, ypos, width, height)
+                    grid = exp_layer.grid
+                    self.assertEqual(grid[max(ypos, 0):ypos + height, max(xpos, 0):xpos + width].tolist(), exp_chunk.tolist())
+                    self.assertEqual(exp_chunk.tolist(), cap_chunk.tolist(), file_name)
+                    self.assertTrue(cap_layer._decoded_content is None)
+
+    def test_wrong_number_of_gids_raises_exception(self):
+        world_map = tiledtmxloader.tmxreader.TileMapParser().parse("minix_cvs.tmx")
+        layer = world_map.layers[0]
+        layer.width += 1
+        self.assertRaises(Exception, world_map._decode_layer, layer)
+
+#  -----------------------------------------------------------------------------
+
+_GROUPS_MAP = """<?xml version="1.0" encoding="UTF-8"?>
+<map version="1.0" orientation="orthogonal" width="2" height="2" tilewidth="32" tileheight="32">
+ <properties>
+  <property name="map_prop" value="1"/>
+ </properties>
+ <objectgroup name="objects">
+  <object name="obj" x="1" y="2" width="3" height="4">
+   <properties><property name="multi">line</property></properties>
+  </object>
+ </objectgroup>
+ <group name="outer">
+  <layer name="g1" width="2" height="2"><data encoding="csv">1,2,3,4</data></layer>
+  <group name="inner">
+   <layer name="g3" width="2" height="2"><data><tile gid="5"/><tile gid="6"/><tile gid="7"/><tile gid="8"/></data></layer>
+   <objectgroup name="ignored"/>
+  </group>
+  <layer name="g2" width="2" height="2"><data encoding="csv">4,3,2,1</data></layer>
+ </group>
+ <layer name="top" width="2" height="2"><data encoding="csv">0,0,0,1</data></layer>
+</map>
+"""
+
+class CompareMixin(object):
+
+    def assert_same(self, expected, captured, path, seen):
+        """
+        Helper method, compares two object hierarchies attribute by attribute.
+        """
+        numpy = tiledtmxloader.tmxreader.numpy
+        if numpy is not None and isinstance(expected, numpy.ndarray):
+            self.assertTrue(numpy.array_equal(expected, captured), path)
+        elif isinstance(expected, (list, tuple, array.array, memoryview)):
+            self.assertEqual(len(expected), len(captured), path)
+            for idx, (exp, cap) in enumerate(zip(expected, captured)):
+                self.assert_same(exp, cap, "%s[%d]" % (path, idx), seen)
+        elif isinstance(expected, dict):
+            self.assertEqual(list(expected.keys()), list(captured.keys()), path)
+            for key in expected:
+                self.assert_same(expected[key], captured[key], "%s[%r]" % (path, key), seen)
+        elif hasattr(expected, "__dict__"):
+            self.assertEqual(type(expected), type(captured), path)
+            if id(expected) in seen:
+                return
+            seen.add(id(expected))
+            self.assertEqual(sorted(vars(expected)), sorted(vars(captured)), path)
+            for name in vars(expected):
+                self.assert_same(getattr(expected, name), getattr(captured, name), path + "." + name, seen)
+        else:
+            self.assertEqual(expected, captured, path)
+
+    def get_map_files(self):
+        return [file_name for file_name in sorted(glob.glob("**/*.tmx", recursive=True)) \
+                                    if file_name != "invalid_version.tmx"]
+
+
+class IterParserTests(CompareMixin, unittest.TestCase):
+
+    def setUp(self):
+        os.chdir(THIS_DIR)
+
+    def test_parse_same_as_minidom(self):
+        for file_name in self.get_map_files():
+            expected = tiledtmxloader.tmxreader.TileMapParser().parse(file_name)
+            captured = tiledtmxloader.tmxreader.TileMapIterParser().parse(file_name)
+            self.assert_same(expected, captured, file_name, set())
+
+    def test_parse_decode_same_as_minidom(self):
+        for file_name in self.get_map_files():
+            expected = tiledtmxloader.tmxreader.TileMapParser().parse_decode(file_name)
+            captured = tiledtmxloader.tmxreader.TileMapIterParser().parse_decode(file_name)
+            for layer in captured.layers:
+                if not layer.is_object_group and not layer.encoding:
+                    # decoding on the fly collects the xml gids as integers
+                    layer.encoded_content = list(map(str, layer.encoded_content))
+            self.assert_same(expected, captured, file_name, set())
+
+    def test_groups_same_as_minidom(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_name = os.path.join(tmp_dir, "groups.tmx")
+            with open(file_name, "w") as tmx_file:
+                tmx_file.write(_GROUPS_MAP)
+            expected = tiledtmxloader.tmxreader.TileMapParser().parse(file_name)
+            captured = tiledtmxloader.tmxreader.TileMapIterParser().parse(file_name)
+        self.assertEqual(["top", "g1", "g2", "g3", "objects"], [layer.name for layer in captured.layers])
+        self.assert_same(expected, captured, file_name, set())
+
+    def test_load_unkown_version_should_raise_exception(self):
+        self.assertRaises(tiledtmxloader.tmxreader.VersionError, \
+                    tiledtmxloader.tmxreader.TileMapIterParser().parse, "invalid_version.tmx")
+
+class TileImageStoreTests(unittest.TestCase):
+
+    def test_add(self):
+        tile_store = tiledtmxloader.tmxreader.TileImageStore()
+        first = object()
+        self.assertTrue(tile_store.add(first, b"abc") is first)
+        self.assertTrue(tile_store.add(object(), b"abc") is first)
+        second = object()
+        self.assertTrue(tile_store.add(second, b"abcd") is second)
+        self.assertEqual({"added": 3, "unique": 2, "duplicates": 1, \
+                          "bytes_added": 10, "bytes_unique": 7}, tile_store.get_statistics())
+
+
+class CacheTests(CompareMixin, unittest.TestCase):
+
+    def setUp(self):
+        os.chdir(THIS_DIR)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = tiledtmxloader.tmxcache.TileMapCache(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_cached_map_same_as_parsed(self):
+        for file_name in self.get_map_files():
+            expected = tiledtmxloader.tmxreader.TileMapParser().parse_decode(file_name)
+            for layer in expected.layers:
+                if not layer.is_object_group:
+                    layer.encoded_content = None
+            self.cache.parse_decode(file_name)
+            captured = self.cache.parse_decode(file_name)
+            self.assert_same(expected, captured, file_name, set())
+        self.assertEqual(len(self.get_map_files()), self.cache.hits)
+        self.assertEqual(len(self.get_map_files()), self.cache.misses)
+
+    def test_changed_dependency_invalidates_cache(self):
+        map_dir = os.path.join(self.tmp_dir.name, "mini2")
+        shutil.copytree("mini2", map_dir)
+        file_name = os.path.join(map_dir, "mini2.tmx")
+        self.cache.parse_decode(file_name)
+        self.cache.parse_decode(file_name)
+        self.assertEqual((1, 1), (self.cache.hits, self.cache.misses))
+        with open(os.path.join(map_dir, "mini2x.tsx"), "a") as tsx_file:
+            tsx_file.write("\n")
+        self.cache.parse_decode(file_name)
+        self.assertEqual((1, 2), (self.cache.hits, self.cache.misses))
+        self.cache.parse_decode(file_name)
+        self.assertEqual((2, 2), (self.cache.hits, self.cache.misses))
+
+    def test_tile_images_of_tsx_are_dependencies(self):
+        tiles_dir = os.path.join(self.tmp_dir.name, "tiles")
+        os.mkdir(tiles_dir)
+        with open(os.path.join(tiles_dir, "tiles.tsx"), "w") as tsx_file:
+            tsx_file.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                           '<tileset name="tiles" tilewidth="24" tileheight="28">\n'
+                           ' <tile id="0"><image width="24" height="28" source="tile.png"/></tile>\n'
+                           '</tileset>\n')
+        file_name = os.path.join(self.tmp_dir.name, "map.tmx")
+        with open(file_name, "w") as tmx_file:
+            tmx_file.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                           '<map version="1.0" orientation="orthogonal" width="1" height="1" '
+                           'tilewidth="24" tileheight="28">\n'
+                           ' <tileset firstgid="1" source="tiles/tiles.tsx"/>\n'
+                           ' <layer name="Layer 0" width="1" height="1"><data encoding="csv">1</data></layer>\n'
+                           '</map>\n')
+        world_map = tiledtmxloader.tmxreader.TileMapParser().parse_decode(file_name)
+        dependencies = tiledtmxloader.tmxcache.get_dependencies(world_map)
+        self.assertTrue(os.path.join(tiles_dir, "tile.png") in dependencies)
+        self.assertFalse(os.path.join(self.tmp_dir.name, "tile.png") in dependencies)
+
+    def test_other_format_version_is_not_loaded(self):
+        self.cache.parse_decode("minix.tmx")
+        cache_file_name = self.cache.get_cache_file_name("minix.tmx")
+        self.assertTrue(self.cache.load(cache_file_name) is not None)
+        with open(cache_file_name, "r+b") as cache_file:
+            cache_file.seek(4)
+            cache_file.write(struct.pack("<I", tiledtmxloader.tmxcache.FORMAT_VERSION + 1))
+        self.assertTrue(self.cache.load(cache_file_name) is None)
+
+#  -----------------------------------------------------------------------------
+
 _has_pyglet = False
 try:
     import pyglet
@@ -166,7 +471,51 @@ class MapLoadTestsPyglet(MapLoadTestsPygame):
         if not _has_pyglet:
             self.fail("needs either module 'pyglet' installed for testing")
         self.resourceloader = tiledtmxloader.helperspyglet.ResourceLoaderPyglet()
-            
+
+    def test_concurrent_load_is_rejected(self):
+        loader_type = tiledtmxloader.helperspyglet.ResourceLoaderPyglet
+        self.assertRaises(ValueError, loader_type, max_workers=4)
+        self.assertRaises(ValueError, loader_type, max_workers=None)
+        self.assertRaises(ValueError, loader_type, executor=object())
+
+    def test_tile_store_creates_one_texture_per_unique_tile(self):
+        world_map = tiledtmxloader.tmxreader.TileMapParser().parse_decode("map_flip.tmx")
+        tile_store = tiledtmxloader.tmxreader.TileImageStore()
+        loader = tiledtmxloader.helperspyglet.ResourceLoaderPyglet(tile_store=tile_store)
+        loader.load(world_map)
+        statistics = tile_store.get_statistics()
+        self.assertEqual(statistics["added"], len(loader.indexed_tiles))
+        textures = set(id(img) for offx, offy, img in loader.indexed_tiles.values())
+        self.assertEqual(statistics["unique"], len(textures))
+
+    def test_flipped_image_data_matches_pygame_transforms(self):
+        if _has_pygame:
+            class Image(object):
+                def __init__(self, surface):
+                    self.width, self.height = surface.get_size()
+                    self.surface = surface
+                def get_image_data(self):
+                    return self
+                def get_data(self, fmt, pitch):
+                    # pyglet rows go from the bottom to the top
+                    return pygame.image.tostring(self.surface, fmt, True)
+
+            surface = pygame.Surface((3, 2), pygame.SRCALPHA, 32)
+            for x in range(3):
+                for y in range(2):
+                    surface.set_at((x, y), (x, y, x * y, 255))
+            loader = self.resourceloader
+            transforms = (
+                (loader.FLIP_X, pygame.transform.flip(surface, True, False)),
+                (loader.FLIP_Y, pygame.transform.flip(surface, False, True)),
+                (loader.FLIP_X | loader.FLIP_Y, pygame.transform.flip(surface, True, True)),
+                (loader.FLIP_DIAGONAL | loader.FLIP_X, pygame.transform.rotate(surface, -90)),
+                (loader.FLIP_DIAGONAL | loader.FLIP_Y, pygame.transform.rotate(surface, 90)),
+                )
+            for gid_flags, expected in transforms:
+                self.assertEqual(loader._get_image_data(Image(expected)), \
+                                 loader._get_flipped_image_data(Image(surface), 1 | gid_flags))
+
 
 
 if __name__ == '__main__':
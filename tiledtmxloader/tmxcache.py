@@ -0,0 +1,317 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+TileMap loader for python for Tiled, a generic tile map editor
+from http://mapeditor.org/ .
+
+This module caches parsed and decoded maps on disk. The cache file of a map
+is named after the SHA-1 of its path and content and contains:
+
+    * a small fixed header (magic, format version, length of the json part)
+    * a json document with the TileMap, its tile sets, layers and objects
+      and the SHA-1 of every file the map depends on (*.tsx and images)
+    * the gids of every tile layer as raw little endian uint32 blobs,
+      aligned to 16 bytes, which are memory mapped when loading
+
+Usage::
+
+    cache = TileMapCache("cache_dir")
+    world_map = cache.parse_decode("map.tmx")
+
+"""
+
+import os
+import json
+import mmap
+import struct
+import array
+import hashlib
+import tempfile
+
+from . import tmxreader
+
+#  -----------------------------------------------------------------------------
+
+FORMAT_VERSION = 1
+
+_MAGIC = b"TMXC"
+_HEADER = struct.Struct("<4sII") # magic, version, json size
+_ALIGNMENT = 16
+
+#  -----------------------------------------------------------------------------
+def get_file_sha1sum(file_descriptor, blocksize=2**20):
+    """
+    Returns the SHA-1 hex digest of the content of a file object.
+    """
+    sha1sum = hashlib.sha1()
+    while True:
+        fbuf = file_descriptor.read(blocksize)
+        if not fbuf:
+            break
+        sha1sum.update(fbuf)
+    return sha1sum.hexdigest()
+
+def get_path_sha1sum(file_name):
+    """
+    Returns the SHA-1 hex digest of a file or None if it does not exist.
+    """
+    try:
+        with open(file_name, "rb") as file_descriptor:
+            return get_file_sha1sum(file_descriptor)
+    except IOError:
+        return None
+
+#  -----------------------------------------------------------------------------
+
+class TileMapCache(object):
+    """
+    Loads maps from a cache directory, parsing and decoding them only if
+    the map or one of the files it depends on changed.
+
+    :Ivariables:
+        cache_dir : string
+            directory of the cache files, created if needed
+        parser : TileMapParser
+            the parser used on a cache miss
+        hits : int
+            number of maps loaded from the cache
+        misses : int
+            number of maps that had to be parsed
+    """
+
+    def __init__(self, cache_dir, parser=None):
+        self.cache_dir = cache_dir
+        self.parser = parser if parser is not None else tmxreader.TileMapParser()
+        self.hits = 0
+        self.misses = 0
+
+    def get_cache_file_name(self, file_name):
+        """
+        Returns the path of the cache file for the given map file.
+        """
+        file_name = os.path.abspath(file_name)
+        sha1sum = hashlib.sha1(file_name.encode('utf-8'))
+        with open(file_name, "rb") as tmx_file:
+            sha1sum.update(get_file_sha1sum(tmx_file).encode('ascii'))
+        return os.path.join(self.cache_dir, sha1sum.hexdigest() + ".tmxcache")
+
+    def parse_decode(self, file_name):
+        """
+        Returns the decoded TileMap of the given map file, either from the
+        cache or parsed by the parser (and then written to the cache).
+
+        The layers of a cached map have no encoded_content, their
+        decoded_content is a read only view of the memory mapped cache file.
+        """
+        cache_file_name = self.get_cache_file_name(file_name)
+        world_map = self.load(cache_file_name)
+        if world_map is not None:
+            self.hits += 1
+            return world_map
+        self.misses += 1
+        world_map = self.parser.parse_decode(file_name)
+        self.save(world_map, cache_file_name)
+        return world_map
+
+    def load(self, cache_file_name):
+        """
+        Loads a TileMap from a cache file.
+
+        :returns: the TileMap or None if the file does not exist, has another
+            format version or one of the dependencies changed
+        """
+        try:
+            with open(cache_file_name, "rb") as cache_file:
+                magic, version, json_size = _HEADER.unpack(cache_file.read(_HEADER.size))
+                if magic != _MAGIC or version != FORMAT_VERSION:
+                    return None
+                header = json.loads(cache_file.read(json_size).decode('utf-8'))
+                for dependency, sha1sum in header["dependencies"]:
+                    if get_path_sha1sum(dependency) != sha1sum:
+                        return None
+                data = mmap.mmap(cache_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (IOError, KeyError, ValueError, struct.error):
+            return None
+        return _decode_map(header["map"], data)
+
+    def save(self, world_map, cache_file_name):
+        """
+        Writes a decoded TileMap to a cache file.
+        """
+        blobs = []
+        header = {
+            "dependencies": [(dependency, get_path_sha1sum(dependency)) \
+                                for dependency in get_dependencies(world_map)],
+            "map": _encode_map(world_map, blobs),
+            }
+        json_data = json.dumps(header).encode('utf-8')
+        # the blob offsets in the json part are relative to this offset
+        offset = _align(_HEADER.size + len(json_data))
+        cache_dir = os.path.dirname(cache_file_name)
+        if cache_dir and not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        file_descriptor, tmp_name = tempfile.mkstemp(dir=cache_dir or None)
+        try:
+            with os.fdopen(file_descriptor, "wb") as cache_file:
+                cache_file.write(_HEADER.pack(_MAGIC, FORMAT_VERSION, len(json_data)))
+                cache_file.write(json_data)
+                for blob in blobs:
+                    cache_file.write(b"\0" * (offset - cache_file.tell()))
+                    cache_file.write(blob)
+                    offset = _align(cache_file.tell())
+            os.replace(tmp_name, cache_file_name)
+        except:
+            os.remove(tmp_name)
+            raise
+
+#  -----------------------------------------------------------------------------
+def get_dependencies(world_map):
+    """
+    Returns the files a parsed map depends on: the map itself, the *.tsx
+    files and the images of its tile sets and objects.
+    """
+    dependencies = [world_map.map_file_name]
+    map_dir = os.path.dirname(world_map.map_file_name)
+    for tile_set in world_map.tile_sets:
+        # the images of a tile set are relative to the file defining it
+        tile_set_dir = map_dir
+        source = getattr(tile_set, "source", None)
+        if source:
+            source = os.path.abspath(os.path.join(map_dir, source))
+            dependencies.append(source)
+            tile_set_dir = os.path.dirname(source)
+        for image in tile_set.images:
+            if image.source:
+                dependencies.append(os.path.abspath(os.path.join(tile_set_dir, image.source)))
+        for tile in tile_set.tiles:
+            for image in tile.images:
+                if image.source:
+                    dependencies.append(os.path.abspath(os.path.join(tile_set_dir, image.source)))
+    for layer in world_map.layers:
+        if layer.is_object_group:
+            for map_obj in layer.objects:
+                if map_obj.image_source:
+                    dependencies.append(os.path.abspath(os.path.join(map_dir, map_obj.image_source)))
+    unique = []
+    for dependency in dependencies:
+        if dependency not in unique:
+            unique.append(dependency)
+    return unique
+
+def _align(offset):
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+#  -----------------------------------------------------------------------------
+# TileMap <-> json
+
+_TILE_LAYER_RUNTIME = ("encoded_content", "_decoded_content", "_content2D", "_lazy")
+
+def _get_attrs(obj, exclude=()):
+    return dict((name, value) for name, value in vars(obj).items() \
+                                                    if name not in exclude)
+
+def _set_attrs(obj, attrs):
+    for name, value in attrs.items():
+        setattr(obj, name, value)
+    return obj
+
+def _encode_image(image):
+    return _get_attrs(image)
+
+def _decode_image(attrs):
+    image = _set_attrs(tmxreader.TileImage(), attrs)
+    if image.trans is not None:
+        image.trans = tuple(image.trans)
+    return image
+
+def _encode_map(world_map, blobs):
+    tile_sets = []
+    for tile_set in world_map.tile_sets:
+        tiles = []
+        for tile in tile_set.tiles:
+            tile_attrs = _get_attrs(tile, ("images", ))
+            tile_attrs["images"] = [_encode_image(image) for image in tile.images]
+            tiles.append(tile_attrs)
+        tile_set_attrs = _get_attrs(tile_set, ("images", "tiles", "indexed_images"))
+        tile_set_attrs["images"] = [_encode_image(image) for image in tile_set.images]
+        tile_set_attrs["tiles"] = tiles
+        tile_sets.append(tile_set_attrs)
+
+    layers = []
+    offset = 0
+    for layer in world_map.layers:
+        if layer.is_object_group:
+            layer_attrs = _get_attrs(layer, ("objects", ))
+            layer_attrs["objects"] = [_get_attrs(map_obj) for map_obj in layer.objects]
+        else:
+            layer_attrs = _get_attrs(layer, _TILE_LAYER_RUNTIME)
+            blob = _gids_to_bytes(layer.decoded_content)
+            layer_attrs["gids"] = (offset, len(blob) // 4)
+            blobs.append(blob)
+            offset = _align(offset + len(blob))
+        layers.append(layer_attrs)
+
+    tile_sets_idx = dict((id(tile_set), idx) for idx, tile_set in enumerate(world_map.tile_sets))
+    cells = []
+    for gid, cell in world_map.tiles.items():
+        cell_attrs = _get_attrs(cell, ("tile_set", ))
+        cell_attrs["tile_set"] = tile_sets_idx[id(cell.tile_set)]
+        cells.append((gid, cell_attrs))
+
+    map_attrs = _get_attrs(world_map, ("tile_sets", "layers", "tiles", \
+                                            "named_layers", "named_tile_sets"))
+    map_attrs["tile_sets"] = tile_sets
+    map_attrs["layers"] = layers
+    map_attrs["tiles"] = cells
+    return map_attrs
+
+def _decode_map(map_attrs, data):
+    world_map = tmxreader.TileMap()
+    for tile_set_attrs in map_attrs.pop("tile_sets"):
+        tile_set = tmxreader.TileSet()
+        for image_attrs in tile_set_attrs.pop("images"):
+            tile_set.images.append(_decode_image(image_attrs))
+        for tile_attrs in tile_set_attrs.pop("tiles"):
+            tile = tmxreader.Tile(tile_attrs["gid"])
+            for image_attrs in tile_attrs.pop("images"):
+                tile.images.append(_decode_image(image_attrs))
+            tile_set.tiles.append(_set_attrs(tile, tile_attrs))
+        world_map.tile_sets.append(_set_attrs(tile_set, tile_set_attrs))
+        world_map.named_tile_sets[tile_set.name] = tile_set
+
+    # the blob section starts right after the json part
+    blob_start = _align(_HEADER.size + _HEADER.unpack_from(data)[2])
+    for layer_attrs in map_attrs.pop("layers"):
+        if layer_attrs["is_object_group"]:
+            layer = tmxreader.MapObjectGroupLayer()
+            for obj_attrs in layer_attrs.pop("objects"):
+                layer.objects.append(_set_attrs(tmxreader.MapObject(), obj_attrs))
+            _set_attrs(layer, layer_attrs)
+        else:
+            offset, count = layer_attrs.pop("gids")
+            layer = _set_attrs(tmxreader.TileLayer(), layer_attrs)
+            layer.decoded_content = _gids_from_buffer(data, blob_start + offset, count)
+            layer.generate_2D()
+            world_map.named_layers[layer.name] = layer
+        world_map.layers.append(layer)
+
+    for gid, cell_attrs in map_attrs.pop("tiles"):
+        cell = tmxreader.Cell(gid, world_map.tile_sets[cell_attrs.pop("tile_set")])
+        world_map.tiles[gid] = _set_attrs(cell, cell_attrs)
+    return _set_attrs(world_map, map_attrs)
+
+def _gids_to_bytes(gids):
+    if tmxreader.numpy is not None:
+        return tmxreader.numpy.asarray(gids, dtype='<u4').tobytes()
+    return struct.pack("<%dI" % len(gids), *gids)
+
+def _gids_from_buffer(data, offset, count):
+    if tmxreader.numpy is not None:
+        gids = tmxreader.numpy.frombuffer(data, dtype='<u4', count=count, offset=offset)
+        return gids.astype(tmxreader.numpy.uint32, copy=False)
+    gids = array.array('I')
+    gids.frombytes(data[offset:offset + count * 4])
+    if struct.pack("=I", 1) != struct.pack("<I", 1):
+        gids.byteswap()
+    return gids
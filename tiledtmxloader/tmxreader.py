@@ -51,6 +51,7 @@ import sys
 import os
 
 from xml.dom import minidom, Node
+from xml.etree import ElementTree
 try:
     # python 2.x
     import StringIO
@@ -61,6 +62,14 @@ except:
 
 import struct
 import array
+import hashlib
+import functools
+import concurrent.futures
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 #  -----------------------------------------------------------------------------
 class TileMap(object):
@@ -174,63 +183,35 @@ class TileMap(object):
                                  int(img.trans[2:4], 16), \
                                  int(img.trans[4:], 16))
 
-    def decode(self):
+    def decode(self, lazy=False):
         """
         Decodes the TileLayer encoded_content and saves it in decoded_content.
+
+        :Parameters:
+            lazy : bool
+                if True the layers are only decoded when their decoded_content
+                or content2D is accessed the first time
         """
         for layer in self.layers:
             if not layer.is_object_group:
-                self._decode_layer(layer)
-                layer.generate_2D()
+                if lazy:
+                    layer.clear_decoded()
+                else:
+                    self._decode_layer(layer)
+                    layer.generate_2D()
 
     def _decode_layer(self, layer):
         """
         Converts the contents in a list of integers which are the gid of the
-        used tiles. If necessary it decodes and uncompresses the contents.
+        used tiles, see TileLayer.decode.
         """
-        layer.decoded_content = []
-        if layer.encoded_content:
-            content = layer.encoded_content
-            if layer.encoding:
-                if layer.encoding.lower() == 'base64':
-                    content = decode_base64(content)
-                elif layer.encoding.lower() == 'csv':
-                    list_of_lines = content.split()
-                    for line in list_of_lines:
-                        layer.decoded_content.extend(line.split(','))
-                    self._fill_decoded_content(layer, list(map(int, \
-                                [val for val in layer.decoded_content if val])))
-                    content = ""
-                else:
-                    raise Exception('unknown data encoding %s' % \
-                                                                (layer.encoding))
-            else:
-                # in the case of xml the encoded_content already contains a
-                # list of integers
-                self._fill_decoded_content(layer, list(map(int, layer.encoded_content)))
-
-                content = ""
-            if layer.compression:
-                if layer.compression == 'gzip':
-                    content = decompress_gzip(content)
-                elif layer.compression == 'zlib':
-                    content = decompress_zlib(content)
-                else:
-                    raise Exception('unknown data compression %s' % \
-                                                            (layer.compression))
-        else:
-            raise Exception('no encoded content to decode')
-
-        if content:
-            struc = struct.Struct("<" + "I" * layer.width * layer.height)
-            val = struc.unpack(content)
-            self._fill_decoded_content(layer, val)
+        layer.decode()
 
-    def _fill_decoded_content(self, layer, gid_list):
-        layer.decoded_content = array.array('L')
-        layer.decoded_content.extend(gid_list)# make Cell
-
-        # TODO: generate property grid here??
+    def _decode_layer_array(self, layer):
+        """
+        Pure python fallback of _decode_layer, see TileLayer.decode.
+        """
+        layer._decode_array()
 
 
 #  -----------------------------------------------------------------------------
@@ -392,7 +373,7 @@ class TileLayer(object):
             name of this layer
         opacity : float
             float from 0 (full transparent) to 1.0 (opaque)
-        decoded_content : list
+        decoded_content : numpy.uint32 array (array.array without numpy)
             list of graphics id going through the map::
 
                 e.g [1, 1, 1, ]
@@ -405,8 +386,15 @@ class TileLayer(object):
                       decoded_content[w * h]  is (width,height)
 
                 usage: graphics id = decoded_content[tile_x + tile_y * width]
-        content2D : list
-            list of list, usage: graphics id = content2D[x][y]
+
+            after TileMap.decode(lazy=True) or clear_decoded() it is decoded
+            on the first access
+        content2D : numpy.uint32 array (list of memoryview without numpy)
+            (width, height) view of decoded_content,
+            usage: graphics id = content2D[x][y]
+        grid : numpy.uint32 array
+            (height, width) view of decoded_content (needs numpy),
+            usage: graphics id = grid[y, x]
 
     """
 
@@ -422,82 +410,167 @@ class TileLayer(object):
         self.encoding = None
         self.compression = None
         self.encoded_content = None
-        self.decoded_content = []
+        self._decoded_content = []
         self.visible = True
         self.properties = {} # {name: value}
         self.is_object_group = False    # ISSUE 9
         self._content2D = None
+        self._lazy = False
+
+    @property
+    def decoded_content(self):
+        if self._decoded_content is None:
+            self.decode()
+        return self._decoded_content
+
+    @decoded_content.setter
+    def decoded_content(self, value):
+        self._decoded_content = value
+
+    @property
+    def content2D(self):
+        if self._content2D is None and self._lazy:
+            self.generate_2D()
+        return self._content2D
+
+    @content2D.setter
+    def content2D(self, value):
+        self._content2D = value
+
+    def clear_decoded(self):
+        """
+        Drops decoded_content and content2D, they are decoded again on the
+        next access.
+        """
+        self._decoded_content = None
+        self._content2D = None
+        self._lazy = True
+
+    def decode(self):
+        """
+        Converts the contents in a list of integers which are the gid of the
+        used tiles. If necessary it decodes and uncompresses the contents.
+
+        If numpy is available the gids are stored in a numpy.uint32 array
+        (see decode_layer_data), otherwise in an array.array.
+        """
+        if numpy is None:
+            self._decode_array()
+        else:
+            if not self.encoded_content:
+                raise Exception('no encoded content to decode')
+            self.decoded_content = decode_layer_data(self.encoded_content, \
+                            self.encoding, self.compression, \
+                            self.width * self.height)
+
+    def _decode_array(self):
+        """
+        Pure python fallback of decode, stores the gids in an
+        array.array('L').
+        """
+        self.decoded_content = []
+        if self.encoded_content:
+            content = self.encoded_content
+            if self.encoding:
+                if self.encoding.lower() == 'base64':
+                    content = decode_base64(content)
+                elif self.encoding.lower() == 'csv':
+                    list_of_lines = content.split()
+                    for line in list_of_lines:
+                        self.decoded_content.extend(line.split(','))
+                    self._fill_decoded_content(list(map(int, \
+                                [val for val in self.decoded_content if val])))
+                    content = ""
+                else:
+                    raise Exception('unknown data encoding %s' % \
+                                                                (self.encoding))
+            else:
+                # in the case of xml the encoded_content already contains a
+                # list of integers
+                self._fill_decoded_content(list(map(int, self.encoded_content)))
+
+                content = ""
+            if self.compression:
+                if self.compression == 'gzip':
+                    content = decompress_gzip(content)
+                elif self.compression == 'zlib':
+                    content = decompress_zlib(content)
+                else:
+                    raise Exception('unknown data compression %s' % \
+                                                            (self.compression))
+        else:
+            raise Exception('no encoded content to decode')
+
+        if content:
+            struc = struct.Struct("<" + "I" * self.width * self.height)
+            val = struc.unpack(content)
+            self._fill_decoded_content(val)
+
+    def _fill_decoded_content(self, gid_list):
+        self.decoded_content = array.array('L')
+        self.decoded_content.extend(gid_list)# make Cell
+
+        # TODO: generate property grid here??
+
+    def get_chunk(self, xpos, ypos, width, height):
+        """
+        Returns the gids of a rectangular window of the layer (needs numpy).
 
-    # def decode(self):
-        # """
-        # Converts the contents in a list of integers which are the gid of the
-        # used tiles. If necessairy it decodes and uncompresses the contents.
-        # """
-        # self.decoded_content = []
-        # if self.encoded_content:
-            # content = self.encoded_content
-            # if self.encoding:
-                # if self.encoding.lower() == 'base64':
-                    # content = decode_base64(content)
-                # elif self.encoding.lower() == 'csv':
-                    # list_of_lines = content.split()
-                    # for line in list_of_lines:
-                        # self.decoded_content.extend(line.split(','))
-                    # self.decoded_content = list(map(int, \
-                                # [val for val in self.decoded_content if val]))
-                    # content = ""
-                # else:
-                    # raise Exception('unknown data encoding %s' % \
-                                                                # (self.encoding))
-            # else:
-                # # in the case of xml the encoded_content already contains a
-                # # list of integers
-                # self.decoded_content = list(map(int, self.encoded_content))
-                # content = ""
-            # if self.compression:
-                # if self.compression == 'gzip':
-                    # content = decompress_gzip(content)
-                # elif self.compression == 'zlib':
-                    # content = decompress_zlib(content)
-                # else:
-                    # raise Exception('unknown data compression %s' % \
-                                                            # (self.compression))
-        # else:
-            # raise Exception('no encoded content to decode')
-
-        # # struc = struct.Struct("<" + "I" * self.width)
-        # # struc_unpack_from = struc.unpack_from
-        # # self_decoded_content_extend = self.decoded_content.extend
-        # # for idx in range(0, len(content), 4 * self.width):
-            # # val = struc_unpack_from(content, idx)
-            # # self_decoded_content_extend(val)
-# ####
-        # struc = struct.Struct("<" + "I" * self.width * self.height)
-        # val = struc.unpack(content) # make Cell
-        # # self.decoded_content.extend(val)
-
-
-        # self.decoded_content = array.array('I')
-        # self.decoded_content.extend(val)
-
-
-        # # arr = array.array('I')
-        # # arr.fromlist(self.decoded_content)
-        # # self.decoded_content = arr
-
-        # # TODO: generate property grid here??
-
-        # self._gen_2D()
+        If the layer has not been decoded (see TileMap.decode(lazy=True))
+        only the rows of the window are decoded when the encoding allows it:
+        base64 (uncompressed, zlib and gzip, compressed data is only
+        inflated up to the last row of the window), csv with one row per
+        line and xml. The window is clipped to the layer.
+
+        :Parameters:
+            xpos : int
+                left column of the window
+            ypos : int
+                top row of the window
+            width : int
+                number of columns
+            height : int
+                number of rows
+
+        :returns: numpy.uint32 array of shape (height, width), usage:
+            graphics id = chunk[y - ypos, x - xpos]
+        """
+        x_min = min(max(xpos, 0), self.width)
+        x_max = min(max(xpos + width, x_min), self.width)
+        y_min = min(max(ypos, 0), self.height)
+        y_max = min(max(ypos + height, y_min), self.height)
+        if not isinstance(self._decoded_content, numpy.ndarray):
+            rows = decode_layer_data_rows(self.encoded_content, self.encoding, \
+                            self.compression, self.width, self.height, \
+                            y_min, y_max)
+        else:
+            rows = self.grid[y_min:y_max]
+        return rows[:, x_min:x_max]
 
     def generate_2D(self):
-        self.content2D = []
+        """
+        Sets content2D to a view of decoded_content, no gids are copied.
+        """
+        if numpy is not None and isinstance(self.decoded_content, numpy.ndarray):
+            # transposed (width, height) view of the (height, width) grid
+            self.content2D = self.grid.T
+        else:
+            # one strided view per column
+            content = memoryview(self.decoded_content)
+            self.content2D = [content[xpos::self.width] \
+                                            for xpos in range(self.width)]
+
+    @property
+    def grid(self):
+        return self.decoded_content.reshape(self.height, self.width)
 
-        # generate the needed lists and fill them
-        for xpos in range(self.width):
-            self.content2D.append(array.array('I'))
-            for ypos in range(self.height):
-                self.content2D[xpos].append( \
-                                self.decoded_content[xpos + ypos * self.width])
+    def unique_gids(self):
+        """
+        Returns the sorted list of the distinct gids used in this layer.
+        """
+        if numpy is not None and isinstance(self.decoded_content, numpy.ndarray):
+            return numpy.unique(self.decoded_content).tolist()
+        return sorted(set(self.decoded_content))
 
     def pretty_print(self):
         num = 0
@@ -674,6 +747,123 @@ def decompress_zlib(in_str):
     content = zlib.decompress(in_str)
     return content
 #  -----------------------------------------------------------------------------
+def decode_layer_data(content, encoding=None, compression=None, num_tiles=None):
+    """
+    Decodes the data of a layer into a numpy.uint32 array of gids.
+
+    Base64 data is decoded and uncompressed into bytes which are then used
+    as buffer for the array, so no intermediate python integers are created.
+    CSV data is parsed directly by numpy.
+
+    :Parameters:
+        content : string or list
+            the encoded content, for xml encoded data a list of gid strings
+        encoding : string
+            'base64', 'csv' or None for xml encoded data
+        compression : string
+            'gzip', 'zlib' or None
+        num_tiles : int
+            expected number of gids (width * height), not checked if None
+
+    :returns: numpy.uint32 array, read only for base64 encoded data
+    """
+    if encoding:
+        if encoding.lower() == 'base64':
+            content = decode_base64(content)
+            if compression:
+                if compression == 'gzip':
+                    content = decompress_gzip(content)
+                elif compression == 'zlib':
+                    content = decompress_zlib(content)
+                else:
+                    raise Exception('unknown data compression %s' % \
+                                                            (compression))
+            if len(content) % 4:
+                raise Exception('layer data size is not a multiple of 4')
+            gids = numpy.frombuffer(content, dtype='<u4')
+            if gids.dtype != numpy.uint32:
+                # big endian host
+                gids = gids.astype(numpy.uint32)
+        elif encoding.lower() == 'csv':
+            gids = numpy.fromstring(content, dtype=numpy.uint32, sep=',')
+        else:
+            raise Exception('unknown data encoding %s' % (encoding))
+    else:
+        # xml: list of gid strings
+        gids = numpy.array(content).astype(numpy.uint32)
+
+    if num_tiles is not None and len(gids) != num_tiles:
+        raise Exception('layer data has %d gids, expected %d' % \
+                                                        (len(gids), num_tiles))
+    return gids
+
+#  -----------------------------------------------------------------------------
+def decode_layer_data_rows(content, encoding, compression, width, height, \
+                                                            row_min, row_max):
+    """
+    Decodes only the rows row_min up to (not including) row_max of the data
+    of a layer, see decode_layer_data. Encodings that can not be decoded
+    partially (csv not written one row per line) are decoded completely.
+
+    :returns: numpy.uint32 array of shape (row_max - row_min, width)
+    """
+    num_rows = row_max - row_min
+    if num_rows <= 0:
+        return numpy.zeros((0, width), dtype=numpy.uint32)
+    start = row_min * width * 4
+    stop = row_max * width * 4
+    if encoding and encoding.lower() == 'base64':
+        content = content.strip()
+        if len(content.split(None, 1)) > 1:
+            content = "".join(content.split())
+        if compression:
+            data = _inflate_base64(content, compression, stop)
+        else:
+            # 4 base64 characters encode 3 bytes
+            first = start // 3
+            data = decode_base64(content[first * 4:(stop + 2) // 3 * 4])
+            start -= first * 3
+        gids = numpy.frombuffer(data, dtype='<u4', count=num_rows * width, \
+                                                            offset=start)
+        gids = gids.astype(numpy.uint32, copy=False)
+    elif encoding and encoding.lower() == 'csv':
+        lines = content.split()
+        gids = None
+        if len(lines) == height:
+            # Tiled ends every line but the last with a comma
+            gids = numpy.fromstring("".join(lines[row_min:row_max]), \
+                                            dtype=numpy.uint32, sep=',')
+        if gids is None or len(gids) != num_rows * width:
+            gids = decode_layer_data(content, encoding, compression, \
+                                width * height)[row_min * width:row_max * width]
+    else:
+        gids = decode_layer_data(content[row_min * width:row_max * width], \
+                                        encoding, compression, num_rows * width)
+    return gids.reshape(num_rows, width)
+
+def _inflate_base64(content, compression, size, block_size=2 ** 16):
+    """
+    Decodes and uncompresses the beginning of a base64 string until size
+    bytes are available.
+    """
+    import zlib
+    if compression == 'gzip':
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    elif compression == 'zlib':
+        decompressor = zlib.decompressobj()
+    else:
+        raise Exception('unknown data compression %s' % (compression))
+    data = bytearray()
+    pos = 0
+    while len(data) < size and pos < len(content):
+        chunk = decode_base64(content[pos:pos + block_size * 4])
+        pos += block_size * 4
+        while chunk and len(data) < size:
+            data += decompressor.decompress(chunk, size - len(data))
+            chunk = decompressor.unconsumed_tail
+    return bytes(data)
+
+#  -----------------------------------------------------------------------------
 def printer(obj, ident=''):
     """
     Helper function, prints a hirarchy of objects.
@@ -887,15 +1077,280 @@ class TileMapParser(object):
         world_map.convert()
         return world_map
 
-    def parse_decode(self, file_name):
+    def parse_decode(self, file_name, lazy=False):
         """
         Parses the map but additionally decodes the data.
+        :Parameters:
+            lazy : bool
+                decode a layer only when it is accessed, see TileMap.decode
         :return: instance of TileMap
         """
         world_map = self.parse(file_name)
-        world_map.decode()
+        world_map.decode(lazy)
+        return world_map
+
+
+#  -----------------------------------------------------------------------------
+
+class TileMapIterParser(TileMapParser):
+    """
+    TileMapParser built on xml.etree.ElementTree.iterparse instead of minidom.
+
+    The map file is read incrementally and every tileset, layer and object
+    group element is dropped as soon as it has been converted, so the whole
+    document is never held in memory. The resulting TileMap is the same as
+    the one returned by TileMapParser (including the order of the layers).
+    """
+
+    def _build_element_tile_set(self, tile_set_elem, world_map):
+        tile_set = TileSet()
+        self._set_element_attributes(tile_set_elem, tile_set)
+        base_path = self.map_file_name
+        if hasattr(tile_set, "source"):
+            base_path = tile_set.source
+            # ISSUE 5: the *.tsx file is probably relative to the *.tmx file
+            if not os.path.isabs(base_path):
+                base_path = self._get_abs_path(self.map_file_name, base_path)
+            tile_set_elem = ElementTree.parse(base_path).getroot()
+            self._set_element_attributes(tile_set_elem, tile_set)
+        for image_elem in tile_set_elem.findall('image'):
+            image = TileImage()
+            self._build_element_image(image_elem, image)
+            image.source = self._get_abs_path(base_path, image.source) # ISSUE 5
+            tile_set.images.append(image)
+        for tile_elem in tile_set_elem.findall('tile'):
+            self._build_element_tile(tile_elem, tile_set, world_map)
+        world_map.tile_sets.append(tile_set)
+
+    def _build_element_tile(self, tile_elem, tile_set, world_map):
+        tile_gid = int(tile_set.firstgid) + int(tile_elem.get("id"))
+        tile = Tile(tile_gid)
+        self._set_element_attributes(tile_elem, tile)
+        try:
+            world_map.tiles[tile_gid].properties.update(tile.properties)
+        except KeyError:
+            cell = Cell(tile_gid, tile_set)
+            cell.properties = dict(tile_set.properties)
+            world_map.tiles[tile_gid] = cell
+            world_map.tiles[tile_gid].properties.update(tile.properties)
+        for image_elem in tile_elem.findall('image'):
+            tile_image = TileImage()
+            self._build_element_image(image_elem, tile_image)
+            tile.images.append(tile_image)
+        tile_set.tiles.append(tile)
+
+    def _build_element_image(self, image_elem, image):
+        self._set_element_attributes(image_elem, image)
+        for data_elem in image_elem.findall('data'):
+            self._set_element_attributes(data_elem, image)
+            image.content = data_elem.text
+
+    def _build_element_object_group(self, object_group_elem):
+        object_group = MapObjectGroupLayer()
+        self._set_element_attributes(object_group_elem, object_group)
+        for object_elem in object_group_elem.findall('object'):
+            tiled_object = MapObject()
+            self._set_element_attributes(object_elem, tiled_object)
+            for image_elem in object_elem.findall('image'):
+                tiled_object.image_source = image_elem.get('source')
+            object_group.objects.append(tiled_object)
+        return object_group
+
+    def _flatten_groups(self, groups):
+        # minidom order: the layers of a group first, then its sub groups
+        for layers, sub_groups in groups:
+            for layer in layers:
+                yield layer
+            for layer in self._flatten_groups(sub_groups):
+                yield layer
+
+    # -- helpers -- #
+    def _set_element_attributes(self, elem, obj):
+        for attr_name, value in elem.items():
+            setattr(obj, attr_name, value)
+        self._get_element_properties(elem, obj)
+
+    def _get_element_properties(self, elem, obj):
+        props = {}
+        for properties_elem in elem.findall('properties'):
+            for property_elem in properties_elem.findall('property'):
+                value = property_elem.get('value')
+                if value is None:
+                    value = property_elem.text
+                props[property_elem.get('name')] = value
+        obj.properties.update(props)
+
+    # -- parsers -- #
+    def parse(self, file_name, decode=False):
+        """
+        Parses the given map.
+
+        :Parameters:
+            file_name : string
+                path of the map file
+            decode : bool
+                if True every layer is decoded as soon as it has been read,
+                xml encoded gids are then collected in an array.array('L')
+                instead of a list of strings
+
+        :return: instance of TileMap
+        """
+        self.map_file_name = os.path.abspath(file_name)
+        world_map = None
+        elems = [] # open elements, elems[-1] is the current one
+        layers = []
+        groups = [] # [(layers, sub groups)]
+        containers = [] # (layers, groups) of the open map and group elements
+        object_groups = []
+        gids = None
+        layer_content = None
+        for event, elem in ElementTree.iterparse(self.map_file_name, \
+                                                        ('start', 'end')):
+            tag = elem.tag
+            if event == 'start':
+                parent = elems[-1] if elems else None
+                elems.append(elem)
+                if parent is None:
+                    if tag == 'map':
+                        world_map = TileMap()
+                        for attr_name, value in elem.items():
+                            setattr(world_map, attr_name, value)
+                        if world_map.version not in ["1.0", "1.1", "1.2"]:
+                            raise VersionError('this parser was made for maps of version 1.0, found version %s' % world_map.version)
+                        containers.append((layers, groups))
+                elif tag == 'group' and containers and \
+                                        parent.tag in ('map', 'group'):
+                    group = ([], [])
+                    containers[-1][1].append(group)
+                    containers.append(group)
+                elif tag == 'data' and parent.tag == 'layer' and \
+                                                    'encoding' not in elem.attrib:
+                    gids = array.array('L') if decode else []
+                continue
+
+            elems.pop()
+            if world_map is None:
+                continue
+            parent = elems[-1] if elems else None
+            if parent is None:
+                continue
+            parent_tag = parent.tag
+            if tag == 'tile' and parent_tag == 'data' and gids is not None:
+                gid = elem.get('gid')
+                gids.append(int(gid) if decode else gid)
+                parent.remove(elem)
+            elif tag == 'data' and parent_tag == 'layer':
+                if gids is None:
+                    layer_content = elem.text
+                else:
+                    layer_content = gids
+                    gids = None
+            elif tag == 'layer' and parent_tag in ('map', 'group'):
+                layer = TileLayer()
+                self._set_element_attributes(elem, layer)
+                for data_elem in elem.findall('data'):
+                    self._set_element_attributes(data_elem, layer)
+                    layer.encoded_content = layer_content
+                layer_content = None
+                if decode:
+                    layer.width = int(layer.width)
+                    layer.height = int(layer.height)
+                    world_map._decode_layer(layer)
+                    layer.generate_2D()
+                containers[-1][0].append(layer)
+                parent.remove(elem)
+            elif tag == 'group' and parent_tag in ('map', 'group'):
+                containers.pop()
+                parent.remove(elem)
+            elif parent_tag == 'map':
+                if tag == 'tileset':
+                    self._build_element_tile_set(elem, world_map)
+                elif tag == 'objectgroup':
+                    object_groups.append(self._build_element_object_group(elem))
+                elif tag == 'properties':
+                    self._get_element_properties(parent, world_map)
+                parent.remove(elem)
+
+        world_map.layers.extend(layers)
+        world_map.layers.extend(self._flatten_groups(groups))
+        # ISSUE 9
+        world_map.layers.extend(object_groups)
+        world_map.map_file_name = self.map_file_name
+        world_map.convert()
         return world_map
 
+    def parse_decode(self, file_name, lazy=False):
+        """
+        Parses the map and decodes the layers while reading the file.
+        :Parameters:
+            lazy : bool
+                decode a layer only when it is accessed, see TileMap.decode
+        :return: instance of TileMap
+        """
+        if lazy:
+            return TileMapParser.parse_decode(self, file_name, lazy)
+        return self.parse(file_name, decode=True)
+
+
+#  -----------------------------------------------------------------------------
+
+class TileImageStore(object):
+    """
+    Content addressed store of tile images. Images are identified by the
+    SHA-1 of their raw pixel data, the first image added for a digest is
+    returned for all later identical ones. One store can be shared by
+    several resource loaders of the same kind (and maps).
+
+    :Ivariables:
+        images : dict
+            {digest: image}
+        num_added : int
+            number of images added
+        num_bytes_added : int
+            sum of the pixel data sizes of the added images
+        num_bytes_unique : int
+            sum of the pixel data sizes of the unique images
+    """
+
+    def __init__(self):
+        self.images = {}
+        self.num_added = 0
+        self.num_bytes_added = 0
+        self.num_bytes_unique = 0
+
+    def add(self, image, data):
+        """
+        Adds an image.
+
+        :Parameters:
+            image : image
+                the tile image
+            data : bytes
+                the raw pixel data of the image
+
+        :returns: the stored image with the same pixel data
+        """
+        digest = hashlib.sha1(data).digest()
+        self.num_added += 1
+        self.num_bytes_added += len(data)
+        stored = self.images.get(digest, None)
+        if stored is None:
+            self.images[digest] = stored = image
+            self.num_bytes_unique += len(data)
+        return stored
+
+    def get_statistics(self):
+        """
+        :returns: dict with the number of added and unique images, the
+            number of duplicates and the pixel data sizes in bytes
+        """
+        return {
+            "added": self.num_added,
+            "unique": len(self.images),
+            "duplicates": self.num_added - len(self.images),
+            "bytes_added": self.num_bytes_added,
+            "bytes_unique": self.num_bytes_unique,
+            }
 
 #  -----------------------------------------------------------------------------
 
@@ -903,16 +1358,35 @@ class AbstractResourceLoader(object):
     """
     Abstract base class for the resource loader.
 
+    load() can decode and slice the tile set images concurrently, see
+    __init__. The images of one file are always loaded by the same worker
+    and indexed_tiles is filled in the same order as without workers.
+
     """
 
     FLIP_X = 1 << 31
     FLIP_Y = 1 << 30
     FLIP_DIAGONAL = 1 << 29
 
-    def __init__(self):
+    def __init__(self, max_workers=0, executor=None, tile_store=None):
+        """
+        :Parameters:
+            max_workers : int
+                number of threads load() uses to load the images, 0 loads
+                them one after another, None uses the default number of
+                threads of concurrent.futures.ThreadPoolExecutor
+            executor : concurrent.futures.Executor
+                executor to use instead of an own thread pool, it has to
+                share the memory with the caller (no process pool)
+            tile_store : TileImageStore
+                if set, tiles with the same pixels share one image
+        """
         self.indexed_tiles = {} # {gid: (offsetx, offsety, image}
         self.world_map = None
         self._img_cache = {}
+        self.max_workers = max_workers
+        self.executor = executor
+        self.tile_store = tile_store
 
     def _load_image(self, filename, colorkey=None): # -> image
         """
@@ -947,6 +1421,20 @@ class AbstractResourceLoader(object):
         """
         raise NotImplementedError('This should be implemented in a inherited class')
 
+    def _get_image_data(self, image): # -> bytes
+        """
+        Returns the raw pixel data of an image, used to find identical tiles.
+        Everything that makes two images look different (size, pixel format,
+        colorkey) has to be part of the data.
+
+        :Parameters:
+            image : image
+                an image returned by one of the _load_image* methods
+
+        :rtype: bytes
+        """
+        raise NotImplementedError('This should be implemented in a inherited class')
+
     def _load_image_parts(self, filename, margin, spacing, tilewidth, tileheight, colorkey=None): #-> [images]
         """
         Load different tile images from one source image.
@@ -984,28 +1472,100 @@ class AbstractResourceLoader(object):
         Loads the image data into the single images.
         """
         self.world_map = tile_map
+        requests = self._get_load_requests(tile_map)
+        if self.executor is None and self.max_workers == 0:
+            for key, load, args, store in requests:
+                store(load(*args) if load else None)
+        else:
+            self._load_concurrently(requests)
+
+    def _get_load_requests(self, tile_map):
+        """
+        Returns the list of (key, load, args, store) to load the images of
+        the tile sets, store(load(*args)) has to be called in list order.
+        Requests with the same key load from the same file.
+        """
+        requests = []
         for tile_set in tile_map.tile_sets:
             # do images first, because tiles could reference it
             for img in tile_set.images:
                 if img.source:
-                    self._load_image_from_source(tile_map, tile_set, img)
+                    requests.append(self._get_image_parts_request(tile_map, tile_set, img))
                 else:
-                    tile_set.indexed_images[img.id] = self._load_tile_image(img)
+                    requests.append((len(requests), self._load_tile_image, (img, ), \
+                            functools.partial(self._store_tile_set_image, tile_set, img.id)))
             # tiles
             for tile in tile_set.tiles:
+                gid = int(tile_set.firstgid) + int(tile.id)
                 for img in tile.images:
                     if not img.content and not img.source:
                         # only image id set
-                        indexed_img = tile_set.indexed_images[img.id]
-                        self.indexed_tiles[int(tile_set.firstgid) + int(tile.id)] = (0, 0, indexed_img)
+                        requests.append((len(requests), None, (), \
+                            functools.partial(self._store_indexed_tile, tile_set, img.id, gid)))
                     else:
                         if img.source:
-                            self._load_image_from_source(tile_map, tile_set, img)
+                            requests.append(self._get_image_parts_request(tile_map, tile_set, img))
                         else:
-                            indexed_img = self._load_tile_image(img)
-                            self.indexed_tiles[int(tile_set.firstgid) + int(tile.id)] = (0, 0, indexed_img)
+                            requests.append((len(requests), self._load_tile_image, (img, ), \
+                                    functools.partial(self._store_tile, gid)))
+        return requests
+
+    def _load_concurrently(self, requests):
+        executor = self.executor
+        if executor is None:
+            executor = concurrent.futures.ThreadPoolExecutor(self.max_workers)
+        try:
+            groups = {} # {key: [request index]}
+            for idx, (key, load, args, store) in enumerate(requests):
+                if load:
+                    groups.setdefault(key, []).append(idx)
+            futures = [(indices, executor.submit(self._load_group, \
+                                    [requests[idx] for idx in indices])) \
+                                    for indices in groups.values()]
+            results = [None] * len(requests)
+            for indices, future in futures:
+                for idx, result in zip(indices, future.result()):
+                    results[idx] = result
+        finally:
+            if executor is not self.executor:
+                executor.shutdown()
+        for (key, load, args, store), result in zip(requests, results):
+            store(result)
+
+    def _load_group(self, requests):
+        return [load(*args) for key, load, args, store in requests]
+
+    def _store_tile_set_image(self, tile_set, img_id, image):
+        tile_set.indexed_images[img_id] = image
+
+    def _store_indexed_tile(self, tile_set, img_id, gid, image):
+        self._add_tile(gid, 0, 0, tile_set.indexed_images[img_id])
+
+    def _store_tile(self, gid, image):
+        self._add_tile(gid, 0, 0, image)
+
+    def _store_image_parts(self, firstgid, offsetx, offsety, images):
+        for idx, image in enumerate(images):
+            self._add_tile(firstgid + idx, offsetx, -offsety, image)
+
+    def _add_tile(self, gid, offsetx, offsety, image, data=None):
+        """
+        Adds a tile image to indexed_tiles, using the image of the
+        tile_store if an identical one has been added before. data is the
+        _get_image_data of the image, if it is already known.
+        """
+        if self.tile_store is not None and image is not None:
+            if data is None:
+                data = self._get_image_data(image)
+            image = self.tile_store.add(image, data)
+        self.indexed_tiles[gid] = (offsetx, offsety, image)
 
     def _load_image_from_source(self, tile_map, tile_set, a_tile_image):
+        key, load, args, store = self._get_image_parts_request(tile_map, \
+                                                    tile_set, a_tile_image)
+        store(load(*args))
+
+    def _get_image_parts_request(self, tile_map, tile_set, a_tile_image):
         # relative path to file
         img_path = os.path.join(os.path.dirname(tile_map.map_file_name), \
                                                             a_tile_image.source)
@@ -1020,13 +1580,10 @@ class AbstractResourceLoader(object):
         # the offset is used for pygame because the origin is topleft in pygame
         if tile_height > tile_map.tileheight:
             offsety = tile_height - tile_map.tileheight
-        idx = 0
-        for image in self._load_image_parts(img_path, \
-                    tile_set.margin, tile_set.spacing, \
-                    tile_width, tile_height, a_tile_image.trans):
-            self.indexed_tiles[int(tile_set.firstgid) + idx] = \
-                                                    (offsetx, -offsety, image)
-            idx += 1
+        args = (img_path, tile_set.margin, tile_set.spacing, \
+                            tile_width, tile_height, a_tile_image.trans)
+        return (img_path, self._load_image_parts, args, functools.partial( \
+                self._store_image_parts, int(tile_set.firstgid), offsetx, offsety))
 
     def _load_tile_image(self, a_tile_image):
         img_str = a_tile_image.content
@@ -1053,7 +1610,7 @@ if __name__ == "__main__":
 				if layer.is_object_group:
 					continue
 
-				for gid in layer.decoded_content:
+				for gid in layer.unique_gids():
 					if gid not in self.indexed_tiles:
 						if gid & self.FLIP_X or gid & self.FLIP_Y or gid & self.FLIP_DIAGONAL:
 							image_gid = gid & ~(self.FLIP_X | self.FLIP_Y | self.FLIP_DIAGONAL)
@@ -1082,6 +1639,8 @@ if __name__ == "__main__":
 				print("~ Image: '{}'".format(filename))
 				try:
 					img = Image.open(filename)
+					# decode now, PIL decodes lazily which is not thread safe
+					img.load()
 				except FileNotFoundError:
 					img = None
 				self._img_cache[filename] = img
@@ -1094,7 +1653,7 @@ if __name__ == "__main__":
 			#print("~ Image Part: '{}' ({}, {}, {}, {}, {})".format(filename, xpos, ypos, width, height, colorkey))
 			source_img = self._load_image(filename, colorkey)
 			crop_rectangle = (xpos, ypos, xpos + width, ypos + height)
-			return self._load_image(filename).crop(crop_rectangle)
+			return source_img.crop(crop_rectangle)
 
 		def _load_image_parts(self, filename, margin, spacing, tile_width, tile_height, colorkey=None):
 			source_img = self._load_image(filename, colorkey)
@@ -1110,17 +1669,25 @@ if __name__ == "__main__":
 			images = []
 			for y_pos in range(margin, height, tile_height_spacing):
 				for x_pos in range(margin, width, tile_width_spacing):
-					img_part = self._load_image_part(filename, x_pos, y_pos, tile_width, tile_height, colorkey)
+					img_part = source_img.crop((x_pos, y_pos, x_pos + tile_width, y_pos + tile_height))
 					images.append(img_part)
 			return images
 
+		def _get_image_data(self, image):
+			return repr((image.mode, image.size)).encode('ascii') + image.tobytes()
+
 		def get_indexed_tiles(self):
 			return self.indexed_tiles
 
 		def save_tile_images(self, directory):
 			os.makedirs(directory, exist_ok=True)
-			for id, (offsetx, neg_offsety, img) in self.indexed_tiles.items():
-				print("~ Tile '{}' ({}, {}): {}".format(id, offsetx, neg_offsety, img))
+			saved = set()
+			for gid, (offsetx, neg_offsety, img) in self.indexed_tiles.items():
+				print("~ Tile '{}' ({}, {}): {}".format(gid, offsetx, neg_offsety, img))
+				# with a tile_store tiles with the same pixels share the image
+				if id(img) in saved:
+					continue
+				saved.add(id(img))
 				sha1sum = hashlib.sha1()
 				output = io.BytesIO()
 				img.save(output, format='PNG')
@@ -1143,13 +1710,18 @@ if __name__ == "__main__":
 
 	arg_parser = argparse.ArgumentParser()
 	arg_parser.add_argument(dest="file", type=extant_file, help="TMX File", metavar="FILE")
+	arg_parser.add_argument('--workers', type=int, default=0, help="number of threads to load the tile sets with")
+	arg_parser.add_argument('--dedup', action="store_true", help="share the images of identical tiles")
 	args = arg_parser.parse_args()
 
 	map_filename = str(args.file)
 	print("~ Map: '{}'".format(map_filename))
 	map = TileMapParser().parse_decode(map_filename)
-	resources = MapResourceLoader()
+	tile_store = TileImageStore() if args.dedup else None
+	resources = MapResourceLoader(args.workers, tile_store=tile_store)
 	resources.load(map)
+	if tile_store is not None:
+		print("~ Tile images: {}".format(tile_store.get_statistics()))
 	print("~ Orientation: '{}'".format(map.orientation))
 	all_sprite_layers = []
 